@@ -0,0 +1,1071 @@
+import os
+import threading
+from collections import OrderedDict
+
+from PyQt6.QtCore import (
+    QObject, QRunnable, QThreadPool, QStandardPaths, QByteArray, QBuffer, QIODevice, QRectF, Qt, pyqtSignal,
+    QFileSystemWatcher, QTimer
+)
+from PyQt6.QtGui import QImage, QPixmap, QPainter, QColor, QFont
+from PyQt6.QtSvg import QSvgRenderer
+
+from storage import VarnProject, LibraryIndex, scan_projects, read_summary
+from glyphs import component_graph
+
+# Global state and background services shared by the screens.
+# Anything slow (rendering, scanning, exporting, tracing) runs here, off the GUI thread,
+# and reports back through Qt signals.
+
+def cache_dir(*parts):
+    base = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.CacheLocation)
+    if not base:
+        base = os.path.join(os.path.expanduser("~"), ".akshar", "cache")
+    path = os.path.join(base, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+# --- 1. GLYPH TILES ---
+
+TILE_SIZE = 128
+PREVIEW_FLUSH_MS = 500      # fresh tiles are written back this long after the last one, in one journal append
+
+def render_glyph_image(svg, size=TILE_SIZE):
+    """Rasterize a glyph SVG as black ink on transparent. Safe off the GUI thread."""
+    image = QImage(size, size, QImage.Format.Format_ARGB32_Premultiplied)
+    image.fill(Qt.GlobalColor.transparent)
+    renderer = QSvgRenderer(QByteArray(svg))
+    renderer.setAspectRatioMode(Qt.AspectRatioMode.KeepAspectRatio)
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    renderer.render(painter, QRectF(0, 0, size, size))
+    painter.end()
+    return image
+
+def tint_image(image, ink):
+    """Recolour a rendered glyph's ink in place, keeping its antialiasing."""
+    painter = QPainter(image)
+    painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_SourceIn)
+    painter.fillRect(image.rect(), QColor(ink))
+    painter.end()
+    return image
+
+def image_to_png(image):
+    buffer = QBuffer()
+    buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+    image.save(buffer, "PNG")
+    return bytes(buffer.data())
+
+def load_tile_image(project, cp, revision=None):
+    """
+    The glyph's preview tile as (QImage, from_disk). Uses previews/glyphs/XXXX.png
+    when it was rendered from the current glyph revision (its component stamp,
+    for glyphs built from components), otherwise rasterizes the SVG with the
+    components flattened in. (None, False) for an undrawn glyph. Safe off the
+    GUI thread, given a project handle of the thread's own.
+    """
+    graph = component_graph(project)
+    if revision is None:
+        revision = graph.stamp(cp)
+    if project.glyph_preview_revision(cp) == revision:
+        image = QImage.fromData(project.glyph_preview(cp), "PNG")
+        if not image.isNull():
+            return image, True
+    svg = graph.flat_svg(cp)
+    if not svg:
+        return None, False
+    return render_glyph_image(svg), False
+
+class GlyphTileCache:
+    """
+    Memory LRU of glyph pixmaps shared by the font editor grid, font thumbnails
+    and the glyph editor's reference overlay. Entries remember the glyph revision
+    they were drawn from, so a saved edit invalidates exactly that glyph's tiles.
+    Misses fall back to the project's preview folder before rasterizing, and fresh
+    rasters are written back there for the next session: queued, then PNG-encoded
+    and journaled in one batch per project by a PreviewWriteJob, never from paint.
+    While the invalidation graph re-renders a glyph in the background it is
+    `pending`: its stale tiles keep being shown until refresh() replaces them.
+    GUI thread only: workers use load_tile_image() directly.
+    """
+    def __init__(self, max_tiles=4096):
+        self.max_tiles = max_tiles
+        self.tiles = OrderedDict()  # (project path, cp, size, ink) -> (revision, QPixmap)
+        self.pending = set()        # (project path, cp) being re-rendered in the background
+        self.unsaved = {}           # project path -> (project, {cp: (revision, QImage)}) not written back yet
+        self.writer = None          # QThreadPool for PreviewWriteJob, made on first use
+        self.flush_timer = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.renders = 0
+        self.evictions = 0
+
+    def tile(self, project, cp, size=TILE_SIZE, ink=None, persist=True):
+        # Composites are stamped with their components' revisions, so editing a base redraws them lazily.
+        revision = component_graph(project).stamp(cp)
+        key = (project.path, cp, size, ink)
+        entry = self.tiles.get(key)
+        if entry is not None and entry[0] == revision:
+            self.hits += 1
+            self.tiles.move_to_end(key)
+            return entry[1]
+        if size <= TILE_SIZE and (project.path, cp) in self.pending:
+            # A fresh tile is on its way; the old drawing (or the placeholder) fills in until then.
+            self.stale_hits += 1
+            return entry[1] if entry is not None else None
+
+        self.misses += 1
+        if size > TILE_SIZE:
+            # Larger than the stored preview (editor overlay): rasterize at full size.
+            svg = component_graph(project).flat_svg(cp)
+            image, from_disk, persist = (render_glyph_image(svg, size) if svg else None), False, False
+        else:
+            image, from_disk = load_tile_image(project, cp, revision)
+        if image is None:
+            self.tiles.pop(key, None)
+            return None
+        if from_disk:
+            self.disk_hits += 1
+        else:
+            self.renders += 1
+            if persist and revision > 0:
+                self.queue_preview(project, cp, revision, image)
+
+        if image.width() != size:
+            image = image.scaled(size, size, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+        if ink is not None:
+            tint_image(image, ink)
+        pixmap = QPixmap.fromImage(image)
+        self.tiles[key] = (revision, pixmap)
+        self.tiles.move_to_end(key)
+        while len(self.tiles) > self.max_tiles:
+            self.tiles.popitem(last=False)
+            self.evictions += 1
+        return pixmap
+
+    def queue_preview(self, project, cp, revision, image):
+        """Write a freshly rendered tile back to the project's previews soon, batched with the others."""
+        if project.read_only:
+            return
+        self.unsaved.setdefault(project.path, (project, {}))[1][cp] = (revision, image.copy())
+        if self.flush_timer is None:
+            self.flush_timer = QTimer()
+            self.flush_timer.setSingleShot(True)
+            self.flush_timer.setInterval(PREVIEW_FLUSH_MS)
+            self.flush_timer.timeout.connect(self.flush_previews)
+        self.flush_timer.start()    # restarted while tiles keep coming, so a scroll is written once it settles
+
+    def flush_previews(self):
+        """Hand every queued tile to the writer thread now."""
+        if self.flush_timer is not None:
+            self.flush_timer.stop()
+        if not self.unsaved:
+            return
+        if self.writer is None:
+            self.writer = QThreadPool()
+            self.writer.setMaxThreadCount(1)    # one writer, so batches land in the order they were queued
+        for project, previews in self.unsaved.values():
+            self.writer.start(PreviewWriteJob(project, previews))
+        self.unsaved = {}
+
+    def invalidate(self, project_path, cp=None):
+        for key in [k for k in self.tiles if k[0] == project_path and (cp is None or k[1] == cp)]:
+            del self.tiles[key]
+
+    def refresh(self, project_path, cp, revision, image):
+        """
+        Take a glyph's background render (a TILE_SIZE image, or None once undrawn):
+        its tiles up to that size are redrawn from it, larger ones are dropped.
+        Returns how many tiles were replaced.
+        """
+        self.pending.discard((project_path, cp))
+        replaced = 0
+        for key in [k for k in self.tiles if k[0] == project_path and k[1] == cp]:
+            _, _, size, ink = key
+            if image is None or size > TILE_SIZE:
+                del self.tiles[key]
+                continue
+            tile = image.scaled(size, size, Qt.AspectRatioMode.KeepAspectRatio,
+                                Qt.TransformationMode.SmoothTransformation) if image.width() != size else image.copy()
+            if ink is not None:
+                tint_image(tile, ink)
+            self.tiles[key] = (revision, QPixmap.fromImage(tile))
+            replaced += 1
+        return replaced
+
+    def stats(self):
+        return {
+            "hits": self.hits, "stale_hits": self.stale_hits, "misses": self.misses, "disk_hits": self.disk_hits,
+            "renders": self.renders, "evictions": self.evictions, "size": len(self.tiles),
+        }
+
+    def reset_stats(self):
+        self.hits = self.stale_hits = self.misses = self.disk_hits = self.renders = self.evictions = 0
+
+class PreviewWriteJob(QRunnable):
+    """Encode queued preview tiles and journal them with one append, off the GUI thread."""
+    def __init__(self, project, previews):
+        super().__init__()
+        self.project = project
+        self.previews = previews    # cp -> (revision, QImage)
+
+    def run(self):
+        try:
+            self.project.save_glyph_previews({cp: (revision, image_to_png(image))
+                                              for cp, (revision, image) in self.previews.items()})
+        except Exception as e:
+            # Closed meanwhile, or the disk refused: previews are derived data and get rendered again.
+            print(f"Preview write-back failed for {self.project.path}: {e}")
+
+_glyph_tiles = None
+
+def glyph_tiles():
+    """The process-wide GlyphTileCache."""
+    global _glyph_tiles
+    if _glyph_tiles is None:
+        _glyph_tiles = GlyphTileCache()
+    return _glyph_tiles
+
+# --- 2. FONT THUMBNAILS ---
+
+A4_RATIO = 1.414
+THUMB_WIDTH = 360
+THUMB_COLUMNS = 8
+
+PAPER = "#f4f1ea"
+
+def preview_codepoints(project, width=THUMB_WIDTH):
+    """The glyph slots a font thumbnail shows, in layout order."""
+    margin = width * 0.08
+    cell = (width - 2 * margin) / THUMB_COLUMNS
+    rows = int((int(width * A4_RATIO) - 2 * margin) // cell)
+    return list(project.codepoints()[:THUMB_COLUMNS * rows])
+
+def render_font_preview(project, width=THUMB_WIDTH, image=None, only=None):
+    """
+    Lay the font's glyphs out on an A4 page, like previews/font.png. Given an
+    earlier render of the same layout as `image`, repaints just the cells of the
+    codepoints in `only`, in place. Safe off the GUI thread.
+    """
+    height = int(width * A4_RATIO)
+    if image is None:
+        image = QImage(width, height, QImage.Format.Format_ARGB32_Premultiplied)
+        image.fill(QColor(PAPER))
+        only = None
+
+    margin = width * 0.08
+    cell = (width - 2 * margin) / THUMB_COLUMNS
+    pad = cell * 0.1
+
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    font = QFont("Segoe UI")
+    font.setPixelSize(int(cell * 0.6))
+    painter.setFont(font)
+    painter.setPen(QColor("#d8d3c8"))
+
+    for i, cp in enumerate(preview_codepoints(project, width)):
+        if only is not None and cp not in only:
+            continue
+        rect = QRectF(margin + (i % THUMB_COLUMNS) * cell, margin + (i // THUMB_COLUMNS) * cell, cell, cell)
+        if only is not None:
+            painter.fillRect(rect, QColor(PAPER))
+        tile, _ = load_tile_image(project, cp)
+        if tile is not None:
+            painter.drawImage(rect.adjusted(pad, pad, -pad, -pad), tile)
+        else:
+            # Undrawn slots show a faint placeholder of the character.
+            painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, chr(cp))
+    painter.end()
+    return image
+
+class ThumbnailCache:
+    """PNG thumbnails on disk keyed by project content hash, evicted least-recently-used first."""
+    def __init__(self, directory=None, max_bytes=64 * 1024 * 1024):
+        self.directory = directory or cache_dir("thumbnails")
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path_for(self, key):
+        return os.path.join(self.directory, f"{key}.png")
+
+    def load(self, key):
+        path = self.path_for(key)
+        try:
+            os.utime(path)  # mtime doubles as the LRU clock
+        except OSError:
+            return None
+        image = QImage(path)
+        return None if image.isNull() else image
+
+    def store(self, key, image):
+        path = self.path_for(key)
+        tmp = f"{path}.{os.getpid()}.{id(image)}.tmp"
+        if image.save(tmp, "PNG"):
+            os.replace(tmp, path)
+        self.evict()
+
+    def evict(self):
+        try:
+            entries = [e for e in os.scandir(self.directory) if e.name.endswith(".png")]
+            stats = [(e.stat().st_mtime, e.stat().st_size, e.path) for e in entries]
+        except OSError:
+            return
+        total = sum(size for _, size, _ in stats)
+        for _, size, path in sorted(stats):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+class ThumbnailSignals(QObject):
+    finished = pyqtSignal(str, QImage)
+    failed = pyqtSignal(str, str)
+
+class ThumbnailJob(QRunnable):
+    def __init__(self, path, cache, signals, key=None):
+        super().__init__()
+        self.path = path
+        self.cache = cache
+        self.signals = signals
+        self.key = key
+
+    def run(self):
+        try:
+            # A known content hash (from the library) is a cache hit without opening the project.
+            image = self.cache.load(self.key) if self.key else None
+            if image is not None:
+                self.signals.finished.emit(self.path, image)
+                return
+            with VarnProject(self.path, read_only=True) as project:
+                key = project.content_hash()
+                image = self.cache.load(key)
+                if image is None:
+                    image = render_font_preview(project)
+                    self.cache.store(key, image)
+        except Exception as e:
+            self.signals.failed.emit(self.path, str(e))
+            return
+        self.signals.finished.emit(self.path, image)
+
+class ThumbnailService(QObject):
+    """
+    Renders font thumbnails on a thread pool and emits `ready(path, image)` on the
+    GUI thread as each one completes. Callers show a placeholder until then.
+    """
+    ready = pyqtSignal(str, QImage)
+
+    def __init__(self, parent=None, cache=None):
+        super().__init__(parent)
+        self.cache = cache or ThumbnailCache()
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max(1, QThreadPool.globalInstance().maxThreadCount() - 1))
+        self.pending = set()
+        self.signals = ThumbnailSignals(self)
+        self.signals.finished.connect(self.on_finished)
+        self.signals.failed.connect(self.on_failed)
+
+    def request(self, path, priority=0, key=None):
+        """
+        Queue a thumbnail; higher priority (e.g. visible cards) is rendered first.
+        `key` is the project's content hash when the caller already knows it.
+        """
+        if path in self.pending:
+            return
+        self.pending.add(path)
+        self.pool.start(ThumbnailJob(path, self.cache, self.signals, key), priority)
+
+    def on_finished(self, path, image):
+        self.pending.discard(path)
+        self.ready.emit(path, image)
+
+    def on_failed(self, path, error):
+        self.pending.discard(path)
+        print(f"Thumbnail failed for {path}: {error}")
+
+    def shutdown(self):
+        """
+        Drop queued renders and wait for running ones. Call before the service
+        goes away: its pool's destructor waits for the workers too, but it runs
+        holding the GIL, which those workers need to finish.
+        """
+        self.pool.clear()
+        self.pool.waitForDone()
+        self.pending.clear()
+
+# --- 3. FONT EXPORT ---
+
+def export_dir():
+    """exports/ next to the application, where generated fonts go by default."""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "exports")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+class ExportSignals(QObject):
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(str, object)
+    failed = pyqtSignal(str, str)
+
+class ExportJob(QRunnable):
+    def __init__(self, project_path, out_path, signals):
+        super().__init__()
+        self.project_path = project_path
+        self.out_path = out_path
+        self.signals = signals
+        self.cancelled = False
+
+    def run(self):
+        # Imported here so fontTools is only loaded once someone exports.
+        from export import ExportCancelled, export_font
+        try:
+            # A handle of our own: the GUI keeps using the editor's project meanwhile.
+            # Its cache update comes back in the report for the GUI's handle to journal.
+            with VarnProject(self.project_path, read_only=True) as project:
+                report = export_font(project, self.out_path, progress=self.signals.progress.emit,
+                                     cancelled=lambda: self.cancelled, save_cache=False)
+        except ExportCancelled:
+            self.signals.failed.emit(self.out_path, "")
+            return
+        except Exception as e:
+            self.signals.failed.emit(self.out_path, str(e))
+            return
+        self.signals.finished.emit(self.out_path, report)
+
+class ExportService(QObject):
+    """
+    Runs one font export at a time off the GUI thread. The export itself fans the
+    glyphs out to worker processes; this thread only feeds them and assembles
+    the tables. `finished` carries the export.ExportReport; `failed` carries an
+    empty message when the export was cancelled.
+    """
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(str, object)
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.job = None
+        self.signals = ExportSignals(self)
+        self.signals.progress.connect(self.progress)
+        self.signals.finished.connect(self.on_finished)
+        self.signals.failed.connect(self.on_failed)
+
+    def export(self, project_path, out_path):
+        if self.job is not None:
+            return False
+        self.job = ExportJob(project_path, out_path, self.signals)
+        self.pool.start(self.job)
+        return True
+
+    def cancel(self):
+        if self.job is not None:
+            self.job.cancelled = True
+
+    def busy(self):
+        return self.job is not None
+
+    def on_finished(self, path, report):
+        self.job = None
+        self.finished.emit(path, report)
+
+    def on_failed(self, path, error):
+        self.job = None
+        self.failed.emit(path, error)
+
+# --- 4. PROJECT LIBRARY ---
+
+def projects_dir():
+    """projects/ next to the application, where .varn files live."""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "projects")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+WATCH_DEBOUNCE_MS = 400  # a copy or sync fires many events; settle before rescanning
+
+def library_path():
+    return os.path.join(cache_dir(), "library.json")
+
+class LibrarySignals(QObject):
+    updated = pyqtSignal(str, dict)
+    removed = pyqtSignal(str)
+    finished = pyqtSignal()
+
+class LibraryScanJob(QRunnable):
+    def __init__(self, directory, known, signals):
+        super().__init__()
+        self.directory = directory
+        self.known = known
+        self.signals = signals
+
+    def run(self):
+        try:
+            changed, gone = scan_projects(self.directory, self.known)
+            for path in gone:
+                self.signals.removed.emit(path)
+            for path, stamp in changed.items():
+                try:
+                    summary = read_summary(path, stamp)
+                except Exception as e:
+                    summary = {"stamp": stamp, "error": str(e)}
+                self.signals.updated.emit(path, summary)
+        finally:
+            self.signals.finished.emit()
+
+class LibraryService(QObject):
+    """
+    The projects in one folder, for the home screen. projects() answers straight
+    from the LibraryIndex catalog, so a populated grid costs the same however big
+    the projects are; refresh() then stats the folder on a worker and reopens only
+    new or changed files, reporting each through `updated` / `removed`.
+    The catalog is written back once a scan has finished.
+
+    While active, the folder itself is watched (one watch, whatever the library
+    size): files added, removed, renamed, touched or saved by compaction, which
+    replaces the archive, trigger a debounced refresh. Journal appends rewrite
+    no directory entry, so edits that are only autosaved are picked up by the
+    refresh set_active(True) always does.
+    """
+    updated = pyqtSignal(str, dict)
+    removed = pyqtSignal(str)
+    scanned = pyqtSignal()
+
+    def __init__(self, directory=None, index=None, parent=None):
+        super().__init__(parent)
+        self.directory = os.path.abspath(directory or projects_dir())
+        self.index = index or LibraryIndex(library_path())
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.scanning = False
+        self.rescan = False
+        self.signals = LibrarySignals(self)
+        self.signals.updated.connect(self.on_updated)
+        self.signals.removed.connect(self.on_removed)
+        self.signals.finished.connect(self.on_finished)
+        self.active = False
+        self.watcher = None
+        self.debounce = QTimer(self)
+        self.debounce.setSingleShot(True)
+        self.debounce.setInterval(WATCH_DEBOUNCE_MS)
+        self.debounce.timeout.connect(self.refresh)
+
+    def set_active(self, active):
+        """Watch the folder while someone shows the library; activating also refreshes."""
+        self.active = active
+        if not active:
+            self.debounce.stop()
+            return
+        if self.watcher is None:
+            self.watcher = QFileSystemWatcher(self)
+            self.watcher.directoryChanged.connect(self.on_directory_changed)
+        if self.directory not in self.watcher.directories():
+            self.watcher.addPath(self.directory)
+        self.refresh()
+
+    def on_directory_changed(self, _path):
+        if self.active:
+            self.debounce.start()
+
+    def projects(self):
+        """[(path, summary)] most recently edited first."""
+        return self.index.projects(self.directory)
+
+    def entry(self, path):
+        entry = self.index.entries.get(path)
+        return None if entry is None or "error" in entry else entry
+
+    def refresh(self):
+        if self.scanning:
+            self.rescan = True  # picked up as soon as the running scan ends
+            return
+        self.scanning = True
+        self.pool.start(LibraryScanJob(self.directory, self.index.stamps(), self.signals))
+
+    def on_updated(self, path, summary):
+        self.index.update(path, summary)
+        if "error" in summary:
+            print(f"Library: skipping {path}: {summary['error']}")
+            self.removed.emit(path)
+        else:
+            self.updated.emit(path, summary)
+
+    def on_removed(self, path):
+        self.index.remove(path)
+        self.removed.emit(path)
+
+    def on_finished(self):
+        self.scanning = False
+        try:
+            self.index.save()
+        except OSError as e:
+            print(f"Library: could not save {self.index.path}: {e}")
+        self.scanned.emit()
+        if self.rescan:
+            self.rescan = False
+            self.refresh()
+
+# --- 5. IMAGE IMPORT ---
+
+IMAGE_FILTER = "Images (*.png *.jpg *.jpeg *.bmp *.gif *.tif *.tiff *.webp *.svg)"
+
+def load_grayscale(path, max_side):
+    """
+    Decode an image file into an 8-bit grayscale NumPy array, transparency
+    flattened onto white. SVGs are rasterized to max_side on their longer side.
+    Safe off the GUI thread.
+    """
+    import numpy as np
+    if path.lower().endswith(".svg"):
+        renderer = QSvgRenderer(path)
+        if not renderer.isValid():
+            raise ValueError("not a readable SVG file")
+        size = renderer.defaultSize()
+        scale = max_side / max(size.width(), size.height(), 1)
+        image = QImage(max(1, round(size.width() * scale)), max(1, round(size.height() * scale)),
+                       QImage.Format.Format_ARGB32_Premultiplied)
+        image.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        renderer.render(painter, QRectF(0, 0, image.width(), image.height()))
+        painter.end()
+    else:
+        image = QImage(path)
+        if image.isNull():
+            raise ValueError("not a readable image file")
+    if image.hasAlphaChannel():
+        flat = QImage(image.size(), QImage.Format.Format_RGB32)
+        flat.fill(Qt.GlobalColor.white)
+        painter = QPainter(flat)
+        painter.drawImage(0, 0, image)
+        painter.end()
+        image = flat
+    image = image.convertToFormat(QImage.Format.Format_Grayscale8)
+    bits = image.constBits()
+    bits.setsize(image.sizeInBytes())
+    rows = np.frombuffer(bits, np.uint8).reshape(image.height(), image.bytesPerLine())
+    # Copy out of the QImage's buffer (and drop the row padding) before it goes away.
+    return rows[:, :image.width()].copy()
+
+class TraceSignals(QObject):
+    progress = pyqtSignal(int, int)
+    traced = pyqtSignal(int, object)
+    finished = pyqtSignal(str, object)
+    failed = pyqtSignal(str, str)
+
+class TraceJob(QRunnable):
+    def __init__(self, path, units_per_em, ascender, signals):
+        super().__init__()
+        self.path = path
+        self.units_per_em = units_per_em
+        self.ascender = ascender
+        self.signals = signals
+        self.cancelled = False
+
+    def run(self):
+        # Imported here so NumPy is only loaded once someone imports an image.
+        from tracing import TraceCancelled, WORK_SIZE, trace_bitmap
+        try:
+            gray = load_grayscale(self.path, WORK_SIZE)
+            if self.cancelled:
+                raise TraceCancelled()
+            contours = trace_bitmap(gray, units_per_em=self.units_per_em, ascender=self.ascender,
+                                    progress=self.signals.progress.emit, cancelled=lambda: self.cancelled)
+        except TraceCancelled:
+            self.signals.failed.emit(self.path, "")
+            return
+        except Exception as e:
+            self.signals.failed.emit(self.path, str(e))
+            return
+        self.signals.finished.emit(self.path, contours)
+
+class SheetTraceJob(QRunnable):
+    def __init__(self, path, rows, cols, codepoints, units_per_em, ascender, signals):
+        super().__init__()
+        self.path = path
+        self.rows = rows
+        self.cols = cols
+        self.codepoints = codepoints
+        self.units_per_em = units_per_em
+        self.ascender = ascender
+        self.signals = signals
+        self.cancelled = False
+
+    def run(self):
+        from tracing import TraceCancelled, CELL_SIZE, trace_sheet
+        try:
+            gray = load_grayscale(self.path, CELL_SIZE * max(self.rows, self.cols))
+            if self.cancelled:
+                raise TraceCancelled()
+            # The cells themselves are traced in worker processes; this thread feeds them.
+            glyphs = trace_sheet(gray, self.rows, self.cols, self.codepoints, self.units_per_em, self.ascender,
+                                 progress=self.signals.progress.emit, traced=self.signals.traced.emit,
+                                 cancelled=lambda: self.cancelled)
+        except TraceCancelled:
+            self.signals.failed.emit(self.path, "")
+            return
+        except Exception as e:
+            self.signals.failed.emit(self.path, str(e))
+            return
+        self.signals.finished.emit(self.path, glyphs)
+
+class TraceService(QObject):
+    """
+    Decodes and traces one image at a time off the GUI thread. `finished`
+    carries the traced canvas.Contours in font units for trace(), or
+    {codepoint: glyph SVG} for trace_sheet(), which also reports each cell on
+    `traced` (SVG, or None for an empty cell) as it is done. `failed` carries
+    an empty message when the import was cancelled.
+    """
+    progress = pyqtSignal(int, int)
+    traced = pyqtSignal(int, object)
+    finished = pyqtSignal(str, object)
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.job = None
+        self.signals = TraceSignals(self)
+        self.signals.progress.connect(self.progress)
+        self.signals.traced.connect(self.traced)
+        self.signals.finished.connect(self.on_finished)
+        self.signals.failed.connect(self.on_failed)
+
+    def trace(self, path, units_per_em, ascender):
+        if self.job is not None:
+            return False
+        self.job = TraceJob(path, units_per_em, ascender, self.signals)
+        self.pool.start(self.job)
+        return True
+
+    def trace_sheet(self, path, rows, cols, codepoints, units_per_em, ascender):
+        """Trace a specimen sheet's rows x cols cells into `codepoints`, row-major (None skips a cell)."""
+        if self.job is not None:
+            return False
+        self.job = SheetTraceJob(path, rows, cols, list(codepoints), units_per_em, ascender, self.signals)
+        self.pool.start(self.job)
+        return True
+
+    def cancel(self):
+        if self.job is not None:
+            self.job.cancelled = True
+
+    def busy(self):
+        return self.job is not None
+
+    def on_finished(self, path, contours):
+        self.job = None
+        self.finished.emit(path, contours)
+
+    def on_failed(self, path, error):
+        self.job = None
+        self.failed.emit(path, error)
+
+# --- 6. INVALIDATION ---
+
+# What a saved glyph edit makes stale, and the order it is redrawn in: tiles
+# on screen, then every other tile of the edited glyphs and of the glyphs using
+# them as components, then the home screen thumbnail's cells, and last the
+# compiled export caches, so the next export only assembles.
+PRIORITY_VISIBLE = 3
+PRIORITY_TILES = 2
+PRIORITY_THUMBNAIL = 1
+PRIORITY_EXPORT = 0
+INVALIDATE_DEBOUNCE_MS = 100    # an import, or undo held down, lands as one flush
+EXPORT_FLAVORS = ("ttf", "otf")
+
+class InvalidationSignals(QObject):
+    tile = pyqtSignal(str, int, object, object) # path, codepoint, stamp (a uint32: too big for int), QImage or None
+    thumbnail = pyqtSignal(str, str, QImage, int)  # path, content hash, image, cells repainted (0: full render)
+    export_cache = pyqtSignal(str, str, object, int)   # path, cache entry name, data, glyphs compiled
+    failed = pyqtSignal(str, str, str)          # path, artifact kind, error
+
+class TileRenderJob(QRunnable):
+    """Render a batch of glyph tiles, each for the stamp it was queued at."""
+    def __init__(self, path, stamps, signals):
+        super().__init__()
+        self.path = path
+        self.stamps = stamps    # codepoint -> stamp
+        self.signals = signals
+
+    def run(self):
+        try:
+            with VarnProject(self.path, read_only=True) as project:
+                for cp, stamp in self.stamps.items():
+                    image, _ = load_tile_image(project, cp, stamp)
+                    self.signals.tile.emit(self.path, cp, stamp, image)
+        except Exception as e:
+            self.signals.failed.emit(self.path, "tile", str(e))
+
+class ThumbnailPatchJob(QRunnable):
+    """
+    Bring a font thumbnail up to date by repainting only the cells of edited
+    glyphs in the last one rendered (`base_key`), when that is still cached and
+    laid out the same; otherwise render it whole.
+    """
+    def __init__(self, path, base_key, layout, codepoints, cache, signals):
+        super().__init__()
+        self.path = path
+        self.base_key = base_key
+        self.layout = layout
+        self.codepoints = set(codepoints)
+        self.cache = cache
+        self.signals = signals
+        self.lock = threading.Lock()
+        self.started = False
+
+    def merge(self, codepoints):
+        """Add cells to a job that has not started yet; False once it has."""
+        with self.lock:
+            if not self.started:
+                self.codepoints.update(codepoints)
+            return not self.started
+
+    def run(self):
+        with self.lock:
+            self.started = True
+        try:
+            with VarnProject(self.path, read_only=True) as project:
+                key = project.content_hash()
+                image = self.cache.load(key)
+                cells = 0
+                if image is None:
+                    base = self.cache.load(self.base_key) if self.base_key else None
+                    if base is not None and preview_codepoints(project) == self.layout:
+                        image = render_font_preview(project, base.width(), base, self.codepoints)
+                        cells = len(self.codepoints & set(self.layout))
+                    else:
+                        image = render_font_preview(project)
+                    self.cache.store(key, image)
+        except Exception as e:
+            self.signals.failed.emit(self.path, "thumbnail", str(e))
+            return
+        self.signals.thumbnail.emit(self.path, key, image, cells)
+
+class ExportCacheJob(QRunnable):
+    """Recompile the edited glyphs into each compiled-glyph cache the project already has."""
+    def __init__(self, path, signals):
+        super().__init__()
+        self.path = path
+        self.signals = signals
+        self.lock = threading.Lock()
+        self.started = False
+
+    def merge(self, codepoints=()):
+        with self.lock:
+            return not self.started
+
+    def run(self):
+        with self.lock:
+            self.started = True
+        try:
+            # Imported here so fontTools is only loaded once the project has been exported.
+            from export import cache_entry_name, refresh_cache
+            # Our own handle; the data comes back for the GUI's handle to journal.
+            with VarnProject(self.path, read_only=True) as project:
+                for flavor in EXPORT_FLAVORS:
+                    name = cache_entry_name(flavor)
+                    if project.cache_entry(name) is None:
+                        continue    # never exported in this flavor: nothing to keep warm
+                    data, compiled = refresh_cache(project, flavor)
+                    if data is not None:
+                        self.signals.export_cache.emit(self.path, name, data, compiled)
+        except Exception as e:
+            self.signals.failed.emit(self.path, "export", str(e))
+
+class InvalidationGraph(QObject):
+    """
+    Tracks what is derived from each glyph of the open projects: grid tiles and
+    stored previews, the glyphs that use it as a component, its cells in the
+    font's thumbnail and its compiled export entries. glyphs_changed() marks
+    glyphs edited; edits arriving within INVALIDATE_DEBOUNCE_MS are flushed
+    together, each glyph once, and expanded through the component graph. A
+    glyph whose stamp already matches its stored preview is skipped.
+    Everything else is recomputed on a one-thread pool in priority order and
+    reported through `tile_ready(path, cp)` and `thumbnail_ready(path, image)`.
+
+    stats() counts the work: edits reported, glyphs flushed, dependents
+    reached, artifacts queued and recomputed; `last` holds the counts of the
+    most recent flush, also emitted as `flushed`. GUI thread only.
+    """
+    tile_ready = pyqtSignal(str, int)
+    thumbnail_ready = pyqtSignal(str, QImage)
+    flushed = pyqtSignal(dict)
+
+    COUNTERS = ("edits", "flushes", "glyphs", "dependents", "unchanged", "tiles_queued", "tiles_visible",
+                "tiles_rendered", "tiles_stale", "thumbnails_queued", "thumbnail_cells", "thumbnails_full",
+                "exports_queued", "export_glyphs", "jobs_merged", "failures")
+
+    def __init__(self, parent=None, thumbnails=None, tiles=None):
+        super().__init__(parent)
+        self.thumbnails = thumbnails or ThumbnailCache()
+        self.tiles = tiles or glyph_tiles()
+        self.projects = {}      # path -> (project, visible codepoints callable or None)
+        self.thumb_keys = {}    # path -> content hash of the newest thumbnail we know is cached
+        self.layouts = {}       # path -> codepoints the thumbnail shows
+        self.dirty = {}         # path -> codepoints edited since the last flush
+        self.edits = {}         # path -> edits reported since the last flush
+        self.jobs = {}          # (path, kind) -> queued job that can still take more work
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)  # one at a time, so the priorities decide the order
+        self.signals = InvalidationSignals(self)
+        self.signals.tile.connect(self.on_tile)
+        self.signals.thumbnail.connect(self.on_thumbnail)
+        self.signals.export_cache.connect(self.on_export_cache)
+        self.signals.failed.connect(self.on_failed)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(INVALIDATE_DEBOUNCE_MS)
+        self.timer.timeout.connect(self.flush)
+        self.counts = dict.fromkeys(self.COUNTERS, 0)
+        self.last = {}
+
+    def attach(self, project, visible=None):
+        """
+        Track an open project (the GUI's handle). visible() returns the codepoints
+        on screen, whose tiles are redrawn first.
+        """
+        self.projects[project.path] = (project, visible)
+        self.thumb_keys[project.path] = project.content_hash()
+        self.layouts[project.path] = preview_codepoints(project)
+
+    def detach(self, project):
+        self.flush()
+        self.projects.pop(project.path, None)
+
+    def glyphs_changed(self, project, codepoints):
+        """Glyphs of an attached project were saved (or undone, or imported)."""
+        if project.path not in self.projects:
+            return
+        dirty = self.dirty.setdefault(project.path, set())
+        for cp in codepoints:
+            dirty.add(cp)
+            self.edits[project.path] = self.edits.get(project.path, 0) + 1
+            # Cells repainting before the flush keep the old tile instead of rendering on the GUI thread.
+            self.tiles.pending.add((project.path, cp))
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def flush(self):
+        self.timer.stop()
+        dirty, self.dirty = self.dirty, {}
+        edits, self.edits = self.edits, {}
+        for path, edited in dirty.items():
+            if path in self.projects:
+                self.invalidate(path, edited, edits.get(path, len(edited)))
+
+    def invalidate(self, path, edited, edits):
+        project, visible = self.projects[path]
+        graph = component_graph(project)
+        last = dict.fromkeys(self.COUNTERS, 0)
+        last["flushes"] = 1
+        last["edits"] = edits
+        stamps = {}
+        for cp in sorted(edited):
+            stamp = graph.stamp(cp)
+            if project.glyph_preview_revision(cp) == stamp:
+                # Saved unchanged (e.g. the editor closed without edits): everything derived is current.
+                self.tiles.pending.discard((path, cp))
+                last["unchanged"] += 1
+            else:
+                stamps[cp] = stamp
+        last["glyphs"] = len(stamps)
+        for cp in list(stamps):
+            for user in graph.dependents(cp):
+                if user not in stamps:
+                    stamps[user] = graph.stamp(user)
+                    last["dependents"] += 1
+
+        if stamps:
+            for cp in stamps:
+                self.tiles.pending.add((path, cp))
+            on_screen = set(visible()) if visible is not None else set()
+            first = {cp: s for cp, s in stamps.items() if cp in on_screen}
+            rest = {cp: s for cp, s in stamps.items() if cp not in on_screen}
+            for batch, priority in ((first, PRIORITY_VISIBLE), (rest, PRIORITY_TILES)):
+                if batch:
+                    self.pool.start(TileRenderJob(path, batch, self.signals), priority)
+            last["tiles_queued"] = len(stamps)
+            last["tiles_visible"] = len(first)
+
+            cells = set(stamps).intersection(self.layouts.get(path, ()))
+            if cells:
+                started = self.queue((path, "thumbnail"), cells, PRIORITY_THUMBNAIL, lambda: ThumbnailPatchJob(
+                    path, self.thumb_keys.get(path), self.layouts[path], cells, self.thumbnails, self.signals))
+                last["thumbnails_queued" if started else "jobs_merged"] += 1
+            started = self.queue((path, "export"), stamps, PRIORITY_EXPORT, lambda: ExportCacheJob(path, self.signals))
+            last["exports_queued" if started else "jobs_merged"] += 1
+
+        for name, value in last.items():
+            self.counts[name] += value
+        self.last = last
+        self.flushed.emit(last)
+
+    def queue(self, key, codepoints, priority, make_job):
+        """Fold the work into the matching job still waiting in the queue, or start a new one (True)."""
+        job = self.jobs.get(key)
+        if job is not None and job.merge(codepoints):
+            return False
+        job = self.jobs[key] = make_job()
+        job.setAutoDelete(False)    # kept in self.jobs to merge into until its result arrives
+        self.pool.start(job, priority)
+        return True
+
+    def on_tile(self, path, cp, stamp, image):
+        entry = self.projects.get(path)
+        if entry is None:
+            return
+        project = entry[0]
+        if component_graph(project).stamp(cp) != stamp:
+            self.counts["tiles_stale"] += 1     # edited again meanwhile; a newer render is queued
+            return
+        if image is not None and project.glyph_preview_revision(cp) != stamp:
+            self.tiles.queue_preview(project, cp, stamp, image)
+        self.tiles.refresh(path, cp, stamp, image)
+        self.counts["tiles_rendered"] += 1
+        self.tile_ready.emit(path, cp)
+
+    def on_thumbnail(self, path, key, image, cells):
+        self.jobs.pop((path, "thumbnail"), None)
+        self.thumb_keys[path] = key
+        if cells:
+            self.counts["thumbnail_cells"] += cells
+        else:
+            self.counts["thumbnails_full"] += 1
+        self.thumbnail_ready.emit(path, image)
+
+    def on_export_cache(self, path, name, data, compiled):
+        self.jobs.pop((path, "export"), None)
+        entry = self.projects.get(path)
+        if entry is not None:
+            entry[0].write_cache(name, data)    # journaled through the handle that owns the journal
+        self.counts["export_glyphs"] += compiled
+
+    def on_failed(self, path, kind, error):
+        self.jobs.pop((path, kind), None)
+        self.counts["failures"] += 1
+        if kind == "tile":
+            # Drawn on demand instead, the next time the cells are painted.
+            self.tiles.pending.difference_update([k for k in self.tiles.pending if k[0] == path])
+        print(f"Invalidation: {kind} refresh failed for {path}: {error}")
+
+    def stats(self):
+        return dict(self.counts)
+
+    def reset_stats(self):
+        self.counts = dict.fromkeys(self.COUNTERS, 0)
+
+_invalidation = None
+
+def invalidation():
+    """The process-wide InvalidationGraph (needs the QApplication)."""
+    global _invalidation
+    if _invalidation is None:
+        _invalidation = InvalidationGraph()
+    return _invalidation
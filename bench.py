@@ -0,0 +1,1444 @@
+import sys
+import os
+import time
+import statistics
+
+# Performance benchmarks for Akshar.
+#
+#   python bench.py                 run everything
+#   python bench.py glyph_grid      run one benchmark
+#
+# Qt benchmarks run offscreen so they also work on a build box without a display.
+
+FRAME_BUDGET_MS = 1000 / 60
+
+def report(name, samples_ms, budget_ms=None):
+    samples = sorted(samples_ms)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    line = f"{name:<40} mean {statistics.mean(samples):8.3f} ms   p95 {p95:8.3f} ms   max {samples[-1]:8.3f} ms"
+    if budget_ms is not None:
+        line += "   " + ("OK" if p95 <= budget_ms else f"OVER BUDGET ({budget_ms:.1f} ms)")
+    print(line)
+
+_app = None
+
+def qt_app():
+    # Kept for the whole run: the process-wide services (app.invalidation()) die with the first QApplication.
+    global _app
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+    from ui import STYLESHEET
+    if _app is None:
+        _app = QApplication.instance() or QApplication(sys.argv[:1])
+        _app.setStyleSheet(STYLESHEET)
+    return _app
+
+# --- 1. FONT EDITOR GLYPH GRID ---
+
+def bench_glyph_grid(glyph_count=50_000, steps=60):
+    app = qt_app()
+    from ui import FontEditor
+
+    editor = FontEditor()
+    editor.data = [(chr(0x4E00 + i), f"U+{0x4E00 + i:04X}", "filled" if i % 3 == 0 else "empty")
+                   for i in range(glyph_count)]
+
+    t0 = time.perf_counter()
+    editor.repopulate_grid()
+    editor.resize(1000, 700)
+    editor.show()
+    app.processEvents()
+    print(f"glyph grid: {glyph_count} glyphs loaded and shown in {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+    # Drag the window edge back and forth; each step is one frame.
+    samples = []
+    for i in range(steps):
+        width = 800 + (i % 20) * 40
+        t0 = time.perf_counter()
+        editor.resize(width, 700)
+        app.processEvents()
+        editor.grid_view.viewport().repaint()
+        samples.append((time.perf_counter() - t0) * 1000)
+    report(f"resize frame ({glyph_count} glyphs)", samples, FRAME_BUDGET_MS)
+
+    bar = editor.grid_view.verticalScrollBar()
+    samples = []
+    for i in range(steps):
+        t0 = time.perf_counter()
+        bar.setValue(bar.maximum() * i // steps)
+        editor.grid_view.viewport().repaint()
+        samples.append((time.perf_counter() - t0) * 1000)
+    report(f"scroll frame ({glyph_count} glyphs)", samples, FRAME_BUDGET_MS)
+    editor.close()
+
+# --- 2. HOME SCREEN CARD GRID ---
+
+def bench_home_grid(project_count=300, steps=120):
+    app = qt_app()
+    from PyQt6.QtCore import QObject
+    from ui import HomeScreen
+
+    home = HomeScreen()
+    home.data = [(f"Font {i}", "Latin", "Today", None) for i in range(project_count)]
+    home.sync_cards()
+    home.resize(1000, 700)
+    home.show()
+    app.processEvents()
+
+    objects_before = len(home.findChildren(QObject))
+    stats_before = dict(home.stats)
+    samples = []
+    for i in range(steps):
+        width = 700 + (i % 40) * 25
+        t0 = time.perf_counter()
+        home.resize(width, 700)
+        app.processEvents()
+        samples.append((time.perf_counter() - t0) * 1000)
+
+    # Let the debounced intro animations fire so their allocations are counted too.
+    deadline = time.perf_counter() + 0.3
+    while time.perf_counter() < deadline:
+        app.processEvents()
+    created = len(home.findChildren(QObject)) - objects_before
+    delta = {k: home.stats[k] - stats_before[k] for k in home.stats}
+
+    report(f"home resize frame ({project_count} fonts)", samples, FRAME_BUDGET_MS)
+    print(f"home grid: {delta['resizes']} resizes, {delta['reflows']} reflows, "
+          f"{delta['cards_created']} cards created, {delta['animations']} intros played, "
+          f"{created} QObjects alive after drag ({created / max(1, delta['resizes']):.2f} per resize)")
+    home.close()
+
+# --- 3. .VARN PROJECT OPEN ---
+
+SAMPLE_SVG = (
+    '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 1000 1000">'
+    '<path d="M 120 0 L 480 700 L 560 700 L 900 0 L 780 0 L 700 200 L 320 200 L 240 0 Z"/></svg>'
+)
+
+def make_project(path, glyph_count):
+    from storage import create_project
+    codepoints = range(0x4E00, 0x4E00 + glyph_count)
+    glyphs = {cp: (SAMPLE_SVG + f"<!-- {cp} -->").encode() for cp in codepoints}
+    create_project(path, "Bench", "Han", codepoints, glyphs).close()
+
+def bench_project_open(glyph_count=10_000, touched=200):
+    import tempfile
+    import tracemalloc
+    from storage import VarnProject
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.varn")
+        make_project(path, glyph_count)
+        size_mb = os.path.getsize(path) / 1e6
+
+        samples = []
+        for _ in range(20):
+            t0 = time.perf_counter()
+            VarnProject(path).close()
+            samples.append((time.perf_counter() - t0) * 1000)
+        report(f"open ({glyph_count} glyphs, {size_mb:.1f} MB)", samples)
+
+        tracemalloc.start()
+        project = VarnProject(path)
+        opened = tracemalloc.get_traced_memory()[0]
+        samples = []
+        for cp in range(0x4E00, 0x4E00 + touched):
+            t0 = time.perf_counter()
+            project.glyph_svg(cp)
+            samples.append((time.perf_counter() - t0) * 1000)
+        touched_mem = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        project.close()
+        report("read glyph svg (cold)", samples)
+        print(f"project memory: {opened / 1024:.0f} KiB after open, "
+              f"{touched_mem / 1024:.0f} KiB after touching {touched} glyphs")
+
+# --- 4. JOURNALED AUTOSAVE ---
+
+def bench_autosave(sizes=(100, 1_000, 10_000), edits=200):
+    import tempfile
+    from storage import VarnProject
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for glyph_count in sizes:
+            path = os.path.join(tmp, f"autosave{glyph_count}.varn")
+            make_project(path, glyph_count)
+            project = VarnProject(path)
+            samples = []
+            for i in range(edits):
+                svg = SAMPLE_SVG + f"<!-- edit {i} -->"
+                t0 = time.perf_counter()
+                project.save_glyph(0x4E00 + i % glyph_count, svg)
+                samples.append((time.perf_counter() - t0) * 1000)
+            report(f"autosave glyph ({glyph_count} glyph project)", samples)
+
+            t0 = time.perf_counter()
+            project.compact()
+            print(f"{'compact ' + str(edits) + ' edits':<40} {(time.perf_counter() - t0) * 1000:8.1f} ms")
+            project.close()
+
+def held_open(paths):
+    """
+    Make os.replace() refuse any target in `paths`, as Windows does for a file
+    another handle has open; POSIX would otherwise hide that case here.
+    """
+    import contextlib
+    real_replace = os.replace
+
+    def replace(src, dst):
+        if os.path.abspath(dst) in paths:
+            raise PermissionError(13, "The process cannot access the file because it is being used", dst)
+        real_replace(src, dst)
+
+    @contextlib.contextmanager
+    def patched():
+        os.replace = replace
+        try:
+            yield
+        finally:
+            os.replace = real_replace
+    return patched()
+
+def bench_compact_shared(glyph_count=1_000, edits=200):
+    """Compaction while a read-only handle (a thumbnail or export worker) has the project open."""
+    import tempfile
+    import threading
+    from storage import VarnProject, VarnError, REPLACE_ATTEMPTS
+
+    def edit(project, tag):
+        for i in range(edits):
+            project.save_glyph(0x4E00 + i % glyph_count, SAMPLE_SVG + f"<!-- {tag} {i} -->")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "shared.varn")
+        make_project(path, glyph_count)
+        project = VarnProject(path)
+        edit(project, "first")
+        reader = VarnProject(path, read_only=True)
+        before = reader.glyph_svg(0x4E00)
+
+        # POSIX: the swap goes through and the reader keeps the files it opened.
+        t0 = time.perf_counter()
+        project.compact()
+        compact_ms = (time.perf_counter() - t0) * 1000
+        edit(project, "after")
+        assert reader.glyph_svg(0x4E00) == before and project.glyph_svg(0x4E00) != before
+        print(f"{'compact, reader open':<40} {compact_ms:8.1f} ms   reader keeps its snapshot, owner keeps saving")
+
+        # Windows: the reader never lets go. The old archive and journal are kept and saving carries on.
+        held = {os.path.abspath(path), os.path.abspath(project.journal_path)}
+        with held_open(held):
+            t0 = time.perf_counter()
+            try:
+                project.compact()
+                raise AssertionError("compact replaced a file that is held open")
+            except VarnError:
+                pass
+            failed_ms = (time.perf_counter() - t0) * 1000
+            edit(project, "held")
+        latest = project.glyph_svg(0x4E00)
+        print(f"{'compact, archive held open':<40} {failed_ms:8.1f} ms   gave up after {REPLACE_ATTEMPTS} tries, "
+              f"{project.pending_bytes() / 1024:.0f} KiB still journaled, saves still work")
+
+        # Only the journal held: the archive is swapped, the journal is kept whole and replays onto it.
+        with held_open({os.path.abspath(project.journal_path)}):
+            assert project.compact()
+        edit(project, "journal held")
+        latest = project.glyph_svg(0x4E00)
+
+        # The reader closes while compaction is retrying: the swap goes through late.
+        with held_open(held):
+            release = threading.Timer(0.2, held.clear)
+            release.start()
+            t0 = time.perf_counter()
+            assert project.compact()
+            late_ms = (time.perf_counter() - t0) * 1000
+        print(f"{'compact, reader closes after 200 ms':<40} {late_ms:8.1f} ms   "
+              f"{project.pending_bytes()} bytes left journaled")
+        reader.close()
+        project.close()
+        with VarnProject(path, read_only=True) as reopened:
+            assert reopened.glyph_svg(0x4E00) == latest
+
+# --- 5. FONT THUMBNAILS ---
+
+def bench_thumbnails(project_count=60, glyph_count=120):
+    import tempfile
+    app = qt_app()
+    from app import ThumbnailCache
+    from ui import HomeScreen
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(project_count):
+            path = os.path.join(tmp, f"font{i}.varn")
+            make_project(path, glyph_count)
+            paths.append(path)
+
+        for label in ("cold cache", "warm cache"):
+            home = HomeScreen()
+            home.thumbnails.cache = ThumbnailCache(os.path.join(tmp, "cache"))
+            home.resize(1000, 700)
+            home.show()
+            app.processEvents()
+
+            t0 = time.perf_counter()
+            home.data = [(f"Font {i}", "Han", "Today", p) for i, p in enumerate(paths)]
+            home.sync_cards()
+            gui_ms = (time.perf_counter() - t0) * 1000
+            while any(not card.has_preview() for card in home.cards.values()):
+                app.processEvents()
+                if time.perf_counter() - t0 > 60:
+                    break
+            total_ms = (time.perf_counter() - t0) * 1000
+            print(f"thumbnails ({label}): {project_count} cards placed in {gui_ms:.1f} ms on the GUI thread, "
+                  f"all previews in {total_ms:.0f} ms")
+            home.close()
+
+# --- 6. GLYPH TILE CACHE ---
+
+def bench_glyph_tiles(glyph_count=5_000, steps=40):
+    import tempfile
+    app = qt_app()
+    from app import glyph_tiles
+    from storage import VarnProject
+    from ui import FontEditor
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "tiles.varn")
+        make_project(path, glyph_count)
+        project = VarnProject(path)
+        # Give every glyph a revision so rendered tiles are written back as previews (journal stays durable).
+        project.save_glyphs({cp: project.glyph_svg(cp) for cp in range(0x4E00, 0x4E00 + glyph_count)})
+        tiles = glyph_tiles()
+
+        editor = FontEditor()
+        editor.load_project(project)
+        editor.resize(1000, 700)
+        editor.show()
+        app.processEvents()
+        view = editor.grid_view
+        bar = view.verticalScrollBar()
+
+        for label in ("first pass (rasterize)", "second pass (memory)"):
+            tiles.reset_stats()
+            samples = []
+            for i in range(steps):
+                t0 = time.perf_counter()
+                bar.setValue(bar.maximum() * i // steps)
+                view.viewport().repaint()
+                samples.append((time.perf_counter() - t0) * 1000)
+            report(f"scroll frame, {label}", samples, FRAME_BUDGET_MS)
+            print(f"  tile cache: {tiles.stats()}")
+
+        # Write-back happens on the writer thread once scrolling settles; time it on its own.
+        t0 = time.perf_counter()
+        queued = sum(len(previews) for _, previews in tiles.unsaved.values())
+        tiles.flush_previews()
+        if tiles.writer is not None:
+            tiles.writer.waitForDone()
+        print(f"preview write-back: {queued} tiles in {(time.perf_counter() - t0) * 1000:.0f} ms, off the GUI thread")
+
+        # New session: memory is cold but previews written back to the project are not.
+        tiles.tiles.clear()
+        tiles.reset_stats()
+        samples = []
+        for i in range(steps):
+            t0 = time.perf_counter()
+            bar.setValue(bar.maximum() * i // steps)
+            view.viewport().repaint()
+            samples.append((time.perf_counter() - t0) * 1000)
+        report("scroll frame, cold memory (previews)", samples, FRAME_BUDGET_MS)
+        print(f"  tile cache: {tiles.stats()}")
+        editor.close()
+        project.close()
+
+# --- 7. OUTLINE MEMORY ---
+
+def handwritten_outline(rng, contours=(2, 4), nodes=(8, 20)):
+    """A plausible fitted handwritten glyph: a few closed cubic contours."""
+    import math
+    from canvas import Contour, GlyphOutline
+
+    outline = GlyphOutline(advance=rng.randint(400, 900))
+    for _ in range(rng.randint(*contours)):
+        cx, cy, r = rng.uniform(150, 650), rng.uniform(0, 600), rng.uniform(60, 250)
+        n = rng.randint(*nodes)
+        contour = Contour()
+        pts = [(cx + r * (1 + rng.uniform(-0.2, 0.2)) * math.cos(2 * math.pi * k / n),
+                cy + r * (1 + rng.uniform(-0.2, 0.2)) * math.sin(2 * math.pi * k / n)) for k in range(n)]
+        contour.move_to(*pts[0])
+        for k in range(1, n + 1):
+            (x0, y0), (x1, y1) = pts[k - 1], pts[k % n]
+            if k == n:
+                # Closing curve ends on the start point, which the contour already holds.
+                contour.coords.extend((x0 + (x1 - x0) / 3, y0 + (y1 - y0) / 3, x0 + 2 * (x1 - x0) / 3, y0 + 2 * (y1 - y0) / 3))
+                contour.kinds.extend((1, 1))
+            else:
+                contour.curve_to(x0 + (x1 - x0) / 3, y0 + (y1 - y0) / 3, x0 + 2 * (x1 - x0) / 3, y0 + 2 * (y1 - y0) / 3, x1, y1)
+        outline.add(contour)
+    return outline
+
+def bench_outline_memory(glyph_count=5_000):
+    import random
+    import tempfile
+    import tracemalloc
+    from canvas import GlyphOutline
+    from storage import create_project, VarnProject
+
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "handwritten.varn")
+        glyphs = {0xE000 + i: handwritten_outline(rng).to_svg().encode() for i in range(glyph_count)}
+        create_project(path, "Handwritten", "Latin", sorted(glyphs), glyphs).close()
+        del glyphs
+
+        project = VarnProject(path, cache_size=0)
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        outlines = {cp: GlyphOutline.from_svg(project.glyph_svg(cp)) for cp in project.codepoints()}
+        load_ms = (time.perf_counter() - t0) * 1000
+        used = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        project.close()
+
+        points = sum(o.node_count() for o in outlines.values())
+        buffers = sum(o.nbytes() for o in outlines.values())
+        print(f"outlines: {glyph_count} glyphs, {points} points loaded in {load_ms:.0f} ms")
+        print(f"  array-backed: {used / 1e6:.2f} MB total ({used / points:.1f} B/point, "
+              f"{buffers / points:.1f} B/point in coordinate buffers)")
+
+        tracemalloc.start()
+        as_tuples = [[c.points() for c in o.contours] for o in outlines.values()]
+        tuples_used = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del as_tuples
+        print(f"  same points as lists of tuples: {tuples_used / 1e6:.2f} MB ({tuples_used / points:.1f} B/point)")
+
+# --- 8. FREEHAND STROKE FITTING ---
+
+def sample_stroke(rng, shape, rate_hz=1000, jitter=0.3):
+    """Pointer samples along a stroke in font units, as a tablet would report them."""
+    import math
+
+    if shape == "loop":       # cursive l: up-stroke, loop, down-stroke
+        path = lambda t: (150 + 400 * t + 120 * math.sin(2 * math.pi * t), 100 + 500 * math.sin(math.pi * t) ** 2)
+    elif shape == "spiral":
+        path = lambda t: (500 + 300 * t * math.cos(6 * math.pi * t), 400 + 300 * t * math.sin(6 * math.pi * t))
+    elif shape == "zigzag":   # straight runs joined by sharp corners
+        def path(t):
+            k, f = divmod(t * 6, 1)
+            return 100 + 600 * t, 200 + 400 * (f if int(k) % 2 == 0 else 1 - f)
+    else:                     # scribble: a smooth wandering line
+        a = [rng.uniform(-1, 1) for _ in range(8)]
+        path = lambda t: (500 + 300 * (a[0] * math.sin(3 * t + a[1]) + a[2] * math.sin(7 * t + a[3])),
+                          400 + 300 * (a[4] * math.sin(5 * t + a[5]) + a[6] * math.sin(9 * t + a[7])))
+    seconds = rng.uniform(0.8, 2.0)
+    count = int(seconds * rate_hz)
+    samples = []
+    for i in range(count):
+        # Uneven hand speed: slow at the ends, fast in the middle.
+        t = 0.5 - 0.5 * math.cos(math.pi * i / (count - 1))
+        x, y = path(t)
+        samples.append((round(x + rng.gauss(0, jitter), 1), round(y + rng.gauss(0, jitter), 1)))
+    return samples
+
+def stroke_deviation(samples, contour):
+    """Largest distance from a sample to the fitted stroke, in font units."""
+    from canvas import CURVE, _bezier_at
+
+    flat = []
+    for segment in contour.segments():
+        pts = segment.points()
+        # Flatten to about one point per font unit so flattening error stays negligible.
+        length = sum(((x1 - x0) ** 2 + (y1 - y0) ** 2) ** 0.5 for (x0, y0), (x1, y1) in zip(pts, pts[1:]))
+        steps = max(2, int(length))
+        if segment.kind == CURVE:
+            flat.extend(_bezier_at(pts, k / steps) for k in range(steps + 1))
+        else:
+            (x0, y0), (x1, y1) = pts
+            flat.extend((x0 + (x1 - x0) * k / steps, y0 + (y1 - y0) * k / steps) for k in range(steps + 1))
+    worst = 0.0
+    for x, y in samples[::8]:
+        worst = max(worst, min((x - fx) ** 2 + (y - fy) ** 2 for fx, fy in flat))
+    return worst ** 0.5
+
+def bench_stroke_fit(strokes_per_shape=5, tolerances=(1.0, 2.0, 4.0)):
+    import random
+    from canvas import StrokeFitter
+
+    rng = random.Random(3)
+    shapes = ("loop", "spiral", "zigzag", "scribble")
+    strokes = {shape: [sample_stroke(rng, shape) for _ in range(strokes_per_shape)] for shape in shapes}
+    for tolerance in tolerances:
+        print(f"stroke fitting, tolerance {tolerance:g} units:")
+        for shape in shapes:
+            per_sample, per_stroke, raw, kept, deviation = [], [], 0, 0, 0.0
+            for samples in strokes[shape]:
+                fitter = StrokeFitter(tolerance)
+                t_stroke = time.perf_counter()
+                for x, y in samples:
+                    t0 = time.perf_counter()
+                    fitter.add_point(x, y)
+                    per_sample.append((time.perf_counter() - t0) * 1000)
+                contour = fitter.finish()
+                per_stroke.append((time.perf_counter() - t_stroke) * 1000)
+                raw += len(samples)
+                kept += len(contour)
+                deviation = max(deviation, stroke_deviation(samples, contour))
+            print(f"  {shape:<9} {raw / len(strokes[shape]):6.0f} samples -> {kept / len(strokes[shape]):5.1f} points "
+                  f"({raw / kept:4.1f}x fewer), max deviation {deviation:.2f} units")
+            report(f"    add_point ({shape})", per_sample, FRAME_BUDGET_MS / 4)
+            report(f"    whole stroke ({shape})", per_stroke)
+
+# --- 9. GLYPH CANVAS ---
+
+def traced_outline(rng, node_target):
+    """A traced scan: hundreds of small closed blobs scattered over the em square."""
+    import math
+    from canvas import Contour, GlyphOutline
+
+    outline = GlyphOutline(advance=1000)
+    while outline.node_count() < node_target:
+        cx, cy, r = rng.uniform(50, 950), rng.uniform(-150, 750), rng.uniform(5, 40)
+        n = rng.randint(6, 16)
+        pts = [(cx + r * (1 + rng.uniform(-0.3, 0.3)) * math.cos(2 * math.pi * k / n),
+                cy + r * (1 + rng.uniform(-0.3, 0.3)) * math.sin(2 * math.pi * k / n)) for k in range(n)]
+        contour = Contour()
+        contour.move_to(*pts[0])
+        for k in range(1, n + 1):
+            (x0, y0), (x1, y1) = pts[k - 1], pts[k % n]
+            if k == n:
+                contour.coords.extend((x0 + (x1 - x0) / 3, y0 + (y1 - y0) / 3, x0 + 2 * (x1 - x0) / 3, y0 + 2 * (y1 - y0) / 3))
+                contour.kinds.extend((1, 1))
+            else:
+                contour.curve_to(x0 + (x1 - x0) / 3, y0 + (y1 - y0) / 3, x0 + 2 * (x1 - x0) / 3, y0 + 2 * (y1 - y0) / 3, x1, y1)
+        outline.add(contour)
+    return outline
+
+def punch_counters(outline):
+    """Turn scattered blobs into counters of one page-sized contour, so everything fills as one group."""
+    from array import array
+    from canvas import Contour
+
+    for contour in outline.contours:
+        points = contour.points()[::-1]
+        contour.coords = array("f", [v for p in points for v in p])
+        contour.kinds = array("B", contour.kinds[::-1])
+    page = Contour()
+    for x, y in ((0, -200), (1000, -200), (1000, 800), (0, 800)):
+        page.line_to(x, y)
+    outline.contours.insert(0, page)
+    return outline
+
+def bench_glyph_canvas(node_count=20_000, steps=60):
+    import random
+    app = qt_app()
+    from PyQt6.QtCore import QPointF
+    from PyQt6.QtWidgets import QGraphicsItem, QGraphicsView
+    from ui import GlyphCanvas, ActiveStrokeItem
+
+    def settle(canvas):
+        while canvas.zoom_timer.isActive():
+            app.processEvents()
+
+    def frames(canvas, label):
+        canvas.fit_em()
+        canvas.set_zoom(canvas.zoom() * 3)
+        settle(canvas)
+        app.processEvents()
+        samples = []
+        for i in range(steps):
+            t0 = time.perf_counter()
+            canvas.pan_by(12 if (i // 15) % 2 == 0 else -12, 6)
+            app.processEvents()
+            samples.append((time.perf_counter() - t0) * 1000)
+        report(f"pan frame, {label}", samples, FRAME_BUDGET_MS)
+
+        samples = []
+        for i in range(steps):
+            t0 = time.perf_counter()
+            canvas.set_zoom(canvas.zoom() * (1.1 if (i // 15) % 2 == 0 else 1 / 1.1))
+            app.processEvents()
+            samples.append((time.perf_counter() - t0) * 1000)
+        report(f"zoom frame, {label}", samples, FRAME_BUDGET_MS)
+        t0 = time.perf_counter()
+        canvas.end_zoom()
+        app.processEvents()
+        print(f"{'  sharp again after the zoom':<40} {(time.perf_counter() - t0) * 1000:8.1f} ms")
+
+        stroke = ActiveStrokeItem(canvas.brush_size)
+        canvas.scene.addItem(stroke)
+        samples = []
+        for i in range(steps * 4):
+            t0 = time.perf_counter()
+            stroke.add_point(QPointF(300 + i * 2, 400 + 50 * (i % 7)))
+            app.processEvents()
+            samples.append((time.perf_counter() - t0) * 1000)
+        canvas.scene.removeItem(stroke)
+        report(f"draw frame, {label}", samples, FRAME_BUDGET_MS)
+
+    scenarios = (
+        ("scattered", traced_outline(random.Random(5), node_count)),
+        ("counters", punch_counters(traced_outline(random.Random(5), node_count))),
+    )
+    for name, outline in scenarios:
+        canvas = GlyphCanvas()
+        canvas.resize(1000, 700)
+        canvas.show()
+        t0 = time.perf_counter()
+        canvas.set_outline(outline)
+        canvas.fit_em()
+        app.processEvents()
+        print(f"glyph canvas ({name}): {outline.node_count()} nodes in {len(outline.contours)} contours, "
+              f"{len(canvas.groups)} cached items, shown in {(time.perf_counter() - t0) * 1000:.1f} ms")
+        frames(canvas, f"{name}, cached")
+
+        # The same scene repainted from scratch every frame, for comparison.
+        canvas.begin_zoom = lambda: None     # keep zooming from re-enabling item caches
+        for group in canvas.groups:
+            group.setCacheMode(QGraphicsItem.CacheMode.NoCache)
+        canvas.setCacheMode(QGraphicsView.CacheModeFlag.CacheNone)
+        canvas.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.FullViewportUpdate)
+        frames(canvas, f"{name}, uncached")
+        canvas.close()
+
+# --- 10. UNDO HISTORY ---
+
+def bench_undo(glyph_count=40, strokes_per_glyph=50, budget_mb=0.5):
+    import random
+    import tracemalloc
+    from canvas import UndoHistory, GlyphOutline, AddContours, MoveContours, EditPoints
+
+    def session(history, rng, snapshots=None):
+        """Draw strokes, nudge and drag nodes across several glyphs; returns per-push times."""
+        times = []
+        for g in range(glyph_count):
+            stack = history.glyph(0x0900 + g)
+            outline = stack.subject = GlyphOutline()
+            for s in range(strokes_per_glyph):
+                stroke = handwritten_outline(rng, contours=(1, 1), nodes=(15, 25)).contours
+                t0 = time.perf_counter()
+                stack.push(AddContours(outline, stroke))
+                times.append((time.perf_counter() - t0) * 1000)
+                if s % 10 == 9:
+                    for _ in range(8):      # a run of arrow-key nudges: one step
+                        stack.push(MoveContours(outline.contours[-1:], 1, 0, "Nudge"))
+                    contour = outline.contours[-1]
+                    for k in range(30):     # one node dragged over 30 mouse moves: one step
+                        x, y = contour.point(0)
+                        stack.push(EditPoints(contour, [0], [(x + 0.5, y)]))
+                if snapshots is not None:
+                    snapshots.append(outline.copy())
+        return times
+
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    history = UndoHistory(budget_bytes=1 << 40)
+    times = session(history, random.Random(11))
+    stats = history.stats()
+    # The outlines themselves are live document state, not history; count them separately.
+    outlines = sum(s.subject.nbytes() for s in history.glyphs.values())
+    used = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    print(f"undo: {stats['steps']} steps over {stats['stacks'] - 1} glyphs, "
+          f"{stats['bytes'] / 1e6:.2f} MB accounted ({stats['bytes_per_step']:.0f} B/step), "
+          f"{used / 1e6:.2f} MB traced incl. {outlines / 1e6:.2f} MB of live outlines")
+    report("push (draw stroke)", times)
+
+    samples = []
+    stack = history.glyph(0x0900)
+    for _ in range(len(stack)):
+        t0 = time.perf_counter()
+        stack.undo()
+        samples.append((time.perf_counter() - t0) * 1000)
+    report("undo", samples)
+
+    # For comparison: a whole-glyph snapshot per step.
+    tracemalloc.start()
+    snapshots = []
+    session(UndoHistory(budget_bytes=1 << 40), random.Random(11), snapshots)
+    snap_used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"  snapshot per step instead: {snap_used / 1e6:.2f} MB ({snap_used / len(snapshots):.0f} B/step)")
+
+    history = UndoHistory(budget_bytes=int(budget_mb * 1024 * 1024))
+    session(history, random.Random(11))
+    stats = history.stats()
+    print(f"  with a {budget_mb:g} MB budget: {stats['steps']} steps kept, {stats['evicted']} evicted, "
+          f"{stats['bytes'] / 1e6:.2f} MB")
+
+# --- 11. UNICODE INDEX ---
+
+def bench_unicode_index(lookups=20_000, repeats=20):
+    import random
+    import unicodedata
+    from glyphs import GLYPH_SETS, load_index
+
+    t0 = time.perf_counter()
+    index = load_index()
+    print(f"  load assets/unicode.idx: {(time.perf_counter() - t0) * 1000:.2f} ms, "
+          f"{len(index.scripts) + len(index.blocks) + len(index.categories)} runs, {index.nbytes() / 1024:.0f} KiB")
+
+    for name in GLYPH_SETS:
+        index = load_index()  # cold: the first set also splits the tables into per-value runs
+        samples = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            codepoints = index.glyph_set(name)
+            samples.append((time.perf_counter() - t0) * 1000)
+        print(f"  {name}: {len(codepoints)} glyphs, cold {samples[0]:.3f} ms")
+        report(f"glyph set {name} (warm)", samples[1:])
+
+    rng = random.Random(3)
+    cps = [rng.randrange(0x30000) for _ in range(lookups)]
+    t0 = time.perf_counter()
+    for cp in cps:
+        index.script(cp), index.block(cp), index.category(cp)
+    print(f"  script+block+category lookup: {(time.perf_counter() - t0) / lookups * 1e6:.2f} us")
+
+    t0 = time.perf_counter()
+    scan = [cp for cp in range(0x110000) if unicodedata.category(chr(cp)) == "Lo" and 0x0900 <= cp < 0x0980]
+    print(f"  full unicodedata scan instead: {(time.perf_counter() - t0) * 1000:.0f} ms ({len(scan)} hits)")
+
+# --- 12. GLYPH SEARCH ---
+
+def bench_glyph_search(glyph_count=30_000):
+    app = qt_app()
+    from ui import FontEditor
+    from glyphs import GlyphSearchIndex, unicode_index
+
+    index = unicode_index()
+    cps = list(index.glyph_set("Latin Extended")) + list(index.glyph_set("Devanagari")) + list(index.glyph_set("CJK"))
+    cps = cps[:glyph_count]
+    editor = FontEditor()
+    editor.data = [(chr(cp), f"U+{cp:04X}", "filled" if i % 3 == 0 else "empty") for i, cp in enumerate(cps)]
+    editor.repopulate_grid()
+    editor.resize(1000, 700)
+    editor.show()
+    app.processEvents()
+
+    t0 = time.perf_counter()
+    GlyphSearchIndex(editor.data).prepare()
+    print(f"glyph search: lookups for {len(cps)} glyphs built in {(time.perf_counter() - t0) * 1000:.1f} ms (idle time after load)")
+
+    def type_query(text, clear=True):
+        """Type text one key at a time; each sample is the filter plus a repaint of the grid."""
+        if clear:
+            editor.search.clear()
+        samples = []
+        for ch in text:
+            t0 = time.perf_counter()
+            editor.search.insert(ch)
+            editor.grid_view.viewport().repaint()
+            samples.append((time.perf_counter() - t0) * 1000)
+        return samples
+
+    for query in ("devanagari letter a", "U+0905", "अ", "latin small letter e with", "cjk unified ideograph-4e0"):
+        samples = type_query(query)
+        report(f"keystroke '{query}' -> {editor.glyph_filter.rowCount()}", samples, 5.0)
+
+    samples = []
+    editor.search.clear()
+    for i in range(20):
+        t0 = time.perf_counter()
+        editor.status_filter.setCurrentIndex(1 + i % 2)
+        editor.grid_view.viewport().repaint()
+        samples.append((time.perf_counter() - t0) * 1000)
+    report(f"status filter ({glyph_count} glyphs)", samples, 5.0)
+    editor.close()
+
+# --- 13. FONT EXPORT ---
+
+def bench_export(glyph_count=10_000, flavors=("ttf", "otf"), edited=20):
+    import random
+    import tempfile
+    from storage import create_project, VarnProject
+    from export import export_font
+
+    rng = random.Random(13)
+    cores = os.cpu_count() or 1
+    worker_counts = sorted({0, cores} | {n for n in (1, 2, 4, 8) if n <= cores})
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "export.varn")
+        glyphs = {0x4E00 + i: handwritten_outline(rng).to_svg().encode() for i in range(glyph_count)}
+        create_project(path, "Export Bench", "Han", sorted(glyphs), glyphs).close()
+        del glyphs
+        with VarnProject(path) as project:
+            for flavor in flavors:
+                out = os.path.join(tmp, f"out.{flavor}")
+                serial = None
+                for workers in worker_counts:
+                    report = export_font(project, out, workers=workers, save_cache=False)
+                    serial = serial or report.total()
+                    label = "in process" if workers == 0 else f"{workers} workers"
+                    phases = "   ".join(f"{k} {v:5.2f} s" for k, v in report.phases.items() if k != "compile")
+                    print(f"export .{flavor} {glyph_count} glyphs, {label:<11} total {report.total():6.2f} s   "
+                          f"speedup {serial / report.total():4.1f}x   {phases}")
+
+                # Incremental: prime the cache, edit a few glyphs, export again.
+                export_font(project, out)
+                for cp in rng.sample(range(0x4E00, 0x4E00 + glyph_count), edited):
+                    project.save_glyph(cp, handwritten_outline(rng).to_svg())
+                report = export_font(project, out)
+                print(f"re-export .{flavor} after editing {edited} glyphs: {report.total():.2f} s "
+                      f"(full export {serial:.2f} s)")
+                print(report.summary())
+
+# --- 14. COLD START ---
+
+def bench_startup(runs=20):
+    app = qt_app()
+    from main import MainWindow
+
+    # Time to the first painted frame, then the cost of each screen's first visit.
+    first_paint, builds = [], {}
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        window = MainWindow()
+        window.show()
+        app.processEvents()
+        first_paint.append((time.perf_counter() - t0) * 1000)
+        for name in ("home_screen", "font_editor", "glyph_editor"):
+            t0 = time.perf_counter()
+            window.show_screen(name)
+            app.processEvents()
+            builds.setdefault(name, []).append((time.perf_counter() - t0) * 1000)
+        window.close()
+        window.deleteLater()
+        app.processEvents()
+    report("main window to first paint", first_paint)
+    for name, samples in builds.items():
+        report(f"first visit: {name}", samples)
+
+# --- 15. PROJECT LIBRARY ---
+
+def bench_library(project_count=100, sizes=(50, 2_000)):
+    import tempfile
+    app = qt_app()
+    from storage import LibraryIndex
+    from app import LibraryService
+    from ui import HomeScreen
+
+    def scan(library, start):
+        done = []
+        library.scanned.connect(lambda: done.append(True))
+        start()
+        while not done:
+            app.processEvents()
+
+    # The grid is filled from the catalog, so its cost should not move with project size.
+    for glyph_count in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            folder = os.path.join(tmp, "projects")
+            os.makedirs(folder)
+            for i in range(project_count):
+                make_project(os.path.join(folder, f"font{i}.varn"), glyph_count)
+            catalog = os.path.join(tmp, "library.json")
+
+            t0 = time.perf_counter()
+            library = LibraryService(folder, LibraryIndex(catalog))
+            scan(library, library.refresh)
+            cold_ms = (time.perf_counter() - t0) * 1000
+
+            t0 = time.perf_counter()
+            library = LibraryService(folder, LibraryIndex(catalog))
+            home = HomeScreen(library=library)
+            grid_ms = (time.perf_counter() - t0) * 1000
+            t0 = time.perf_counter()
+            scan(library, home.show)  # showing the screen starts the revalidation
+            revalidate_ms = (time.perf_counter() - t0) * 1000
+            print(f"library ({project_count} projects x {glyph_count} glyphs): cold scan {cold_ms:.0f} ms, "
+                  f"populated grid {grid_ms:.1f} ms, background revalidation (no changes) {revalidate_ms:.1f} ms")
+            home.close()
+
+def bench_library_watch(sizes=(10, 1_000), glyph_count=4):
+    import shutil
+    import tempfile
+    import tracemalloc
+    app = qt_app()
+    from PyQt6.QtCore import QEventLoop, QTimer
+    from storage import LibraryIndex
+    from app import LibraryService, WATCH_DEBOUNCE_MS
+    from ui import HomeScreen
+
+    def pump_until(done, timeout=120):
+        # Sleep in the event loop between checks, so idle CPU is really idle.
+        loop = QEventLoop()
+        deadline = time.perf_counter() + timeout
+        while not done() and time.perf_counter() < deadline:
+            QTimer.singleShot(5, loop.quit)
+            loop.exec()
+
+    # One project dropped into the folder: latency to its card, and CPU (all threads) spent.
+    for project_count in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            folder = os.path.join(tmp, "projects")
+            os.makedirs(folder)
+            template = os.path.join(tmp, "template.varn")
+            make_project(template, glyph_count)
+            for i in range(project_count):
+                shutil.copyfile(template, os.path.join(folder, f"font{i}.varn"))
+            library = LibraryService(folder, LibraryIndex(os.path.join(tmp, "library.json")))
+            home = HomeScreen(library=library)
+            home.resize(1000, 700)
+            home.show()
+            pump_until(lambda: len(home.cards) == project_count and not library.scanning
+                       and all(card.has_preview() for card in home.cards.values()))
+
+            settled = time.perf_counter() + 2.0  # let the card intros play out
+            pump_until(lambda: time.perf_counter() > settled)
+
+            tracemalloc.start()
+            cpu0 = time.process_time()
+            idle_until = time.perf_counter() + 1.0
+            pump_until(lambda: time.perf_counter() > idle_until)
+            idle_cpu_ms = (time.process_time() - cpu0) * 1000
+
+            dropped = os.path.join(folder, "dropped.varn")
+            cpu0 = time.process_time()
+            t0 = time.perf_counter()
+            shutil.copyfile(template, dropped + ".part")
+            os.replace(dropped + ".part", dropped)
+            pump_until(lambda: dropped in home.cards)
+            latency_ms = (time.perf_counter() - t0) * 1000
+            event_cpu_ms = (time.process_time() - cpu0) * 1000
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"library watch ({project_count} projects): idle {idle_cpu_ms:.1f} ms CPU/s, "
+                  f"dropped file to card {latency_ms:.0f} ms ({WATCH_DEBOUNCE_MS} ms debounce), "
+                  f"{event_cpu_ms:.1f} ms CPU, {peak / 1024:.0f} KiB peak Python allocations")
+            home.close()
+
+# --- 16. IMAGE IMPORT ---
+
+def scan_image(path, size):
+    """A scanned letter: dark ink on off-white paper with grain, saved as PNG."""
+    import numpy as np
+    from PyQt6.QtGui import QImage, QPainter, QColor, QFont
+    from PyQt6.QtCore import Qt, QRectF
+    image = QImage(size, size, QImage.Format.Format_Grayscale8)
+    image.fill(QColor(236, 236, 236))
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    painter.setPen(QColor(24, 24, 24))
+    font = QFont("Sans Serif")
+    font.setPixelSize(int(size * 0.4))
+    painter.setFont(font)
+    painter.drawText(QRectF(0, 0, size, size), Qt.AlignmentFlag.AlignCenter, "Ag8")
+    painter.end()
+    bits = image.bits()
+    bits.setsize(image.sizeInBytes())
+    pixels = np.frombuffer(bits, np.uint8).reshape(size, image.bytesPerLine())
+    grain = np.random.default_rng(7).integers(-20, 21, pixels.shape)
+    pixels[:] = (pixels.astype(np.int16) + grain).clip(0, 255).astype(np.uint8)
+    image.save(path, "PNG")
+
+def bench_trace(size=4_000, frame_ms=16):
+    import tempfile
+    app = qt_app()
+    from PyQt6.QtCore import QTimer
+    from app import TraceService
+    from ui import UNITS_PER_EM, ASCENDER
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "scan.png")
+        scan_image(path, size)
+        tracer = TraceService()
+        result = {}
+        tracer.finished.connect(lambda p, contours: result.setdefault("contours", contours))
+        tracer.failed.connect(lambda p, error: result.setdefault("error", error))
+        # A frame timer stands in for input handling: the longest gap between
+        # ticks is how long the GUI thread would have ignored the user.
+        ticks = []
+        timer = QTimer()
+        timer.timeout.connect(lambda: ticks.append(time.perf_counter()))
+        timer.start(frame_ms)
+
+        def run():
+            result.clear()
+            ticks[:] = [time.perf_counter()]
+            t0 = time.perf_counter()
+            tracer.trace(path, UNITS_PER_EM, ASCENDER)
+            while not result:
+                app.processEvents()
+            ticks.append(time.perf_counter())
+            gap = max(b - a for a, b in zip(ticks, ticks[1:])) * 1000
+            return (time.perf_counter() - t0) * 1000, gap
+
+        total_ms, gap_ms = run()
+        contours = result.get("contours") or []
+        nodes = sum(len(c.kinds) for c in contours)
+        print(f"trace ({size}x{size} scan): {total_ms:.0f} ms decode + trace, {len(contours)} contours, "
+              f"{nodes} nodes, longest GUI stall {gap_ms:.0f} ms ({frame_ms} ms frames)")
+
+        # Cancel right away: how long until the worker lets go.
+        result.clear()
+        t0 = time.perf_counter()
+        tracer.trace(path, UNITS_PER_EM, ASCENDER)
+        tracer.cancel()
+        while not result:
+            app.processEvents()
+        print(f"trace cancel: {(time.perf_counter() - t0) * 1000:.0f} ms "
+              f"({'cancelled' if result.get('error') == '' else 'completed'})")
+        timer.stop()
+
+# --- 17. SPECIMEN SHEET IMPORT ---
+
+def specimen_sheet(path, chars, cols, cell=300):
+    """A scanned specimen sheet: one character per ruled grid cell, dark ink on off-white paper."""
+    from PyQt6.QtGui import QImage, QPainter, QColor, QFont, QPen
+    from PyQt6.QtCore import Qt, QRectF
+    rows = -(-len(chars) // cols)
+    image = QImage(cols * cell, rows * cell, QImage.Format.Format_Grayscale8)
+    image.fill(QColor(238, 238, 238))
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    painter.setPen(QPen(QColor(150, 150, 150), 3))
+    for r in range(rows + 1):
+        painter.drawLine(0, r * cell, cols * cell, r * cell)
+    for c in range(cols + 1):
+        painter.drawLine(c * cell, 0, c * cell, rows * cell)
+    font = QFont("Sans Serif")
+    font.setPixelSize(int(cell * 0.6))
+    painter.setFont(font)
+    painter.setPen(QColor(24, 24, 24))
+    for i, char in enumerate(chars):
+        painter.drawText(QRectF((i % cols) * cell, (i // cols) * cell, cell, cell), Qt.AlignmentFlag.AlignCenter, char)
+    painter.end()
+    image.save(path, "PNG")
+    return rows
+
+def bench_sheet_import(cols=10, glyph_count=100):
+    import tempfile
+    app = qt_app()  # decoding uses QImage
+    from app import load_grayscale
+    from storage import VarnProject
+    from tracing import CELL_SIZE, trace_sheet
+
+    chars = [chr(cp) for cp in range(0x21, 0x21 + glyph_count)]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sheet.png")
+        rows = specimen_sheet(path, chars, cols)
+        codepoints = [ord(c) for c in chars]
+
+        t0 = time.perf_counter()
+        gray = load_grayscale(path, CELL_SIZE * max(rows, cols))
+        decode_ms = (time.perf_counter() - t0) * 1000
+        cores = os.cpu_count() or 1
+        for workers in sorted({0, cores}):
+            t0 = time.perf_counter()
+            glyphs = trace_sheet(gray, rows, cols, codepoints, workers=workers)
+            trace_ms = (time.perf_counter() - t0) * 1000
+            where = f"on {workers} worker process{'es' if workers > 1 else ''}" if workers else "in process"
+            print(f"sheet import ({rows}x{cols} cells, {gray.shape[1]}x{gray.shape[0]} px): decode {decode_ms:.0f} ms, "
+                  f"traced {len(glyphs)} glyphs {where} in {trace_ms:.0f} ms")
+
+        # The whole sheet lands in the journal as one transaction: one write, one sync.
+        make_project(os.path.join(tmp, "batch.varn"), 0)
+        with VarnProject(os.path.join(tmp, "batch.varn")) as project:
+            t0 = time.perf_counter()
+            project.save_glyphs(glyphs)
+            batch_ms = (time.perf_counter() - t0) * 1000
+        make_project(os.path.join(tmp, "single.varn"), 0)
+        with VarnProject(os.path.join(tmp, "single.varn")) as project:
+            t0 = time.perf_counter()
+            for cp, svg in glyphs.items():
+                project.save_glyph(cp, svg)
+            single_ms = (time.perf_counter() - t0) * 1000
+        print(f"sheet import commit ({len(glyphs)} glyphs): one transaction {batch_ms:.1f} ms, "
+              f"glyph by glyph {single_ms:.1f} ms")
+
+# --- 18. GLYPH COMPONENTS ---
+
+def bench_components(consonants=36, matras=12):
+    """Devanagari-style reuse: every consonant+matra glyph built from a shared headline, body and matra."""
+    import random
+    import tempfile
+    from canvas import Component, GlyphOutline
+    from storage import create_project, VarnProject
+    from export import export_font
+    from glyphs import component_graph
+
+    rng = random.Random(21)
+    headline, bodies, marks = 0xE000, range(0xE001, 0xE001 + consonants), range(0xE100, 0xE100 + matras)
+    parts = {cp: handwritten_outline(rng, nodes=(20, 40)) for cp in (headline, *bodies, *marks)}
+    composites = {}
+    for i, body in enumerate(bodies):
+        for j, mark in enumerate(marks):
+            composites[0x0915 + i * 0x100 + j] = [Component(headline), Component(body), Component(mark, (1, 0, 0, 1, 500, 0))]
+
+    def resolve(cp):
+        return parts.get(cp)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sizes = {}
+        for kind in ("copied", "components"):
+            glyphs = {cp: outline.to_svg().encode() for cp, outline in parts.items()}
+            for cp, components in composites.items():
+                outline = GlyphOutline(components=components)
+                glyphs[cp] = (outline.flattened(resolve) if kind == "copied" else outline).to_svg().encode()
+            path = os.path.join(tmp, f"{kind}.varn")
+            create_project(path, "Components", "Devanagari", sorted(glyphs), glyphs).close()
+            with VarnProject(path) as project:
+                out = os.path.join(tmp, f"{kind}.ttf")
+                report = export_font(project, out, workers=0, save_cache=False)
+                sizes[kind] = (os.path.getsize(path), os.path.getsize(out), report.total())
+        for kind, (project_bytes, font_bytes, seconds) in sizes.items():
+            print(f"components ({len(composites)} glyphs {kind}): project {project_bytes / 1e3:7.0f} kB, "
+                  f".ttf {font_bytes / 1e3:7.0f} kB, export {seconds * 1000:6.0f} ms")
+
+        # Editing the headline: dependents are found from the graph and only go stale, nothing is rewritten.
+        with VarnProject(os.path.join(tmp, "components.varn")) as project:
+            graph = component_graph(project)
+            graph.sync()
+            project.save_glyph(headline, handwritten_outline(rng).to_svg().encode())
+            t0 = time.perf_counter()
+            stale = graph.dependents(headline)
+            for cp in stale:
+                graph.stamp(cp)
+            graph_ms = (time.perf_counter() - t0) * 1000
+            print(f"components: headline edit reaches {len(stale)} glyphs, dependents + stamps in {graph_ms:.1f} ms")
+
+# --- 19. INVALIDATION ---
+
+def bench_invalidation(glyph_count=2_000, dependents=40):
+    """One saved edit to a shared component: what gets redone, how fast, and how much stays on the GUI thread."""
+    import random
+    import tempfile
+    app = qt_app()
+    from canvas import Component
+    from storage import create_project
+    from export import export_font
+    import app as services
+    from ui import FontEditor
+
+    rng = random.Random(22)
+    base = 0xE000
+    glyphs = {base: handwritten_outline(rng).to_svg().encode()}
+    for i in range(glyph_count):
+        outline = handwritten_outline(rng)
+        if i % (glyph_count // dependents) == 0:
+            outline.components.append(Component(base))
+        glyphs[0x4E00 + i] = outline.to_svg().encode()
+    with tempfile.TemporaryDirectory() as tmp:
+        project = create_project(os.path.join(tmp, "bench.varn"), "Invalidation", "Han", sorted(glyphs), glyphs)
+        export_font(project, os.path.join(tmp, "out.ttf"), workers=0)
+        graph = services.invalidation()
+        graph.thumbnails = services.ThumbnailCache(os.path.join(tmp, "thumbs"))
+        graph.thumbnails.store(project.content_hash(), services.render_font_preview(project))
+        editor = FontEditor()
+        editor.resize(1000, 700)
+        editor.show()
+        editor.load_project(project)
+        app.processEvents()
+        tiles = services.glyph_tiles()
+
+        def settle():
+            while graph.pool.activeThreadCount() or graph.timer.isActive():
+                app.processEvents()
+                graph.pool.waitForDone(5)
+            app.processEvents()
+
+        settle()
+        visible = set(editor.visible_codepoints())
+        done = {}
+        graph.tile_ready.connect(lambda path, cp: done.setdefault("visible", time.perf_counter())
+                                 if visible and all((path, c) not in tiles.pending for c in visible) else None)
+        graph.thumbnail_ready.connect(lambda path, image: done.setdefault("thumbnail", time.perf_counter()))
+        for label in ("first edit", "next edit"):  # the first one also builds the component graph's reverse edges
+            graph.reset_stats()
+            tiles.reset_stats()
+            done.clear()
+            project.save_glyph(base, handwritten_outline(rng).to_svg().encode())
+            t0 = time.perf_counter()
+            editor.refresh_glyph(base)
+            gui_ms = (time.perf_counter() - t0) * 1000
+            graph.flush()
+            flush_ms = (time.perf_counter() - t0) * 1000 - gui_ms
+            settle()
+            total_ms = (time.perf_counter() - t0) * 1000
+            stats = graph.stats()
+            ready = "   ".join(f"{name} {(at - t0) * 1000:.0f} ms" for name, at in sorted(done.items(), key=lambda kv: kv[1]))
+            print(f"invalidation {label} ({glyph_count} glyphs, base used by {stats['dependents']}): "
+                  f"refresh_glyph {gui_ms:.2f} ms, flush {flush_ms:.1f} ms, all done {total_ms:.0f} ms   {ready}")
+            print(f"  redone: {stats['tiles_rendered']} tiles, {stats['thumbnail_cells']} thumbnail cells, "
+                  f"{stats['export_glyphs']} export glyphs; GUI-thread tile renders {tiles.stats()['renders']}")
+
+        report = export_font(project, os.path.join(tmp, "out.ttf"), workers=0, save_cache=False)
+        print(f"invalidation: export afterwards {report.total() * 1000:.0f} ms, {report.recompiled} glyphs recompiled")
+        editor.close()
+        project.close()
+
+# --- 20. HIT TESTING ---
+
+def bench_hit_test(sizes=(1_000, 10_000, 100_000), queries=200, linear_queries=10):
+    """Pick, rubber band and eraser queries on traced glyphs, against testing every segment."""
+    import random
+    from canvas import SegmentIndex
+
+    class LinearScan(SegmentIndex):
+        """The same exact tests, run on every segment of the glyph."""
+        def candidates(self, x0, y0, x1, y1):
+            return {(cid, n) for cid, (_, segments, _) in self.entries.items() for n in range(len(segments))}
+
+    for size in sizes:
+        rng = random.Random(size)
+        outline = traced_outline(rng, size * 3)
+        segment_count = outline.segment_count()
+        t0 = time.perf_counter()
+        index = SegmentIndex()
+        index.build(outline.contours)
+        build_ms = (time.perf_counter() - t0) * 1000
+        linear = LinearScan()
+        linear.build(outline.contours)
+
+        points = [(rng.uniform(0, 1000), rng.uniform(-200, 800)) for _ in range(queries)]
+        kinds = (
+            ("pick", lambda idx, x, y: idx.contour_at(x, y, 4)),
+            ("rubber band", lambda idx, x, y: idx.in_rect(x, y, x + 60, y + 60)),
+            ("eraser", lambda idx, x, y: idx.near_path([(x, y), (x + 15, y + 5)], 20)),
+        )
+        for name, query in kinds:
+            for label, idx, count in (("grid", index, queries), ("linear", linear, linear_queries)):
+                samples, tested = [], 0
+                for x, y in points[:count]:
+                    t0 = time.perf_counter()
+                    query(idx, x, y)
+                    samples.append((time.perf_counter() - t0) * 1000)
+                    tested += idx.tested
+                report(f"{name} {segment_count // 1000}k segs, {label}", samples)
+                print(f"  {tested / count:.0f} segments looked at per query")
+
+        stroke = outline.contours.pop()
+        samples = []
+        for _ in range(20):
+            t0 = time.perf_counter()
+            outline.contours.append(stroke)
+            index.sync(outline.contours, [stroke])
+            outline.contours.pop()
+            index.sync(outline.contours, [stroke])
+            samples.append((time.perf_counter() - t0) * 1000)
+        print(f"hit test {segment_count} segments: build {build_ms:.0f} ms, "
+              f"add + remove one contour {statistics.mean(samples):.3f} ms")
+
+# --- 21. BOOLEAN OPERATIONS ---
+
+def naive_boolean(subject, clip, op, tolerance=0.25):
+    """
+    Textbook clipping in pure Python, for comparison: flatten, test every edge
+    against every other, split, and classify each piece by casting a ray
+    against every edge. Returns the boundary pieces; linking and refitting
+    them (which canvas.boolean_contours also does) is not counted.
+    """
+    import math
+
+    def flatten(contour):
+        points = []
+        for segment in contour.segments():
+            pts = segment.points()
+            if len(pts) == 2:
+                points.append(pts[0])
+                continue
+            (x0, y0), (x1, y1), (x2, y2), (x3, y3) = pts
+            second = max(math.hypot(x0 - 2 * x1 + x2, y0 - 2 * y1 + y2), math.hypot(x1 - 2 * x2 + x3, y1 - 2 * y2 + y3))
+            steps = max(1, min(64, math.ceil(math.sqrt(0.75 * second / tolerance))))
+            for k in range(steps):
+                t = k / steps
+                s = 1 - t
+                points.append((s * s * s * x0 + 3 * s * s * t * x1 + 3 * s * t * t * x2 + t * t * t * x3,
+                               s * s * s * y0 + 3 * s * s * t * y1 + 3 * s * t * t * y2 + t * t * t * y3))
+        return points
+
+    edges = []
+    for operand, contours in enumerate((subject, clip)):
+        for contour in contours:
+            ring = flatten(contour)
+            edges += [(ring[k - 1], ring[k], operand) for k in range(len(ring))]
+    cuts = [[0.0, 1.0] for _ in edges]
+    for i, ((ax, ay), (bx, by), _) in enumerate(edges):
+        rx, ry = bx - ax, by - ay
+        for j in range(i + 1, len(edges)):
+            (cx, cy), (dx, dy), _ = edges[j]
+            sx, sy = dx - cx, dy - cy
+            denom = rx * sy - ry * sx
+            if denom == 0:
+                continue
+            qx, qy = cx - ax, cy - ay
+            t = (qx * sy - qy * sx) / denom
+            u = (qx * ry - qy * rx) / denom
+            if 0 < t < 1 and 0 < u < 1:
+                cuts[i].append(t)
+                cuts[j].append(u)
+
+    def winding(px, py):
+        counts = [0, 0]
+        for (ax, ay), (bx, by), operand in edges:
+            if (ay <= py < by or by <= py < ay) and ax + (py - ay) * (bx - ax) / (by - ay) > px:
+                counts[operand] += 1 if ay < by else -1
+        return counts
+
+    def filled(counts):
+        a, b = counts[0] != 0, counts[1] != 0
+        return {"union": a or b, "difference": a and not b, "intersection": a and b}[op]
+
+    pieces = []
+    for ((ax, ay), (bx, by), _), params in zip(edges, cuts):
+        params.sort()
+        length = math.hypot(bx - ax, by - ay) or 1
+        nx, ny = -(by - ay) / length * 1e-3, (bx - ax) / length * 1e-3
+        for t0, t1 in zip(params, params[1:]):
+            mx, my = ax + (t0 + t1) / 2 * (bx - ax), ay + (t0 + t1) / 2 * (by - ay)
+            if filled(winding(mx + nx, my + ny)) != filled(winding(mx - nx, my - ny)):
+                pieces.append(((ax + t0 * (bx - ax), ay + t0 * (by - ay)), (ax + t1 * (bx - ax), ay + t1 * (by - ay))))
+    return pieces
+
+def eraser_sweep(rng, width=40, samples=40):
+    """The outline a round eraser leaves along a wavy drag across the em square: one capsule per pointer step."""
+    import math
+    from canvas import Contour, UNION, boolean_contours
+
+    x0, y0 = rng.uniform(50, 200), rng.uniform(0, 600)
+    x1, y1 = rng.uniform(600, 950), rng.uniform(0, 600)
+    path = [(x0 + (x1 - x0) * k / samples, y0 + (y1 - y0) * k / samples + 60 * math.sin(k / 4)) for k in range(samples + 1)]
+    capsules = []
+    for (ax, ay), (bx, by) in zip(path, path[1:]):
+        angle = math.atan2(by - ay, bx - ax)
+        arc = [angle + math.pi / 2 + math.pi * k / 8 for k in range(9)]
+        capsules.append(Contour.from_points([(bx + width / 2 * math.cos(a), by + width / 2 * math.sin(a)) for a in arc]
+                                            + [(ax - width / 2 * math.cos(a), ay - width / 2 * math.sin(a)) for a in arc]))
+    return boolean_contours(capsules, (), UNION)
+
+def bench_boolean(node_targets=(200, 2_000, 20_000), runs=5, naive_runs=1):
+    """Eraser cuts and export overlap removal on handwritten and traced glyphs, against pure-Python clipping."""
+    import random
+    from canvas import DIFFERENCE, UNION, boolean_contours, flatten_rings, remove_overlaps
+
+    rng = random.Random(24)
+    glyphs = [handwritten_outline(rng, contours=(4, 6)) for _ in range(runs)]
+    sweeps = [eraser_sweep(rng) for _ in range(runs)]
+    for label, fast in (("vectorized", True), ("naive", False)):
+        samples = []
+        for glyph, sweep in list(zip(glyphs, sweeps))[:runs if fast else naive_runs]:
+            t0 = time.perf_counter()
+            if fast:
+                boolean_contours(glyph.contours, sweep, DIFFERENCE)
+            else:
+                naive_boolean(glyph.contours, sweep, "difference")
+            samples.append((time.perf_counter() - t0) * 1000)
+        report(f"eraser cut, handwritten glyph, {label}", samples)
+
+    for target in node_targets:
+        outline = traced_outline(random.Random(target), target)
+        edges = len(flatten_rings(outline.contours)[0])
+        for label, fast in (("vectorized", True), ("naive", False)):
+            if not fast and edges > 5_000:
+                print(f"overlap removal {edges} edges, naive: skipped (quadratic, tens of seconds)")
+                continue
+            samples = []
+            for _ in range(runs if fast else naive_runs):
+                t0 = time.perf_counter()
+                if fast:
+                    boolean_contours(outline.contours, (), UNION)
+                else:
+                    naive_boolean(outline.contours, (), "union")
+                samples.append((time.perf_counter() - t0) * 1000)
+            report(f"overlap removal {edges} edges, {label}", samples)
+            print(f"  {edges / statistics.mean(samples):.0f} edges per ms")
+
+    # Export: most handwritten glyphs have no overlapping contours and skip clipping entirely.
+    samples = []
+    for glyph in glyphs:
+        t0 = time.perf_counter()
+        remove_overlaps(glyph.contours)
+        samples.append((time.perf_counter() - t0) * 1000)
+    report("remove_overlaps, handwritten glyph", samples)
+
+# --- 22. PRESSURE STROKE CAPTURE ---
+
+def tablet_samples(rng, seconds=2.0, rate_hz=1000):
+    """A pen stroke as a tablet reports it: (x, y, pressure, tilt x, tilt y, time) at `rate_hz`."""
+    import math
+
+    count = int(seconds * rate_hz)
+    x0, y0 = rng.uniform(100, 300), rng.uniform(100, 500)
+    samples = []
+    for k in range(count):
+        t = k / rate_hz
+        samples.append((x0 + 300 * t + 60 * math.sin(t * 7), y0 + 120 * math.sin(t * 4) + rng.gauss(0, 0.3),
+                        min(1.0, max(0.0, 0.55 + 0.4 * math.sin(t * 3) + rng.gauss(0, 0.02))),
+                        rng.uniform(-30, 30), rng.uniform(-30, 30), t))
+    return samples
+
+def bench_stroke_capture(strokes=5, rate_hz=1000, width=40):
+    """Per-event cost of the capture ring, per-frame expansion and the final union, at tablet rates."""
+    import random
+    from canvas import StrokeCapture
+
+    rng = random.Random(25)
+    frame_every = int(rate_hz * FRAME_BUDGET_MS / 1000)
+    capture = StrokeCapture()
+    # The first merge imports NumPy; that happens once per session, not per stroke.
+    capture.begin(width, tolerance=1.0)
+    for sample in tablet_samples(rng, seconds=0.1, rate_hz=rate_hz):
+        capture.push(*sample)
+    capture.finish()
+    capture.reset_stats()
+    push_samples, finish_samples = [], []
+    for _ in range(strokes):
+        samples = tablet_samples(rng, rate_hz=rate_hz)
+        capture.begin(width, tolerance=1.0)
+        push = capture.push
+        for k, sample in enumerate(samples):
+            t0 = time.perf_counter()
+            push(*sample)
+            push_samples.append((time.perf_counter() - t0) * 1000)
+            if k % frame_every == frame_every - 1:
+                capture.frame()
+        capture.finish()
+        finish_samples.append(capture.finish_ms)
+    stats = capture.stats()
+    report("push per tablet event", push_samples)
+    print(f"  {stats['samples']} samples, {stats['frames']} frames, mean {stats['mean_frame_ms']:.2f} ms, "
+          f"max {stats['max_frame_ms']:.2f} ms per frame (budget {FRAME_BUDGET_MS:.1f} ms), {stats['dropped']} dropped")
+    report("final union per stroke", finish_samples)
+
+    # A GUI thread stalled for 0.5 s: a 256-sample ring keeps the oldest samples and counts the rest.
+    capture = StrokeCapture(capacity=256)
+    capture.begin(width, tolerance=1.0)
+    for sample in tablet_samples(rng, seconds=0.5, rate_hz=rate_hz):
+        capture.push(*sample)
+    capture.finish()
+    print(f"stalled frame with a 256-sample ring: {capture.stats()['dropped']} of {rate_hz // 2} samples dropped")
+
+BENCHMARKS = {
+    "glyph_grid": bench_glyph_grid,
+    "home_grid": bench_home_grid,
+    "project_open": bench_project_open,
+    "autosave": bench_autosave,
+    "compact_shared": bench_compact_shared,
+    "thumbnails": bench_thumbnails,
+    "glyph_tiles": bench_glyph_tiles,
+    "outline_memory": bench_outline_memory,
+    "stroke_fit": bench_stroke_fit,
+    "glyph_canvas": bench_glyph_canvas,
+    "undo": bench_undo,
+    "unicode_index": bench_unicode_index,
+    "glyph_search": bench_glyph_search,
+    "export": bench_export,
+    "startup": bench_startup,
+    "library": bench_library,
+    "library_watch": bench_library_watch,
+    "trace": bench_trace,
+    "sheet_import": bench_sheet_import,
+    "components": bench_components,
+    "invalidation": bench_invalidation,
+    "hit_test": bench_hit_test,
+    "boolean": bench_boolean,
+    "stroke_capture": bench_stroke_capture,
+}
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        BENCHMARKS[name]()
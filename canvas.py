@@ -0,0 +1,2009 @@
+import math
+import re
+import time
+from array import array
+
+# Drawing model for the glyph editor: vector outlines, tools and undo/redo.
+#
+# Nothing in here imports Qt, so export and the headless tools can use the
+# same geometry as the editor. Coordinates are font units, y up, origin on
+# the baseline. Points live in flat array('f') buffers (8 bytes per point plus
+# one byte for its kind) instead of tuples or QPointF objects.
+
+# --- 1. PATH MODEL ---
+
+ON_CURVE = 0
+OFF_CURVE = 1   # cubic control point; always in pairs between two on-curve points
+
+LINE = 0
+CURVE = 1
+
+class Segment:
+    """A view onto one line or cubic segment of a Contour; holds no coordinates itself."""
+    __slots__ = ("contour", "start", "kind")
+
+    def __init__(self, contour, start, kind):
+        self.contour = contour
+        self.start = start
+        self.kind = kind
+
+    def indices(self):
+        count = len(self.contour)
+        span = 4 if self.kind == CURVE else 2
+        return [(self.start + k) % count for k in range(span)]
+
+    def points(self):
+        point = self.contour.point
+        return [point(i) for i in self.indices()]
+
+    def bounds(self):
+        xs, ys = zip(*self.points())
+        return min(xs), min(ys), max(xs), max(ys)
+
+    def __repr__(self):
+        return f"Segment({'curve' if self.kind == CURVE else 'line'}, {self.points()})"
+
+class Contour:
+    """One closed (or open, while drawing) path: interleaved x,y floats plus a kind per point."""
+    __slots__ = ("coords", "kinds", "closed")
+
+    def __init__(self, coords=None, kinds=None, closed=True):
+        self.coords = coords if coords is not None else array("f")
+        self.kinds = kinds if kinds is not None else array("B")
+        self.closed = closed
+
+    @classmethod
+    def from_points(cls, points, kinds=None, closed=True):
+        coords = array("f")
+        for x, y in points:
+            coords.append(x)
+            coords.append(y)
+        kinds = array("B", kinds) if kinds is not None else array("B", bytes(len(coords) // 2))
+        return cls(coords, kinds, closed)
+
+    # -- Building --
+    def move_to(self, x, y):
+        self.coords.append(x)
+        self.coords.append(y)
+        self.kinds.append(ON_CURVE)
+
+    line_to = move_to
+
+    def curve_to(self, x1, y1, x2, y2, x, y):
+        self.coords.extend((x1, y1, x2, y2, x, y))
+        self.kinds.extend((OFF_CURVE, OFF_CURVE, ON_CURVE))
+
+    def close(self):
+        self.closed = True
+
+    # -- Access --
+    def __len__(self):
+        return len(self.kinds)
+
+    def point(self, i):
+        return self.coords[2 * i], self.coords[2 * i + 1]
+
+    def points(self):
+        c = self.coords
+        return [(c[i], c[i + 1]) for i in range(0, len(c), 2)]
+
+    def segments(self):
+        count = len(self.kinds)
+        if count < 2:
+            return
+        kinds = self.kinds
+        last = count if self.closed else count - 1
+        i = 0
+        while i < last:
+            if kinds[(i + 1) % count] == OFF_CURVE:
+                yield Segment(self, i, CURVE)
+                i += 3
+            else:
+                yield Segment(self, i, LINE)
+                i += 1
+
+    def bounds(self):
+        """Bounds of all points (control points included, so never too small)."""
+        xs = self.coords[0::2]
+        ys = self.coords[1::2]
+        return min(xs), min(ys), max(xs), max(ys)
+
+    def nbytes(self):
+        return self.coords.itemsize * len(self.coords) + self.kinds.itemsize * len(self.kinds)
+
+    def signed_area(self):
+        """Shoelace area of the point polygon (controls included): > 0 counter-clockwise, y up."""
+        c = self.coords
+        n = len(c)
+        if n < 6:
+            return 0.0
+        area = c[n - 2] * c[1] - c[0] * c[n - 1]
+        for i in range(0, n - 2, 2):
+            area += c[i] * c[i + 3] - c[i + 2] * c[i + 1]
+        return area / 2
+
+    # -- Editing --
+    def translate(self, dx, dy):
+        c = self.coords
+        for i in range(0, len(c), 2):
+            c[i] += dx
+            c[i + 1] += dy
+
+    def reverse(self):
+        """Flip direction in place. Closed contours keep their first point so kinds stay valid."""
+        points = self.points()
+        kinds = list(self.kinds)
+        if self.closed and points:
+            points = points[:1] + points[:0:-1]
+            kinds = kinds[:1] + kinds[:0:-1]
+        else:
+            points.reverse()
+            kinds.reverse()
+        self.coords = array("f", [v for p in points for v in p])
+        self.kinds = array("B", kinds)
+
+    def copy(self):
+        return Contour(array("f", self.coords), array("B", self.kinds), self.closed)
+
+    def __eq__(self, other):
+        return (isinstance(other, Contour) and self.closed == other.closed
+                and self.kinds == other.kinds and self.coords == other.coords)
+
+    def __repr__(self):
+        return f"Contour({len(self)} points, closed={self.closed})"
+
+IDENTITY = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+
+class Component:
+    """
+    A reference to another glyph's drawing, placed through an affine transform
+    (a, b, c, d, e, f) in font units: x' = a*x + c*y + e, y' = b*x + d*y + f,
+    the same order as fontTools and TrueType composites use.
+    """
+    __slots__ = ("codepoint", "transform")
+
+    def __init__(self, codepoint, transform=IDENTITY):
+        self.codepoint = codepoint
+        self.transform = tuple(float(v) for v in transform)
+
+    def apply(self, contour):
+        """A transformed copy of one of the base glyph's contours."""
+        a, b, c, d, e, f = self.transform
+        src = contour.coords
+        coords = array("f", bytes(4 * len(src)))
+        coords[0::2] = array("f", [a * x + c * y + e for x, y in zip(src[0::2], src[1::2])])
+        coords[1::2] = array("f", [b * x + d * y + f for x, y in zip(src[0::2], src[1::2])])
+        out = Contour(coords, array("B", contour.kinds), contour.closed)
+        if a * d - b * c < 0:
+            out.reverse()   # a mirrored component would otherwise wind the wrong way
+        return out
+
+    def copy(self):
+        return Component(self.codepoint, self.transform)
+
+    def __eq__(self, other):
+        return isinstance(other, Component) and self.codepoint == other.codepoint and self.transform == other.transform
+
+    def __repr__(self):
+        return f"Component(U+{self.codepoint:04X}, {self.transform})"
+
+class GlyphOutline:
+    """All contours of one glyph, the other glyphs it uses as components, and its advance width."""
+    __slots__ = ("contours", "advance", "components")
+
+    def __init__(self, contours=None, advance=1000, components=None):
+        self.contours = contours if contours is not None else []
+        self.advance = advance
+        self.components = components if components is not None else []
+
+    def add(self, contour):
+        self.contours.append(contour)
+        return contour
+
+    def node_count(self):
+        return sum(len(c) for c in self.contours)
+
+    def segment_count(self):
+        return sum(1 for c in self.contours for _ in c.segments())
+
+    def nbytes(self):
+        return sum(c.nbytes() for c in self.contours) + COMPONENT_BYTES * len(self.components)
+
+    def bounds(self):
+        boxes = [c.bounds() for c in self.contours if len(c)]
+        if not boxes:
+            return None
+        x0s, y0s, x1s, y1s = zip(*boxes)
+        return min(x0s), min(y0s), max(x1s), max(y1s)
+
+    def is_empty(self):
+        return not self.components and not any(len(c) for c in self.contours)
+
+    def copy(self):
+        return GlyphOutline([c.copy() for c in self.contours], self.advance, [c.copy() for c in self.components])
+
+    def flattened(self, resolve, _using=()):
+        """
+        A plain outline with every component replaced by its transformed contours.
+        resolve(codepoint) returns the base glyph's GlyphOutline, or None when it
+        is missing; nested components are followed, a cycle is cut where it closes.
+        """
+        flat = GlyphOutline([c.copy() for c in self.contours], self.advance)
+        for component in self.components:
+            if component.codepoint in _using:
+                continue
+            base = resolve(component.codepoint)
+            if base is None:
+                continue
+            if base.components:
+                base = base.flattened(resolve, (*_using, component.codepoint))
+            flat.contours.extend(component.apply(c) for c in base.contours if len(c))
+        return flat
+
+    def draw(self, pen):
+        """Replay the contours into a fontTools-style pen (moveTo / lineTo / curveTo / closePath)."""
+        for contour in self.contours:
+            if not len(contour):
+                continue
+            point = contour.point
+            pen.moveTo(point(0))
+            for segment in contour.segments():
+                indices = segment.indices()
+                if segment.kind == CURVE:
+                    pen.curveTo(point(indices[1]), point(indices[2]), point(indices[3]))
+                elif indices[1] != 0:   # the line back to the start is implied by closePath
+                    pen.lineTo(point(indices[1]))
+            if contour.closed:
+                pen.closePath()
+            else:
+                pen.endPath()
+
+    # -- SVG (glyphs/XXXX.svg) --
+    def to_svg(self, units_per_em=1000, ascender=800):
+        """SVG is y-down, so the outline is flipped around the ascender to fill a UPM square."""
+        parts = []
+        for contour in self.contours:
+            if not len(contour):
+                continue
+            c, kinds = contour.coords, contour.kinds
+            parts.append(f"M{_num(c[0])} {_num(ascender - c[1])}")
+            i, count = 1, len(kinds)
+            while i < count:
+                if kinds[i] == OFF_CURVE and i + 2 < count + (1 if contour.closed else 0):
+                    pts = [((i + k) % count) for k in range(3)]
+                    parts.append("C" + " ".join(f"{_num(c[2 * p])} {_num(ascender - c[2 * p + 1])}" for p in pts))
+                    i += 3
+                else:
+                    parts.append(f"L{_num(c[2 * i])} {_num(ascender - c[2 * i + 1])}")
+                    i += 1
+            if contour.closed:
+                parts.append("Z")
+        d = "".join(parts)
+        # Components are kept as references; renderers flatten them first (see glyphs.ComponentGraph).
+        uses = "".join(f'<use data-component="U+{c.codepoint:04X}" data-transform="{" ".join(map(_num, c.transform))}"/>'
+                       for c in self.components)
+        return (f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {units_per_em} {units_per_em}" '
+                f'data-advance="{_num(self.advance)}"><path fill-rule="nonzero" d="{d}"/>{uses}</svg>')
+
+    @classmethod
+    def from_svg(cls, svg, ascender=800):
+        if isinstance(svg, bytes):
+            svg = svg.decode("utf-8")
+        advance = _SVG_ADVANCE.search(svg)
+        outline = cls(advance=float(advance.group(1)) if advance else 1000)
+        for d in _SVG_PATH.findall(svg):
+            outline.contours.extend(parse_path_data(d, ascender))
+        for code, transform in _SVG_USE.findall(svg):
+            outline.components.append(Component(int(code, 16), map(float, transform.split())))
+        return outline
+
+def _num(value):
+    return f"{value:.2f}".rstrip("0").rstrip(".")
+
+_SVG_PATH = re.compile(r'<path[^>]*?\sd="([^"]*)"')
+_SVG_ADVANCE = re.compile(r'data-advance="([-\d.]+)"')
+_SVG_USE = re.compile(r'<use data-component="U\+([0-9A-Fa-f]+)" data-transform="([^"]*)"')
+_PATH_COMMAND = re.compile(r"([MLCQZHVmlcqzhv])([^MLCQZHVmlcqzhv]*)")
+_PATH_NUMBER = re.compile(r"-?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+
+_FAST_PATH = re.compile(r"[^MLCZ0-9\s.eE+\-]")
+_FAST_KINDS = {"M": b"\x00", "L": b"\x00", "C": b"\x01\x01\x00"}
+
+def parse_path_data(d, ascender=800, fast=True):
+    """Parse absolute/relative M, L, H, V, C, Q and Z commands into Contours (y flipped back up)."""
+    if fast and not _FAST_PATH.search(d):
+        return _parse_absolute_path(d, ascender)
+    contours = []
+    contour = None
+    x = y = 0.0
+    for command, args in _PATH_COMMAND.findall(d):
+        values = [float(v) for v in _PATH_NUMBER.findall(args)]
+        upper = command.upper()
+        relative = command != upper
+
+        if upper == "Z":
+            if contour is not None:
+                contour.closed = True
+                # A closing point that repeats the start is implied by Z.
+                if len(contour) > 1 and contour.kinds[-1] == ON_CURVE and contour.coords[-2:] == contour.coords[:2]:
+                    del contour.coords[-2:]
+                    del contour.kinds[-1]
+                x, y = contour.coords[0], ascender - contour.coords[1]
+            contour = None
+            continue
+
+        if contour is None and upper != "M":
+            contour = Contour(closed=False)
+            contours.append(contour)
+            contour.move_to(x, ascender - y)
+
+        coords, kinds = (contour.coords, contour.kinds) if contour is not None else (None, None)
+        if upper == "M":
+            for k in range(0, len(values) - 1, 2):
+                nx, ny = values[k], values[k + 1]
+                x, y = (x + nx, y + ny) if relative else (nx, ny)
+                if k == 0:
+                    contour = Contour(closed=False)
+                    contours.append(contour)
+                    coords, kinds = contour.coords, contour.kinds
+                coords.extend((x, ascender - y))
+                kinds.append(ON_CURVE)
+        elif upper == "L":
+            for k in range(0, len(values) - 1, 2):
+                nx, ny = values[k], values[k + 1]
+                x, y = (x + nx, y + ny) if relative else (nx, ny)
+                coords.extend((x, ascender - y))
+                kinds.append(ON_CURVE)
+        elif upper in "HV":
+            for v in values:
+                if upper == "H":
+                    x = x + v if relative else v
+                else:
+                    y = y + v if relative else v
+                coords.extend((x, ascender - y))
+                kinds.append(ON_CURVE)
+        elif upper == "C":
+            for k in range(0, len(values) - 5, 6):
+                ox, oy = (x, y) if relative else (0.0, 0.0)
+                x1, y1, x2, y2, x3, y3 = values[k:k + 6]
+                coords.extend((x1 + ox, ascender - (y1 + oy), x2 + ox, ascender - (y2 + oy),
+                               x3 + ox, ascender - (y3 + oy)))
+                kinds.extend((OFF_CURVE, OFF_CURVE, ON_CURVE))
+                x, y = x3 + ox, y3 + oy
+        elif upper == "Q":
+            # Elevate quadratics to cubics; the model only stores cubic controls.
+            for k in range(0, len(values) - 3, 4):
+                ox, oy = (x, y) if relative else (0.0, 0.0)
+                qx, qy, x3, y3 = values[k] + ox, values[k + 1] + oy, values[k + 2] + ox, values[k + 3] + oy
+                c1x, c1y = x + 2 / 3 * (qx - x), y + 2 / 3 * (qy - y)
+                c2x, c2y = x3 + 2 / 3 * (qx - x3), y3 + 2 / 3 * (qy - y3)
+                coords.extend((c1x, ascender - c1y, c2x, ascender - c2y, x3, ascender - y3))
+                kinds.extend((OFF_CURVE, OFF_CURVE, ON_CURVE))
+                x, y = x3, y3
+    return contours
+
+def _parse_absolute_path(d, ascender):
+    # What GlyphOutline.to_svg writes (absolute M/L/C/Z, one M per subpath):
+    # bulk-convert each subpath's numbers and build its kinds from the letters.
+    pieces = d.split("Z")
+    contours = []
+    for n, sub in enumerate(pieces):
+        letters = re.findall(r"[MLC]", sub)
+        if not letters:
+            continue
+        if letters[0] != "M" or letters.count("M") > 1:
+            return parse_path_data(d, ascender, fast=False)
+        values = [float(v) for v in _PATH_NUMBER.findall(sub)]
+        values[1::2] = [ascender - v for v in values[1::2]]
+        contour = Contour(array("f", values), array("B", b"".join(_FAST_KINDS[c] for c in letters)),
+                          closed=n < len(pieces) - 1)
+        if contour.closed and len(contour) > 1 and contour.kinds[-1] == ON_CURVE and contour.coords[-2:] == contour.coords[:2]:
+            del contour.coords[-2:]
+            del contour.kinds[-1]
+        contours.append(contour)
+    return contours
+
+# --- 2. STROKE FITTING ---
+# Freehand samples arrive at 100-1000 Hz. They are thinned, split at corners
+# (found with Ramer-Douglas-Peucker) and fitted with cubic Beziers (Schneider's
+# algorithm) so a stroke keeps a handful of nodes instead of every sample.
+
+DEFAULT_TOLERANCE = 2.0     # font units; one screen pixel on the default 500px canvas
+CORNER_ANGLE = 1.2          # radians; sharper turns in the RDP polyline become corners
+FIT_WINDOW = 128             # samples fitted at once while the stroke is being drawn
+
+def rdp(points, tolerance, first=0, last=None):
+    """Indices of the points Ramer-Douglas-Peucker keeps from points[first:last + 1]."""
+    if last is None:
+        last = len(points) - 1
+    if last - first < 2:
+        return list(range(first, last + 1))
+    tol_sq = tolerance * tolerance
+    keep = [first, last]
+    stack = [(first, last)]
+    while stack:
+        a, b = stack.pop()
+        ax, ay = points[a]
+        bx, by = points[b]
+        dx, dy = bx - ax, by - ay
+        length_sq = dx * dx + dy * dy
+        worst, worst_i = tol_sq, -1
+        for i in range(a + 1, b):
+            px, py = points[i]
+            if length_sq:
+                cross = (px - ax) * dy - (py - ay) * dx
+                d = cross * cross / length_sq
+            else:
+                d = (px - ax) ** 2 + (py - ay) ** 2
+            if d > worst:
+                worst, worst_i = d, i
+        if worst_i >= 0:
+            keep.append(worst_i)
+            stack.append((a, worst_i))
+            stack.append((worst_i, b))
+    keep.sort()
+    return keep
+
+def find_corners(points, tolerance, first=0, last=None):
+    """Sample indices where the stroke turns sharper than CORNER_ANGLE."""
+    kept = rdp(points, tolerance, first, last)
+    corners = []
+    for a, v, b in zip(kept, kept[1:], kept[2:]):
+        (ax, ay), (vx, vy), (bx, by) = points[a], points[v], points[b]
+        turn = math.atan2((vx - ax) * (by - vy) - (vy - ay) * (bx - vx), (vx - ax) * (bx - vx) + (vy - ay) * (by - vy))
+        if abs(turn) > CORNER_ANGLE:
+            corners.append(v)
+    return corners
+
+def fit_cubics(points, tolerance, first=0, last=None, left_tangent=None, right_tangent=None):
+    """
+    Fit points[first:last + 1] with as few cubics as keep every sample within
+    `tolerance`. Returns [(first, last, (p0, c1, c2, p3)), ...] so callers know
+    which samples each curve covers. Tangents are unit vectors pointing into the
+    curve at each end; by default they are estimated from the samples.
+    """
+    if last is None:
+        last = len(points) - 1
+    if last <= first:
+        return []
+    out = []
+    t1 = left_tangent or _end_tangent(points, first, last, 1, tolerance)
+    t2 = right_tangent or _end_tangent(points, last, first, -1, tolerance)
+    _fit(points, first, last, t1, t2, tolerance * tolerance, out)
+    return out
+
+def _unit(dx, dy):
+    length = (dx * dx + dy * dy) ** 0.5
+    return (dx / length, dy / length) if length > 1e-9 else None
+
+def _end_tangent(points, i, stop, step, tolerance):
+    # Look a few tolerances along the stroke rather than at the next (noisy) sample.
+    x, y = points[i]
+    reach_sq = (3 * tolerance) ** 2
+    j = i + step
+    while j != stop and (points[j][0] - x) ** 2 + (points[j][1] - y) ** 2 < reach_sq:
+        j += step
+    return _unit(points[j][0] - x, points[j][1] - y) or (1.0, 0.0)
+
+def _bezier_at(b, t):
+    (x0, y0), (x1, y1), (x2, y2), (x3, y3) = b
+    mt = 1 - t
+    a, c, d, e = mt * mt * mt, 3 * mt * mt * t, 3 * mt * t * t, t * t * t
+    return a * x0 + c * x1 + d * x2 + e * x3, a * y0 + c * y1 + d * y2 + e * y3
+
+def _chord_params(points, first, last):
+    u = [0.0]
+    total = 0.0
+    px, py = points[first]
+    for i in range(first + 1, last + 1):
+        x, y = points[i]
+        total += ((x - px) ** 2 + (y - py) ** 2) ** 0.5
+        u.append(total)
+        px, py = x, y
+    if total <= 0:
+        return [k / (last - first) for k in range(last - first + 1)]
+    return [v / total for v in u]
+
+def _generate_bezier(points, first, last, u, t1, t2):
+    (x0, y0), (x3, y3) = points[first], points[last]
+    c00 = c01 = c11 = r0 = r1 = 0.0
+    for k, t in enumerate(u):
+        mt = 1 - t
+        b0, b1, b2, b3 = mt * mt * mt, 3 * mt * mt * t, 3 * mt * t * t, t * t * t
+        a1x, a1y = t1[0] * b1, t1[1] * b1
+        a2x, a2y = t2[0] * b2, t2[1] * b2
+        c00 += a1x * a1x + a1y * a1y
+        c01 += a1x * a2x + a1y * a2y
+        c11 += a2x * a2x + a2y * a2y
+        px, py = points[first + k]
+        rx = px - (x0 * (b0 + b1) + x3 * (b2 + b3))
+        ry = py - (y0 * (b0 + b1) + y3 * (b2 + b3))
+        r0 += a1x * rx + a1y * ry
+        r1 += a2x * rx + a2y * ry
+    det = c00 * c11 - c01 * c01
+    alpha1 = (r0 * c11 - r1 * c01) / det if abs(det) > 1e-12 else 0.0
+    alpha2 = (c00 * r1 - c01 * r0) / det if abs(det) > 1e-12 else 0.0
+    chord = ((x3 - x0) ** 2 + (y3 - y0) ** 2) ** 0.5
+    if alpha1 < 1e-6 * chord or alpha2 < 1e-6 * chord:
+        # Degenerate least-squares solution: fall back to Wu/Barsky's heuristic.
+        alpha1 = alpha2 = chord / 3
+    return ((x0, y0), (x0 + t1[0] * alpha1, y0 + t1[1] * alpha1),
+            (x3 + t2[0] * alpha2, y3 + t2[1] * alpha2), (x3, y3))
+
+def _max_error(points, first, last, b, u):
+    worst, split = 0.0, (first + last) // 2
+    for k in range(1, last - first):
+        x, y = _bezier_at(b, u[k])
+        px, py = points[first + k]
+        d = (x - px) ** 2 + (y - py) ** 2
+        if d >= worst:
+            worst, split = d, first + k
+    return worst, split
+
+def _reparameterize(points, first, b, u):
+    (x0, y0), (x1, y1), (x2, y2), (x3, y3) = b
+    out = []
+    for k, t in enumerate(u):
+        # One Newton-Raphson step towards the curve point nearest the sample.
+        mt = 1 - t
+        qx, qy = _bezier_at(b, t)
+        d1x = 3 * (mt * mt * (x1 - x0) + 2 * mt * t * (x2 - x1) + t * t * (x3 - x2))
+        d1y = 3 * (mt * mt * (y1 - y0) + 2 * mt * t * (y2 - y1) + t * t * (y3 - y2))
+        d2x = 6 * (mt * (x2 - 2 * x1 + x0) + t * (x3 - 2 * x2 + x1))
+        d2y = 6 * (mt * (y2 - 2 * y1 + y0) + t * (y3 - 2 * y2 + y1))
+        px, py = points[first + k]
+        ex, ey = qx - px, qy - py
+        denominator = d1x * d1x + d1y * d1y + ex * d2x + ey * d2y
+        out.append(t - (ex * d1x + ey * d1y) / denominator if abs(denominator) > 1e-12 else t)
+    return out
+
+def _fit(points, first, last, t1, t2, error_sq, out):
+    if last - first == 1:
+        (x0, y0), (x3, y3) = points[first], points[last]
+        d = ((x3 - x0) ** 2 + (y3 - y0) ** 2) ** 0.5 / 3
+        out.append((first, last, ((x0, y0), (x0 + t1[0] * d, y0 + t1[1] * d),
+                                  (x3 + t2[0] * d, y3 + t2[1] * d), (x3, y3))))
+        return
+
+    u = _chord_params(points, first, last)
+    b = _generate_bezier(points, first, last, u, t1, t2)
+    error, split = _max_error(points, first, last, b, u)
+    if error <= error_sq:
+        out.append((first, last, b))
+        return
+    if error <= error_sq * 16:
+        for _ in range(4):
+            u = _reparameterize(points, first, b, u)
+            b = _generate_bezier(points, first, last, u, t1, t2)
+            error, split = _max_error(points, first, last, b, u)
+            if error <= error_sq:
+                out.append((first, last, b))
+                return
+
+    (ax, ay), (bx, by) = points[max(first, split - 2)], points[min(last, split + 2)]
+    center = _unit(ax - bx, ay - by) or (-t1[0], -t1[1])
+    _fit(points, first, split, t1, center, error_sq, out)
+    _fit(points, split, last, (-center[0], -center[1]), t2, error_sq, out)
+
+def _is_straight(b, tolerance):
+    (x0, y0), (x1, y1), (x2, y2), (x3, y3) = b
+    dx, dy = x3 - x0, y3 - y0
+    length = (dx * dx + dy * dy) ** 0.5
+    if length < 1e-9:
+        return False
+    limit = tolerance * 0.25 * length
+    return abs((x1 - x0) * dy - (y1 - y0) * dx) <= limit and abs((x2 - x0) * dy - (y2 - y0) * dx) <= limit
+
+class StrokeFitter:
+    """
+    Simplifies a freehand stroke while it is being drawn.
+
+    add_point() thins the samples and, once FIT_WINDOW of them have piled up,
+    fits that tail and freezes every curve but the last one. The frozen part is
+    never refitted, so the cost per sample stays flat however long the stroke
+    gets; finish() fits what is left and returns the stroke as an open Contour.
+    """
+    def __init__(self, tolerance=DEFAULT_TOLERANCE, window=FIT_WINDOW):
+        self.tolerance = tolerance
+        self.window = window
+        self.min_distance_sq = (tolerance * 0.5) ** 2
+        self.curves = []            # frozen (p0, c1, c2, p3) tuples
+        self.tail = []              # samples after the last frozen node
+        self.tangent = None         # direction leaving the last frozen node (None after a corner)
+        self.next_fit = window
+        self.sample_count = 0
+        self.skipped = None         # last thinned-out sample, so the stroke still ends under the pen
+
+    def add_point(self, x, y):
+        """Returns False when the sample was too close to the previous one to keep."""
+        self.sample_count += 1
+        tail = self.tail
+        if tail:
+            lx, ly = tail[-1]
+            if (x - lx) ** 2 + (y - ly) ** 2 < self.min_distance_sq:
+                self.skipped = (x, y)
+                return False
+        self.skipped = None
+        tail.append((x, y))
+        if len(tail) >= self.next_fit:
+            self._freeze()
+        return True
+
+    def _fit_tail(self):
+        tail, tolerance = self.tail, self.tolerance
+        last = len(tail) - 1
+        corners = find_corners(tail, tolerance)
+        bounds = [0] + corners + [last]
+        fitted = []
+        for k, (a, b) in enumerate(zip(bounds, bounds[1:])):
+            fitted.extend(fit_cubics(tail, tolerance, a, b, self.tangent if k == 0 else None))
+        return fitted, set(corners)
+
+    def _freeze(self):
+        fitted, corners = self._fit_tail()
+        if len(fitted) > 1:
+            keep = fitted[:-1]
+            start = fitted[-1][0]
+        else:
+            # One curve still covers the whole window; freeze it so the tail stays bounded.
+            keep = fitted
+            start = len(self.tail) - 1
+        self.curves.extend(b for _, _, b in keep)
+        (x2, y2), (x3, y3) = keep[-1][2][2], keep[-1][2][3]
+        self.tangent = None if start in corners else _unit(x3 - x2, y3 - y2)
+        self.tail = self.tail[start:]
+        self.next_fit = len(self.tail) + self.window // 2
+
+    def contour(self, tail_curves=True):
+        """The stroke so far. With tail_curves=False the unfitted tail is drawn as lines (cheap preview)."""
+        contour = Contour(closed=False)
+        start = self.curves[0][0] if self.curves else (self.tail[0] if self.tail else None)
+        if start is None:
+            return contour
+        contour.move_to(*start)
+        limit = self.tolerance
+        curves = self.curves
+        if tail_curves and len(self.tail) > 1:
+            fitted, _ = self._fit_tail()
+            curves = curves + [b for _, _, b in fitted]
+        for b in curves:
+            if _is_straight(b, limit):
+                contour.line_to(*b[3])
+            else:
+                contour.curve_to(*b[1], *b[2], *b[3])
+        if not tail_curves:
+            for x, y in self.tail[1:]:
+                contour.line_to(x, y)
+        return contour
+
+    def finish(self):
+        if self.skipped is not None:
+            self.tail.append(self.skipped)
+        contour = self.contour()
+        self.curves = []
+        self.tail = []
+        self.tangent = None
+        self.skipped = None
+        self.next_fit = self.window
+        return contour
+
+def fit_polygon(points, tolerance=DEFAULT_TOLERANCE, corners=None):
+    """
+    Fit a closed polygon (e.g. a flattened brush outline) with cubics: [(x, y), ...] -> closed Contour.
+    `corners` (sorted indices after 0) overrides the corner detection, e.g. to keep a clipped glyph's nodes.
+    """
+    if points[0] != points[-1]:
+        points = points + points[:1]
+    last = len(points) - 1
+    bounds = [0] + (find_corners(points, tolerance) if corners is None else [i for i in corners if 0 < i < last]) + [last]
+    contour = Contour()
+    contour.move_to(*points[0])
+    for a, b in zip(bounds, bounds[1:]):
+        for _, _, curve in fit_cubics(points, tolerance, a, b):
+            if _is_straight(curve, tolerance):
+                contour.line_to(*curve[3])
+            else:
+                contour.curve_to(*curve[1], *curve[2], *curve[3])
+    if len(contour) > 1 and contour.kinds[-1] == ON_CURVE:
+        del contour.coords[-2:]
+        del contour.kinds[-1]
+    return contour
+
+def simplify_stroke(points, tolerance=DEFAULT_TOLERANCE):
+    """Fit a finished stroke in one go: [(x, y), ...] -> open Contour."""
+    fitter = StrokeFitter(tolerance)
+    for x, y in points:
+        fitter.add_point(x, y)
+    return fitter.finish()
+
+# --- 3. UNDO / REDO ---
+# QUndoStack-style commands that record only what an edit changed. Consecutive
+# small edits (nudges, node drags) merge into one step, and every stack shares
+# one memory budget: the oldest steps are forgotten first.
+
+DEFAULT_UNDO_BUDGET = 16 * 1024 * 1024
+COMMAND_OVERHEAD = 96       # bytes for the command object itself (measured, see bench.py undo)
+COMPONENT_BYTES = 120       # one Component: object, codepoint and transform tuple
+
+MERGE_MOVE = 1
+MERGE_POINTS = 2
+MERGE_ADVANCE = 3
+
+class Command:
+    """One undoable edit. Subclasses keep a delta, never a copy of the glyph."""
+    __slots__ = ("text", "seq", "bytes_counted")
+    merge_id = -1           # commands with the same id >= 0 may merge into one step
+
+    def __init__(self, text):
+        self.text = text
+        self.seq = 0
+        self.bytes_counted = 0
+
+    def redo(self):
+        raise NotImplementedError
+
+    def undo(self):
+        raise NotImplementedError
+
+    def merge_with(self, other):
+        """Absorb `other` (already applied) into this command; False to keep separate steps."""
+        return False
+
+    def contours(self):
+        """Contours the edit touched, so views can refresh just those."""
+        return []
+
+    def nbytes(self):
+        return COMMAND_OVERHEAD
+
+class AddContours(Command):
+    __slots__ = ("outline", "added", "index")
+
+    def __init__(self, outline, contours, text="Draw"):
+        super().__init__(text)
+        self.outline = outline
+        self.added = list(contours)
+        self.index = len(outline.contours)
+
+    def redo(self):
+        self.outline.contours[self.index:self.index] = self.added
+
+    def undo(self):
+        del self.outline.contours[self.index:self.index + len(self.added)]
+
+    def contours(self):
+        return self.added
+
+    def nbytes(self):
+        return COMMAND_OVERHEAD + 8 * len(self.added) + sum(c.nbytes() for c in self.added)
+
+class RemoveContours(Command):
+    __slots__ = ("outline", "removed")
+
+    def __init__(self, outline, contours, text="Erase"):
+        super().__init__(text)
+        self.outline = outline
+        ids = set(map(id, contours))
+        self.removed = [(i, c) for i, c in enumerate(outline.contours) if id(c) in ids]
+
+    def redo(self):
+        for i, _ in reversed(self.removed):
+            del self.outline.contours[i]
+
+    def undo(self):
+        for i, contour in self.removed:
+            self.outline.contours.insert(i, contour)
+
+    def contours(self):
+        return [c for _, c in self.removed]
+
+    def nbytes(self):
+        return COMMAND_OVERHEAD + 16 * len(self.removed) + sum(c.nbytes() for _, c in self.removed)
+
+class ReplaceContours(Command):
+    """Swap some contours for others in one step (e.g. the eraser cutting them); the new ones go where the first old one was."""
+    __slots__ = ("outline", "removed", "added", "index")
+
+    def __init__(self, outline, contours, replacements, text="Erase"):
+        super().__init__(text)
+        self.outline = outline
+        ids = set(map(id, contours))
+        self.removed = [(i, c) for i, c in enumerate(outline.contours) if id(c) in ids]
+        self.added = list(replacements)
+        self.index = self.removed[0][0] if self.removed else len(outline.contours)
+
+    def redo(self):
+        for i, _ in reversed(self.removed):
+            del self.outline.contours[i]
+        self.outline.contours[self.index:self.index] = self.added
+
+    def undo(self):
+        del self.outline.contours[self.index:self.index + len(self.added)]
+        for i, contour in self.removed:
+            self.outline.contours.insert(i, contour)
+
+    def contours(self):
+        return [c for _, c in self.removed] + self.added
+
+    def nbytes(self):
+        return (COMMAND_OVERHEAD + 16 * len(self.removed) + 8 * len(self.added)
+                + sum(c.nbytes() for _, c in self.removed) + sum(c.nbytes() for c in self.added))
+
+class MoveContours(Command):
+    """Translate whole contours; repeated nudges of the same contours merge."""
+    __slots__ = ("moved", "dx", "dy")
+    merge_id = MERGE_MOVE
+
+    def __init__(self, contours, dx, dy, text="Move"):
+        super().__init__(text)
+        self.moved = list(contours)
+        self.dx = dx
+        self.dy = dy
+
+    def redo(self):
+        for contour in self.moved:
+            contour.translate(self.dx, self.dy)
+
+    def undo(self):
+        for contour in self.moved:
+            contour.translate(-self.dx, -self.dy)
+
+    def merge_with(self, other):
+        if len(other.moved) != len(self.moved) or any(a is not b for a, b in zip(self.moved, other.moved)):
+            return False
+        self.dx += other.dx
+        self.dy += other.dy
+        return True
+
+    def contours(self):
+        return self.moved
+
+    def nbytes(self):
+        return COMMAND_OVERHEAD + 8 * len(self.moved)
+
+class EditPoints(Command):
+    """New positions for some points of one contour (node drag); a continuing drag merges."""
+    __slots__ = ("contour", "indices", "before", "after")
+    merge_id = MERGE_POINTS
+
+    def __init__(self, contour, indices, positions, text="Edit points"):
+        super().__init__(text)
+        self.contour = contour
+        self.indices = array("I", indices)
+        c = contour.coords
+        self.before = array("f", [v for i in self.indices for v in (c[2 * i], c[2 * i + 1])])
+        self.after = array("f", [v for p in positions for v in p])
+
+    def apply(self, values):
+        c = self.contour.coords
+        for k, i in enumerate(self.indices):
+            c[2 * i] = values[2 * k]
+            c[2 * i + 1] = values[2 * k + 1]
+
+    def redo(self):
+        self.apply(self.after)
+
+    def undo(self):
+        self.apply(self.before)
+
+    def merge_with(self, other):
+        if other.contour is not self.contour or other.indices != self.indices:
+            return False
+        self.after = other.after
+        return True
+
+    def contours(self):
+        return [self.contour]
+
+    def nbytes(self):
+        return COMMAND_OVERHEAD + 4 * len(self.indices) + 4 * (len(self.before) + len(self.after))
+
+class SetAdvance(Command):
+    __slots__ = ("outline", "before", "after")
+    merge_id = MERGE_ADVANCE
+
+    def __init__(self, outline, advance, text="Advance width"):
+        super().__init__(text)
+        self.outline = outline
+        self.before = outline.advance
+        self.after = advance
+
+    def redo(self):
+        self.outline.advance = self.after
+
+    def undo(self):
+        self.outline.advance = self.before
+
+    def merge_with(self, other):
+        if other.outline is not self.outline:
+            return False
+        self.after = other.after
+        return True
+
+class SetComponents(Command):
+    """Replace the glyph's component references (add, remove or re-place them)."""
+    __slots__ = ("outline", "before", "after")
+
+    def __init__(self, outline, components, text="Edit components"):
+        super().__init__(text)
+        self.outline = outline
+        self.before = list(outline.components)
+        self.after = list(components)
+
+    def redo(self):
+        self.outline.components[:] = self.after
+
+    def undo(self):
+        self.outline.components[:] = self.before
+
+    def nbytes(self):
+        return COMMAND_OVERHEAD + COMPONENT_BYTES * (len(self.before) + len(self.after))
+
+class ReplaceGlyph(Command):
+    """Font-level step: one glyph's saved drawing, before and after (None = undrawn)."""
+    __slots__ = ("project", "codepoint", "before", "after")
+
+    def __init__(self, project, codepoint, before, after, text="Edit glyph"):
+        super().__init__(text)
+        self.project = project
+        self.codepoint = codepoint
+        self.before = before
+        self.after = after
+
+    def write(self, svg):
+        if svg:
+            self.project.save_glyph(self.codepoint, svg)
+        elif self.project.has_glyph(self.codepoint):
+            self.project.delete_glyph(self.codepoint)
+
+    def redo(self):
+        self.write(self.after)
+
+    def undo(self):
+        self.write(self.before)
+
+    def nbytes(self):
+        return COMMAND_OVERHEAD + len(self.before or b"") + len(self.after or b"")
+
+class ReplaceGlyphs(Command):
+    """Font-level step over many glyphs at once (e.g. a batch import), journaled as one transaction."""
+    __slots__ = ("project", "before", "after")
+
+    def __init__(self, project, before, after, text="Import glyphs"):
+        super().__init__(text)
+        self.project = project
+        self.before = before    # {codepoint: svg or None}
+        self.after = after
+
+    @property
+    def codepoints(self):
+        return list(self.after)
+
+    def redo(self):
+        self.project.save_glyphs(self.after)
+
+    def undo(self):
+        # Glyphs that were undrawn before stay untouched if they are still undrawn.
+        self.project.save_glyphs({cp: svg for cp, svg in self.before.items() if svg or self.project.has_glyph(cp)})
+
+    def nbytes(self):
+        return COMMAND_OVERHEAD + sum(len(svg or b"") for svg in (*self.before.values(), *self.after.values()))
+
+class UndoStack:
+    """
+    Linear history like QUndoStack: push() applies a command, undo()/redo() move
+    through it, and pushing after an undo drops the redo tail. Listeners are
+    called with the command that just ran (or None after clear/eviction).
+    `subject` is whatever the commands edit, e.g. the glyph's GlyphOutline.
+    """
+    def __init__(self, name="", history=None):
+        self.name = name
+        self.history = history
+        self.subject = None
+        self.commands = []
+        self.index = 0          # commands[:index] are applied
+        self.clean_index = 0
+        self.bytes = 0
+        self.listeners = []
+
+    def notify(self, command):
+        for listener in self.listeners:
+            listener(command)
+
+    def push(self, command):
+        command.redo()
+        for dropped in self.commands[self.index:]:
+            self.bytes -= dropped.nbytes()
+        del self.commands[self.index:]
+        if self.clean_index > self.index:
+            self.clean_index = -1   # the clean state was in the dropped redo tail
+
+        top = self.commands[-1] if self.commands else None
+        if (top is not None and command.merge_id >= 0 and top.merge_id == command.merge_id
+                and self.index != self.clean_index and top.merge_with(command)):
+            self.bytes -= top.bytes_counted
+            command = top
+        else:
+            self.commands.append(command)
+            self.index += 1
+        command.seq = self.history.next_seq() if self.history is not None else 0
+        command.bytes_counted = command.nbytes()
+        self.bytes += command.bytes_counted
+        if self.history is not None:
+            self.history.enforce_budget()
+        self.notify(command)
+
+    def undo(self):
+        if not self.can_undo():
+            return None
+        self.index -= 1
+        command = self.commands[self.index]
+        command.undo()
+        self.notify(command)
+        return command
+
+    def redo(self):
+        if not self.can_redo():
+            return None
+        command = self.commands[self.index]
+        command.redo()
+        self.index += 1
+        self.notify(command)
+        return command
+
+    def can_undo(self):
+        return self.index > 0
+
+    def can_redo(self):
+        return self.index < len(self.commands)
+
+    def undo_text(self):
+        return self.commands[self.index - 1].text if self.can_undo() else ""
+
+    def redo_text(self):
+        return self.commands[self.index].text if self.can_redo() else ""
+
+    def set_clean(self):
+        self.clean_index = self.index
+
+    def is_clean(self):
+        return self.index == self.clean_index
+
+    def oldest_seq(self):
+        return self.commands[0].seq if self.commands else None
+
+    def drop_oldest(self):
+        """Forget the oldest step (it can no longer be undone). Returns bytes freed."""
+        if self.index == 0:
+            # Everything here is undone; the redo tail can't be replayed without its first step.
+            freed = self.bytes
+            self.commands = []
+            self.clean_index = 0 if self.clean_index == 0 else -1
+            self.bytes = 0
+            return freed
+        command = self.commands.pop(0)
+        self.bytes -= command.bytes_counted
+        self.index -= 1
+        self.clean_index = self.clean_index - 1 if self.clean_index > 0 else -1
+        return command.bytes_counted
+
+    def clear(self):
+        self.commands = []
+        self.index = self.clean_index = 0
+        self.bytes = 0
+        self.notify(None)
+
+    def __len__(self):
+        return len(self.commands)
+
+class UndoHistory:
+    """
+    All undo stacks of one open font: a font-level stack (glyph saves, imports)
+    plus one stack per glyph, created on first edit. They share `budget_bytes`;
+    when history grows past it, the globally oldest steps are evicted.
+    """
+    def __init__(self, budget_bytes=DEFAULT_UNDO_BUDGET):
+        self.budget_bytes = budget_bytes
+        self.seq = 0
+        self.font = UndoStack("font", self)
+        self.glyphs = {}
+        self.evicted = 0
+
+    def next_seq(self):
+        self.seq += 1
+        return self.seq
+
+    def glyph(self, codepoint):
+        stack = self.glyphs.get(codepoint)
+        if stack is None:
+            stack = self.glyphs[codepoint] = UndoStack(f"U+{codepoint:04X}", self)
+        return stack
+
+    def drop_glyph(self, codepoint):
+        """Forget a glyph's history, e.g. after a font-level step replaced its drawing."""
+        stack = self.glyphs.pop(codepoint, None)
+        if stack is not None:
+            stack.clear()
+
+    def stacks(self):
+        return [self.font, *self.glyphs.values()]
+
+    def total_bytes(self):
+        return sum(s.bytes for s in self.stacks())
+
+    def enforce_budget(self):
+        total = self.total_bytes()
+        while total > self.budget_bytes:
+            # The step just pushed always stays, so the last action can be undone.
+            candidates = [s for s in self.stacks() if s.commands and s.oldest_seq() != self.seq]
+            if not candidates:
+                break
+            oldest = min(candidates, key=UndoStack.oldest_seq)
+            total -= oldest.drop_oldest()
+            self.evicted += 1
+            oldest.notify(None)
+
+    def stats(self):
+        steps = sum(len(s) for s in self.stacks())
+        total = self.total_bytes()
+        return {
+            "stacks": len(self.glyphs) + 1, "steps": steps, "bytes": total,
+            "bytes_per_step": total / steps if steps else 0, "evicted": self.evicted,
+        }
+
+# --- 4. HIT TESTING ---
+# The selection and eraser tools ask "what is under the pointer" on every
+# mouse move. A uniform grid over the segments' bounding boxes answers from
+# the few cells around the pointer, so the cost follows how crowded that spot
+# is rather than how many segments the glyph has. The grid is kept current
+# from each command's touched contours instead of being rebuilt.
+
+HIT_CELL = 16.0     # font units per grid cell; traced glyphs put a few segments in each
+
+def _flatten(points, kind):
+    """A segment as a polyline: a line as is, a cubic sampled finely enough for picking."""
+    if kind == LINE:
+        return points
+    (x0, y0), (x1, y1), (x2, y2), (x3, y3) = points
+    length = math.hypot(x1 - x0, y1 - y0) + math.hypot(x2 - x1, y2 - y1) + math.hypot(x3 - x2, y3 - y2)
+    n = max(2, min(16, int(length / 8) + 1))
+    out = []
+    for k in range(n + 1):
+        t = k / n
+        s = 1 - t
+        a, b, c, d = s * s * s, 3 * s * s * t, 3 * s * t * t, t * t * t
+        out.append((a * x0 + b * x1 + c * x2 + d * x3, a * y0 + b * y1 + c * y2 + d * y3))
+    return out
+
+def _point_segment_distance(px, py, ax, ay, bx, by):
+    dx, dy = bx - ax, by - ay
+    length_sq = dx * dx + dy * dy
+    t = 0.0 if length_sq == 0 else max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length_sq))
+    return math.hypot(px - ax - t * dx, py - ay - t * dy)
+
+def _segments_cross(a, b, c, d):
+    def side(p, q, r):
+        return (q[0] - p[0]) * (r[1] - p[1]) - (q[1] - p[1]) * (r[0] - p[0])
+    d1, d2, d3, d4 = side(c, d, a), side(c, d, b), side(a, b, c), side(a, b, d)
+    return (d1 > 0) != (d2 > 0) and (d3 > 0) != (d4 > 0)
+
+def _segment_distance(a, b, c, d):
+    """Shortest distance between line segments ab and cd."""
+    if _segments_cross(a, b, c, d):
+        return 0.0
+    return min(_point_segment_distance(*a, *c, *d), _point_segment_distance(*b, *c, *d),
+               _point_segment_distance(*c, *a, *b), _point_segment_distance(*d, *a, *b))
+
+def _line_hits_rect(a, b, x0, y0, x1, y1):
+    """Liang-Barsky: does segment ab reach into the rectangle?"""
+    (ax, ay), (bx, by) = a, b
+    t0, t1 = 0.0, 1.0
+    dx, dy = bx - ax, by - ay
+    for p, q in ((-dx, ax - x0), (dx, x1 - ax), (-dy, ay - y0), (dy, y1 - ay)):
+        if p == 0:
+            if q < 0:
+                return False
+        else:
+            t = q / p
+            if p < 0:
+                t0 = max(t0, t)
+            else:
+                t1 = min(t1, t)
+            if t0 > t1:
+                return False
+    return True
+
+class SegmentIndex:
+    """
+    Uniform grid of segment bounding boxes for a glyph's contours. add(),
+    remove() and sync() keep it current one contour at a time; the queries
+    look only at the segments in the cells they touch. `tested` counts the
+    segments the last query looked at.
+    """
+    def __init__(self, cell=HIT_CELL):
+        self.cell = cell
+        self.cells = {}         # (cx, cy) -> {contour id: [segment numbers]}
+        self.entries = {}       # contour id -> (contour, [(start, kind, box)], cell keys)
+        self.segment_count = 0
+        self.max_cx = None      # rightmost column ever used, where inside tests stop
+        self.tested = 0
+
+    def __len__(self):
+        return self.segment_count
+
+    def cell_range(self, x0, y0, x1, y1):
+        size = self.cell
+        return math.floor(x0 / size), math.floor(y0 / size), math.floor(x1 / size), math.floor(y1 / size)
+
+    def build(self, contours):
+        self.cells = {}
+        self.entries = {}
+        self.segment_count = 0
+        self.max_cx = None
+        for contour in contours:
+            self.add(contour)
+
+    def add(self, contour):
+        cid = id(contour)
+        if cid in self.entries:
+            self.remove(contour)
+        segments = []
+        keys = set()
+        cells = self.cells
+        for n, segment in enumerate(contour.segments()):
+            box = segment.bounds()
+            segments.append((segment.start, segment.kind, box))
+            cx0, cy0, cx1, cy1 = self.cell_range(*box)
+            for cx in range(cx0, cx1 + 1):
+                for cy in range(cy0, cy1 + 1):
+                    key = (cx, cy)
+                    keys.add(key)
+                    cells.setdefault(key, {}).setdefault(cid, []).append(n)
+            if self.max_cx is None or cx1 > self.max_cx:
+                self.max_cx = cx1
+        self.entries[cid] = (contour, segments, keys)
+        self.segment_count += len(segments)
+
+    def remove(self, contour):
+        entry = self.entries.pop(id(contour), None)
+        if entry is None:
+            return
+        _, segments, keys = entry
+        for key in keys:
+            cell = self.cells[key]
+            del cell[id(contour)]
+            if not cell:
+                del self.cells[key]
+        self.segment_count -= len(segments)
+
+    def sync(self, contours, touched):
+        """Re-index the contours an edit touched (Command.contours()); `contours` is the outline's list now."""
+        current = set(map(id, contours))
+        for contour in touched:
+            if id(contour) in current:
+                self.add(contour)
+            else:
+                self.remove(contour)
+
+    def candidates(self, x0, y0, x1, y1):
+        """(contour id, segment number) pairs whose cells overlap the box, each once."""
+        found = set()
+        cells = self.cells
+        cx0, cy0, cx1, cy1 = self.cell_range(x0, y0, x1, y1)
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                cell = cells.get((cx, cy))
+                if cell:
+                    for cid, numbers in cell.items():
+                        found.update((cid, n) for n in numbers)
+        return found
+
+    def polyline(self, cid, n):
+        contour, segments, _ = self.entries[cid]
+        start, kind, _ = segments[n]
+        return _flatten(Segment(contour, start, kind).points(), kind)
+
+    # -- Queries --
+    def segment_at(self, x, y, radius):
+        """The nearest (contour, Segment) within `radius` of the point, or None."""
+        best, best_distance = None, radius
+        found = self.candidates(x - radius, y - radius, x + radius, y + radius)
+        self.tested = len(found)
+        for cid, n in found:
+            box = self.entries[cid][1][n][2]
+            if box[0] - radius > x or box[2] + radius < x or box[1] - radius > y or box[3] + radius < y:
+                continue
+            line = self.polyline(cid, n)
+            distance = min(_point_segment_distance(x, y, *a, *b) for a, b in zip(line, line[1:]))
+            if distance <= best_distance:
+                best, best_distance = (cid, n), distance
+        if best is None:
+            return None
+        contour, segments, _ = self.entries[best[0]]
+        start, kind, _ = segments[best[1]]
+        return contour, Segment(contour, start, kind)
+
+    def winding(self, x, y):
+        """{contour id: winding number} of the contours around the point, from a ray cast towards +x."""
+        if self.max_cx is None:
+            return {}
+        numbers = {}
+        found = self.candidates(x, y, self.max_cx * self.cell + self.cell, y)
+        self.tested += len(found)
+        for cid, n in found:
+            box = self.entries[cid][1][n][2]
+            if box[2] < x or box[1] > y or box[3] < y:
+                continue
+            line = self.polyline(cid, n)
+            for (ax, ay), (bx, by) in zip(line, line[1:]):
+                if ay <= y < by and (bx - ax) * (y - ay) - (x - ax) * (by - ay) > 0:
+                    numbers[cid] = numbers.get(cid, 0) + 1
+                elif by <= y < ay and (bx - ax) * (y - ay) - (x - ax) * (by - ay) < 0:
+                    numbers[cid] = numbers.get(cid, 0) - 1
+        return {cid: w for cid, w in numbers.items() if w}
+
+    def contour_at(self, x, y, radius):
+        """
+        The contour to pick at a point: the one whose edge is nearest within
+        `radius`, else the smallest contour the point lies inside, else None.
+        """
+        hit = self.segment_at(x, y, radius)
+        if hit is not None:
+            return hit[0]
+        inside = self.winding(x, y)
+        if not inside:
+            return None
+        return min((self.entries[cid][0] for cid in inside), key=lambda c: abs(c.signed_area()))
+
+    def in_rect(self, x0, y0, x1, y1):
+        """Contours with a segment reaching into the rectangle (rubber-band selection)."""
+        hits = set()
+        found = self.candidates(x0, y0, x1, y1)
+        self.tested = len(found)
+        for cid, n in found:
+            if cid in hits:
+                continue
+            box = self.entries[cid][1][n][2]
+            if box[0] > x1 or box[2] < x0 or box[1] > y1 or box[3] < y0:
+                continue
+            if box[0] >= x0 and box[2] <= x1 and box[1] >= y0 and box[3] <= y1:
+                hits.add(cid)
+                continue
+            line = self.polyline(cid, n)
+            if any(_line_hits_rect(a, b, x0, y0, x1, y1) for a, b in zip(line, line[1:])):
+                hits.add(cid)
+        return [self.entries[cid][0] for cid in hits]
+
+    def near_path(self, points, radius):
+        """Contours with a segment within `radius` of the polyline `points` (an eraser sweep)."""
+        hits = set()
+        self.tested = 0
+        if len(points) == 1:
+            points = [points[0], points[0]]
+        for a, b in zip(points, points[1:]):
+            x0, x1 = min(a[0], b[0]) - radius, max(a[0], b[0]) + radius
+            y0, y1 = min(a[1], b[1]) - radius, max(a[1], b[1]) + radius
+            found = self.candidates(x0, y0, x1, y1)
+            self.tested += len(found)
+            for cid, n in found:
+                if cid in hits:
+                    continue
+                box = self.entries[cid][1][n][2]
+                if box[0] > x1 or box[2] < x0 or box[1] > y1 or box[3] < y0:
+                    continue
+                line = self.polyline(cid, n)
+                if any(_segment_distance(a, b, c, d) <= radius for c, d in zip(line, line[1:])):
+                    hits.add(cid)
+        return [self.entries[cid][0] for cid in hits]
+
+# --- 5. BOOLEAN OPERATIONS ---
+# Union, difference and intersection of contour sets under the nonzero rule:
+# the eraser cuts the swept brush out of the glyph, and export merges
+# overlapping strokes into one outline. The bulk work is vectorized NumPy,
+# imported only when an operation runs so that opening the app does not pay
+# for it:
+#
+#   contours ──flatten──> rings ──sweep and prune──> crossings ──split──>
+#       sub-edges ──winding on both sides──> boundary ──link──> contours
+#
+# Contours nothing crosses or touches are kept or dropped whole, curves
+# intact; only the ones that were cut are fitted back from their polygons.
+
+UNION = "union"
+DIFFERENCE = "difference"
+INTERSECTION = "intersection"
+
+FLATTEN_TOLERANCE = 0.25    # font units a flattened curve may stray from the drawn one
+SNAP = 1 / 256              # grid that vertices and crossings are rounded to, so shared points compare equal
+WINDING_PAIRS = 1 << 22     # (sample, edge) pairs tested per vectorized ray-casting block
+
+def flatten_rings(contours, tolerance=FLATTEN_TOLERANCE):
+    """
+    Contours -> (vertices, ring, node) arrays: the (n, 2) vertices of every
+    contour flattened into chords, each curve cut into as many as Wang's
+    formula asks for, the index of the contour each vertex belongs to, and
+    whether it is one of the contour's on-curve points. Open contours are
+    treated as closed; contours with fewer than two points are skipped.
+    """
+    import numpy as np
+    contours = [c if len(c) > 1 else Contour() for c in contours]
+    if not any(contours):
+        return np.empty((0, 2)), np.empty(0, dtype=np.int64), np.empty(0, dtype=bool)
+    sizes = np.array([len(c) for c in contours])
+    base = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    base[sizes == 0] = -1      # never matched below: empty contours own no points
+    xy = np.concatenate([np.frombuffer(c.coords, dtype=np.float32) for c in contours]).astype(np.float64).reshape(-1, 2)
+    kinds = np.concatenate([np.frombuffer(c.kinds, dtype=np.uint8) for c in contours])
+
+    on = np.flatnonzero(kinds == ON_CURVE)
+    ring = np.searchsorted(base, on, side="right") - 1
+    local = on - base[ring]
+    following = np.roll(on, -1)
+    last = ring != np.roll(ring, -1)
+    following[last] = on[np.searchsorted(ring, ring[last])]   # the ring's first on-curve point
+    c1 = base[ring] + (local + 1) % sizes[ring]
+    c2 = base[ring] + (local + 2) % sizes[ring]
+    curve = kinds[c1] == OFF_CURVE
+    p0, p1, p2, p3 = xy[on], xy[c1], xy[c2], xy[following]
+
+    # Wang's formula: chords needed for a cubic to stay within `tolerance`.
+    second = np.maximum(np.hypot(*(p0 - 2 * p1 + p2).T), np.hypot(*(p1 - 2 * p2 + p3).T))
+    steps = np.where(curve, np.clip(np.ceil(np.sqrt(0.75 * second / tolerance)), 1, 64), 1).astype(np.int64)
+    segment = np.repeat(np.arange(len(on)), steps)
+    start = np.cumsum(steps) - steps
+    k = np.arange(len(segment)) - start[segment]
+    t = (k / steps[segment])[:, None]
+    s = 1 - t
+    points = (s * s * s * p0[segment] + 3 * s * s * t * p1[segment]
+              + 3 * s * t * t * p2[segment] + t * t * t * p3[segment])
+    return points, ring[segment], k == 0
+
+def _ring_next(ring):
+    """Index of each vertex's successor within its ring."""
+    import numpy as np
+    following = np.arange(1, len(ring) + 1)
+    last = np.flatnonzero(ring != np.append(ring[1:], -1))
+    first = np.concatenate(([0], last[:-1] + 1))
+    following[last] = first
+    return following
+
+def _snap(points):
+    import numpy as np
+    return np.round(points / SNAP) * SNAP
+
+def _clean_rings(points, ring, node):
+    """Snap vertices to the grid, drop repeated ones and rings left with fewer than three."""
+    import numpy as np
+    points = _snap(points)
+    while len(points):
+        keep = np.any(points != points[_ring_next(ring)], axis=1)
+        if keep.all():
+            break
+        points, ring, node = points[keep], ring[keep], node[keep]
+    if len(ring):
+        counts = np.bincount(ring)
+        keep = counts[ring] >= 3
+        points, ring, node = points[keep], ring[keep], node[keep]
+    return points, ring, node
+
+def _cross(ax, ay, bx, by):
+    return ax * by - ay * bx
+
+def _expand(counts):
+    """For rows repeated `counts` times: (row, 0-based position within its run) per output row."""
+    import numpy as np
+    row = np.repeat(np.arange(len(counts)), counts)
+    return row, np.arange(len(row)) - np.repeat(np.cumsum(counts) - counts, counts)
+
+def _box_pairs(lo, hi):
+    """
+    Every pair (i, j), i != j, of boxes that overlap, each once. Boxes are
+    bucketed into a uniform grid sized for a handful per cell; a pair is
+    reported by the cell holding the lower-left corner of its overlap.
+    """
+    import numpy as np
+    width, height = (hi.max(axis=0) - lo.min(axis=0)).tolist()
+    size = max(math.sqrt(max(width * height, 1.0) / len(lo)) * 4, float(np.median(hi - lo)) * 2, SNAP)
+    origin = lo.min(axis=0)
+    first = ((lo - origin) // size).astype(np.int64)
+    last = ((hi - origin) // size).astype(np.int64)
+    span = last - first + 1
+    box, k = _expand(span[:, 0] * span[:, 1])
+    cx = first[box, 0] + k % span[box, 0]
+    cy = first[box, 1] + k // span[box, 0]
+    key = cx * (last[:, 1].max() + 2) + cy
+    order = np.argsort(key, kind="stable")
+    box, key = box[order], key[order]
+    group_end = np.searchsorted(key, key, side="right")
+    row, k = _expand(group_end - np.arange(len(key)) - 1)
+    i, j = box[row], box[row + 1 + k]
+    corner = ((np.maximum(lo[i], lo[j]) - origin) // size).astype(np.int64)
+    own = (corner[:, 0] * (last[:, 1].max() + 2) + corner[:, 1]) == key[row]
+    i, j = i[own], j[own]
+    overlap = np.all(np.maximum(lo[i], lo[j]) <= np.minimum(hi[i], hi[j]), axis=1)
+    return i[overlap], j[overlap]
+
+def _crossings(a, b):
+    """
+    Edges ab that cross or touch: candidate pairs from overlapping boxes,
+    then the exact test. Returns (edge, t, point) rows splitting edges at
+    interior crossings, collinear overlaps included, the edge pairs that meet
+    at all, and (edge, other edge, at end) rows where another edge passes
+    through one of an edge's end points.
+    """
+    import numpy as np
+    i, j = _box_pairs(np.minimum(a, b), np.maximum(a, b))
+
+    r = b[i] - a[i]
+    s = b[j] - a[j]
+    q = a[j] - a[i]
+    denom = _cross(r[:, 0], r[:, 1], s[:, 0], s[:, 1])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = _cross(q[:, 0], q[:, 1], s[:, 0], s[:, 1]) / denom
+        u = _cross(q[:, 0], q[:, 1], r[:, 0], r[:, 1]) / denom
+    proper = (denom != 0) & (t >= 0) & (t <= 1) & (u >= 0) & (u <= 1)
+    split_edge, split_t, split_point = [], [], []
+    point = _snap(a[i[proper]] + t[proper, None] * r[proper])
+    for edge, param in ((i[proper], t[proper]), (j[proper], u[proper])):
+        inside = (param > 0) & (param < 1)
+        split_edge.append(edge[inside])
+        split_t.append(param[inside])
+        split_point.append(point[inside])
+    touching = [np.stack((i[proper], j[proper]), axis=1)]
+    vertex = []
+    for edge, other, param in ((i[proper], j[proper], t[proper]), (j[proper], i[proper], u[proper])):
+        tip = (param == 0) | (param == 1)
+        vertex.append(np.stack((edge[tip], other[tip], param[tip] == 1), axis=1))
+
+    # Collinear overlaps: each edge is split where the other one ends.
+    collinear = (denom == 0) & (_cross(q[:, 0], q[:, 1], r[:, 0], r[:, 1]) == 0)
+    ci, cj = i[collinear], j[collinear]
+    for edge, other in ((ci, cj), (cj, ci)):
+        d = b[edge] - a[edge]
+        length_sq = (d * d).sum(axis=1)
+        for tip in (a[other], b[other]):
+            param = ((tip - a[edge]) * d).sum(axis=1) / np.where(length_sq > 0, length_sq, 1)
+            inside = (param > 0) & (param < 1)
+            split_edge.append(edge[inside])
+            split_t.append(param[inside])
+            split_point.append(tip[inside])
+            touching.append(np.stack((edge[inside], other[inside]), axis=1))
+    return (np.concatenate(split_edge), np.concatenate(split_t), np.concatenate(split_point),
+            np.concatenate(touching), np.concatenate(vertex))
+
+def _winding(samples, a, b, operand):
+    """
+    Winding numbers of both operands at every sample point, as a (n, 2)
+    array, by casting rays towards +x. Edges are bucketed into horizontal
+    bands so that each sample is only tested against the edges of its band.
+    """
+    import numpy as np
+    result = np.zeros((len(samples), 2), dtype=np.int64)
+    if not len(a) or not len(samples):
+        return result
+    if np.ptp(a[:, 0]) > np.ptp(a[:, 1]):
+        # Rays across the short side meet fewer edges. Swapping x and y mirrors the plane, which negates windings.
+        return -_winding(samples[:, ::-1], a[:, ::-1], b[:, ::-1], operand)
+    y0 = min(a[:, 1].min(), b[:, 1].min())
+    y1 = max(a[:, 1].max(), b[:, 1].max())
+    bands = int(min(4096, max(1, len(a) // 8)))
+    height = (y1 - y0) / bands or 1.0
+    first = np.clip(((np.minimum(a[:, 1], b[:, 1]) - y0) // height).astype(np.int64), 0, bands - 1)
+    last = np.clip(((np.maximum(a[:, 1], b[:, 1]) - y0) // height).astype(np.int64), 0, bands - 1)
+    spans = last - first + 1
+    edge = np.repeat(np.arange(len(a)), spans)
+    band = first[edge] + np.arange(len(edge)) - np.repeat(np.cumsum(spans) - spans, spans)
+    by_band = np.argsort(band, kind="stable")
+    edge, band = edge[by_band], band[by_band]
+    band_start = np.searchsorted(band, np.arange(bands + 1))
+
+    sample_band = ((samples[:, 1] - y0) // height).astype(np.int64)
+    inside = (sample_band >= 0) & (sample_band < bands)
+    queries = np.flatnonzero(inside)
+    lo = band_start[sample_band[queries]]
+    counts = band_start[sample_band[queries] + 1] - lo
+    total = np.cumsum(counts)
+    block_start = 0
+    while block_start < len(queries):
+        block_end = int(np.searchsorted(total, (total[block_start - 1] if block_start else 0) + WINDING_PAIRS, side="right"))
+        block_end = max(block_end, block_start + 1)
+        q_counts = counts[block_start:block_end]
+        which = np.repeat(np.arange(block_start, block_end), q_counts)
+        offset = np.arange(len(which)) - np.repeat(np.cumsum(q_counts) - q_counts, q_counts)
+        e = edge[lo[which] + offset]
+        q = queries[which]
+        px, py = samples[q, 0], samples[q, 1]
+        ax, ay, bx, by = a[e, 0], a[e, 1], b[e, 0], b[e, 1]
+        up = (ay <= py) & (py < by)
+        down = (by <= py) & (py < ay)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x = ax + (py - ay) * (bx - ax) / (by - ay)
+        hit = (up | down) & (x > px)
+        contribution = np.where(up, 1, -1)[hit]
+        result += np.bincount(q[hit] * 2 + operand[e[hit]], weights=contribution,
+                              minlength=2 * len(samples)).astype(np.int64).reshape(-1, 2)
+        block_start = block_end
+    return result
+
+def _filled(winding, op):
+    a = winding[:, 0] != 0
+    b = winding[:, 1] != 0
+    if op == UNION:
+        return a | b
+    if op == DIFFERENCE:
+        return a & ~b
+    if op == INTERSECTION:
+        return a & b
+    raise ValueError(f"unknown boolean operation {op!r}")
+
+def _link(start, end, gap=0.0):
+    """
+    Chain directed boundary edges into closed loops of edge indices. At a
+    vertex where several loops meet, the k-th edge in is paired with the
+    k-th edge out; every pairing closes. An edge whose end meets no start
+    is joined to the nearest free start within `gap`.
+    """
+    import numpy as np
+    def keys(points):
+        cells = np.round(points / SNAP).astype(np.int64) + (1 << 30)
+        return (cells[:, 0] << 32) | cells[:, 1]
+    out_keys, in_keys = keys(start), keys(end)
+    out_order = np.argsort(out_keys, kind="stable")
+    in_order = np.argsort(in_keys, kind="stable")
+    following = np.full(len(start), -1, dtype=np.int64)
+    matched = out_keys[out_order] == in_keys[in_order]
+    if matched.all():
+        following[in_order] = out_order
+    else:
+        # Crossings snapped apart leave small gaps: link what meets, bridge the gaps, drop open chains.
+        outgoing = {}
+        for k in out_order:
+            outgoing.setdefault(int(out_keys[k]), []).append(int(k))
+        for k in in_order:
+            candidates = outgoing.get(int(in_keys[k]))
+            if candidates:
+                following[k] = candidates.pop()
+        free = [k for candidates in outgoing.values() for k in candidates]
+        for k in np.flatnonzero(following < 0).tolist():
+            if not free:
+                break
+            distance = np.hypot(*(start[free] - end[k]).T)
+            nearest = int(distance.argmin())
+            if distance[nearest] <= gap:
+                following[k] = free.pop(nearest)
+    loops = []
+    seen = np.zeros(len(start), dtype=bool)
+    following = following.tolist()
+    for k in range(len(following)):
+        if seen[k]:
+            continue
+        loop = []
+        while k >= 0 and not seen[k]:
+            seen[k] = True
+            loop.append(k)
+            k = following[k]
+        if k == loop[0]:
+            loops.append(loop)
+    return loops
+
+def boolean_contours(subject, clip=(), op=UNION, tolerance=DEFAULT_TOLERANCE, flatness=FLATTEN_TOLERANCE):
+    """
+    Combine two lists of closed contours under the nonzero rule: UNION,
+    DIFFERENCE (subject minus clip) or INTERSECTION. Returns new contours,
+    outer ones counter-clockwise (y up) like drawn strokes. Contours that no
+    other contour crosses or touches come back as copies with their curves
+    intact; cut ones are fitted back from polygons to within `tolerance`.
+    """
+    import numpy as np
+    subject, clip = list(subject), list(clip)
+    contours = subject + clip
+    points, ring, node = _clean_rings(*flatten_rings(contours, flatness))
+    if not len(points):
+        return []
+    operand = (ring >= len(subject)).astype(np.int64)
+    a, b = points, points[_ring_next(ring)]
+
+    # Split every edge where another crosses or touches it.
+    following = _ring_next(ring)
+    split_edge, split_t, split_point, touching, vertex = _crossings(a, b)
+    involved = np.zeros(len(contours), dtype=bool)
+    pairs = ring[touching]
+    involved[pairs[pairs[:, 0] != pairs[:, 1]].ravel()] = True
+    involved[ring[split_edge]] = True
+    count = len(a)
+    rows_edge = np.concatenate((np.arange(count), split_edge))
+    rows_t = np.concatenate((np.zeros(count), split_t))
+    rows_point = np.concatenate((a, split_point))
+    rows_node = np.concatenate((node, np.ones(len(split_edge), dtype=bool)))
+    # Pieces between two cuts lie wholly inside or outside everything else: a run shares one classification.
+    breaks = np.zeros(count, dtype=bool)
+    breaks[np.flatnonzero(ring != np.roll(ring, 1))] = True
+    vertex = vertex[ring[vertex[:, 0]] != ring[vertex[:, 1]]]
+    breaks[np.where(vertex[:, 2] == 1, following[vertex[:, 0]], vertex[:, 0])] = True
+    rows_break = np.concatenate((breaks, np.ones(len(split_edge), dtype=bool)))
+    order = np.lexsort((rows_t, rows_edge))
+    rows_edge, rows_point, rows_node = rows_edge[order], rows_point[order], rows_node[order]
+    rows_run = np.cumsum(rows_break[order])
+    same = np.append(rows_edge[1:] == rows_edge[:-1], False)
+    sub_start = rows_point
+    sub_end = np.where(same[:, None], np.roll(rows_point, -1, axis=0), b[rows_edge])
+    keep = np.any(sub_start != sub_end, axis=1)
+    sub_edge, sub_start, sub_end = rows_edge[keep], sub_start[keep], sub_end[keep]
+    sub_node = rows_node[keep]
+    end_node = np.where(same, np.roll(rows_node, -1), node[following][rows_edge])[keep]
+    _, run = np.unique(rows_run[keep], return_inverse=True)
+    sub_operand = operand[sub_edge]
+    # The longest piece of each run stands for it: short ones sit among crossings snapped close together.
+    length = np.hypot(*(sub_end - sub_start).T)
+    by_length = np.lexsort((-length, run))
+    sample = by_length[np.searchsorted(run[by_length], np.arange(run.max() + 1))]
+
+    # Which side of each run is filled: winding just left and just right of its sample piece's midpoint.
+    direction = sub_end[sample] - sub_start[sample]
+    normal = np.stack((-direction[:, 1], direction[:, 0]), axis=1) / np.hypot(*direction.T)[:, None]
+    middle = (sub_start[sample] + sub_end[sample]) / 2
+    offset = normal * (SNAP * 1e-4)     # far below the snapping grid, far above float error at font scale
+    winding = _winding(np.concatenate((middle + offset, middle - offset)), sub_start, sub_end, sub_operand)
+    left = _filled(winding[:len(middle)], op)[run]
+    right = _filled(winding[len(middle):], op)[run]
+    boundary = left != right
+    forward = boundary & left
+
+    result = []
+    sub_ring = ring[sub_edge]
+    pieces = np.bincount(sub_ring, minlength=len(contours))
+    on_boundary = np.bincount(sub_ring, weights=boundary, minlength=len(contours))
+    kept_forward = np.bincount(sub_ring, weights=forward, minlength=len(contours))
+    whole = (on_boundary == pieces) & ((kept_forward == pieces) | (kept_forward == 0))
+    for index in np.flatnonzero(~involved & (pieces > 0)).tolist():
+        if whole[index]:
+            contour = contours[index].copy()
+            if not kept_forward[index]:
+                contour.reverse()
+            result.append(contour)
+        elif on_boundary[index]:
+            involved[index] = True      # coincident with another contour; rebuild it from the polygon
+    chosen = boundary & involved[sub_ring]
+    flip = ~forward[chosen, None]
+    start = np.where(flip, sub_end[chosen], sub_start[chosen])
+    end = np.where(flip, sub_start[chosen], sub_end[chosen])
+    start_node = np.where(flip[:, 0], end_node[chosen], sub_node[chosen])
+    # Coincident pieces from both operands close the same gap once.
+    cells = np.round(np.concatenate((start, end), axis=1) / SNAP).astype(np.int64)
+    _, unique = np.unique(cells, axis=0, return_index=True)
+    unique.sort()
+    start, end, start_node = start[unique], end[unique], start_node[unique]
+    for loop in _link(start, end, tolerance):
+        polygon = start[loop]
+        x, y = polygon[:, 0], polygon[:, 1]
+        area = (np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))) / 2
+        if len(loop) < 3 or abs(area) <= tolerance * tolerance:
+            continue
+        # Fit between the original nodes and the cuts only, so each run is part of one drawn segment.
+        before, after = polygon - np.roll(polygon, 1, axis=0), np.roll(polygon, -1, axis=0) - polygon
+        straight = (np.abs(_cross(before[:, 0], before[:, 1], after[:, 0], after[:, 1]))
+                    <= SNAP * (np.hypot(*before.T) + np.hypot(*after.T))) & ((before * after).sum(axis=1) > 0)
+        nodes = np.flatnonzero(start_node[loop] & ~straight)
+        first = int(nodes[0]) if len(nodes) else 0
+        polygon = np.roll(polygon, -first, axis=0)
+        corners = ((nodes - first) % len(loop)).tolist()
+        result.append(fit_polygon([tuple(p) for p in polygon.tolist()], tolerance, sorted(corners)))
+    return result
+
+def remove_overlaps(contours, tolerance=DEFAULT_TOLERANCE):
+    """Merge overlapping contours into the outline they fill; contours overlapping nothing are returned as they are."""
+    # Sweep along x first: glyphs whose contour boxes never meet need no clipping at all.
+    boxes = sorted(c.bounds() for c in contours if len(c) > 1)
+    active = []
+    for x0, y0, x1, y1 in boxes:
+        active = [box for box in active if box[2] >= x0]
+        if any(box[1] <= y1 and box[3] >= y0 for box in active):
+            return boolean_contours(contours, (), UNION, tolerance)
+        active.append((x0, y0, x1, y1))
+    return list(contours)
+
+# --- 6. PRESSURE STROKES ---
+# Tablets report 200-1000 samples a second. The input handler only copies
+# each sample's numbers into a preallocated ring; once per frame the editor
+# drains the ring and grows the stroke's outline by what arrived. A stroke is
+# the union of tapered capsules, one per pair of kept samples, each as wide as
+# the pen pressure at its ends.
+
+SAMPLE_FIELDS = 6           # x, y, pressure, tilt x, tilt y, time (s)
+CAPTURE_CAPACITY = 4096     # samples held between two frames before new ones are dropped
+MIN_PRESSURE_WIDTH = 0.2    # fraction of the brush width left at zero pressure, so light touches still ink
+CAPSULES_PER_UNION = 16     # capsules merged at once while drawing, so finishing a long stroke stays quick
+
+class SampleRing:
+    """
+    Fixed-size ring of pointer samples in one flat array('d'). push() stores
+    the numbers in place and allocates nothing; when the reader has fallen a
+    full ring behind, the new sample is dropped and counted in `dropped`.
+    """
+    __slots__ = ("data", "capacity", "head", "tail", "dropped")
+
+    def __init__(self, capacity=CAPTURE_CAPACITY):
+        self.data = array("d", bytes(8 * SAMPLE_FIELDS * capacity))
+        self.capacity = capacity
+        self.head = 0           # samples written so far
+        self.tail = 0           # samples read so far
+        self.dropped = 0
+
+    def __len__(self):
+        return self.head - self.tail
+
+    def push(self, x, y, pressure, tilt_x, tilt_y, t):
+        if self.head - self.tail >= self.capacity:
+            self.dropped += 1
+            return False
+        i = (self.head % self.capacity) * SAMPLE_FIELDS
+        data = self.data
+        data[i] = x
+        data[i + 1] = y
+        data[i + 2] = pressure
+        data[i + 3] = tilt_x
+        data[i + 4] = tilt_y
+        data[i + 5] = t
+        self.head += 1
+        return True
+
+    def drain(self):
+        """Every sample written since the last drain, oldest first, as (x, y, pressure, tilt x, tilt y, time) tuples."""
+        data, capacity = self.data, self.capacity
+        samples = []
+        for n in range(self.tail, self.head):
+            i = (n % capacity) * SAMPLE_FIELDS
+            samples.append(tuple(data[i:i + SAMPLE_FIELDS]))
+        self.tail = self.head
+        return samples
+
+    def clear(self):
+        self.head = self.tail = 0
+        self.dropped = 0
+
+def tapered_capsule(x0, y0, r0, x1, y1, r1, tolerance=DEFAULT_TOLERANCE):
+    """
+    Closed counter-clockwise polygon around two discs and the tangent lines
+    joining them, arcs flattened to within `tolerance`. A disc that holds the
+    other comes back on its own.
+    """
+    dx, dy = x1 - x0, y1 - y0
+    d = math.hypot(dx, dy)
+    if d <= abs(r0 - r1):
+        x, y, r = (x0, y0, r0) if r0 >= r1 else (x1, y1, r1)
+        return [(x + r * math.cos(a), y + r * math.sin(a)) for a in _arc(0, 2 * math.pi, r, tolerance)[:-1]]
+    heading = math.atan2(dy, dx)
+    spread = math.acos((r0 - r1) / d)
+    # Front arc around the end disc, then the back arc around the start disc; the tangents join them.
+    front = _arc(heading - spread, heading + spread, r1, tolerance)
+    back = _arc(heading + spread, heading - spread + 2 * math.pi, r0, tolerance)
+    return ([(x1 + r1 * math.cos(a), y1 + r1 * math.sin(a)) for a in front]
+            + [(x0 + r0 * math.cos(a), y0 + r0 * math.sin(a)) for a in back])
+
+def _arc(start, stop, radius, tolerance):
+    """Angles from start to stop, close enough that the chords stay within `tolerance` of the circle."""
+    step = 2 * math.acos(max(-1.0, 1 - tolerance / radius)) if radius > tolerance else math.pi / 2
+    count = max(1, math.ceil((stop - start) / step))
+    return [start + (stop - start) * k / count for k in range(count + 1)]
+
+class PressureStroke:
+    """
+    The outline of one variable-width stroke. extend() takes a frame's samples
+    and returns the capsules they add (for the live preview), merging every
+    CAPSULES_PER_UNION of them as it goes; finish() unions the merged parts
+    and fits the result to closed contours. Samples closer than half the pen
+    radius to the last kept one are skipped; the final one is always kept so
+    the stroke ends under the pen.
+    """
+    def __init__(self, width, tolerance=DEFAULT_TOLERANCE):
+        self.width = width
+        self.tolerance = tolerance
+        self.discs = []         # (x, y, radius) of the kept samples
+        self.pieces = []        # capsule polygons not merged yet, one per pair of consecutive discs
+        self.merged = []        # contours of the capsules merged so far
+        self.skipped = None
+
+    def radius(self, pressure):
+        return self.width / 2 * (MIN_PRESSURE_WIDTH + (1 - MIN_PRESSURE_WIDTH) * min(max(pressure, 0.0), 1.0))
+
+    def extend(self, samples):
+        added = []
+        discs = self.discs
+        for x, y, pressure, _, _, _ in samples:
+            disc = (x, y, self.radius(pressure))
+            if discs:
+                lx, ly, lr = discs[-1]
+                spacing = max(self.tolerance, min(lr, disc[2]) / 2)
+                if (x - lx) ** 2 + (y - ly) ** 2 < spacing * spacing:
+                    self.skipped = disc
+                    continue
+                added.append(tapered_capsule(lx, ly, lr, *disc, self.tolerance))
+            self.skipped = None
+            discs.append(disc)
+        self.pieces += added
+        if len(self.pieces) >= CAPSULES_PER_UNION:
+            # Half the tolerance here and half at the end, so the two fits stay within it together.
+            self.merged += boolean_contours(self.contours(), (), UNION, self.tolerance / 2)
+            self.pieces = []
+        return added
+
+    def contours(self):
+        return [Contour.from_points(p) for p in self.pieces if len(p) > 2]
+
+    def finish(self):
+        """The stroke as closed counter-clockwise contours (empty when nothing was drawn)."""
+        if self.skipped is not None:
+            lx, ly, lr = self.discs[-1]
+            self.pieces.append(tapered_capsule(lx, ly, lr, *self.skipped, self.tolerance))
+        elif len(self.discs) == 1:
+            x, y, r = self.discs[0]
+            self.pieces.append(tapered_capsule(x, y, r, x, y, r, self.tolerance))
+        pieces = self.merged + self.contours()
+        self.discs, self.pieces, self.merged, self.skipped = [], [], [], None
+        return boolean_contours(pieces, (), UNION, self.tolerance / 2) if pieces else []
+
+class StrokeCapture:
+    """
+    Pressure stroke input for the editor. The input handler calls push() per
+    tablet event; frame() runs once per frame, draining the ring into the
+    PressureStroke and timing itself. stats() reports samples captured and
+    dropped, frames and their processing time.
+    """
+    def __init__(self, capacity=CAPTURE_CAPACITY):
+        self.ring = SampleRing(capacity)
+        self.push = self.ring.push      # bound once: the event handler calls it per sample
+        self.stroke = None
+        self.reset_stats()
+
+    @property
+    def active(self):
+        return self.stroke is not None
+
+    def begin(self, width, tolerance=DEFAULT_TOLERANCE):
+        self.ring.clear()
+        self.stroke = PressureStroke(width, tolerance)
+
+    def frame(self):
+        """Expand the samples that arrived since the last frame; returns the capsule polygons they added."""
+        if self.stroke is None:
+            return []
+        t0 = time.perf_counter()
+        samples = self.ring.drain()
+        added = self.stroke.extend(samples)
+        ms = (time.perf_counter() - t0) * 1000
+        self.samples += len(samples)
+        if samples:
+            self.frames += 1
+            self.frame_ms += ms
+            self.max_frame_ms = max(self.max_frame_ms, ms)
+        return added
+
+    def finish(self):
+        """End the stroke: the fitted outline contours, and the time the final union took in `finish_ms`."""
+        if self.stroke is None:
+            return []
+        self.frame()
+        self.dropped += self.ring.dropped
+        self.ring.dropped = 0
+        t0 = time.perf_counter()
+        contours = self.stroke.finish()
+        self.finish_ms = (time.perf_counter() - t0) * 1000
+        self.stroke = None
+        self.strokes += 1
+        return contours
+
+    def cancel(self):
+        self.dropped += self.ring.dropped
+        self.ring.clear()
+        self.stroke = None
+
+    def stats(self):
+        return {
+            "strokes": self.strokes, "samples": self.samples, "dropped": self.dropped + self.ring.dropped,
+            "frames": self.frames, "mean_frame_ms": self.frame_ms / self.frames if self.frames else 0.0,
+            "max_frame_ms": self.max_frame_ms, "finish_ms": self.finish_ms,
+        }
+
+    def reset_stats(self):
+        self.strokes = self.samples = self.dropped = self.frames = 0
+        self.frame_ms = self.max_frame_ms = self.finish_ms = 0.0
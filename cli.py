@@ -0,0 +1,219 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from storage import PROJECT_SUFFIX, VarnProject
+
+# Headless entry point for build machines: no display, no Qt.
+#
+#   python cli.py export  fonts/ --formats ttf,otf --out dist/ --json
+#   python cli.py validate fonts/*.varn
+#
+# Projects (files, or folders of .varn files) are handed out to worker
+# processes, one project per task; a single project gets export.py's own
+# per-glyph pool instead. Each finished project is reported as it completes:
+# one line of text, or with --json one JSON object per line (JSON Lines),
+# followed by a summary object. The exit status is 1 if any project failed.
+#
+# Only storage.py, canvas.py, glyphs.py and export.py (fontTools) are imported, never
+# app.py or ui.py, so this runs where PyQt6 is not even installed.
+
+FORMATS = ("ttf", "otf")
+MAX_EXTENT = 4.0    # glyphs reaching further than this many ems from the origin are flagged
+
+def find_projects(paths):
+    """Expand folders into the .varn files directly inside them, keeping the given order."""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found += sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith(PROJECT_SUFFIX))
+        else:
+            found.append(path)
+    return list(dict.fromkeys(found))
+
+# --- Per-project work (runs in the pool) ---
+
+def check_project(project):
+    """
+    Problems that would make the exported font wrong or unusable, as
+    [{"level": "error" | "warning", "glyph": "U+XXXX" or None, "message": ...}].
+    """
+    from canvas import GlyphOutline
+    from glyphs import component_graph
+    graph = component_graph(project)
+    issues = []
+
+    def issue(level, message, cp=None):
+        issues.append({"level": level, "glyph": None if cp is None else f"U+{cp:04X}", "message": message})
+
+    font = project.font
+    upem = font.get("units_per_em", 1000)
+    if not isinstance(upem, int) or not 16 <= upem <= 16384:
+        issue("error", f"units_per_em must be a whole number from 16 to 16384, not {upem!r}")
+        upem = 1000
+    ascender = font.get("ascender", round(upem * 0.8))
+    if not str(font.get("family", "")).strip():
+        issue("warning", "font has no family name")
+    slots = set(project.codepoints())
+    drawn = project.drawn_codepoints()
+    if not drawn:
+        issue("warning", "no glyphs are drawn")
+    limit = upem * MAX_EXTENT
+    for cp in drawn:
+        if not 0 <= cp <= 0x10FFFF or 0xD800 <= cp <= 0xDFFF:
+            issue("error", "not a valid Unicode scalar value", cp)
+            continue
+        if cp not in slots:
+            issue("warning", "drawn but not in the font's glyph set", cp)
+        try:
+            outline = GlyphOutline.from_svg(project.glyph_svg(cp), ascender)
+        except Exception as e:
+            issue("error", f"unreadable drawing: {e}", cp)
+            continue
+        for base in graph.components(cp):
+            if not project.glyph_svg(base):
+                issue("error", f"uses U+{base:04X} as a component, which is not drawn", cp)
+            elif graph.would_cycle(cp, base):
+                issue("error", f"uses U+{base:04X} as a component, which contains this glyph", cp)
+        if outline.components:
+            outline = graph.outline(cp)
+        if outline.is_empty():
+            issue("warning", "saved drawing has no contours", cp)
+        for contour in outline.contours:
+            if not contour.closed:
+                issue("error", "open contour (exported glyphs must be closed shapes)", cp)
+                break
+        xs = [x for contour in outline.contours for x, _ in contour.points()]
+        ys = [y for contour in outline.contours for _, y in contour.points()]
+        if xs and max(map(abs, xs + ys)) > limit:
+            issue("warning", f"reaches more than {MAX_EXTENT:g} em from the origin", cp)
+    return issues
+
+def run_project(path, action, formats=(), out_dir=None, glyph_workers=0, write_cache=True):
+    """Validate or export one project; returns its JSON-ready record. Never raises."""
+    record = {"project": path, "action": action, "ok": True}
+    t_start = time.perf_counter()
+    try:
+        t0 = time.perf_counter()
+        # Only an export that keeps its compiled-glyph cache writes to the project.
+        with VarnProject(path, read_only=action == "validate" or not write_cache) as project:
+            phases = {"open": time.perf_counter() - t0}
+            record["glyphs"] = len(project.drawn_codepoints())
+            if action == "validate":
+                t0 = time.perf_counter()
+                issues = record["issues"] = check_project(project)
+                phases["check"] = time.perf_counter() - t0
+                record["ok"] = not any(i["level"] == "error" for i in issues)
+            else:
+                from export import export_font
+                stem = os.path.splitext(os.path.basename(path))[0]
+                outputs = record["outputs"] = []
+                for flavor in formats:
+                    out_path = os.path.join(out_dir or os.path.dirname(os.path.abspath(path)), f"{stem}.{flavor}")
+                    report = export_font(project, out_path, flavor, workers=glyph_workers, save_cache=write_cache)
+                    outputs.append({
+                        "path": out_path, "format": flavor, "bytes": os.path.getsize(out_path),
+                        "recompiled": report.recompiled, "cached": report.hits,
+                    })
+                    for phase, seconds in report.phases.items():
+                        phases[f"{flavor}.{phase}"] = seconds
+        record["phases"] = {phase: round(seconds, 6) for phase, seconds in phases.items()}
+    except Exception as e:
+        record["ok"] = False
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["seconds"] = round(time.perf_counter() - t_start, 6)
+    return record
+
+# --- Reporting (runs in the parent) ---
+
+def format_record(record):
+    status = "ok" if record["ok"] else "FAILED"
+    line = f"{status:<6} {record['project']}  {record['seconds'] * 1000:8.1f} ms"
+    if "error" in record:
+        return f"{line}\n       {record['error']}"
+    if "glyphs" in record:
+        line += f"  {record['glyphs']} glyphs"
+    for output in record.get("outputs", ()):
+        line += f"\n       -> {output['path']} ({output['bytes']} bytes, {output['recompiled']} recompiled)"
+    for issue in record.get("issues", ()):
+        where = f"{issue['glyph']}: " if issue["glyph"] else ""
+        line += f"\n       {issue['level']}: {where}{issue['message']}"
+    return line
+
+def emit(record, as_json):
+    print(json.dumps(record, ensure_ascii=False) if as_json else format_record(record), flush=True)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="cli.py", description="Export and validate Akshar .varn projects without a display.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("export", "build fonts from projects"), ("validate", "check projects for problems")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("projects", nargs="+", help=".varn files, or folders holding them")
+        command.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1,
+                             help="worker processes (default: one per core)")
+        command.add_argument("--json", action="store_true", help="print one JSON object per project, then a summary")
+        if name == "export":
+            command.add_argument("--formats", default="ttf",
+                                 help="comma-separated font formats to write: ttf, otf (default: ttf)")
+            command.add_argument("--out", help="folder for the fonts (default: next to each project)")
+            command.add_argument("--no-cache-write", action="store_true",
+                                 help="do not journal compiled glyphs back into the projects (read-only sources)")
+    args = parser.parse_args(argv)
+    if args.command == "export":
+        args.formats = [f.strip().lower() for f in args.formats.split(",") if f.strip()]
+        unknown = sorted(set(args.formats) - set(FORMATS))
+        if unknown or not args.formats:
+            parser.error(f"unsupported format(s): {', '.join(unknown) or '(none)'}; choose from {', '.join(FORMATS)}")
+        if args.out:
+            os.makedirs(args.out, exist_ok=True)
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    projects = find_projects(args.projects)
+    t0 = time.perf_counter()
+    jobs = min(args.jobs, len(projects)) or 1
+    options = {}
+    if args.command == "export":
+        # Parallel across projects, or across one project's glyphs, never both at once.
+        options = {"formats": args.formats, "out_dir": args.out, "write_cache": not args.no_cache_write,
+                   "glyph_workers": None if jobs == 1 and args.jobs > 1 else 0}
+
+    records = []
+    if jobs == 1:
+        for path in projects:
+            records.append(run_project(path, args.command, **options))
+            emit(records[-1], args.json)
+    else:
+        # spawn, like export.py: the same behaviour on every platform.
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=context) as pool:
+            futures = [pool.submit(run_project, path, args.command, **options) for path in projects]
+            try:
+                for future in as_completed(futures):
+                    records.append(future.result())
+                    emit(records[-1], args.json)
+            except BaseException:
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+
+    failed = [r["project"] for r in records if not r["ok"]]
+    summary = {
+        "summary": True, "action": args.command, "projects": len(records), "ok": len(records) - len(failed),
+        "failed": len(failed), "jobs": jobs, "seconds": round(time.perf_counter() - t0, 6),
+    }
+    if args.json:
+        emit(summary, True)
+    else:
+        print(f"{summary['ok']}/{summary['projects']} projects ok in {summary['seconds']:.2f} s on {jobs} "
+              f"process{'es' if jobs > 1 else ''}", file=sys.stderr)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,489 @@
+import hashlib
+import math
+import multiprocessing
+import os
+import re
+import struct
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import fontTools
+from fontTools.fontBuilder import FontBuilder
+from fontTools.misc.psCharStrings import T2CharString
+from fontTools.pens.boundsPen import BoundsPen
+from fontTools.pens.cu2quPen import Cu2QuPen
+from fontTools.pens.recordingPen import RecordingPen
+from fontTools.pens.roundingPen import RoundingPen
+from fontTools.pens.t2CharStringPen import T2CharStringPen
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+from fontTools.ttLib.tables._g_l_y_f import Glyph
+
+from canvas import Contour, GlyphOutline, remove_overlaps
+from glyphs import component_graph
+
+# .varn project -> installable .ttf (TrueType, quadratic glyf) or .otf (CFF, cubic).
+#
+# Everything per glyph (SVG parsing, overlap removal, curve conversion,
+# bounds, compiling the glyph program) runs in a process pool, a chunk of
+# glyphs per task. The parent only reads SVGs out of the project and
+# assembles the tables from the compiled glyphs, so it never re-expands them:
+# bounds and metrics come back from the workers with each glyph.
+#
+# Compiled glyphs are kept in the project (cache/export-ttf.bin, -otf.bin),
+# keyed by a hash of the glyph's SVG. Re-exporting after editing a few letters
+# recompiles just those and reassembles the tables from the rest.
+#
+# Glyphs built from components (canvas.Component) are flattened before they
+# are hashed, so editing a base recompiles the glyphs that use it. In a .ttf,
+# a glyph drawn only from components is written as a TrueType composite
+# instead: nothing to compile, and the base's points are stored once.
+
+QUAD_TOLERANCE = 1.0    # font units; how far the cu2qu quadratics may stray from the drawn cubics
+CHUNK_SIZE = 64         # glyphs per pool task
+POOL_MIN_GLYPHS = 256   # below this, starting worker processes costs more than it saves
+F2DOT14_MAX = 2 - 2 ** -14  # largest scale a TrueType component transform can hold
+
+class ExportError(Exception):
+    pass
+
+class ExportCancelled(ExportError):
+    pass
+
+class ExportReport:
+    """What one export did: glyph counts, compiled-glyph cache use and seconds per phase."""
+    __slots__ = ("path", "flavor", "glyphs", "hits", "recompiled", "workers", "phases", "cache")
+
+    def __init__(self, path, flavor):
+        self.path = path
+        self.flavor = flavor
+        self.glyphs = 0
+        self.hits = 0           # glyphs taken from the compiled cache, or composites needing no compiling
+        self.recompiled = 0
+        self.workers = 0
+        self.phases = {}        # phase -> seconds, in the order they ran
+        self.cache = None       # updated cache entry to store, or None when nothing changed
+
+    @property
+    def cache_name(self):
+        return cache_entry_name(self.flavor)
+
+    def total(self):
+        return sum(self.phases.values())
+
+    def summary(self):
+        where = f" on {self.workers} workers" if self.workers else ""
+        lines = [f"{self.glyphs} glyphs: {self.hits} from cache, {self.recompiled} recompiled{where}"]
+        lines += [f"  {phase:<9} {seconds * 1000:9.1f} ms" for phase, seconds in self.phases.items()]
+        lines.append(f"  {'total':<9} {self.total() * 1000:9.1f} ms")
+        return "\n".join(lines)
+
+def glyph_name(codepoint):
+    if codepoint == 0x20:
+        return "space"
+    return f"uni{codepoint:04X}" if codepoint <= 0xFFFF else f"u{codepoint:05X}"
+
+def postscript_name(family, style):
+    name = re.sub(r"[^A-Za-z0-9]", "", family) or "Akshar"
+    return f"{name}-{re.sub(r'[^A-Za-z0-9]', '', style) or 'Regular'}"[:63]
+
+def notdef_outline(units_per_em, ascender):
+    """The usual hollow box for missing characters."""
+    width = units_per_em // 2
+    stroke = units_per_em // 20
+    outer = Contour.from_points([(stroke, 0), (width - stroke, 0), (width - stroke, ascender), (stroke, ascender)])
+    inner = Contour.from_points([(2 * stroke, stroke), (2 * stroke, ascender - stroke),
+                                 (width - 2 * stroke, ascender - stroke), (width - 2 * stroke, stroke)])
+    return GlyphOutline([outer, inner], advance=width)
+
+# --- Per-glyph work (runs in the pool) ---
+
+def outline_pen_commands(outline):
+    """The outline as pen commands, with overlapping strokes merged into one outline (canvas.remove_overlaps)."""
+    recording = RecordingPen()
+    if len(outline.contours) > 1:
+        outline = GlyphOutline(remove_overlaps(outline.contours), outline.advance)
+    outline.draw(recording)
+    return recording
+
+def compile_glyph(outline, flavor):
+    """
+    One glyph for the given flavor, as (advance, bounds, data, points, contours):
+    bounds is (xMin, yMin, xMax, yMax) or None when empty, data the compiled glyf
+    record or CFF charstring.
+    """
+    advance = max(0, round(outline.advance))
+    commands = outline_pen_commands(outline)
+    if flavor == "ttf":
+        pen = TTGlyphPen(None)
+        # Outlines are drawn counter-clockwise (PostScript order); TrueType wants clockwise.
+        commands.replay(Cu2QuPen(pen, QUAD_TOLERANCE, reverse_direction=True))
+        glyph = pen.glyph()
+        if glyph.numberOfContours == 0:
+            return advance, None, b"", 0, 0
+        glyph.recalcBounds(None)
+        bounds = (glyph.xMin, glyph.yMin, glyph.xMax, glyph.yMax)
+        return advance, bounds, glyph.compile(None, recalcBBoxes=False), len(glyph.coordinates), glyph.numberOfContours
+
+    pen = T2CharStringPen(advance, None)
+    commands.replay(pen)
+    charstring = pen.getCharString()
+    charstring.compile()
+    # Bounds of the rounded points, which is what the charstring holds.
+    bounds_pen = BoundsPen(None)
+    commands.replay(RoundingPen(bounds_pen))
+    bounds = bounds_pen.bounds
+    if bounds is not None:
+        bounds = (math.floor(bounds[0]), math.floor(bounds[1]), math.ceil(bounds[2]), math.ceil(bounds[3]))
+    return advance, bounds, charstring.bytecode, 0, len(outline.contours)
+
+def compile_chunk(jobs, flavor, ascender):
+    """Pool task: [(name, svg bytes)] -> [(name, advance, bounds, data, points, contours)]."""
+    return [(name, *compile_glyph(GlyphOutline.from_svg(svg, ascender), flavor)) for name, svg in jobs]
+
+# --- Compiled glyph cache ---
+
+CACHE_VERSION = 2
+_CACHE_HEADER = struct.Struct("<4sH8sI")       # magic, version, options fingerprint, record count
+_CACHE_RECORD = struct.Struct("<8siB4iIII")    # glyph key, advance, has bounds, bounds, points, contours, data length
+_CACHE_MAGIC = b"AKXC"
+
+def cache_entry_name(flavor):
+    return f"cache/export-{flavor}.bin"
+
+def options_fingerprint(flavor):
+    """Anything besides the SVG that changes compiled output; a mismatch discards the whole cache."""
+    options = (CACHE_VERSION, flavor, QUAD_TOLERANCE, fontTools.version)
+    return hashlib.blake2b(repr(options).encode(), digest_size=8).digest()
+
+def glyph_key(svg, ascender):
+    h = hashlib.blake2b(svg, digest_size=8)
+    h.update(struct.pack("<i", ascender))
+    return h.digest()
+
+def dump_cache(records, flavor):
+    """{glyph key: (advance, bounds, data, points, contours)} -> bytes."""
+    out = [_CACHE_HEADER.pack(_CACHE_MAGIC, CACHE_VERSION, options_fingerprint(flavor), len(records))]
+    for key, (advance, bounds, data, points, contours) in records.items():
+        out.append(_CACHE_RECORD.pack(key, advance, bounds is not None, *(bounds or (0, 0, 0, 0)), points, contours, len(data)))
+        out.append(data)
+    return b"".join(out)
+
+def load_cache(data, flavor):
+    """Inverse of dump_cache(); empty when the data is missing, damaged or from other options."""
+    if not data or len(data) < _CACHE_HEADER.size:
+        return {}
+    magic, version, fingerprint, count = _CACHE_HEADER.unpack_from(data, 0)
+    if magic != _CACHE_MAGIC or version != CACHE_VERSION or fingerprint != options_fingerprint(flavor):
+        return {}
+    records = {}
+    pos = _CACHE_HEADER.size
+    try:
+        for _ in range(count):
+            key, advance, has_bounds, x0, y0, x1, y1, points, contours, length = _CACHE_RECORD.unpack_from(data, pos)
+            pos += _CACHE_RECORD.size
+            records[key] = (advance, (x0, y0, x1, y1) if has_bounds else None, data[pos:pos + length], points, contours)
+            pos += length
+    except struct.error:
+        return {}
+    return records
+
+# --- Assembly (runs in the parent) ---
+
+def composite_parts(graph, cp, outline):
+    """
+    The glyph as TrueType component records [(base glyph name, transform)], or
+    None when it has to be flattened instead: it has contours of its own, a
+    missing or cyclic base, or a transform a composite cannot hold.
+    """
+    if not outline.components or any(len(c) for c in outline.contours):
+        return None
+    parts = []
+    for component in outline.components:
+        base = component.codepoint
+        if not graph.project.glyph_svg(base) or graph.would_cycle(cp, base):
+            return None
+        a, b, c, d, e, f = component.transform
+        if not all(-2 <= v <= F2DOT14_MAX for v in (a, b, c, d)) or not all(-32768 <= round(v) < 32768 for v in (e, f)):
+            return None
+        parts.append((glyph_name(base), (a, b, c, d, round(e), round(f))))
+    return parts
+
+def glyph_sources(project, font, codepoints, composites=None):
+    """
+    Yield (glyph name, svg) for every exported glyph; .notdef and space are
+    always present. Components are flattened into the SVG, except in glyphs
+    that can stay TrueType composites when a `composites` dict is given: those
+    are yielded with svg None and stored there as name -> (advance, parts).
+    """
+    upem = font.get("units_per_em", 1000)
+    ascender = font.get("ascender", round(upem * 0.8))
+    graph = component_graph(project)
+    yield ".notdef", notdef_outline(upem, ascender).to_svg(upem, ascender).encode()
+    if 0x20 not in codepoints:
+        yield "space", GlyphOutline(advance=upem // 4).to_svg(upem, ascender).encode()
+    for cp in codepoints:
+        svg = project.glyph_svg(cp)
+        if svg is None:
+            continue
+        if b"<use" in svg:
+            outline = GlyphOutline.from_svg(svg, ascender)
+            parts = composite_parts(graph, cp, outline) if composites is not None else None
+            if parts:
+                composites[glyph_name(cp)] = (max(0, round(outline.advance)), parts)
+                yield glyph_name(cp), None
+                continue
+            svg = graph.flat_svg(cp)
+        yield glyph_name(cp), svg
+
+def assemble_composites(glyf, compiled, composites):
+    """
+    Add the composite glyphs to a built glyf table and give each an entry in
+    `compiled` like a compiled glyph's, with the point and contour totals of its
+    flattened outline. Returns maxp's composite limits: (points, contours,
+    component elements, component depth).
+    """
+    totals = {}
+
+    def measure(name):
+        if name not in composites:
+            return compiled[name][3], compiled[name][4], 0
+        if name not in totals:
+            points = contours = depth = 0
+            for base, _ in composites[name][1]:
+                p, c, d = measure(base)
+                points, contours, depth = points + p, contours + c, max(depth, d)
+            totals[name] = (points, contours, depth + 1)
+        return totals[name]
+
+    names = set(glyf.keys()).union(composites)
+    for name, (_, parts) in composites.items():
+        pen = TTGlyphPen(names)
+        for base, transform in parts:
+            pen.addComponent(base, transform)
+        glyf[name] = pen.glyph()
+    limits = (0, 0, 0, 0)
+    for name, (advance, parts) in composites.items():
+        glyph = glyf[name]
+        glyph.recalcBounds(glyf)
+        points, contours, depth = measure(name)
+        bounds = (glyph.xMin, glyph.yMin, glyph.xMax, glyph.yMax) if contours else None
+        compiled[name] = (advance, bounds, b"", points, contours)
+        limits = tuple(map(max, limits, (points, contours, len(parts), depth)))
+    return limits
+
+def build_font(font, glyph_order, cmap, compiled, flavor, composites=None):
+    """
+    Assemble a TTFont from compiled glyphs without recomputing anything the
+    workers measured. `composites` (ttf only) maps the names of glyphs written
+    as TrueType composites to (advance, [(base name, transform)]).
+    """
+    upem = font.get("units_per_em", 1000)
+    ascender = font.get("ascender", round(upem * 0.8))
+    descender = font.get("descender", -round(upem * 0.2))
+    family = font.get("family", "Untitled")
+    style = font.get("style", "Regular")
+    ps_name = postscript_name(family, style)
+
+    builder = FontBuilder(upem, isTTF=(flavor == "ttf"))
+    builder.font.recalcBBoxes = False
+    builder.setupGlyphOrder(glyph_order)
+    builder.setupCharacterMap(cmap)
+    composites = composites or {}
+
+    if flavor == "ttf":
+        glyphs = {name: Glyph(compiled[name][2]) for name in glyph_order if name not in composites}
+        builder.setupGlyf(glyphs, calcGlyphBounds=False, validateGlyphFormat=False)
+        maxp = builder.font["maxp"]
+        maxp.maxPoints = max((entry[3] for entry in compiled.values()), default=0)
+        maxp.maxContours = max((entry[4] for entry in compiled.values()), default=0)
+        if composites:
+            # A copy: the caller's dict stays exactly what was compiled, which is what gets cached.
+            compiled = dict(compiled)
+            (maxp.maxCompositePoints, maxp.maxCompositeContours,
+             maxp.maxComponentElements, maxp.maxComponentDepth) = assemble_composites(builder.font["glyf"], compiled, composites)
+
+    boxes = [compiled[name][1] for name in glyph_order if compiled[name][1] is not None]
+    x_min = min((b[0] for b in boxes), default=0)
+    y_min = min((b[1] for b in boxes), default=0)
+    x_max = max((b[2] for b in boxes), default=0)
+    y_max = max((b[3] for b in boxes), default=0)
+
+    if flavor != "ttf":
+        charstrings = {name: T2CharString(bytecode=compiled[name][2]) for name in glyph_order}
+        builder.setupCFF(ps_name, {"FullName": f"{family} {style}", "FamilyName": family}, charstrings, {})
+        builder.font["CFF "].cff.topDictIndex[0].FontBBox = [x_min, y_min, x_max, y_max]
+
+    metrics = {}
+    for name in glyph_order:
+        advance, bounds = compiled[name][:2]
+        metrics[name] = (advance, bounds[0] if bounds else 0)
+    builder.setupHorizontalMetrics(metrics)
+
+    inked = [(compiled[name][0], compiled[name][1]) for name in glyph_order if compiled[name][1] is not None]
+    builder.setupHorizontalHeader(
+        ascent=ascender, descent=descender, lineGap=0,
+        advanceWidthMax=max((m[0] for m in metrics.values()), default=0),
+        minLeftSideBearing=min((b[0] for _, b in inked), default=0),
+        minRightSideBearing=min((a - b[2] for a, b in inked), default=0),
+        xMaxExtent=max((b[2] for _, b in inked), default=0),
+    )
+    head = builder.font["head"]
+    head.xMin, head.yMin, head.xMax, head.yMax = x_min, y_min, x_max, y_max
+
+    builder.setupNameTable({
+        "familyName": family,
+        "styleName": style,
+        "fullName": f"{family} {style}",
+        "psName": ps_name,
+        "uniqueFontIdentifier": f"Akshar: {ps_name}",
+        "version": "Version 1.000",
+    })
+    x_height = compiled.get(glyph_name(ord("x")), (0, None))[1]
+    cap_height = compiled.get(glyph_name(ord("H")), (0, None))[1]
+    builder.setupOS2(
+        sTypoAscender=ascender, sTypoDescender=descender, sTypoLineGap=0,
+        usWinAscent=max(ascender, y_max), usWinDescent=max(-descender, -y_min),
+        sxHeight=x_height[3] if x_height else 0, sCapHeight=cap_height[3] if cap_height else 0,
+        fsType=0,
+    )
+    builder.setupPost()
+    return builder.font
+
+def gather_glyphs(project, font, codepoints, flavor, cache):
+    """
+    Read and hash every exported glyph's SVG. Returns (glyph order, {name: entry}
+    for the glyphs found in `cache`, {name: glyph key}, [(name, svg)] left to
+    compile, {name: composite} for .ttf composites).
+    """
+    ascender = font.get("ascender", round(font.get("units_per_em", 1000) * 0.8))
+    compiled = {}
+    keys = {}
+    dirty = []
+    glyph_order = []
+    composites = {} if flavor == "ttf" else None
+    for name, svg in glyph_sources(project, font, codepoints, composites):
+        glyph_order.append(name)
+        if svg is None:
+            continue
+        key = keys[name] = glyph_key(svg, ascender)
+        entry = cache.get(key)
+        if entry is not None:
+            compiled[name] = entry
+        else:
+            dirty.append((name, svg))
+    return glyph_order, compiled, keys, dirty, composites
+
+def refresh_cache(project, flavor, cancelled=None):
+    """
+    Bring the project's compiled-glyph cache for `flavor` up to date without
+    writing a font, so the next export only has to assemble the tables.
+    Compiles in this process. Returns (cache bytes to store, or None when
+    nothing changed, number of glyphs compiled); cancelled() returning True
+    between glyphs stops with ExportCancelled.
+    """
+    font = project.font
+    ascender = font.get("ascender", round(font.get("units_per_em", 1000) * 0.8))
+    cache = load_cache(project.cache_entry(cache_entry_name(flavor)), flavor)
+    glyph_order, compiled, keys, dirty, _ = gather_glyphs(project, font, sorted(project.drawn_codepoints()), flavor, cache)
+    for name, svg in dirty:
+        if cancelled is not None and cancelled():
+            raise ExportCancelled("cache refresh cancelled")
+        compiled[name] = compile_glyph(GlyphOutline.from_svg(svg, ascender), flavor)
+    records = {keys[name]: compiled[name] for name in glyph_order if name in keys}
+    if not dirty and records.keys() == cache.keys():
+        return None, 0
+    return dump_cache(records, flavor), len(dirty)
+
+def export_font(project, path, flavor=None, workers=None, progress=None, cancelled=None, save_cache=True):
+    """
+    Write the project's drawn glyphs to `path` as .ttf or .otf (from the extension
+    unless flavor is given) and return an ExportReport.
+
+    Glyphs whose SVG is unchanged since the last export come from the project's
+    compiled cache; only the rest are compiled. workers=0 compiles in this
+    process; the default uses every core once there is enough to compile to be
+    worth it. progress(done, total) is called here as chunks finish; cancelled()
+    returning True stops the export with ExportCancelled. The updated cache is
+    written back to the project unless save_cache is False, in which case the
+    caller stores report.cache under report.cache_name itself.
+    """
+    flavor = flavor or os.path.splitext(path)[1].lstrip(".").lower()
+    if flavor not in ("ttf", "otf"):
+        raise ExportError(f"unsupported font format: {flavor!r}")
+    report = ExportReport(path, flavor)
+    phases = report.phases
+    font = project.font
+    upem = font.get("units_per_em", 1000)
+    ascender = font.get("ascender", round(upem * 0.8))
+    codepoints = sorted(project.drawn_codepoints())
+
+    t0 = time.perf_counter()
+    cache = load_cache(project.cache_entry(report.cache_name), flavor)
+    phases["cache"] = time.perf_counter() - t0
+
+    # Read and hash every SVG; only glyphs missing from the cache become jobs.
+    t0 = time.perf_counter()
+    glyph_order, compiled, keys, dirty, composites = gather_glyphs(project, font, codepoints, flavor, cache)
+    report.glyphs = len(glyph_order)
+    report.hits = len(compiled) + len(composites or ())
+    report.recompiled = len(dirty)
+    phases["read"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    if workers is None:
+        workers = (os.cpu_count() or 1) if len(dirty) >= POOL_MIN_GLYPHS else 0
+    report.workers = workers
+    done = report.hits
+    chunks = (dirty[i:i + CHUNK_SIZE] for i in range(0, len(dirty), CHUNK_SIZE))
+
+    def collect(results):
+        nonlocal done
+        for name, *entry in results:
+            compiled[name] = tuple(entry)
+        done += len(results)
+        if progress is not None:
+            progress(done, report.glyphs)
+        if cancelled is not None and cancelled():
+            raise ExportCancelled("export cancelled")
+
+    if progress is not None:
+        progress(done, report.glyphs)
+    if workers == 0:
+        for chunk in chunks:
+            collect(compile_chunk(chunk, flavor, ascender))
+    elif dirty:
+        # spawn, not fork: the caller is usually a Qt process with threads running.
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            pending = {pool.submit(compile_chunk, chunk, flavor, ascender) for chunk in chunks}
+            try:
+                while pending:
+                    finished, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        collect(future.result())
+            except BaseException:
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+    phases["compile"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    cmap = {cp: glyph_name(cp) for cp in codepoints}
+    cmap.setdefault(0x20, "space")
+    tt_font = build_font(font, glyph_order, cmap, compiled, flavor, composites)
+    phases["assemble"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    tmp = f"{path}.{os.getpid()}.tmp"
+    tt_font.save(tmp)
+    os.replace(tmp, path)
+    phases["write"] = time.perf_counter() - t0
+
+    # Keep exactly the glyphs this export used, so edited-away versions do not pile up.
+    t0 = time.perf_counter()
+    records = {keys[name]: compiled[name] for name in glyph_order if name in keys}
+    if report.recompiled or records.keys() != cache.keys():
+        report.cache = dump_cache(records, flavor)
+        if save_cache:
+            project.write_cache(report.cache_name, report.cache)
+    phases["store"] = time.perf_counter() - t0
+    return report
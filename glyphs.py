@@ -0,0 +1,614 @@
+import os
+import re
+import struct
+import sys
+import unicodedata
+import weakref
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import compress
+
+from storage import OP_GLYPH
+
+# Unicode knowledge behind glyph sets: which codepoints belong to a script or
+# block, their general category and their name.
+#
+# Script, block and category runs are precomputed into assets/unicode.idx
+# (python glyphs.py build) and read on first use, so building the Devanagari or
+# CJK set walks a few hundred ranges instead of asking unicodedata about all
+# 1.1M codepoints. Names still come from unicodedata, one codepoint at a time.
+
+INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "unicode.idx")
+
+_MAGIC = b"AKUX"
+_HEADER = struct.Struct("<4sH16s16s")   # magic, format version, script/block UCD version, category UCD version
+_FORMAT = 1
+
+# Categories that get a glyph slot: letters, marks, numbers, punctuation, symbols.
+# Controls, spaces, format characters, surrogates, private use and unassigned are left out.
+DRAWABLE = frozenset((
+    "Lu", "Ll", "Lt", "Lm", "Lo", "Mn", "Mc", "Me", "Nd", "Nl", "No",
+    "Pc", "Pd", "Ps", "Pe", "Pi", "Pf", "Po", "Sm", "Sc", "Sk", "So",
+))
+
+# Glyph sets offered when creating a font or picking "Script & Unicode Range".
+# Each is a union of ("script" | "block", name) sources, filtered to DRAWABLE.
+GLYPH_SETS = {
+    "Latin": [("block", "Basic Latin")],
+    "Latin Extended": [("block", "Basic Latin"), ("script", "Latin")],
+    "Devanagari": [("block", "Devanagari"), ("block", "Devanagari Extended"), ("block", "Vedic Extensions")],
+    "Accents": [("block", "Combining Diacritical Marks"), ("block", "Spacing Modifier Letters")],
+    "Symbols": [("block", "General Punctuation"), ("block", "Currency Symbols"), ("block", "Arrows"),
+                ("block", "Mathematical Operators"), ("block", "Geometric Shapes"), ("block", "Miscellaneous Symbols")],
+    "CJK": [("script", "Han")],
+}
+
+class RangeTable:
+    """One Unicode property as runs: codepoints starts[i] .. starts[i + 1] - 1 all have names[values[i]]."""
+    __slots__ = ("starts", "values", "names", "_runs")
+
+    def __init__(self, starts, values, names):
+        self.starts = starts        # array("I"), ascending, starts[0] == 0
+        self.values = values        # array("H") into names
+        self.names = names
+        self._runs = None           # name -> [(first, last), ...], built on first ranges() call
+
+    def value(self, codepoint):
+        return self.names[self.values[bisect_right(self.starts, codepoint) - 1]]
+
+    def ranges(self, name):
+        """Inclusive (first, last) runs that have this value, in codepoint order."""
+        if self._runs is None:
+            runs = {}
+            starts, values = self.starts, self.values
+            ends = list(starts[1:]) + [0x110000]
+            for start, end, value in zip(starts, ends, values):
+                runs.setdefault(self.names[value], []).append((start, end - 1))
+            self._runs = runs
+        return self._runs.get(name, [])
+
+    def __len__(self):
+        return len(self.starts)
+
+    def nbytes(self):
+        return self.starts.itemsize * len(self.starts) + self.values.itemsize * len(self.values)
+
+def intersect_ranges(a, b, b_lasts=None):
+    """
+    Intersection of two sorted lists of inclusive ranges. `a` is expected to be the
+    short one: each of its ranges bisects into `b` (b_lasts = [last for _, last in b]).
+    """
+    if b_lasts is None:
+        b_lasts = [last for _, last in b]
+    out = []
+    for first, last in a:
+        j = bisect_left(b_lasts, first)
+        while j < len(b) and b[j][0] <= last:
+            out.append((max(first, b[j][0]), min(last, b[j][1])))
+            j += 1
+    return out
+
+def union_ranges(*lists):
+    merged = []
+    for first, last in sorted(r for ranges in lists for r in ranges):
+        if merged and first <= merged[-1][1] + 1:
+            if last > merged[-1][1]:
+                merged[-1] = (merged[-1][0], last)
+        else:
+            merged.append((first, last))
+    return merged
+
+class UnicodeIndex:
+    """Script, block and category lookups over the packed tables in assets/unicode.idx."""
+    def __init__(self, scripts, blocks, categories, script_codes, ucd_version="", category_version=""):
+        self.scripts = scripts
+        self.blocks = blocks
+        self.categories = categories
+        self.script_codes = script_codes    # "Deva" -> "Devanagari"
+        self.ucd_version = ucd_version
+        self.category_version = category_version
+        self._drawable = None
+        self._drawable_lasts = None
+
+    # -- Per codepoint --
+    def script(self, codepoint):
+        return self.scripts.value(codepoint)
+
+    def block(self, codepoint):
+        return self.blocks.value(codepoint)
+
+    def category(self, codepoint):
+        return self.categories.value(codepoint)
+
+    @staticmethod
+    def name(codepoint):
+        return unicodedata.name(chr(codepoint), "")
+
+    # -- Sets --
+    def script_names(self):
+        return sorted(n for n in self.scripts.names if n not in ("Common", "Inherited", "Unknown"))
+
+    def block_names(self):
+        return [n for n in dict.fromkeys(self.blocks.names[v] for v in self.blocks.values) if n != "No_Block"]
+
+    def drawable_ranges(self):
+        if self._drawable is None:
+            table = self.categories
+            drawable = {i for i, name in enumerate(table.names) if name in DRAWABLE}
+            ends = list(table.starts[1:]) + [0x110000]
+            ranges = []
+            for start, end, value in zip(table.starts, ends, table.values):
+                if value not in drawable:
+                    continue
+                if ranges and ranges[-1][1] == start - 1:
+                    ranges[-1] = (ranges[-1][0], end - 1)
+                else:
+                    ranges.append((start, end - 1))
+            self._drawable = ranges
+            self._drawable_lasts = [last for _, last in self._drawable]
+        return self._drawable
+
+    def ranges(self, kind, name):
+        if kind == "script":
+            return self.scripts.ranges(self.script_codes.get(name, name))
+        if kind == "block":
+            return self.blocks.ranges(name)
+        raise ValueError(f"unknown range kind: {kind}")
+
+    def glyph_set(self, sources):
+        """
+        Drawable codepoints of a GLYPH_SETS name or a list of (kind, name) sources,
+        as a sorted array("I"). Costs O(ranges) plus the size of the result.
+        """
+        if isinstance(sources, str):
+            if sources not in GLYPH_SETS:
+                raise KeyError(f"unknown glyph set: {sources}")
+            sources = GLYPH_SETS[sources]
+        wanted = union_ranges(*(self.ranges(kind, name) for kind, name in sources))
+        codepoints = array("I")
+        for first, last in intersect_ranges(wanted, self.drawable_ranges(), self._drawable_lasts):
+            codepoints.extend(range(first, last + 1))
+        return codepoints
+
+    def nbytes(self):
+        return self.scripts.nbytes() + self.blocks.nbytes() + self.categories.nbytes()
+
+def project_codepoints(project):
+    """
+    A project's glyph slots: the codepoints saved in font.json, or for projects
+    created without any, the glyph set named by the project's script plus
+    whatever is already drawn.
+    """
+    slots = project.font.get("codepoints")
+    if slots:
+        return list(slots)
+    drawn = project.drawn_codepoints()
+    if project.script not in GLYPH_SETS:
+        return sorted(drawn)
+    return sorted(set(unicode_index().glyph_set(project.script)).union(drawn))
+
+# --- Glyph search ---
+
+_CODE_QUERY = re.compile(r"(?:u\+|0x)([0-9a-f]*)", re.IGNORECASE)
+_STATUS_QUERY = re.compile(r"\bis:(filled|empty)\b", re.IGNORECASE)
+
+class GlyphSearchIndex:
+    """
+    Lookup structures over a font's glyph slots, rows being positions in the
+    FontEditor's (char, code, status) list:
+
+      - codepoint -> row, for "अ" or pasted text
+      - sorted "U+XXXX" codes, so "U+09" is a bisected prefix range
+      - a name trigram index, filled in per trigram the first time a query uses it
+      - a filled/empty status bitmap (one byte per row)
+
+    Each structure is built the first time a query needs it, or all at once by
+    prepare() when the GUI is idle, so opening a font pays nothing up front.
+
+    search() answers one keystroke. A query that extends the previous one only
+    re-checks the previous hits, so typing "DEVANAGARI LETTER A" narrows instead
+    of starting over.
+    """
+    def __init__(self, glyphs):
+        self.glyphs = glyphs
+        self.chars = [g[0] for g in glyphs]
+        self.filled = bytearray(g[2] == "filled" for g in glyphs)
+        self._rows = None
+        self._codes = None              # (sorted codes, their rows)
+        self._names = None
+        self._trigrams = {}             # trigram -> array("I") of rows whose name contains it
+        self._last = ("", None)         # (name query, rows) for incremental narrowing
+
+    def __len__(self):
+        return len(self.chars)
+
+    def prepare(self):
+        """Build every lookup structure now instead of on the first keystroke that needs it."""
+        self.row_of(0)
+        self.find_code("U+")
+        self.names()
+
+    def row_of(self, codepoint):
+        if self._rows is None:
+            self._rows = dict(zip(map(ord, self.chars), range(len(self.chars))))
+        return self._rows.get(codepoint)
+
+    def names(self):
+        if self._names is None:
+            self._names = [unicodedata.name(char, "") for char in self.chars]
+        return self._names
+
+    def set_status(self, row, status):
+        self.filled[row] = status == "filled"
+
+    # -- Lookups --
+    def find_chars(self, text):
+        rows = (self.row_of(ord(c)) for c in text)
+        return sorted({row for row in rows if row is not None})
+
+    def find_code(self, prefix):
+        """Rows whose "U+XXXX" code starts with prefix, in row order."""
+        if self._codes is None:
+            codes = [g[1] for g in self.glyphs]
+            order = sorted(range(len(codes)), key=codes.__getitem__)
+            self._codes = ([codes[row] for row in order], order)
+        keys, rows = self._codes
+        lo = bisect_left(keys, prefix)
+        hi = bisect_left(keys, prefix + "\uffff")
+        return sorted(rows[lo:hi])
+
+    def trigram(self, gram):
+        rows = self._trigrams.get(gram)
+        if rows is None:
+            rows = self._trigrams[gram] = array("I", (r for r, name in enumerate(self.names()) if gram in name))
+        return rows
+
+    def find_name(self, text):
+        """Rows whose Unicode name contains text (case-insensitive)."""
+        text = " ".join(text.upper().split())
+        names = self.names()
+        last_text, last_rows = self._last
+        if last_rows is not None and last_text in text:
+            candidates = last_rows
+        elif len(text) >= 3:
+            # Use the rarest trigram already indexed; index at most one new trigram per keystroke.
+            grams = [text[i:i + 3] for i in range(len(text) - 2)]
+            known = [self._trigrams[g] for g in grams if g in self._trigrams]
+            candidates = min(known, key=len) if known else self.trigram(grams[-1])
+        else:
+            candidates = range(len(names))
+        rows = [r for r in candidates if text in names[r]]
+        self._last = (text, rows)
+        return rows
+
+    def with_status(self, rows, status):
+        """Keep only rows in the given status; rows=None means every glyph."""
+        if status not in ("filled", "empty"):
+            return rows
+        want = status == "filled"
+        if rows is None:
+            mask = self.filled if want else self.filled.translate(_INVERT)
+            return list(compress(range(len(self.chars)), mask))
+        filled = self.filled
+        return [r for r in rows if filled[r] == want]
+
+    def search(self, query, status=None):
+        """
+        Rows matching query, or None when nothing filters (show everything).
+        Accepts a character or pasted text, "U+0905" / "0x905" (prefixes too),
+        words of a Unicode name, and "is:filled" / "is:empty".
+        """
+        match = _STATUS_QUERY.search(query)
+        if match:
+            status = match.group(1).lower()
+            query = _STATUS_QUERY.sub(" ", query)
+        text = query.strip()
+        code = _CODE_QUERY.fullmatch(text)
+        if not text or code and not code.group(1):
+            rows = None
+        elif code:
+            # Codes are stored padded to four digits: "0x41" is U+0041, while "U+09" still lists U+09xx.
+            digits = code.group(1).upper()
+            rows = self.find_code("U+" + digits.zfill(4))
+            if len(digits) < 4:
+                rows = sorted(set(rows).union(self.find_code("U+" + digits)))
+        elif len(text) == 1 or any(ord(c) > 0x7F for c in text):
+            rows = self.find_chars(text.replace(" ", ""))
+        else:
+            rows = self.find_name(text)
+        return self.with_status(rows, status)
+
+_INVERT = bytes(range(256)).replace(b"\x00\x01", b"\x01\x00")
+
+# --- Glyph components ---
+# A glyph can use others as components (canvas.Component): the shirorekha,
+# matras and accents drawn once and placed into every glyph that needs them.
+# Nothing derived from a glyph is stored per dependent; previews and compiled
+# outlines key on stamp(), which folds in the revisions of every component, so
+# editing a base makes each dependent stale the next time it is looked at.
+
+_USE_BYTES = re.compile(rb'<use data-component="U\+([0-9A-Fa-f]+)"')
+
+class ComponentGraph:
+    """
+    Which glyphs of a project use which others as components. A glyph's own
+    components are read from its SVG on demand and re-read when its revision
+    changes. The reverse edges behind dependents() take one scan of the drawn
+    glyphs the first time they are needed and are then kept current from the
+    journal. Not thread-safe: each project handle gets its own graph.
+    """
+    def __init__(self, project):
+        self.project = project
+        self.forward = {}       # codepoint -> (revision, component codepoints)
+        self.users = None       # codepoint -> set of glyphs using it directly, once built
+        self.synced = 0         # journal size the reverse edges were last checked against
+        self.compacted = 0      # project.compactions at that check
+
+    def components(self, cp):
+        """Codepoints the glyph uses directly, in drawing order."""
+        revision = self.project.glyph_revision(cp)
+        entry = self.forward.get(cp)
+        if entry is not None and entry[0] == revision:
+            return entry[1]
+        svg = self.project.glyph_svg(cp)
+        bases = tuple(int(code, 16) for code in _USE_BYTES.findall(svg)) if svg and b"<use" in svg else ()
+        old = entry[1] if entry is not None else ()
+        self.forward[cp] = (revision, bases)
+        if self.users is not None and old != bases:
+            for base in old:
+                self.users.get(base, set()).discard(cp)
+            for base in bases:
+                self.users.setdefault(base, set()).add(cp)
+        return bases
+
+    def sync(self):
+        compacted = self.project.compactions    # read first: a compaction landing in between is caught next time
+        size = self.project.pending_bytes()
+        if self.users is None or compacted != self.compacted:
+            # First use, or a compaction folded edits we never saw into the archive: check every glyph.
+            # Unchanged revisions cost a lookup each; only edited glyphs are read.
+            if self.users is None:
+                self.users = {}
+                for cp, (_, bases) in self.forward.items():
+                    for base in bases:
+                        self.users.setdefault(base, set()).add(cp)
+            for cp in set(self.project.drawn_codepoints()).union(self.forward):
+                self.components(cp)
+        elif size != self.synced:
+            for cp in self.project.journal_ops(OP_GLYPH):
+                self.components(cp)
+        self.synced = size
+        self.compacted = compacted
+
+    def dependents(self, cp):
+        """Every glyph that shows `cp`, directly or through other components, nearest first."""
+        self.sync()
+        found = []
+        seen = {cp}
+        queue = [cp]
+        for base in queue:
+            for user in sorted(self.users.get(base, ())):
+                if user not in seen:
+                    seen.add(user)
+                    found.append(user)
+                    queue.append(user)
+        return found
+
+    def would_cycle(self, cp, base):
+        """True if making `base` a component of `cp` would make the glyph contain itself."""
+        stack, seen = [base], set()
+        while stack:
+            current = stack.pop()
+            if current == cp:
+                return True
+            if current not in seen:
+                seen.add(current)
+                stack.extend(self.components(current))
+        return False
+
+    def stamp(self, cp, _using=()):
+        """
+        The glyph's revision for anything derived from its drawing. A glyph without
+        components keeps its own revision; a composite folds in its components'
+        stamps, so it changes whenever any of them is edited.
+        """
+        revision = self.project.glyph_revision(cp)
+        bases = self.components(cp)
+        if not bases:
+            return revision
+        using = (*_using, cp)
+        parts = [revision] + [self.stamp(base, using) for base in bases if base not in using]
+        return zlib.crc32(struct.pack(f"<{len(parts)}I", *parts)) or 1
+
+    def outline(self, cp):
+        """The glyph with components replaced by their contours (canvas.GlyphOutline), or None if undrawn."""
+        from canvas import GlyphOutline
+        font = self.project.font
+        ascender = font.get("ascender", round(font.get("units_per_em", 1000) * 0.8))
+
+        def resolve(code):
+            svg = self.project.glyph_svg(code)
+            return GlyphOutline.from_svg(svg, ascender) if svg else None
+
+        outline = resolve(cp)
+        if outline is None or not outline.components:
+            return outline
+        return outline.flattened(resolve, (cp,))
+
+    def flat_svg(self, cp):
+        """The glyph's SVG with components flattened, for renderers that cannot follow them."""
+        svg = self.project.glyph_svg(cp)
+        if not svg or b"<use" not in svg:
+            return svg
+        font = self.project.font
+        upem = font.get("units_per_em", 1000)
+        return self.outline(cp).to_svg(upem, font.get("ascender", round(upem * 0.8))).encode("utf-8")
+
+_component_graphs = weakref.WeakKeyDictionary()
+
+def component_graph(project):
+    """The ComponentGraph of an open storage.VarnProject, created on first use."""
+    graph = _component_graphs.get(project)
+    if graph is None:
+        graph = _component_graphs[project] = ComponentGraph(project)
+    return graph
+
+# --- Index file ---
+
+def _write_strings(out, strings):
+    out.append(struct.pack("<H", len(strings)))
+    for s in strings:
+        data = s.encode("utf-8")
+        out.append(struct.pack("<B", len(data)) + data)
+
+def _read_strings(data, pos):
+    (count,) = struct.unpack_from("<H", data, pos)
+    pos += 2
+    strings = []
+    for _ in range(count):
+        length = data[pos]
+        strings.append(data[pos + 1:pos + 1 + length].decode("utf-8"))
+        pos += 1 + length
+    return strings, pos
+
+def _write_table(out, table):
+    starts, values = array("I", table.starts), array("H", table.values)
+    if sys.byteorder == "big":
+        starts.byteswap()
+        values.byteswap()
+    _write_strings(out, table.names)
+    out.append(struct.pack("<I", len(starts)) + starts.tobytes() + values.tobytes())
+
+def _read_table(data, pos):
+    names, pos = _read_strings(data, pos)
+    (count,) = struct.unpack_from("<I", data, pos)
+    pos += 4
+    starts = array("I", data[pos:pos + 4 * count])
+    pos += 4 * count
+    values = array("H", data[pos:pos + 2 * count])
+    pos += 2 * count
+    if sys.byteorder == "big":
+        starts.byteswap()
+        values.byteswap()
+    return RangeTable(starts, values, names), pos
+
+def save_index(index, path=INDEX_PATH):
+    out = [_HEADER.pack(_MAGIC, _FORMAT, index.ucd_version.encode(), index.category_version.encode())]
+    for table in (index.scripts, index.blocks, index.categories):
+        _write_table(out, table)
+    codes = sorted(index.script_codes)
+    _write_strings(out, codes)
+    _write_strings(out, [index.script_codes[c] for c in codes])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(b"".join(out))
+    os.replace(tmp, path)
+
+def load_index(path=INDEX_PATH):
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, ucd_version, category_version = _HEADER.unpack_from(data, 0)
+    if magic != _MAGIC or version != _FORMAT:
+        raise ValueError(f"{path} is not a unicode index (format {_FORMAT})")
+    pos = _HEADER.size
+    scripts, pos = _read_table(data, pos)
+    blocks, pos = _read_table(data, pos)
+    categories, pos = _read_table(data, pos)
+    codes, pos = _read_strings(data, pos)
+    names, pos = _read_strings(data, pos)
+    return UnicodeIndex(scripts, blocks, categories, dict(zip(codes, names)),
+                        ucd_version.rstrip(b"\0").decode(), category_version.rstrip(b"\0").decode())
+
+_unicode_index = None
+
+def unicode_index():
+    """The process-wide UnicodeIndex, read from assets/unicode.idx on first use."""
+    global _unicode_index
+    if _unicode_index is None:
+        _unicode_index = load_index()
+    return _unicode_index
+
+# --- Building the index (development only) ---
+
+def _runs(starts, values):
+    """Collapse (start, value) pairs into a RangeTable, merging neighbours with equal values."""
+    names = list(dict.fromkeys(values))
+    ids = {n: i for i, n in enumerate(names)}
+    packed_starts, packed_values = array("I"), array("H")
+    for start, value in zip(starts, values):
+        if packed_values and names[packed_values[-1]] == value:
+            continue
+        packed_starts.append(start)
+        packed_values.append(ids[value])
+    return RangeTable(packed_starts, packed_values, names)
+
+def _parse_ucd(path, default):
+    """Scripts.txt / Blocks.txt style 'XXXX..YYYY ; Value' lines -> (starts, values) covering 0..10FFFF."""
+    ranges = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            span, value = (p.strip() for p in line.split(";")[:2])
+            first, _, last = span.partition("..")
+            ranges.append((int(first, 16), int(last or first, 16), value))
+    starts, values, next_cp = [], [], 0
+    for first, last, value in sorted(ranges):
+        if first > next_cp:
+            starts.append(next_cp)
+            values.append(default)
+        starts.append(first)
+        values.append(value)
+        next_cp = last + 1
+    if next_cp <= 0x10FFFF:
+        starts.append(next_cp)
+        values.append(default)
+    return starts, values
+
+def build_index(path=INDEX_PATH, scripts_txt=None, blocks_txt=None):
+    """
+    Regenerate assets/unicode.idx. Script and block runs come from the given UCD
+    files, or from fontTools' copy of the UCD; categories come from this Python's
+    unicodedata, so only characters it can name end up in glyph sets.
+    """
+    if scripts_txt and blocks_txt:
+        script_starts, script_values = _parse_ucd(scripts_txt, "Unknown")
+        block_starts, block_values = _parse_ucd(blocks_txt, "No_Block")
+        codes = {}
+        ucd_version = ""
+    else:
+        from fontTools.unicodedata import Blocks, Scripts
+        codes = {code: name.replace("_", " ") for code, name in Scripts.NAMES.items()}
+        script_starts, script_values = Scripts.RANGES, [codes[v] for v in Scripts.VALUES]
+        block_starts, block_values = Blocks.RANGES, Blocks.VALUES
+        ucd_version = ""
+        with open(Scripts.__file__, encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("# Scripts-"):
+                    ucd_version = line[len("# Scripts-"):].split(".txt")[0]
+                    break
+
+    category_starts, category_values = [], []
+    previous = None
+    for cp in range(0x110000):
+        category = unicodedata.category(chr(cp))
+        if category != previous:
+            category_starts.append(cp)
+            category_values.append(category)
+            previous = category
+
+    index = UnicodeIndex(_runs(script_starts, script_values), _runs(block_starts, block_values),
+                         _runs(category_starts, category_values), codes, ucd_version, unicodedata.unidata_version)
+    save_index(index, path)
+    return index
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["build"]:
+        index = build_index(INDEX_PATH, *sys.argv[2:4])
+        print(f"{INDEX_PATH}: {len(index.scripts)} script runs, {len(index.blocks)} block runs, "
+              f"{len(index.categories)} category runs, {os.path.getsize(INDEX_PATH)} bytes")
+    else:
+        print("usage: python glyphs.py build [Scripts.txt Blocks.txt]")
@@ -1,57 +1,150 @@
+import time
+
+STARTUP_T0 = time.perf_counter()
+
+import os
 import sys
 from PyQt6.QtWidgets import QApplication, QMainWindow, QStackedWidget, QPushButton
-from ui import StartMenu, HomeScreen, FontEditor, GlyphEditor
-from PyQt6.QtCore import pyqtSignal
+from PyQt6.QtCore import QObject, QEvent, pyqtSignal
+from ui import STYLESHEET, StartMenu, HomeScreen, FontEditor, GlyphEditor
+
+class StartupTimer(QObject):
+    """
+    Startup instrumentation, enabled with --startup-timing or AKSHAR_STARTUP_TIMING=1.
+    Logs each startup phase (time since the previous mark and since launch), and
+    the first paint of every screen as it gets built.
+    """
+    def __init__(self, enabled=False):
+        super().__init__()
+        self.enabled = enabled
+        self.last = STARTUP_T0
+        self.pending = {}  # widget -> phase waiting for its first paint
+
+    def mark(self, phase):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        print(f"[startup] {phase:<28} {(now - self.last) * 1000:8.1f} ms   "
+              f"{(now - STARTUP_T0) * 1000:8.1f} ms since launch")
+        self.last = now
+
+    def watch_paint(self, widget, phase):
+        if self.enabled:
+            self.pending[widget] = phase
+            widget.installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint and obj in self.pending:
+            obj.removeEventFilter(self)
+            self.mark(f"{self.pending.pop(obj)} first paint")
+        return False
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, timer=None):
         super().__init__()
         self.setWindowTitle("Akshar")
         self.resize(1000, 700)
-        
+        self.timer = timer or StartupTimer()
+        self.menu_pinned = False
+
         self.stack = QStackedWidget()
         self.setCentralWidget(self.stack)
-        
-        # 1. Initialize Screens
-        self.start_menu = StartMenu()
-        self.home_screen = HomeScreen()
-        self.font_editor = FontEditor()
-        self.glyph_editor = GlyphEditor()
-        
-        # 2. Add to Stack
-        self.stack.addWidget(self.start_menu)   # 0
-        self.stack.addWidget(self.home_screen)  # 1
-        self.stack.addWidget(self.font_editor)  # 2
-        self.stack.addWidget(self.glyph_editor) # 3
-        
-        # --- SYNCHRONIZATION LOGIC ---
-        
-        # Connect Home signal to Sync
-        self.home_screen.pin_toggled.connect(self.sync_pin_state)
-        
-        # Connect Font Editor signal to Sync
-        self.font_editor.pin_toggled.connect(self.sync_pin_state)
-        
-        # --- NAVIGATION LOGIC ---
-        
-        self.start_menu.btn_start.clicked.connect(lambda: self.stack.setCurrentIndex(1))
-        self.home_screen.btn_new.clicked.connect(lambda: self.stack.setCurrentIndex(2))
-        
+
+        # Screens are built on first navigation (see screen()); only the start menu
+        # is needed for the first paint.
+        self.screens = {}
+        self.show_screen("start_menu")
+
+    # --- SCREENS ---
+
+    def screen(self, name):
+        """The named screen, building and wiring it up on first use."""
+        screen = self.screens.get(name)
+        if screen is None:
+            screen = getattr(self, "build_" + name)()
+            self.screens[name] = screen
+            self.stack.addWidget(screen)
+            if hasattr(screen, "set_pinned_state"):
+                screen.resize(self.stack.size())
+                screen.set_pinned_state(self.menu_pinned)
+            self.timer.mark(f"{name} built")
+            self.timer.watch_paint(screen, name)
+        return screen
+
+    def show_screen(self, name):
+        self.stack.setCurrentWidget(self.screen(name))
+
+    def build_start_menu(self):
+        start_menu = StartMenu()
+        start_menu.btn_start.clicked.connect(lambda: self.show_screen("home_screen"))
+        return start_menu
+
+    def build_home_screen(self):
+        home_screen = HomeScreen()
+        home_screen.pin_toggled.connect(self.sync_pin_state)
+        home_screen.project_opened.connect(self.open_project)
+        return home_screen
+
+    def build_font_editor(self):
+        font_editor = FontEditor()
+        font_editor.pin_toggled.connect(self.sync_pin_state)
         # Back Button Logic
-        self.font_editor.font_menu.back_callback = lambda: self.stack.setCurrentIndex(1)
+        font_editor.font_menu.back_callback = lambda: self.show_screen("home_screen")
+        # Glyph Editor: open from the grid, auto-save on the way back
+        font_editor.glyph_opened.connect(self.open_glyph)
+        return font_editor
+
+    def build_glyph_editor(self):
+        glyph_editor = GlyphEditor()
+        glyph_editor.btn_back.clicked.connect(self.close_glyph)
+        return glyph_editor
+
+    # --- NAVIGATION LOGIC ---
+
+    def open_project(self, path):
+        if self.screen("font_editor").open_project(path):
+            self.show_screen("font_editor")
+
+    def open_glyph(self, cp):
+        font_editor = self.screen("font_editor")
+        self.screen("glyph_editor").open_glyph(font_editor.project, cp, font_editor.history)
+        self.show_screen("glyph_editor")
+
+    def close_glyph(self):
+        glyph_editor = self.screen("glyph_editor")
+        glyph_editor.save_glyph()
+        if glyph_editor.codepoint is not None:
+            self.screen("font_editor").refresh_glyph(glyph_editor.codepoint)
+        self.show_screen("font_editor")
+
+    def closeEvent(self, event):
+        # Journal the glyph being edited and release the project before the window goes.
+        if "glyph_editor" in self.screens:
+            self.screens["glyph_editor"].save_glyph()
+        if "font_editor" in self.screens:
+            self.screens["font_editor"].close_project()
+        super().closeEvent(event)
 
     def sync_pin_state(self, is_pinned: bool):
         """
         Received a signal from one screen, force the state onto ALL screens.
+        Screens not built yet pick it up when they are.
         """
-        # Update Home
-        self.home_screen.set_pinned_state(is_pinned)
-        
-        # Update Font Editor
-        self.font_editor.set_pinned_state(is_pinned)
+        self.menu_pinned = is_pinned
+        for screen in self.screens.values():
+            if hasattr(screen, "set_pinned_state"):
+                screen.set_pinned_state(is_pinned)
 
 if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()  # font export runs glyph work in child processes
+    timer = StartupTimer("--startup-timing" in sys.argv or os.environ.get("AKSHAR_STARTUP_TIMING") == "1")
+    timer.mark("imports")
     app = QApplication(sys.argv)
-    window = MainWindow()
+    app.setApplicationName("Akshar")
+    app.setStyleSheet(STYLESHEET)  # parsed once, shared by every screen
+    timer.mark("application")
+    window = MainWindow(timer)
     window.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    timer.mark("main window")
+    sys.exit(app.exec())
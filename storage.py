@@ -0,0 +1,907 @@
+import hashlib
+import json
+import os
+import struct
+import threading
+import time
+import zipfile
+import zlib
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+
+# .varn project container
+#
+#   MyFont.varn  (ZIP)
+#   ├── manifest.json        small, read on open
+#   ├── font.json            Unicode + font data, read on first use
+#   ├── glyphs/XXXX.svg      one drawing per codepoint, read on demand
+#   ├── previews/font.png
+#   ├── previews/glyphs/XXXX.png
+#   ├── cache/…              derived data (compiled export glyphs), safe to drop
+#   └── meta/app.json
+#
+# Opening a project reads only the ZIP central directory and manifest.json.
+# Glyph entries are indexed into packed arrays (no per-entry Python objects),
+# and each SVG is inflated only when the grid or the glyph editor asks for it.
+#
+# Edits never rewrite the archive. They are appended to a write-ahead journal
+# next to it (MyFont.varn.journal) and folded back into the ZIP by compact(),
+# either on explicit Save or in the background. Opening a project replays
+# whatever the journal holds, which is also how a crash is recovered from.
+
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+FONT_INFO = "font.json"
+GLYPH_DIR = "glyphs/"
+GLYPH_PREVIEW_DIR = "previews/glyphs/"
+FONT_PREVIEW = "previews/font.png"
+CACHE_DIR = "cache/"
+JOURNAL_SUFFIX = ".journal"
+COMPACT_THRESHOLD = 4 * 1024 * 1024  # journal bytes before a background compaction
+REPLACE_ATTEMPTS = 6                 # tries at swapping in a file another handle still has open
+REPLACE_DELAY = 0.05                 # seconds before the first retry, doubled after each
+
+class VarnError(Exception):
+    pass
+
+def glyph_name(codepoint):
+    return f"{GLYPH_DIR}{codepoint:04X}.svg"
+
+def glyph_preview_name(codepoint):
+    return f"{GLYPH_PREVIEW_DIR}{codepoint:04X}.png"
+
+def retry_replace(swap):
+    """
+    Call swap(), an os.replace() of a project file, until it stops raising
+    PermissionError: Windows refuses to replace a file any handle (a thumbnail
+    or export worker, the library scan) has open. No lock is held between tries.
+    Raises the last PermissionError if the file stays open.
+    """
+    delay = REPLACE_DELAY
+    for attempt in range(REPLACE_ATTEMPTS):
+        try:
+            swap()
+            return
+        except PermissionError:
+            if attempt == REPLACE_ATTEMPTS - 1:
+                raise
+            time.sleep(delay)
+            delay *= 2
+
+def cache_slot(name):
+    """Journal key for a cache/ entry; records carry the name too, so compaction can restore it."""
+    return zlib.crc32(name.encode("utf-8"))
+
+# --- 1. ZIP CENTRAL DIRECTORY ---
+
+_EOCD = struct.Struct("<4s4H2LH")
+_EOCD64_LOCATOR = struct.Struct("<4sLQL")
+_EOCD64 = struct.Struct("<4sQ2H2L4Q")
+_CENTRAL = struct.Struct("<4s6H3L5H2L")
+_LOCAL = struct.Struct("<4s5H3L2H")
+
+def read_central_directory(fp):
+    """Yield (raw_name, flags, method, crc, comp_size, size, header_offset, comment) for every entry."""
+    fp.seek(0, os.SEEK_END)
+    file_size = fp.tell()
+    tail_size = min(file_size, _EOCD.size + 0xFFFF)
+    fp.seek(file_size - tail_size)
+    tail = fp.read(tail_size)
+    pos = tail.rfind(b"PK\x05\x06")
+    if pos < 0:
+        raise VarnError("not a .varn file (no ZIP end of central directory)")
+    _, _, _, _, count, cd_size, cd_offset, _ = _EOCD.unpack_from(tail, pos)
+
+    loc = pos - _EOCD64_LOCATOR.size
+    if loc >= 0 and tail[loc:loc + 4] == b"PK\x06\x07":
+        _, _, eocd64_offset, _ = _EOCD64_LOCATOR.unpack_from(tail, loc)
+        fp.seek(eocd64_offset)
+        record = _EOCD64.unpack(fp.read(_EOCD64.size))
+        count, cd_size, cd_offset = record[7], record[8], record[9]
+
+    fp.seek(cd_offset)
+    data = fp.read(cd_size)
+    pos = 0
+    for _ in range(count):
+        (sig, _, _, flags, method, _, _, crc, comp_size, size,
+         name_len, extra_len, comment_len, _, _, _, offset) = _CENTRAL.unpack_from(data, pos)
+        if sig != b"PK\x01\x02":
+            raise VarnError("corrupt central directory")
+        pos += _CENTRAL.size
+        raw_name = data[pos:pos + name_len]
+        if 0xFFFFFFFF in (comp_size, size, offset):
+            size, comp_size, offset = _zip64_sizes(data, pos + name_len, extra_len, size, comp_size, offset)
+        comment = data[pos + name_len + extra_len:pos + name_len + extra_len + comment_len]
+        pos += name_len + extra_len + comment_len
+        yield raw_name, flags, method, crc, comp_size, size, offset, comment
+
+def decode_name(raw_name, flags):
+    return raw_name.decode("utf-8" if flags & 0x800 else "cp437")
+
+def _zip64_sizes(data, pos, extra_len, size, comp_size, offset):
+    end = pos + extra_len
+    while pos + 4 <= end:
+        tag, length = struct.unpack_from("<2H", data, pos)
+        if tag == 0x0001:
+            fields = iter(struct.unpack_from(f"<{length // 8}Q", data, pos + 4))
+            if size == 0xFFFFFFFF: size = next(fields)
+            if comp_size == 0xFFFFFFFF: comp_size = next(fields)
+            if offset == 0xFFFFFFFF: offset = next(fields)
+            break
+        pos += 4 + length
+    return size, comp_size, offset
+
+class EntryTable:
+    """Per-codepoint ZIP entries packed into parallel arrays, sorted by codepoint."""
+    def __init__(self):
+        self.codepoints = array("I")
+        self.offsets = array("Q")
+        self.comp_sizes = array("Q")
+        self.methods = array("B")
+        self.crcs = array("I")
+        self.revisions = array("I")
+
+    def add(self, codepoint, method, crc, comp_size, offset, revision=0):
+        self.codepoints.append(codepoint)
+        self.offsets.append(offset)
+        self.comp_sizes.append(comp_size)
+        self.methods.append(method)
+        self.crcs.append(crc)
+        self.revisions.append(revision)
+
+    def sort(self):
+        if all(a < b for a, b in zip(self.codepoints, self.codepoints[1:])):
+            return
+        order = sorted(range(len(self.codepoints)), key=self.codepoints.__getitem__)
+        for attr in ("codepoints", "offsets", "comp_sizes", "methods", "crcs", "revisions"):
+            column = getattr(self, attr)
+            setattr(self, attr, array(column.typecode, (column[i] for i in order)))
+
+    def find(self, codepoint):
+        i = bisect_left(self.codepoints, codepoint)
+        if i < len(self.codepoints) and self.codepoints[i] == codepoint:
+            return i
+        return -1
+
+    def __len__(self):
+        return len(self.codepoints)
+
+    def __contains__(self, codepoint):
+        return self.find(codepoint) >= 0
+
+    def nbytes(self):
+        columns = (self.codepoints, self.offsets, self.comp_sizes, self.methods, self.crcs, self.revisions)
+        return sum(a.itemsize * len(a) for a in columns)
+
+# --- 2. WRITE-AHEAD JOURNAL ---
+
+OP_GLYPH = 1      # payload: glyph SVG
+OP_DELETE = 2     # glyph removed, no payload
+OP_PREVIEW = 3    # payload: glyph preview PNG
+OP_FONT = 4       # payload: full font.json
+OP_CACHE = 5      # payload: entry name, NUL, data; codepoint is cache_slot(name)
+OP_BATCH = 6      # payload: complete records, applied together or not at all
+
+_RECORD = struct.Struct("<2sBIIII")  # magic, op, codepoint, revision, length, crc32
+_RECORD_MAGIC = b"VJ"
+
+class ProjectJournal:
+    """
+    Append-only log of edits to one .varn file. Every record is a fixed header
+    plus payload, checksummed so a torn write at the tail (crash mid-append)
+    is detected and cut off on replay. A batch is one record wrapping several,
+    so its checksum covers them all and a torn batch is dropped whole. Only the
+    latest record per key is indexed in memory; payloads stay on disk until read.
+
+    A read-only journal (the handles worker threads open beside the GUI's)
+    never writes: a tail it cannot verify may be an append still in progress,
+    so it is left alone for the owning handle to repair.
+    """
+    def __init__(self, path, durable=True, read_only=False):
+        self.path = path
+        self.durable = durable
+        self.read_only = read_only
+        self.lock = threading.RLock()
+        self.index = {}   # (op kind, codepoint) -> (op, revision, payload offset, length)
+        self.fp = open(path, "rb" if read_only else "a+b")
+        self.replay()
+
+    @staticmethod
+    def key(op, codepoint):
+        # Glyph writes and deletes share a slot; the latest one wins.
+        return (OP_GLYPH if op == OP_DELETE else op, codepoint)
+
+    @staticmethod
+    def pack(op, codepoint, revision, payload=b""):
+        header = _RECORD.pack(_RECORD_MAGIC, op, codepoint, revision, len(payload), 0)
+        crc = zlib.crc32(payload, zlib.crc32(header[:15]))
+        return header[:15] + struct.pack("<I", crc) + payload
+
+    def replay(self):
+        self.index.clear()
+        self.fp.seek(0)
+        data = self.fp.read()
+        pos = 0
+        while pos + _RECORD.size <= len(data):
+            magic, op, codepoint, revision, length, crc = _RECORD.unpack_from(data, pos)
+            start = pos + _RECORD.size
+            payload = data[start:start + length]
+            if magic != _RECORD_MAGIC or len(payload) != length or zlib.crc32(payload, zlib.crc32(data[pos:pos + 15])) != crc:
+                break
+            if op == OP_BATCH:
+                self.index_batch(data, start, start + length)
+            else:
+                self.index[self.key(op, codepoint)] = (op, revision, start, length)
+            pos = start + length
+        if pos != len(data) and not self.read_only:
+            # Torn tail from an interrupted append: drop it so new records line up.
+            self.fp.truncate(pos)
+            self.sync()
+        self.size = pos
+
+    def index_batch(self, data, pos, end, base=0):
+        # The batch checksum already vouches for the records inside it.
+        # data[pos:end] is the batch body, which sits at file offset base + pos.
+        while pos < end:
+            _, op, codepoint, revision, length, _ = _RECORD.unpack_from(data, pos)
+            start = pos + _RECORD.size
+            self.index[self.key(op, codepoint)] = (op, revision, base + start, length)
+            pos = start + length
+
+    def check_writable(self):
+        if self.read_only:
+            raise VarnError(f"{self.path}: journal opened read-only")
+
+    def append(self, op, codepoint, revision, payload=b""):
+        self.check_writable()
+        record = self.pack(op, codepoint, revision, payload)
+        with self.lock:
+            self.fp.seek(0, os.SEEK_END)
+            self.fp.write(record)
+            self.fp.flush()
+            self.sync()
+            start = self.size + _RECORD.size
+            self.size = start + len(payload)
+            self.index[self.key(op, codepoint)] = (op, revision, start, len(payload))
+
+    def append_batch(self, records):
+        """Append [(op, codepoint, revision, payload), ...] as one transaction with a single sync."""
+        self.check_writable()
+        body = b"".join(self.pack(*record) for record in records)
+        with self.lock:
+            self.fp.seek(0, os.SEEK_END)
+            self.fp.write(self.pack(OP_BATCH, 0, 0, body))
+            self.fp.flush()
+            self.sync()
+            start = self.size + _RECORD.size
+            self.size = start + len(body)
+            self.index_batch(body, 0, len(body), base=start)
+
+    def sync(self):
+        if self.durable and not self.read_only:
+            # fdatasync skips the metadata flush fsync would do; each append stays cheap.
+            getattr(os, "fdatasync", os.fsync)(self.fp.fileno())
+
+    def get(self, op, codepoint):
+        """(op, revision, payload) of the latest record for this key, or None."""
+        with self.lock:
+            entry = self.index.get(self.key(op, codepoint))
+            if entry is None:
+                return None
+            op, revision, offset, length = entry
+            # Re-check the record's own checksum: the index is only as good as the file under it.
+            self.fp.seek(offset - _RECORD.size)
+            data = self.fp.read(_RECORD.size + length)
+        if len(data) == _RECORD.size + length:
+            magic, _, _, _, _, crc = _RECORD.unpack_from(data)
+            if magic == _RECORD_MAGIC and zlib.crc32(data[_RECORD.size:], zlib.crc32(data[:15])) == crc:
+                return op, revision, data[_RECORD.size:]
+        raise VarnError(f"{self.path}: journal record for {op}/{codepoint:04X} at {offset} is damaged")
+
+    def snapshot(self):
+        """The indexed records and the journal size they cover, taken atomically."""
+        with self.lock:
+            return dict(self.index), self.size
+
+    def drop_before(self, offset):
+        """
+        Forget everything before `offset` (already compacted), keeping later
+        records. The rest is written to a new file that replaces the journal,
+        so read-only handles still open on the old one keep valid offsets.
+        Returns False if the journal could not be replaced and was kept whole;
+        its compacted records then just replay onto the archive that has them.
+        """
+        self.check_writable()
+        tmp_path = self.path + ".tmp"
+
+        def swap():
+            with self.lock:
+                # Copied on every try: appends may have landed since the last one.
+                self.fp.seek(offset)
+                tail = self.fp.read()
+                with open(tmp_path, "wb") as out:
+                    out.write(tail)
+                    out.flush()
+                    if self.durable:
+                        os.fsync(out.fileno())
+                self.fp.close()
+                try:
+                    os.replace(tmp_path, self.path)
+                finally:
+                    # Whichever file survived, appends must keep working.
+                    self.fp = open(self.path, "a+b")
+                self.replay()
+
+        try:
+            retry_replace(swap)
+        except OSError:
+            os.remove(tmp_path)
+            return False
+        return True
+
+    def close(self):
+        self.fp.close()
+
+# --- 3. PROJECT ---
+
+class VarnProject:
+    """
+    An open .varn project. Only the central directory and manifest are read here;
+    font.json, glyph SVGs and previews are read lazily and glyph SVGs are kept
+    in a small LRU so memory follows the glyphs actually touched.
+
+    One handle per project owns it and may write. Handles opened with
+    read_only=True (worker threads reading beside the GUI, the library scan)
+    see the journal as it was when they opened it and never modify it.
+    """
+    def __init__(self, path, cache_size=256, read_only=False):
+        self.path = os.fspath(path)
+        self.cache_size = cache_size
+        self.read_only = read_only
+        self.cache = OrderedDict()
+        self.lock = threading.RLock()
+        self.compact_lock = threading.Lock()
+        self.compactions = 0   # archives swapped in by compact(); journal offsets before one mean nothing after it
+        self.fp = open(self.path, "rb")
+        self._font = None
+        self.journal = None
+        try:
+            self.load_index()
+            self.manifest = json.loads(self.read_entry(MANIFEST))
+        except Exception:
+            self.fp.close()
+            raise
+        if self.manifest.get("format") != "varn":
+            self.fp.close()
+            raise VarnError(f"{self.path}: not a .varn project")
+        # A leftover journal means edits that were never compacted (or a crash): replay it.
+        if os.path.exists(self.journal_path):
+            self.journal = ProjectJournal(self.journal_path, read_only=read_only)
+
+    @classmethod
+    def open(cls, path, **kwargs):
+        return cls(path, **kwargs)
+
+    def load_index(self):
+        self.glyphs = EntryTable()
+        self.glyph_previews = EntryTable()
+        self.entries = {}
+        tables = ((GLYPH_DIR.encode(), b".svg", self.glyphs), (GLYPH_PREVIEW_DIR.encode(), b".png", self.glyph_previews))
+        for raw_name, flags, method, crc, comp_size, _, offset, comment in read_central_directory(self.fp):
+            for prefix, suffix, table in tables:
+                if raw_name.startswith(prefix) and raw_name.endswith(suffix):
+                    try:
+                        # The entry comment carries the glyph revision written by compact().
+                        revision = int(comment) if comment.isdigit() else 0
+                        table.add(int(raw_name[len(prefix):-4], 16), method, crc, comp_size, offset, revision)
+                        break
+                    except ValueError:
+                        pass
+            else:
+                self.entries[decode_name(raw_name, flags)] = (method, crc, comp_size, offset, comment)
+        self.glyphs.sort()
+        self.glyph_previews.sort()
+
+    # -- Raw entry access --
+    def read_raw(self, method, comp_size, offset):
+        with self.lock:
+            self.fp.seek(offset)
+            header = self.fp.read(_LOCAL.size)
+            sig, _, _, _, _, _, _, _, _, name_len, extra_len = _LOCAL.unpack(header)
+            if sig != b"PK\x03\x04":
+                raise VarnError(f"{self.path}: corrupt local header at {offset}")
+            self.fp.seek(offset + _LOCAL.size + name_len + extra_len)
+            data = self.fp.read(comp_size)
+        if method == zipfile.ZIP_STORED:
+            return data
+        if method == zipfile.ZIP_DEFLATED:
+            return zlib.decompress(data, -15)
+        raise VarnError(f"{self.path}: unsupported compression method {method}")
+
+    def read_entry(self, name):
+        entry = self.entries.get(name)
+        if entry is None:
+            raise KeyError(name)
+        method, _, comp_size, offset, _ = entry
+        return self.read_raw(method, comp_size, offset)
+
+    def has_entry(self, name):
+        return name in self.entries
+
+    # -- Font data --
+    @property
+    def name(self):
+        return self.manifest.get("name", os.path.splitext(os.path.basename(self.path))[0])
+
+    @property
+    def script(self):
+        return self.manifest.get("script", "")
+
+    @property
+    def font(self):
+        if self._font is None:
+            record = self.journal.get(OP_FONT, 0) if self.journal else None
+            if record is not None:
+                self._font = json.loads(record[2])
+            elif FONT_INFO in self.entries:
+                self._font = json.loads(self.read_entry(FONT_INFO))
+            else:
+                self._font = {}
+        return self._font
+
+    def codepoints(self):
+        """Every glyph slot in the font, drawn or not."""
+        slots = self.font.get("codepoints")
+        return list(slots) if slots is not None else self.drawn_codepoints()
+
+    def journal_ops(self, kind):
+        """{codepoint: op} for journaled records of one kind (glyph or preview)."""
+        if self.journal is None:
+            return {}
+        index, _ = self.journal.snapshot()
+        return {cp: entry[0] for (k, cp), entry in index.items() if k == kind}
+
+    def drawn_codepoints(self):
+        drawn = set(self.glyphs.codepoints)
+        for cp, op in self.journal_ops(OP_GLYPH).items():
+            if op == OP_DELETE:
+                drawn.discard(cp)
+            else:
+                drawn.add(cp)
+        return sorted(drawn)
+
+    def has_glyph(self, codepoint):
+        if self.journal is not None:
+            record = self.journal.index.get((OP_GLYPH, codepoint))
+            if record is not None:
+                return record[0] != OP_DELETE
+        return codepoint in self.glyphs
+
+    def glyph_count(self):
+        if self.journal is None:
+            return len(self.glyphs)
+        return len(self.drawn_codepoints())
+
+    def glyph_revision(self, codepoint):
+        """Bumped on every save of this glyph; 0 if it was never saved."""
+        if self.journal is not None:
+            record = self.journal.index.get((OP_GLYPH, codepoint))
+            if record is not None:
+                return record[1]
+        i = self.glyphs.find(codepoint)
+        return self.glyphs.revisions[i] if i >= 0 else 0
+
+    def glyph_svg(self, codepoint):
+        """The SVG bytes for a glyph, or None if it has not been drawn."""
+        svg = self.cache.get(codepoint)
+        if svg is not None:
+            self.cache.move_to_end(codepoint)
+            return svg
+        record = self.journal.get(OP_GLYPH, codepoint) if self.journal else None
+        if record is not None:
+            if record[0] == OP_DELETE:
+                return None
+            svg = record[2]
+        else:
+            i = self.glyphs.find(codepoint)
+            if i < 0:
+                return None
+            svg = self.read_raw(self.glyphs.methods[i], self.glyphs.comp_sizes[i], self.glyphs.offsets[i])
+        self.remember(codepoint, svg)
+        return svg
+
+    def remember(self, codepoint, svg):
+        self.cache[codepoint] = svg
+        self.cache.move_to_end(codepoint)
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def glyph_preview(self, codepoint):
+        record = self.journal.get(OP_PREVIEW, codepoint) if self.journal else None
+        if record is not None:
+            return record[2]
+        i = self.glyph_previews.find(codepoint)
+        if i < 0:
+            return None
+        t = self.glyph_previews
+        return self.read_raw(t.methods[i], t.comp_sizes[i], t.offsets[i])
+
+    def glyph_preview_revision(self, codepoint):
+        record = self.journal.index.get((OP_PREVIEW, codepoint)) if self.journal else None
+        if record is not None:
+            return record[1]
+        i = self.glyph_previews.find(codepoint)
+        return self.glyph_previews.revisions[i] if i >= 0 else -1
+
+    def content_hash(self):
+        """
+        Hash of everything that affects how the font looks, built from the
+        central-directory CRCs and journal revisions: no glyph is decompressed.
+        font.json records all carry revision 0, so those are told apart by
+        where the latest one sits in the journal.
+        """
+        h = hashlib.blake2b(digest_size=16)
+        h.update(self.glyphs.codepoints.tobytes())
+        h.update(self.glyphs.crcs.tobytes())
+        font_entry = self.entries.get(FONT_INFO)
+        h.update(str(font_entry[1] if font_entry else 0).encode())
+        if self.journal is not None:
+            index, _ = self.journal.snapshot()
+            for key in sorted(k for k in index if k[0] not in (OP_PREVIEW, OP_CACHE)):
+                _, revision, offset, _ = index[key]
+                h.update(repr((key, offset if key[0] == OP_FONT else revision)).encode())
+        return h.hexdigest()
+
+    # -- Autosave (journaled) --
+    def open_journal(self):
+        if self.read_only:
+            raise VarnError(f"{self.path}: opened read-only")
+        with self.lock:
+            # Preview write-back runs on its own thread; two journals on one file would interleave appends.
+            if self.journal is None:
+                self.journal = ProjectJournal(self.journal_path)
+            return self.journal
+
+    @property
+    def journal_path(self):
+        return self.path + JOURNAL_SUFFIX
+
+    def save_glyph(self, codepoint, svg):
+        """Append one glyph edit to the journal. Cost is independent of project size."""
+        if isinstance(svg, str):
+            svg = svg.encode("utf-8")
+        revision = self.glyph_revision(codepoint) + 1
+        self.open_journal().append(OP_GLYPH, codepoint, revision, svg)
+        self.remember(codepoint, svg)
+        return revision
+
+    def save_glyphs(self, glyphs):
+        """
+        Journal many glyph edits as one transaction: {codepoint: svg, or None to
+        delete}. After a crash either all of them are there or none are.
+        Returns {codepoint: revision}.
+        """
+        glyphs = {cp: svg.encode("utf-8") if isinstance(svg, str) else svg for cp, svg in glyphs.items()}
+        records = []
+        revisions = {}
+        for codepoint, svg in glyphs.items():
+            revision = revisions[codepoint] = self.glyph_revision(codepoint) + 1
+            records.append((OP_GLYPH if svg else OP_DELETE, codepoint, revision, svg or b""))
+        if records:
+            self.open_journal().append_batch(records)
+        for codepoint, svg in glyphs.items():
+            if svg:
+                self.remember(codepoint, svg)
+            else:
+                self.cache.pop(codepoint, None)
+        return revisions
+
+    def delete_glyph(self, codepoint):
+        revision = self.glyph_revision(codepoint) + 1
+        self.open_journal().append(OP_DELETE, codepoint, revision)
+        self.cache.pop(codepoint, None)
+        return revision
+
+    def save_glyph_preview(self, codepoint, revision, png):
+        """Store a rendered preview tile; `revision` is the glyph revision it shows."""
+        self.open_journal().append(OP_PREVIEW, codepoint, revision, png)
+
+    def save_glyph_previews(self, previews):
+        """Store many preview tiles with one journal append: {codepoint: (revision, png)}."""
+        if previews:
+            self.open_journal().append_batch([(OP_PREVIEW, cp, revision, png) for cp, (revision, png) in previews.items()])
+
+    def set_font_info(self, font):
+        self._font = dict(font)
+        self.open_journal().append(OP_FONT, 0, 0, json.dumps(self._font).encode("utf-8"))
+
+    def cache_entry(self, name):
+        """A cache/ entry written by write_cache(), or None."""
+        record = self.journal.get(OP_CACHE, cache_slot(name)) if self.journal else None
+        if record is not None:
+            entry_name, _, data = record[2].partition(b"\0")
+            if entry_name.decode("utf-8") == name:
+                return data
+        return self.read_entry(name) if name in self.entries else None
+
+    def write_cache(self, name, data):
+        """Journal derived data under cache/; like previews it does not change content_hash()."""
+        if not name.startswith(CACHE_DIR):
+            raise ValueError(f"cache entries live under {CACHE_DIR}: {name}")
+        self.open_journal().append(OP_CACHE, cache_slot(name), 0, name.encode("utf-8") + b"\0" + data)
+
+    def pending_bytes(self):
+        return self.journal.size if self.journal else 0
+
+    # -- Compaction --
+    def compact(self):
+        """
+        Fold the journal into the ZIP: write a new archive beside the old one,
+        swap it in atomically, then drop the journal records it now contains.
+        Edits made while this runs stay in the journal. Returns False if there
+        was nothing to do. If the archive stays held open elsewhere the old one
+        is kept, the journal is left untouched and VarnError is raised.
+        """
+        with self.compact_lock:
+            if self.read_only or self.journal is None or self.journal.size == 0:
+                return False
+            records, upto = self.journal.snapshot()
+            tmp_path = self.path + ".tmp"
+            try:
+                self.write_compacted(tmp_path, records)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+            def swap():
+                with self.lock:
+                    self.fp.close()
+                    try:
+                        os.replace(tmp_path, self.path)
+                    finally:
+                        self.fp = open(self.path, "rb")
+                    self.load_index()
+                    self.manifest = json.loads(self.read_entry(MANIFEST))
+                    self.compactions += 1
+
+            try:
+                retry_replace(swap)
+            except OSError as e:
+                os.remove(tmp_path)
+                raise VarnError(f"{self.path}: could not replace the archive, edits stay journaled: {e}") from e
+            self.journal.drop_before(upto)
+            return True
+
+    def compact_if_needed(self, threshold=COMPACT_THRESHOLD):
+        if self.pending_bytes() >= threshold and not self.compact_lock.locked():
+            return self.compact_async()
+        return None
+
+    def compact_async(self, on_done=None):
+        """Run compact() on a background thread; `on_done(result_or_exception)` is called from it."""
+        def run():
+            try:
+                result = self.compact()
+            except Exception as e:
+                result = e
+            if on_done is not None:
+                on_done(result)
+        thread = threading.Thread(target=run, name=f"compact {os.path.basename(self.path)}", daemon=True)
+        thread.start()
+        return thread
+
+    def write_compacted(self, tmp_path, records):
+        def journaled(kind):
+            return {cp: entry for (k, cp), entry in records.items() if k == kind}
+
+        def read_journal(entry):
+            _, _, offset, length = entry
+            with self.journal.lock:
+                self.journal.fp.seek(offset)
+                return self.journal.fp.read(length)
+
+        def write_table(zf, table, overlay, name_for):
+            for cp in sorted(set(table.codepoints) | set(overlay)):
+                entry = overlay.get(cp)
+                if entry is not None:
+                    if entry[0] == OP_DELETE:
+                        continue
+                    data, revision = read_journal(entry), entry[1]
+                else:
+                    i = table.find(cp)
+                    data = self.read_raw(table.methods[i], table.comp_sizes[i], table.offsets[i])
+                    revision = table.revisions[i]
+                info = zipfile.ZipInfo(name_for(cp), time.localtime()[:6])
+                info.compress_type = zipfile.ZIP_DEFLATED
+                info.comment = str(revision).encode()
+                zf.writestr(info, data)
+
+        glyph_overlay = journaled(OP_GLYPH)
+        preview_overlay = journaled(OP_PREVIEW)
+        font_entry = records.get((OP_FONT, 0))
+        cache_entries = dict(read_journal(entry).split(b"\0", 1) for (k, _), entry in records.items() if k == OP_CACHE)
+
+        manifest = dict(self.manifest)
+        manifest["modified"] = time.time()
+        manifest["glyph_count"] = len(
+            {cp for cp in self.glyphs.codepoints if glyph_overlay.get(cp, (0,))[0] != OP_DELETE}
+            | {cp for cp, entry in glyph_overlay.items() if entry[0] != OP_DELETE}
+        )
+
+        with open(tmp_path, "wb") as out:
+            with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zf:
+                zf.writestr(MANIFEST, json.dumps(manifest))
+                replaced = {MANIFEST}
+                if font_entry is not None:
+                    zf.writestr(FONT_INFO, read_journal(font_entry))
+                    replaced.add(FONT_INFO)
+                for name, data in cache_entries.items():
+                    name = name.decode("utf-8")
+                    zf.writestr(name, data)
+                    replaced.add(name)
+                for name in self.entries:
+                    if name not in replaced:
+                        zf.writestr(name, self.read_entry(name))
+                write_table(zf, self.glyphs, glyph_overlay, glyph_name)
+                write_table(zf, self.glyph_previews, preview_overlay, glyph_preview_name)
+            out.flush()
+            os.fsync(out.fileno())
+
+    def font_preview(self):
+        return self.read_entry(FONT_PREVIEW) if FONT_PREVIEW in self.entries else None
+
+    def close(self):
+        # Anything still journaled is replayed on the next open.
+        with self.compact_lock:
+            self.cache.clear()
+            self.fp.close()
+            if self.journal is not None:
+                self.journal.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# --- 4. CREATING PROJECTS ---
+
+def new_manifest(name, script, glyph_count=0):
+    now = time.time()
+    return {
+        "format": "varn",
+        "version": FORMAT_VERSION,
+        "name": name,
+        "script": script,
+        "created": now,
+        "modified": now,
+        "glyph_count": glyph_count,
+    }
+
+def new_font_info(name, script, codepoints=(), units_per_em=1000):
+    return {
+        "family": name,
+        "style": "Regular",
+        "script": script,
+        "units_per_em": units_per_em,
+        "ascender": int(units_per_em * 0.8),
+        "descender": -int(units_per_em * 0.2),
+        "codepoints": list(codepoints),
+    }
+
+def create_project(path, name, script, codepoints=(), glyphs=None, units_per_em=1000):
+    """Write a new .varn project. `glyphs` maps codepoint -> SVG bytes."""
+    glyphs = glyphs or {}
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr(MANIFEST, json.dumps(new_manifest(name, script, len(glyphs))))
+        zf.writestr(FONT_INFO, json.dumps(new_font_info(name, script, codepoints, units_per_em)))
+        for codepoint in sorted(glyphs):
+            zf.writestr(glyph_name(codepoint), glyphs[codepoint])
+        zf.writestr("meta/app.json", json.dumps({}))
+    return VarnProject(path)
+
+# --- 5. PROJECT LIBRARY ---
+
+PROJECT_SUFFIX = ".varn"
+LIBRARY_VERSION = 1
+
+def file_stamp(path):
+    """
+    (mtime_ns, size) of a project and of its journal. Autosave only appends to
+    the journal, so both are needed to notice every edit.
+    """
+    st = os.stat(path)
+    try:
+        jst = os.stat(path + JOURNAL_SUFFIX)
+        journal = [jst.st_mtime_ns, jst.st_size]
+    except FileNotFoundError:
+        journal = [0, 0]
+    return [st.st_mtime_ns, st.st_size] + journal
+
+def scan_projects(directory, known):
+    """
+    Stat every .varn in `directory` (no archive is opened). Returns
+    ({path: stamp} for projects that are new or differ from `known`,
+    [paths in `known` that are gone]).
+    """
+    directory = os.path.abspath(directory)
+    found = {}
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.name.endswith(PROJECT_SUFFIX) and entry.is_file():
+                    try:
+                        found[entry.path] = file_stamp(entry.path)
+                    except OSError:
+                        pass  # removed between listing and stat
+    except FileNotFoundError:
+        pass
+    changed = {path: stamp for path, stamp in found.items() if known.get(path) != stamp}
+    gone = [path for path in known if os.path.dirname(path) == directory and path not in found]
+    return changed, gone
+
+def read_summary(path, stamp=None):
+    """
+    What the library shows for one project. Opening reads only the central
+    directory, manifest and journal, so this costs the same for any glyph count.
+    """
+    stamp = stamp or file_stamp(path)
+    with VarnProject(path, read_only=True) as project:
+        return {
+            "name": project.name,
+            "script": project.script,
+            "glyphs": project.glyph_count(),
+            "modified": max(stamp[0], stamp[2]) / 1e9,
+            "thumbnail": project.content_hash(),  # key into the thumbnail cache
+            "stamp": stamp,
+        }
+
+class LibraryIndex:
+    """
+    JSON catalog of project summaries keyed by absolute path. Entries carry the
+    file stamp they were read at, so revalidating only reopens projects that
+    changed on disk. Unreadable projects are kept with an "error" so they are
+    not retried until they change, but are left out of projects().
+    """
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.dirty = False
+        try:
+            with open(path, "rb") as f:
+                data = json.load(f)
+            if data.get("version") == LIBRARY_VERSION:
+                self.entries = data["projects"]
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass  # missing or unreadable catalog: everything gets revalidated
+
+    def stamps(self):
+        return {path: entry.get("stamp") for path, entry in self.entries.items()}
+
+    def projects(self, directory):
+        """Readable projects in `directory`, most recently edited first."""
+        directory = os.path.abspath(directory)
+        found = [(path, entry) for path, entry in self.entries.items()
+                 if "error" not in entry and os.path.dirname(path) == directory]
+        found.sort(key=lambda item: item[1]["modified"], reverse=True)
+        return found
+
+    def update(self, path, entry):
+        self.entries[path] = entry
+        self.dirty = True
+
+    def remove(self, path):
+        if self.entries.pop(path, None) is not None:
+            self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            # dumps() takes the C encoder; dump() to a file would encode in Python.
+            f.write(json.dumps({"version": LIBRARY_VERSION, "projects": self.entries}))
+        os.replace(tmp, self.path)
+        self.dirty = False
@@ -0,0 +1,315 @@
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from canvas import GlyphOutline, fit_polygon
+
+# Bitmap -> glyph outline, for importing scans and images into the glyph editor.
+#
+#   grayscale pixels ──downsample──> work bitmap ──threshold──> ink mask
+#       ──crack edges──> pixel-boundary loops ──smooth + fit──> Contours
+#
+# Everything per pixel is vectorized NumPy: the block-mean downsample, the
+# Otsu histogram, the ink mask and the boundary edges with their successor
+# links. Python only walks the boundary (a few thousand edges per glyph) to
+# put each loop in order, and fits the cubics. Nothing here imports Qt;
+# decoding the image file is the caller's job (see app.py).
+#
+# A specimen sheet (one scanned page, a character per grid cell) is
+# thresholded once for the whole page, cut into cells, and the cells are
+# traced in a process pool, a few per task, like export.py compiles glyphs.
+
+WORK_SIZE = 1024          # pixels along the longer side of the traced bitmap
+TRACE_TOLERANCE = 1.0     # pixels of the work bitmap the fitted curves may stray
+MIN_AREA = 12             # pixels; smaller specks (scanner dust, paper grain) are dropped
+FIT_SPACING = 2.0         # pixels between the samples handed to the curve fitter
+CELL_SIZE = 512           # pixels a sheet cell is traced at, at most
+CELL_INSET = 0.06         # fraction of a cell trimmed on each side, so ruled grid lines are not traced
+CELLS_PER_TASK = 4        # sheet cells per pool task
+POOL_MIN_CELLS = 24       # below this, starting worker processes costs more than it saves
+
+# Edge directions in image coordinates (y down), turning clockwise.
+_DX = np.array([1, 0, -1, 0])
+_DY = np.array([0, 1, 0, -1])
+
+class TraceCancelled(Exception):
+    pass
+
+def downsample(gray, max_side=WORK_SIZE):
+    """Block-mean an 8-bit grayscale array by a whole factor until it fits max_side."""
+    h, w = gray.shape
+    factor = -(-max(h, w) // max_side)
+    if factor <= 1:
+        return np.ascontiguousarray(gray)
+    h, w = h // factor, w // factor
+    blocks = gray[:h * factor, :w * factor].reshape(h, factor, w, factor)
+    return (blocks.sum(axis=(1, 3), dtype=np.uint32) // (factor * factor)).astype(np.uint8)
+
+def otsu_threshold(gray):
+    """The gray level that best separates ink from paper (Otsu's method)."""
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    levels = np.arange(256)
+    weight = np.cumsum(hist)
+    mass = np.cumsum(hist * levels)
+    total, total_mass = weight[-1], mass[-1]
+    background = total - weight
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_fg = mass / weight
+        mean_bg = (total_mass - mass) / background
+        between = weight * background * (mean_fg - mean_bg) ** 2
+    between[~np.isfinite(between)] = 0
+    return int(np.argmax(between)) + 1
+
+def ink_mask(gray, threshold=None):
+    """Boolean ink bitmap. Light-on-dark images (more "ink" than paper) are inverted."""
+    if threshold is None:
+        threshold = otsu_threshold(gray)
+    mask = gray < threshold
+    if np.count_nonzero(mask) * 2 > mask.size:
+        mask = ~mask
+    return mask
+
+def boundary_loops(mask):
+    """
+    Closed loops along pixel edges between ink and paper, as (N, 2) vertex arrays
+    in pixel-corner coordinates (y down). Each loop keeps ink on its right, so
+    outer boundaries and holes come out in opposite directions. Diagonal pixel
+    pairs are joined, so thin diagonal strokes stay one shape.
+    """
+    h, w = mask.shape
+    padded = np.zeros((h + 2, w + 2), dtype=bool)
+    padded[1:-1, 1:-1] = mask
+    stride = w + 1
+
+    # Horizontal edges on row boundary y (between pixel rows y-1 and y), columns x..x+1.
+    below = padded[1:, 1:-1]
+    above = padded[:-1, 1:-1]
+    ys, xs = np.nonzero(below & ~above)          # ink below: walk +x
+    starts = [ys * stride + xs]
+    dirs = [np.zeros(len(xs), np.int8)]
+    ys, xs = np.nonzero(above & ~below)          # ink above: walk -x
+    starts.append(ys * stride + xs + 1)
+    dirs.append(np.full(len(xs), 2, np.int8))
+    # Vertical edges on column boundary x (between pixel columns x-1 and x), rows y..y+1.
+    right = padded[1:-1, 1:]
+    left = padded[1:-1, :-1]
+    ys, xs = np.nonzero(right & ~left)           # ink right: walk -y
+    starts.append((ys + 1) * stride + xs)
+    dirs.append(np.full(len(xs), 3, np.int8))
+    ys, xs = np.nonzero(left & ~right)           # ink left: walk +y
+    starts.append(ys * stride + xs)
+    dirs.append(np.full(len(xs), 1, np.int8))
+
+    start = np.concatenate(starts)
+    direction = np.concatenate(dirs).astype(np.int64)
+    count = len(start)
+    if not count:
+        return []
+    end = start + _DX[direction] + _DY[direction] * stride
+
+    # Successor of each edge: the edge leaving its end vertex, preferring a left
+    # turn, then straight on, then right. Only saddles (two diagonal ink pixels)
+    # have two candidates; turning left there joins the pixels.
+    outgoing = np.full((h + 1) * stride * 4, -1, dtype=np.int64)
+    outgoing[start * 4 + direction] = np.arange(count)
+    base = end * 4
+    nxt = outgoing[base + (direction + 3) % 4]
+    fallback = nxt < 0
+    nxt[fallback] = outgoing[base[fallback] + direction[fallback]]
+    fallback = nxt < 0
+    nxt[fallback] = outgoing[base[fallback] + (direction[fallback] + 1) % 4]
+
+    # Only corners matter for the shape: walk edge-to-edge but keep an edge's
+    # start vertex only where the direction changes.
+    corner = direction != direction[nxt]
+    nxt_list = nxt.tolist()
+    corner_list = corner.tolist()
+    seen = bytearray(count)
+    loops = []
+    for first in range(count):
+        if seen[first]:
+            continue
+        loop = []
+        e = first
+        while not seen[e]:
+            seen[e] = 1
+            if corner_list[e]:
+                loop.append(nxt_list[e])
+            e = nxt_list[e]
+        if len(loop) >= 4:
+            ends = end[loop]
+            loops.append(np.stack((ends % stride, ends // stride), axis=1).astype(np.float64))
+    return loops
+
+def loop_area(points):
+    x, y = points[:, 0], points[:, 1]
+    return 0.5 * float(np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y))
+
+def smooth_loop(points):
+    """
+    Replace the pixel staircase with the midpoints of its runs. One-pixel steps
+    (diagonals) become straight lines; long runs keep their corners within half
+    a pixel.
+    """
+    mid = (points + np.roll(points, -1, axis=0)) * 0.5
+    run = np.abs(np.roll(points, -1, axis=0) - points).sum(axis=1)
+    # Long runs keep their end points too, so square corners stay square.
+    keep_corner = (run > 2) & (np.roll(run, 1) > 2)
+    out = np.empty((len(points) * 2, 2))
+    out[0::2] = points
+    out[1::2] = mid
+    mask = np.empty(len(points) * 2, dtype=bool)
+    mask[0::2] = keep_corner
+    mask[1::2] = True
+    return out[mask]
+
+def resample_loop(points, spacing=FIT_SPACING):
+    """
+    Points every `spacing` along a closed polygon, keeping its vertices. The
+    curve fitter expects dense samples, as from a pen; a long straight run
+    given as just its two ends fits badly.
+    """
+    closed = np.vstack((points, points[:1]))
+    lengths = np.hypot(*np.diff(closed, axis=0).T)
+    steps = np.maximum(np.ceil(lengths / spacing).astype(int), 1)
+    # For each output sample: which edge it lies on and how far along it.
+    edge = np.repeat(np.arange(len(points)), steps)
+    offsets = np.arange(len(edge)) - np.repeat(np.cumsum(steps) - steps, steps)
+    t = (offsets / steps[edge])[:, None]
+    return closed[edge] * (1 - t) + closed[edge + 1] * t
+
+def trace_mask(mask, units_per_em=1000, ascender=800, scale=None, tolerance=TRACE_TOLERANCE,
+               min_area=MIN_AREA, step=None):
+    """
+    Trace a boolean ink bitmap into closed Contours in font units, y up. By
+    default the bitmap is scaled to fill the em square; `scale` (font units per
+    pixel) fixes it instead. Either way it is centred horizontally with its top
+    edge on the ascender. step(percent) is called as contours are fitted.
+    """
+    loops = [loop for loop in boundary_loops(mask) if abs(loop_area(loop)) >= min_area]
+    h, w = mask.shape
+    if scale is None:
+        scale = units_per_em / max(h, w, 1)
+    dx = (units_per_em - w * scale) / 2
+    contours = []
+    # Fitting dominates; report it by vertex count so big loops move the bar more.
+    total = sum(len(loop) for loop in loops) or 1
+    fitted = 0
+    for loop in loops:
+        # Ink-on-the-right is clockwise on screen and stays clockwise through the y flip;
+        # reverse so outers run counter-clockwise like drawn strokes.
+        points = resample_loop(smooth_loop(loop))[::-1]
+        xs = points[:, 0] * scale + dx
+        ys = ascender - points[:, 1] * scale
+        contours.append(fit_polygon(list(zip(xs.tolist(), ys.tolist())), tolerance * scale))
+        fitted += len(loop)
+        if step is not None:
+            step(100 * fitted // total)
+    return contours
+
+def trace_bitmap(gray, threshold=None, units_per_em=1000, ascender=800, tolerance=TRACE_TOLERANCE,
+                 min_area=MIN_AREA, progress=None, cancelled=None):
+    """
+    Trace an 8-bit grayscale array (dark ink on light paper, or the reverse) into
+    closed Contours in font units, y up. The image is scaled to fill the em
+    square and centred. Outer contours run counter-clockwise, holes clockwise.
+    progress(done, total) is reported in percent; cancelled() is polled between
+    stages and contours and raises TraceCancelled.
+    """
+    def step(done):
+        if cancelled is not None and cancelled():
+            raise TraceCancelled()
+        if progress is not None:
+            progress(done, 100)
+
+    work = downsample(gray)
+    step(10)
+    mask = ink_mask(work, threshold)
+    step(20)
+    return trace_mask(mask, units_per_em, ascender, tolerance=tolerance, min_area=min_area,
+                      step=lambda percent: step(20 + 80 * percent // 100))
+
+# --- Specimen sheets ---
+
+def slice_cells(mask, rows, cols, inset=CELL_INSET):
+    """Cut a page bitmap into rows x cols equal cells, row-major, each trimmed by `inset` on every side."""
+    h, w = mask.shape
+    ys = np.linspace(0, h, rows + 1).round().astype(int)
+    xs = np.linspace(0, w, cols + 1).round().astype(int)
+    cell_h, cell_w = h // rows, w // cols
+    trim_y, trim_x = int(cell_h * inset), int(cell_w * inset)
+    # Every cell gets the same size, so every glyph gets the same scale and baseline.
+    return [mask[y + trim_y:y + cell_h - trim_y, x + trim_x:x + cell_w - trim_x]
+            for y in ys[:-1] for x in xs[:-1]]
+
+def trace_cells(jobs, units_per_em, ascender):
+    """[(codepoint, cell mask), ...] -> [(codepoint, glyph SVG bytes or None for an empty cell), ...]"""
+    results = []
+    for codepoint, cell in jobs:
+        # Cells are traced at the scale of the full cell height, so letters keep their
+        # relative size and sit on a shared baseline.
+        contours = trace_mask(cell, units_per_em, ascender, scale=units_per_em / cell.shape[0])
+        if contours:
+            svg = GlyphOutline(contours).to_svg(units_per_em, ascender)
+            results.append((codepoint, svg.encode("utf-8")))
+        else:
+            results.append((codepoint, None))
+    return results
+
+def trace_sheet(gray, rows, cols, codepoints, units_per_em=1000, ascender=800, inset=CELL_INSET,
+                workers=None, progress=None, traced=None, cancelled=None):
+    """
+    Trace a specimen sheet: an 8-bit grayscale page with one character per cell
+    of a rows x cols grid, mapped row-major onto `codepoints` (None skips a
+    cell). Returns {codepoint: glyph SVG bytes} for the cells that hold ink.
+
+    The page is thresholded once, so faint and bold cells agree on what is ink.
+    workers=0 traces in this process; the default uses every core once there
+    are enough cells. traced(codepoint, svg or None) is called as each cell
+    finishes, progress(done, total) after each batch of them; cancelled()
+    returning True stops with TraceCancelled.
+    """
+    work = downsample(gray, CELL_SIZE * max(rows, cols))
+    mask = ink_mask(work)
+    jobs = [(cp, cell) for cp, cell in zip(codepoints, slice_cells(mask, rows, cols, inset)) if cp is not None]
+    if workers is None:
+        cores = os.cpu_count() or 1
+        workers = cores if cores > 1 and len(jobs) >= POOL_MIN_CELLS else 0
+    glyphs = {}
+    done = 0
+
+    def collect(results):
+        nonlocal done
+        for codepoint, svg in results:
+            if svg is not None:
+                glyphs[codepoint] = svg
+            if traced is not None:
+                traced(codepoint, svg)
+        done += len(results)
+        if progress is not None:
+            progress(done, len(jobs))
+        if cancelled is not None and cancelled():
+            raise TraceCancelled()
+
+    if progress is not None:
+        progress(0, len(jobs))
+    chunks = (jobs[i:i + CELLS_PER_TASK] for i in range(0, len(jobs), CELLS_PER_TASK))
+    if workers == 0:
+        for chunk in chunks:
+            collect(trace_cells(chunk, units_per_em, ascender))
+    elif jobs:
+        # spawn, not fork: the caller is usually a Qt process with threads running.
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            pending = {pool.submit(trace_cells, chunk, units_per_em, ascender) for chunk in chunks}
+            try:
+                while pending:
+                    finished, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        collect(future.result())
+            except BaseException:
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+    return glyphs
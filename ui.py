@@ -1,11 +1,88 @@
+import math
+import os
 import sys
+import time
+from bisect import bisect_left
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
     QPushButton, QSpacerItem, QSizePolicy, QFrame, QScrollArea, 
-    QGridLayout, QGraphicsOpacityEffect
+    QGridLayout, QGraphicsOpacityEffect, QAbstractItemView, QStyledItemDelegate, QStyle,
+    QStyleOptionViewItem, QGraphicsView, QGraphicsScene, QGraphicsItem, QGraphicsPathItem, QGraphicsRectItem,
+    QDialog, QLineEdit, QListWidget, QListWidgetItem, QComboBox, QFileDialog, QProgressDialog, QMessageBox,
+    QSpinBox, QCheckBox, QFormLayout, QMenu, QInputDialog
+)
+from PyQt6.QtCore import (
+    Qt, QPropertyAnimation, QEasingCurve, QPoint, QSize, QTimer, QParallelAnimationGroup, pyqtSignal,
+    QSequentialAnimationGroup, QPauseAnimation,
+    QAbstractListModel, QAbstractProxyModel, QModelIndex, QRect, QRectF, QPointF, QEvent
+)
+from PyQt6.QtGui import (
+    QFont, QColor, QPen, QPainter, QPixmap, QRegion, QPainterPath, QPainterPathStroker, QShortcut, QKeySequence,
+    QPolygonF
 )
-from PyQt6.QtCore import Qt, QPropertyAnimation, QEasingCurve, QPoint, QSize, QTimer, QParallelAnimationGroup, pyqtSignal
-from PyQt6.QtGui import QFont
+
+from app import (
+    ThumbnailService, ExportService, LibraryService, TraceService, IMAGE_FILTER, export_dir, glyph_tiles,
+    render_glyph_image, tint_image, invalidation
+)
+from canvas import (
+    Contour, GlyphOutline, StrokeFitter, fit_polygon, ON_CURVE, OFF_CURVE,
+    UndoHistory, AddContours, RemoveContours, ReplaceContours, MoveContours, ReplaceGlyph, ReplaceGlyphs, Component,
+    SetComponents, SegmentIndex, boolean_contours, DIFFERENCE, StrokeCapture
+)
+from glyphs import GLYPH_SETS, GlyphSearchIndex, unicode_index, project_codepoints, component_graph
+from storage import VarnProject, VarnError, create_project, PROJECT_SUFFIX
+
+# --- STYLESHEET ---
+
+# Chrome shared by every screen, installed once on the QApplication (see main.py)
+# so Qt parses it a single time instead of once per widget. Widgets opt in by
+# object name; one-off styles stay inline next to the widget they belong to.
+STYLESHEET = """
+#screen, #screen * { background-color: #1e1e1e; font-family: Segoe UI, sans-serif; }
+#topBar, #topBar * { background-color: #252525; border-bottom: 1px solid #333333; }
+#bottomBar, #bottomBar * { background-color: #252525; border-top: 1px solid #333333; }
+#sidePanel, #sidePanel * { background-color: #222222; border-right: 1px solid #333333; }
+#dimOverlay { background-color: rgba(0, 0, 0, 150); }
+QScrollArea#cardScroll { border: none; }
+
+QPushButton#menuButton {
+    background-color: transparent; color: #dddddd; font-size: 18px;
+    border: 1px solid #444444; border-radius: 6px;
+}
+QPushButton#menuButton:hover { background-color: #333333; }
+
+QFrame#drawer, #drawer QFrame { background-color: #252525; border-right: 1px solid #333333; }
+#drawer QPushButton {
+    background-color: transparent; color: #dddddd; text-align: left;
+    padding: 10px 15px; border: none; border-radius: 4px; font-size: 14px;
+}
+#drawer QPushButton:hover { background-color: #333333; color: #ffffff; }
+#drawer QFrame#separator { background-color: #333333; max-height: 1px; margin: 5px 0; }
+QPushButton#drawerClose {
+    background-color: transparent; border: none; color: #666666;
+    padding: 0px; margin: 0px; text-align: center;
+}
+QPushButton#drawerClose:hover { color: #ffffff; background-color: #333333; border-radius: 4px; }
+QPushButton#drawerPin { color: #666666; border: none; padding: 0px; border-radius: 4px; margin: 0px; text-align: center; }
+QPushButton#drawerPin:checked { color: #dddddd; background-color: #444444; }
+QPushButton#drawerPin:hover { background-color: #333333; }
+QPushButton#drawerDanger, QPushButton#drawerDanger:hover { color: #ff6666; text-align: left; padding: 10px 15px; }
+
+QFrame#fontCard { background-color: #252525; border-radius: 12px; border: 1px solid #333333; }
+QFrame#fontCard:hover { background-color: #2d2d2d; border-color: #555555; }
+QLabel#cardPreview { background-color: #1a1a1a; border-radius: 8px; border: none; color: #333333; font-size: 64px; font-weight: bold; }
+QLabel#cardTitle { color: #f0f0f0; font-weight: bold; font-size: 14px; border: none; background: transparent; }
+QLabel#cardScript { color: #888888; font-size: 12px; border: none; background: transparent; }
+QLabel#cardDate { color: #555555; font-size: 11px; border: none; background: transparent; }
+
+QPushButton#sideAction { color: #aaaaaa; border: 1px solid #333333; border-radius: 5px; font-size: 12px; }
+QPushButton#sideAction:hover { background-color: #333333; color: #ffffff; }
+QPushButton#sideAction:disabled { color: #555555; }
+QPushButton#toolButton { background-color: transparent; border: 1px solid transparent; border-radius: 4px; font-size: 20px; }
+QPushButton#toolButton:hover { background-color: #333333; border: 1px solid #555555; }
+QPushButton#toolButton:checked { background-color: #3a3a3a; border: 1px solid #3d8bfd; }
+"""
 
 # --- 1. UTILS & OVERLAYS ---
 
@@ -13,7 +90,7 @@ class DimOverlay(QWidget):
     def __init__(self, parent=None, close_callback=None):
         super().__init__(parent)
         self.close_callback = close_callback
-        self.setStyleSheet("background-color: rgba(0, 0, 0, 150);")
+        self.setObjectName("dimOverlay")
         self.hide()
 
     def mousePressEvent(self, event):
@@ -28,20 +105,7 @@ class HomeHamburgerMenu(QFrame):
         self.close_callback = close_callback
         self.pin_callback = pin_callback
         self.setFixedWidth(280)
-        self.setStyleSheet("""
-            QFrame { background-color: #252525; border-right: 1px solid #333333; }
-            QLabel { color: #888888; font-weight: bold; font-size: 12px; margin-top: 10px; margin-bottom: 5px; }
-            QPushButton {
-                background-color: transparent;
-                color: #dddddd;
-                text-align: left;
-                padding: 10px 15px;
-                border: none;
-                border-radius: 4px;
-                font-size: 14px;
-            }
-            QPushButton:hover { background-color: #333333; color: #ffffff; }
-        """)
+        self.setObjectName("drawer")
 
         layout = QVBoxLayout()
         layout.setContentsMargins(10, 20, 10, 20)
@@ -50,24 +114,12 @@ class HomeHamburgerMenu(QFrame):
         # -- Header (X and Pin) --
         header = QHBoxLayout()
         header.setContentsMargins(5, 0, 5, 10)
-        icon_btn_style = """
-            QPushButton { 
-                background-color: transparent; 
-                border: none; 
-                color: #666666; 
-                padding: 0px;
-                margin: 0px;
-                text-align: center;
-            }
-            QPushButton:hover { color: #ffffff; background-color: #333333; border-radius: 4px; }
-        """
-
         # Close button (Left)
         btn_close = QPushButton("✕")
         btn_close.setFixedSize(45, 45)
         btn_close.setCursor(Qt.CursorShape.PointingHandCursor)
         btn_close.setFont(QFont("Segoe UI Symbol", 18))
-        btn_close.setStyleSheet(icon_btn_style)
+        btn_close.setObjectName("drawerClose")
         btn_close.clicked.connect(self.close_callback)
 
         # Pin button (Right)
@@ -76,11 +128,7 @@ class HomeHamburgerMenu(QFrame):
         self.btn_pin.setCheckable(True)
         self.btn_pin.setCursor(Qt.CursorShape.PointingHandCursor)
         self.btn_pin.setFont(QFont("Segoe UI Emoji", 18))
-        self.btn_pin.setStyleSheet("""
-            QPushButton { color: #666666; border: none; padding: 0px; border-radius: 4px; margin: 0px; text-align: center; }
-            QPushButton:checked { color: #dddddd; background-color: #444444; }
-            QPushButton:hover { background-color: #333333; }
-        """)
+        self.btn_pin.setObjectName("drawerPin")
         self.btn_pin.clicked.connect(self.pin_callback)
 
         # Header layout
@@ -104,7 +152,7 @@ class HomeHamburgerMenu(QFrame):
             line = QFrame()
             line.setFrameShape(QFrame.Shape.HLine)
             line.setFrameShadow(QFrame.Shadow.Sunken)
-            line.setStyleSheet("background-color: #333333; max-height: 1px; margin: 5px 0;")
+            line.setObjectName("separator")
             layout.addWidget(line)
 
         # -- Menu Items --
@@ -128,7 +176,7 @@ class HomeHamburgerMenu(QFrame):
         
         add_sep()
         btn_exit = add_btn("Exit", "🚪")
-        btn_exit.setStyleSheet("color: #ff6666; text-align: left; padding: 10px 15px;")
+        btn_exit.setObjectName("drawerDanger")
 
         self.setLayout(layout)
 
@@ -136,22 +184,38 @@ class HomeHamburgerMenu(QFrame):
 
 class HomeScreen(QWidget):
     pin_toggled = pyqtSignal(bool)
-    def __init__(self):
+    project_opened = pyqtSignal(str)  # a card was clicked, or a new font created: the .varn to edit
+    def __init__(self, library=None):
         super().__init__()
         self.data = []
         self.is_menu_pinned = False
         self.is_menu_open = False
-        
+
+        # Card widgets live as long as their font does; the grid only moves them.
+        self.cards = {}
+        self.grid_cols = 0
+        self.slots = {}  # card key -> (row, col) it was last laid out in
+        self.layout_dirty = False
+        self.card_size = QSize()
+        self.pending_intro = set()
+        self.stats = {"resizes": 0, "reflows": 0, "cards_created": 0, "animations": 0}
+        self.thumb_keys = {}  # path -> content hash its thumbnail is cached under
+
+        self.library = library or LibraryService(parent=self)
         self.init_ui()
-        self.load_dummy_data()
+        self.load_library()
 
     def init_ui(self):
-        self.setStyleSheet("background-color: #1e1e1e; font-family: Segoe UI, sans-serif;")
+        self.setObjectName("screen")
         
         self.resize_timer = QTimer(self)
         self.resize_timer.setSingleShot(True)
         self.resize_timer.timeout.connect(self.animate_cards)
 
+        self.thumbnails = ThumbnailService(self)
+        self.thumbnails.ready.connect(self.on_thumbnail_ready)
+        invalidation().thumbnail_ready.connect(self.on_thumbnail_ready)   # patched after glyph edits
+
         # Root Layout (Horizontal) handles Pinned State logic
         self.root_layout = QHBoxLayout(self)
         self.root_layout.setContentsMargins(0, 0, 0, 0)
@@ -166,7 +230,7 @@ class HomeScreen(QWidget):
         # Top Bar
         top_bar = QFrame()
         top_bar.setFixedHeight(60)
-        top_bar.setStyleSheet("background-color: #252525; border-bottom: 1px solid #333333;")
+        top_bar.setObjectName("topBar")
         top_layout = QHBoxLayout(top_bar)
         top_layout.setContentsMargins(20, 0, 20, 0)
 
@@ -174,16 +238,7 @@ class HomeScreen(QWidget):
         self.btn_menu = QPushButton("☰")
         self.btn_menu.setFixedSize(40, 36)
         self.btn_menu.setCursor(Qt.CursorShape.PointingHandCursor)
-        self.btn_menu.setStyleSheet("""
-            QPushButton {
-                background-color: transparent;
-                color: #dddddd;
-                font-size: 18px;
-                border: 1px solid #444444;
-                border-radius: 6px;
-            }
-            QPushButton:hover { background-color: #333333; }
-        """)
+        self.btn_menu.setObjectName("menuButton")
         self.btn_menu.clicked.connect(self.open_menu)
         top_layout.addWidget(self.btn_menu)
 
@@ -205,6 +260,7 @@ class HomeScreen(QWidget):
             }
             QPushButton:hover { background-color: #ffffff; }
         """)
+        self.btn_new.clicked.connect(self.new_project)
         top_layout.addWidget(self.btn_new)
 
         content_layout.addWidget(top_bar)
@@ -212,10 +268,9 @@ class HomeScreen(QWidget):
         # Grid Scroll Area
         self.scroll = QScrollArea()
         self.scroll.setWidgetResizable(True)
-        self.scroll.setStyleSheet("QScrollArea { border: none; background-color: #1e1e1e; }")
+        self.scroll.setObjectName("cardScroll")
         
         self.container = QWidget()
-        self.container.setStyleSheet("background-color: #1e1e1e;")
         self.grid_layout = QGridLayout(self.container)
         self.grid_layout.setContentsMargins(40, 40, 40, 40)
         self.grid_layout.setSpacing(25)
@@ -244,8 +299,17 @@ class HomeScreen(QWidget):
 
     def showEvent(self, event):
         self.repopulate_grid()
+        self.library.set_active(True)
         super().showEvent(event)
 
+    def hideEvent(self, event):
+        self.library.set_active(False)
+        super().hideEvent(event)
+
+    def closeEvent(self, event):
+        self.thumbnails.shutdown()
+        super().closeEvent(event)
+
     def resizeEvent(self, event):
         if self.overlay.isVisible():
             self.overlay.resize(self.size())
@@ -253,8 +317,8 @@ class HomeScreen(QWidget):
         if not self.is_menu_pinned and self.is_menu_open:
             self.side_menu.resize(self.side_menu.width(), self.height())
 
+        self.stats["resizes"] += 1
         self.repopulate_grid()
-        self.resize_timer.start(150)
         super().resizeEvent(event)
 
     # --- Menu Logic (Fixed) ---
@@ -357,59 +421,172 @@ class HomeScreen(QWidget):
         self.repopulate_grid()
 
     def animate_cards(self):
-            for i in range(self.grid_layout.count()):
-                widget = self.grid_layout.itemAt(i).widget()
-                if not widget: continue
-
-                # 1. Setup Opacity Effect
-                effect = QGraphicsOpacityEffect(widget)
-                widget.setGraphicsEffect(effect)
-                
-                # 2. Define Animations
-                # Opacity: 0 -> 1
-                anim_op = QPropertyAnimation(effect, b"opacity")
-                anim_op.setStartValue(0)
-                anim_op.setEndValue(1)
-                anim_op.setDuration(400)
-                
-                # Position: Slide Up (Fly)
-                # We use the widget's current layout position as the END point
-                end_pos = widget.pos()
-                start_pos = end_pos + QPoint(0, 50) # Start 50px lower
-                
-                anim_pos = QPropertyAnimation(widget, b"pos")
-                anim_pos.setStartValue(start_pos)
-                anim_pos.setEndValue(end_pos)
-                anim_pos.setDuration(400)
-                anim_pos.setEasingCurve(QEasingCurve.Type.OutBack) # "Fly" bounce effect
-
-                # 3. Group and Stagger
-                group = QParallelAnimationGroup(self)
-                group.addAnimation(anim_op)
-                group.addAnimation(anim_pos)
-                
-                # Delay based on index (50ms stagger)
-                QTimer.singleShot(i * 50, group.start)
+        # Only cards that moved into a new slot or were just added get an intro,
+        # and only if they can actually be seen. A busy event loop can fire this
+        # before the scroll area has grown the container to fit new cards, when
+        # they are still squeezed on top of each other: try again shortly.
+        if self.container.height() < self.grid_layout.minimumSize().height():
+            self.resize_timer.start(50)
+            return
+        self.grid_layout.activate()
+        visible = self.visible_rect()
+        delay = 0
+        for key in self.data_keys():
+            card = self.cards[key]
+            if key not in self.pending_intro or not visible.intersects(card.geometry()):
+                continue
+            card.play_intro(delay)
+            self.stats["animations"] += 1
+            delay += 50
+        self.pending_intro.clear()
                 
-    # --- Grid Logic (Unchanged) ---
-    def load_dummy_data(self):
-        self.data = [
-            ("MyFirstFont", "Latin", "2m ago"),
-            ("Devanagari Test", "Devanagari", "1h ago"),
-            ("Pixel Art", "Symbols", "Yesterday"),
-            ("Logos", "Symbols", "2 days ago"),
-            ("Handwritten", "Latin", "Last week"),
-            ("Tech Mono", "Latin", "2 weeks ago"),
-            ("Ancient", "Runes", "1 month ago"),
-        ]
+    # --- Library (catalog first, revalidated in the background) ---
+    def load_library(self):
+        # Scan results arrive one project at a time; fold each burst into one grid update.
+        self.library_changes = {}  # path -> summary, or None when removed
+        self.library_timer = QTimer(self)
+        self.library_timer.setSingleShot(True)
+        self.library_timer.setInterval(50)
+        self.library_timer.timeout.connect(self.apply_library_changes)
+        self.library.updated.connect(self.on_library_changed)
+        self.library.removed.connect(self.on_library_changed)
+        self.apply_library()  # revalidation starts when the screen is first shown
+
+    def on_library_changed(self, path, summary=None):
+        self.library_changes[path] = summary
+        self.library_timer.start()
+
+    def library_entry(self, path, summary):
+        return (summary["name"], summary["script"], self.edited_label(summary["modified"]), path)
+
+    def apply_library_changes(self):
+        """
+        Patch self.data in place: changed projects keep their slot (so only their
+        card repaints) and new ones are appended, so no other card moves. The grid
+        is re-sorted by last edit the next time it is loaded from the catalog.
+        """
+        changes, self.library_changes = self.library_changes, {}
+        rows = {self.entry_key(entry): i for i, entry in enumerate(self.data)}
+        added = []
+        for path, summary in changes.items():
+            if summary is None:
+                continue
+            if path in rows:
+                self.data[rows[path]] = self.library_entry(path, summary)
+            else:
+                added.append((summary["modified"], self.library_entry(path, summary)))
+            card = self.cards.get(path)
+            if card is not None and self.thumb_keys.get(path) != summary["thumbnail"]:
+                card.clear_preview()  # content changed: fetch the new thumbnail
+            self.thumb_keys[path] = summary["thumbnail"]
+        removed = {path for path, summary in changes.items() if summary is None}
+        for path in removed:
+            self.thumb_keys.pop(path, None)
+        added.sort(key=lambda item: item[0], reverse=True)
+        self.data = [e for e in self.data if self.entry_key(e) not in removed] + [entry for _, entry in added]
+        self.sync_cards()
+
+    def new_project(self):
+        """Create an untitled Latin font in the library folder and open it; its card follows from the next scan."""
+        name, n = "Untitled", 1
+        path = os.path.join(self.library.directory, name + PROJECT_SUFFIX)
+        while os.path.exists(path):
+            n += 1
+            name = f"Untitled {n}"
+            path = os.path.join(self.library.directory, name + PROJECT_SUFFIX)
+        try:
+            create_project(path, name, "Latin", unicode_index().glyph_set("Latin")).close()
+        except OSError as e:
+            print(f"New font: could not create {path}: {e}")
+            return
+        self.project_opened.emit(path)
+
+    def apply_library(self):
+        """The whole grid from the catalog, as the library last saw it."""
+        projects = self.library.projects()
+        self.data = [self.library_entry(path, summary) for path, summary in projects]
+        self.thumb_keys = {path: summary["thumbnail"] for path, summary in projects}
+        self.sync_cards()
+
+    @staticmethod
+    def edited_label(timestamp, now=None):
+        age = (now or time.time()) - timestamp
+        if age < 60:
+            return "Just now"
+        if age < 3600:
+            return f"{int(age // 60)}m ago"
+        if age < 86400:
+            return f"{int(age // 3600)}h ago"
+        days = int(age // 86400)
+        if days == 1:
+            return "Yesterday"
+        if days < 7:
+            return f"{days} days ago"
+        if days < 14:
+            return "Last week"
+        if days < 30:
+            return f"{days // 7} weeks ago"
+        if days < 60:
+            return "1 month ago"
+        return time.strftime("%d %b %Y", time.localtime(timestamp))
+
+    # --- Grid Logic (Incremental) ---
+
+    @staticmethod
+    def entry_key(entry):
+        title, _, _, path = entry
+        return path or title
+
+    def data_keys(self):
+        return [self.entry_key(entry) for entry in self.data]
+
+    def sync_cards(self):
+        """Diff self.data against the live cards: create new ones, drop removed ones, update text."""
+        wanted = set()
+        for entry in self.data:
+            title, script, date, path = entry
+            key = self.entry_key(entry)
+            wanted.add(key)
+            card = self.cards.get(key)
+            if card is None:
+                card = FontCard(title, script, date, path)
+                card.opened.connect(self.project_opened)
+                self.cards[key] = card
+                self.pending_intro.add(key)
+                self.stats["cards_created"] += 1
+            else:
+                card.update_info(title, script, date)
+
+        for key in list(self.cards):
+            if key not in wanted:
+                card = self.cards.pop(key)
+                self.slots.pop(key, None)
+                self.grid_layout.removeWidget(card)
+                card.deleteLater()
+                self.pending_intro.discard(key)
+
+        self.layout_dirty = True  # new/removed cards need slots; everything else stays put
         self.repopulate_grid()
+        self.request_thumbnails()
 
-    def repopulate_grid(self):
-        for i in reversed(range(self.grid_layout.count())):
-            widget = self.grid_layout.itemAt(i).widget()
-            if widget:
-                widget.setParent(None)
+    # --- Thumbnails (rendered off the GUI thread) ---
+    def visible_rect(self):
+        return self.scroll.viewport().rect().translated(0, self.scroll.verticalScrollBar().value())
 
+    def request_thumbnails(self):
+        visible = self.visible_rect()
+        for key, card in self.cards.items():
+            if card.path and not card.has_preview():
+                # Cards on screen jump the queue; the rest fill in behind them.
+                priority = 1 if visible.intersects(card.geometry()) else 0
+                self.thumbnails.request(card.path, priority, self.thumb_keys.get(card.path))
+
+    def on_thumbnail_ready(self, path, image):
+        card = self.cards.get(path)
+        if card is not None:
+            card.set_preview(image)
+
+    def repopulate_grid(self):
         available_width = self.scroll.viewport().width() - 100 
         if available_width < 100: available_width = 100
 
@@ -419,21 +596,29 @@ class HomeScreen(QWidget):
         card_width = (available_width - ((max_cols - 1) * spacing)) // max_cols
 
         card_height = int(card_width * 1.414)
+        card_size = QSize(card_width, card_height)
 
-        row, col = 0, 0
-        for title, script, date in self.data:
-            card = FontCard(title, script, date)
-            
-            card.setFixedSize(card_width, card_height)
-            
-            self.grid_layout.addWidget(card, row, col)
-            
-            col += 1
-            if col >= max_cols:
-                col = 0
-                row += 1
+        if card_size != self.card_size:
+            self.card_size = card_size
+            for card in self.cards.values():
+                card.setFixedSize(card_size)
+
+        if max_cols == self.grid_cols and not self.layout_dirty:
+            return
+
+        # Column count or card list changed: move only the cards whose slot changed.
+        self.grid_cols = max_cols
+        self.layout_dirty = False
+        self.stats["reflows"] += 1
+        for i, key in enumerate(self.data_keys()):
+            slot = (i // max_cols, i % max_cols)
+            if self.slots.get(key) != slot:
+                self.slots[key] = slot
+                self.grid_layout.addWidget(self.cards[key], *slot)
+                self.pending_intro.add(key)
         
         self.container.layout().update() 
+        self.resize_timer.start(150)
 
 # --- 4. START MENU (Unchanged) ---
 class StartMenu(QWidget):
@@ -444,7 +629,7 @@ class StartMenu(QWidget):
     def init_ui(self):
         self.setWindowTitle("Akshar")
         self.resize(800, 600)
-        self.setStyleSheet("background-color: #1e1e1e; font-family: Segoe UI, sans-serif;")
+        self.setObjectName("screen")
         layout = QVBoxLayout()
         layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
         layout.setContentsMargins(50, 50, 50, 30)
@@ -488,52 +673,522 @@ class StartMenu(QWidget):
 
 # --- 5. COMPONENT HELPERS (FontCard, GlyphCell, Editors) ---
 
+class FontPreview(QLabel):
+    """Card thumbnail: a placeholder letter until the rendered page arrives, then the page aspect-fit."""
+    def __init__(self, placeholder=""):
+        super().__init__(placeholder)
+        self.placeholder = placeholder
+        self.image = None
+        self.setAlignment(Qt.AlignmentFlag.AlignCenter)
+
+    def clear_image(self):
+        self.image = None
+        self.setText(self.placeholder)
+
+    def set_image(self, image):
+        self.image = QPixmap.fromImage(image)
+        self.setText("")
+        self.update()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.image is None:
+            return
+        # Scaled at paint time, so only cards on screen pay for it.
+        target = QSize(self.image.size())
+        target.scale(self.size() - QSize(12, 12), Qt.AspectRatioMode.KeepAspectRatio)
+        x = (self.width() - target.width()) // 2
+        y = (self.height() - target.height()) // 2
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        painter.drawPixmap(QRect(x, y, target.width(), target.height()), self.image)
+        painter.end()
+
 class FontCard(QFrame):
-    def __init__(self, title, script, date):
+    opened = pyqtSignal(str)  # the card's project path, on click
+
+    def __init__(self, title, script, date, path=None):
         super().__init__()
+        self.path = path
+        self.info = (title, script, date)
         self.setCursor(Qt.CursorShape.PointingHandCursor)
         self.setFixedHeight(280)
         self.setMinimumWidth(200)
-        self.setStyleSheet("""QFrame { background-color: #252525; border-radius: 12px; border: 1px solid #333333; } QFrame:hover { background-color: #2d2d2d; border-color: #555555; }""")
+        self.setObjectName("fontCard")
         layout = QVBoxLayout()
         layout.setContentsMargins(10, 10, 10, 15)
         layout.setSpacing(5)
-        self.preview = QLabel()
-        self.preview.setStyleSheet("background-color: #1a1a1a; border-radius: 8px; border: none;")
+        self.preview = FontPreview(title[:1])
+        self.preview.setObjectName("cardPreview")
         self.preview.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
         layout.addWidget(self.preview)
         self.lbl_title = QLabel(title)
-        self.lbl_title.setStyleSheet("color: #f0f0f0; font-weight: bold; font-size: 14px; border: none; background: transparent;")
+        self.lbl_title.setObjectName("cardTitle")
         layout.addWidget(self.lbl_title)
         self.lbl_script = QLabel(script)
-        self.lbl_script.setStyleSheet("color: #888888; font-size: 12px; border: none; background: transparent;")
+        self.lbl_script.setObjectName("cardScript")
         layout.addWidget(self.lbl_script)
         self.lbl_date = QLabel(f"Edited: {date}")
-        self.lbl_date.setStyleSheet("color: #555555; font-size: 11px; border: none; background: transparent;")
+        self.lbl_date.setObjectName("cardDate")
         layout.addWidget(self.lbl_date)
         self.setLayout(layout)
+        self.intro = None
 
-class GlyphCell(QFrame):
-    def __init__(self, char, unicode_text, status="empty"):
-        super().__init__()
-        self.setFixedSize(100, 120)
-        self.setCursor(Qt.CursorShape.PointingHandCursor)
-        bg = "#252525" if status == "empty" else "#2d2d2d"
-        border = "#333333" if status == "empty" else "#555555"
-        text = "#666666" if status == "empty" else "#f0f0f0"
-        self.setStyleSheet(f"QFrame {{ background-color: {bg}; border: 1px solid {border}; border-radius: 8px; }} QFrame:hover {{ border-color: #888888; background-color: #333333; }}")
-        layout = QVBoxLayout()
-        layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        layout.setSpacing(5)
-        self.lbl_char = QLabel(char)
-        self.lbl_char.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.lbl_char.setStyleSheet(f"font-size: 32px; font-weight: bold; color: {text}; border: none; background: transparent;")
-        layout.addWidget(self.lbl_char)
-        self.lbl_code = QLabel(unicode_text)
-        self.lbl_code.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.lbl_code.setStyleSheet("font-size: 10px; color: #666666; border: none; background: transparent;")
-        layout.addWidget(self.lbl_code)
-        self.setLayout(layout)
+    def mouseReleaseEvent(self, event):
+        if (event.button() == Qt.MouseButton.LeftButton and self.path
+                and self.rect().contains(event.position().toPoint())):
+            self.opened.emit(self.path)
+        super().mouseReleaseEvent(event)
+
+    def update_info(self, title, script, date):
+        if (title, script, date) == self.info:
+            return
+        self.info = (title, script, date)
+        self.preview.placeholder = title[:1]
+        if self.preview.image is None:
+            self.preview.setText(title[:1])
+        self.lbl_title.setText(title)
+        self.lbl_script.setText(script)
+        self.lbl_date.setText(f"Edited: {date}")
+
+    def has_preview(self):
+        return self.preview.image is not None
+
+    def set_preview(self, image):
+        self.preview.set_image(image)
+
+    def clear_preview(self):
+        self.preview.clear_image()
+
+    def play_intro(self, delay=0):
+        # Fade + fly-up, built once per card and reused for every later reflow.
+        if self.intro is None:
+            self.opacity = QGraphicsOpacityEffect(self)
+            self.setGraphicsEffect(self.opacity)
+
+            self.anim_op = QPropertyAnimation(self.opacity, b"opacity")
+            self.anim_op.setStartValue(0.0)
+            self.anim_op.setEndValue(1.0)
+            self.anim_op.setDuration(400)
+
+            self.anim_pos = QPropertyAnimation(self, b"pos")
+            self.anim_pos.setDuration(400)
+            self.anim_pos.setEasingCurve(QEasingCurve.Type.OutBack) # "Fly" bounce effect
+
+            fly = QParallelAnimationGroup()
+            fly.addAnimation(self.anim_op)
+            fly.addAnimation(self.anim_pos)
+
+            self.intro_pause = QPauseAnimation()
+            self.intro = QSequentialAnimationGroup(self)
+            self.intro.addAnimation(self.intro_pause)
+            self.intro.addAnimation(fly)
+            # An opacity effect at 1.0 still forces offscreen rendering; drop it when done.
+            self.intro.finished.connect(lambda: self.opacity.setEnabled(False))
+
+        self.intro.stop()
+        end_pos = self.pos()
+        self.anim_pos.setStartValue(end_pos + QPoint(0, 50)) # Start 50px lower
+        self.anim_pos.setEndValue(end_pos)
+        self.intro_pause.setDuration(delay)
+        self.opacity.setOpacity(0.0)
+        self.opacity.setEnabled(True)
+        self.intro.start()
+
+class GlyphGridModel(QAbstractListModel):
+    """Flat list of (char, code, status) glyph slots backing the FontEditor grid."""
+    CharRole = Qt.ItemDataRole.UserRole + 1
+    CodeRole = Qt.ItemDataRole.UserRole + 2
+    StatusRole = Qt.ItemDataRole.UserRole + 3
+    GlyphRole = Qt.ItemDataRole.UserRole + 4
+    ImportRole = Qt.ItemDataRole.UserRole + 5
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.glyphs = []
+        self.project = None
+        self.tiles = glyph_tiles()
+        self.search = None
+        self.imports = {}   # codepoint -> (state, preview pixmap or None) while a batch import runs
+
+    def set_glyphs(self, glyphs, project=None):
+        self.beginResetModel()
+        self.glyphs = list(glyphs)
+        self.project = project
+        self.search = None
+        self.endResetModel()
+
+    def search_index(self):
+        """GlyphSearchIndex over the current glyphs, built on first use."""
+        if self.search is None:
+            self.search = GlyphSearchIndex(self.glyphs)
+        return self.search
+
+    def glyph_tile(self, char, size, ink):
+        """The user's drawing for this slot, or None to fall back to the plain character."""
+        if self.project is None:
+            return None
+        return self.tiles.tile(self.project, ord(char), size, ink)
+
+    def set_status(self, row, status):
+        char, code, _ = self.glyphs[row]
+        self.glyphs[row] = (char, code, status)
+        if self.search is not None:
+            self.search.set_status(row, status)
+        idx = self.index(row)
+        self.dataChanged.emit(idx, idx, [self.StatusRole])
+
+    def set_import_state(self, cp, state, preview=None):
+        """Mark a slot as "queued" or "traced" (with its preview) during a batch import; None clears it."""
+        if state is None:
+            self.imports.pop(cp, None)
+        else:
+            self.imports[cp] = (state, preview)
+        row = self.search_index().row_of(cp)
+        if row is not None:
+            idx = self.index(row)
+            self.dataChanged.emit(idx, idx, [self.ImportRole])
+
+    def clear_import_states(self):
+        for cp in list(self.imports):
+            self.set_import_state(cp, None)
+
+    def refresh_tile(self, cp):
+        """Repaint a slot whose drawing changed without its status changing, e.g. through a component."""
+        row = self.search_index().row_of(cp)
+        if row is not None:
+            idx = self.index(row)
+            self.dataChanged.emit(idx, idx, [self.GlyphRole])
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.glyphs)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        glyph = self.glyphs[index.row()]
+        if role == self.GlyphRole:
+            return glyph
+        if role == self.ImportRole:
+            return self.imports.get(ord(glyph[0])) if self.imports else None
+        char, code, status = glyph
+        if role in (Qt.ItemDataRole.DisplayRole, self.CharRole):
+            return char
+        if role == self.CodeRole:
+            return code
+        if role == self.StatusRole:
+            return status
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return f"{char}  {code}  ({status})"
+        return None
+
+class GlyphFilterModel(QAbstractProxyModel):
+    """
+    The rows of a GlyphGridModel that match the search box, in source order.
+    Matching is done by the source's GlyphSearchIndex; this only maps rows.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.query = ""
+        self.status = None
+        self.rows = None    # sorted source rows, or None to pass everything through
+
+    def setSourceModel(self, model):
+        super().setSourceModel(model)
+        model.modelReset.connect(self.refilter)
+        model.dataChanged.connect(self.on_source_changed)
+        self.refilter()
+
+    def set_filter(self, query, status=None):
+        self.query = query
+        self.status = status
+        self.refilter()
+
+    def refilter(self):
+        self.beginResetModel()
+        if self.query.strip() or self.status:
+            self.rows = self.sourceModel().search_index().search(self.query, self.status)
+        else:
+            self.rows = None
+        self.endResetModel()
+
+    def glyph_tile(self, char, size, ink):
+        return self.sourceModel().glyph_tile(char, size, ink)
+
+    def on_source_changed(self, top_left, bottom_right, roles=()):
+        # Rows whose status flips stay visible until the next keystroke rather than vanishing under the cursor.
+        for row in range(top_left.row(), bottom_right.row() + 1):
+            index = self.mapFromSource(self.sourceModel().index(row))
+            if index.isValid():
+                self.dataChanged.emit(index, index, roles)
+
+    # -- QAbstractProxyModel interface --
+    def mapToSource(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        row = index.row() if self.rows is None else self.rows[index.row()]
+        return self.sourceModel().index(row)
+
+    def mapFromSource(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        row = index.row()
+        if self.rows is not None:
+            pos = bisect_left(self.rows, row)
+            if pos == len(self.rows) or self.rows[pos] != row:
+                return QModelIndex()
+            row = pos
+        return self.index(row, 0)
+
+    def index(self, row, column=0, parent=QModelIndex()):
+        if parent.isValid() or not 0 <= row < self.rowCount():
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=None):
+        if index is None:
+            return super().parent()
+        return QModelIndex()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.sourceModel() is None:
+            return 0
+        return self.sourceModel().rowCount() if self.rows is None else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 1
+
+class GlyphCell(QStyledItemDelegate):
+    """Paints one glyph slot; the view only asks for the cells that are on screen."""
+    SIZE = QSize(100, 120)
+    TILE = 64
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Colours and fonts are built once; the rounded card behind each state is
+        # rendered to a pixmap once and blitted, so a cell costs one blit + two texts.
+        self.text_colors = {"empty": QColor("#666666"), "filled": QColor("#f0f0f0")}
+        self.code_color = QColor("#666666")
+        self.char_font = QFont("Segoe UI", 24, QFont.Weight.Bold)
+        self.char_font.setPixelSize(32)
+        self.code_font = QFont("Segoe UI")
+        self.code_font.setPixelSize(10)
+        self.backgrounds = {
+            ("empty", False): self.render_background("#252525", "#333333"),
+            ("filled", False): self.render_background("#2d2d2d", "#555555"),
+        }
+        hover = self.render_background("#333333", "#888888")
+        self.backgrounds[("empty", True)] = self.backgrounds[("filled", True)] = hover
+        # Batch import: cells waiting for their trace, and traced cells waiting to be written.
+        self.backgrounds[("queued", False)] = self.backgrounds[("queued", True)] = self.render_background("#252525", "#0078d4")
+        self.backgrounds[("traced", False)] = self.backgrounds[("traced", True)] = self.render_background("#1f2f3d", "#0078d4")
+
+    def render_background(self, bg, border):
+        pixmap = QPixmap(self.SIZE)
+        pixmap.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(QPen(QColor(border)))
+        painter.setBrush(QColor(bg))
+        painter.drawRoundedRect(QRectF(0.5, 0.5, self.SIZE.width() - 1, self.SIZE.height() - 1), 8, 8)
+        painter.end()
+        return pixmap
+
+    def sizeHint(self, option, index):
+        return self.SIZE
+
+    def paint(self, painter, option, index):
+        char, code, status = index.data(GlyphGridModel.GlyphRole)
+        hovered = bool(option.state & QStyle.StateFlag.State_MouseOver)
+        rect = option.rect
+        imported = index.data(GlyphGridModel.ImportRole)
+        state = imported[0] if imported else status
+        painter.drawPixmap(rect.topLeft(), self.backgrounds.get((state, hovered), self.backgrounds[("empty", hovered)]))
+
+        char_rect = rect.adjusted(0, 10, 0, -40)
+        color = self.text_colors.get(status, self.code_color)
+        if imported:
+            tile = imported[1]
+        else:
+            tile = index.model().glyph_tile(char, self.TILE, color.name()) if status == "filled" else None
+        if tile is not None:
+            x = char_rect.x() + (char_rect.width() - self.TILE) // 2
+            y = char_rect.y() + (char_rect.height() - self.TILE) // 2
+            painter.drawPixmap(x, y, tile)
+        else:
+            painter.setPen(color)
+            painter.setFont(self.char_font)
+            painter.drawText(char_rect, Qt.AlignmentFlag.AlignCenter, char)
+
+        painter.setPen(self.code_color)
+        painter.setFont(self.code_font)
+        painter.drawText(rect.adjusted(0, rect.height() - 40, 0, -15), Qt.AlignmentFlag.AlignCenter, code)
+
+class GlyphGridView(QAbstractItemView):
+    """
+    Uniform grid of GlyphCells. Cell positions are pure arithmetic on the row number,
+    so a resize only recomputes the column count and paints the cells on screen,
+    no matter how many glyphs the model holds.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.cell = GlyphCell.SIZE
+        self.spacing = 15
+        self.margin = 40
+        self.hover_row = -1
+        self.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.setMouseTracking(True)
+        self.viewport().setCursor(Qt.CursorShape.PointingHandCursor)
+        self.setItemDelegate(GlyphCell(self))
+        self.setStyleSheet("QAbstractItemView { border: none; background-color: #1e1e1e; }")
+
+    # -- Geometry --
+    def row_count(self):
+        return self.model().rowCount() if self.model() else 0
+
+    def columns(self):
+        step = self.cell.width() + self.spacing
+        return max(1, (self.viewport().width() - 2 * self.margin + self.spacing) // step)
+
+    def row_rect(self, row):
+        cols = self.columns()
+        x = self.margin + (row % cols) * (self.cell.width() + self.spacing)
+        y = self.margin + (row // cols) * (self.cell.height() + self.spacing) - self.verticalOffset()
+        return QRect(x, y, self.cell.width(), self.cell.height())
+
+    def content_height(self):
+        lines = -(-self.row_count() // self.columns())
+        return 2 * self.margin + lines * (self.cell.height() + self.spacing) - self.spacing
+
+    def visible_rows(self):
+        step = self.cell.height() + self.spacing
+        cols = self.columns()
+        top = max(0, (self.verticalOffset() - self.margin) // step)
+        bottom = (self.verticalOffset() + self.viewport().height() - self.margin) // step
+        return range(top * cols, min(self.row_count(), (bottom + 1) * cols))
+
+    def updateGeometries(self):
+        bar = self.verticalScrollBar()
+        bar.setRange(0, max(0, self.content_height() - self.viewport().height()))
+        bar.setPageStep(self.viewport().height())
+        bar.setSingleStep(self.cell.height() // 3)
+        super().updateGeometries()
+
+    def resizeEvent(self, event):
+        # Keep the first visible glyph anchored while the columns reflow.
+        first = self.visible_rows().start if event.oldSize().width() > 0 else 0
+        super().resizeEvent(event)
+        self.updateGeometries()
+        if first:
+            step = self.cell.height() + self.spacing
+            self.verticalScrollBar().setValue((first // self.columns()) * step)
+
+    def reset(self):
+        super().reset()
+        self.hover_row = -1
+        self.updateGeometries()
+        self.viewport().update()
+
+    def rowsInserted(self, parent, start, end):
+        super().rowsInserted(parent, start, end)
+        self.updateGeometries()
+
+    def rowsAboutToBeRemoved(self, parent, start, end):
+        super().rowsAboutToBeRemoved(parent, start, end)
+        QTimer.singleShot(0, self.updateGeometries)
+
+    # -- QAbstractItemView interface --
+    def indexAt(self, point):
+        if not self.model():
+            return QModelIndex()
+        step_x = self.cell.width() + self.spacing
+        step_y = self.cell.height() + self.spacing
+        x = point.x() - self.margin
+        y = point.y() + self.verticalOffset() - self.margin
+        if x < 0 or y < 0 or x % step_x >= self.cell.width() or y % step_y >= self.cell.height():
+            return QModelIndex()
+        col = x // step_x
+        if col >= self.columns():
+            return QModelIndex()
+        row = (y // step_y) * self.columns() + col
+        return self.model().index(row, 0) if row < self.row_count() else QModelIndex()
+
+    def visualRect(self, index):
+        return self.row_rect(index.row()) if index.isValid() else QRect()
+
+    def scrollTo(self, index, hint=QAbstractItemView.ScrollHint.EnsureVisible):
+        rect = self.row_rect(index.row())
+        bar = self.verticalScrollBar()
+        if hint == QAbstractItemView.ScrollHint.PositionAtCenter:
+            bar.setValue(bar.value() + rect.center().y() - self.viewport().height() // 2)
+        elif rect.top() < 0 or hint == QAbstractItemView.ScrollHint.PositionAtTop:
+            bar.setValue(bar.value() + rect.top() - self.spacing)
+        elif rect.bottom() > self.viewport().height():
+            bar.setValue(bar.value() + rect.bottom() - self.viewport().height() + self.spacing)
+
+    def moveCursor(self, action, modifiers):
+        row = self.currentIndex().row()
+        Action = QAbstractItemView.CursorAction
+        moves = {
+            Action.MoveLeft: -1, Action.MoveRight: 1,
+            Action.MoveUp: -self.columns(), Action.MoveDown: self.columns(),
+        }
+        row = min(max(0, row + moves.get(action, 0)), self.row_count() - 1)
+        return self.model().index(row, 0) if row >= 0 else QModelIndex()
+
+    def horizontalOffset(self):
+        return 0
+
+    def verticalOffset(self):
+        return self.verticalScrollBar().value()
+
+    def isIndexHidden(self, index):
+        return False
+
+    def setSelection(self, rect, flags):
+        pass
+
+    def visualRegionForSelection(self, selection):
+        return QRegion()
+
+    def scrollContentsBy(self, dx, dy):
+        self.viewport().scroll(dx, dy)
+
+    # -- Painting & hover --
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        option = QStyleOptionViewItem()
+        self.initViewItemOption(option)
+        delegate = self.itemDelegate()
+        model = self.model()
+        clip = event.rect()
+        for row in self.visible_rows():
+            rect = self.row_rect(row)
+            if not rect.intersects(clip):
+                continue
+            option.rect = rect
+            option.state = QStyle.StateFlag.State_Enabled
+            if row == self.hover_row:
+                option.state |= QStyle.StateFlag.State_MouseOver
+            delegate.paint(painter, option, model.index(row, 0))
+        painter.end()
+
+    def mouseMoveEvent(self, event):
+        row = self.indexAt(event.position().toPoint()).row()
+        if row != self.hover_row:
+            for old in (self.hover_row, row):
+                if old >= 0:
+                    self.viewport().update(self.row_rect(old))
+            self.hover_row = row
+        super().mouseMoveEvent(event)
+
+    def leaveEvent(self, event):
+        if self.hover_row >= 0:
+            self.viewport().update(self.row_rect(self.hover_row))
+            self.hover_row = -1
+        super().leaveEvent(event)
 
 class FontHamburgerMenu(QFrame):
     def __init__(self, parent=None, close_callback=None, pin_callback=None, back_callback=None):
@@ -543,14 +1198,7 @@ class FontHamburgerMenu(QFrame):
         self.back_callback = back_callback 
         
         self.setFixedWidth(280)
-        self.setStyleSheet("""
-            QFrame { background-color: #252525; border-right: 1px solid #333333; }
-            QPushButton {
-                background-color: transparent; color: #dddddd; text-align: left;
-                padding: 10px 15px; border: none; border-radius: 4px; font-size: 14px;
-            }
-            QPushButton:hover { background-color: #333333; color: #ffffff; }
-        """)
+        self.setObjectName("drawer")
 
         layout = QVBoxLayout()
         layout.setContentsMargins(10, 20, 10, 20)
@@ -559,21 +1207,13 @@ class FontHamburgerMenu(QFrame):
         # -- Header (X and Pin) --
         header = QHBoxLayout()
         header.setContentsMargins(5, 0, 5, 10)
-        
-        icon_btn_style = """
-            QPushButton { 
-                background-color: transparent; border: none; color: #666666; 
-                padding: 0px; margin: 0px; text-align: center;
-            }
-            QPushButton:hover { color: #ffffff; background-color: #333333; border-radius: 4px; }
-        """
 
         # EXPOSED AS SELF.BTN_CLOSE
         self.btn_close = QPushButton("✕")
         self.btn_close.setFixedSize(45, 45)
         self.btn_close.setCursor(Qt.CursorShape.PointingHandCursor)
         self.btn_close.setFont(QFont("Segoe UI Symbol", 18))
-        self.btn_close.setStyleSheet(icon_btn_style)
+        self.btn_close.setObjectName("drawerClose")
         self.btn_close.clicked.connect(self.close_callback)
 
         self.btn_pin = QPushButton("📌")
@@ -581,11 +1221,7 @@ class FontHamburgerMenu(QFrame):
         self.btn_pin.setCheckable(True)
         self.btn_pin.setCursor(Qt.CursorShape.PointingHandCursor)
         self.btn_pin.setFont(QFont("Segoe UI Emoji", 18))
-        self.btn_pin.setStyleSheet("""
-            QPushButton { color: #666666; border: none; padding: 0px; border-radius: 4px; margin: 0px; text-align: center; }
-            QPushButton:checked { color: #dddddd; background-color: #444444; }
-            QPushButton:hover { background-color: #333333; }
-        """)
+        self.btn_pin.setObjectName("drawerPin")
         self.btn_pin.clicked.connect(self.pin_callback)
 
         header.addWidget(self.btn_close, alignment=Qt.AlignmentFlag.AlignLeft)
@@ -603,7 +1239,7 @@ class FontHamburgerMenu(QFrame):
         def add_sep():
             line = QFrame()
             line.setFrameShape(QFrame.Shape.HLine)
-            line.setStyleSheet("background-color: #333333; max-height: 1px; margin: 5px 0;")
+            line.setObjectName("separator")
             layout.addWidget(line)
 
         # -- Content --
@@ -611,16 +1247,19 @@ class FontHamburgerMenu(QFrame):
         if self.back_callback: btn_back.clicked.connect(self.back_callback)
         add_sep()
 
-        add_btn("Save Progress", "💾")
+        self.btn_save = add_btn("Save Progress", "💾")
         add_btn("Save As…", "📝")
         add_sep()
         
-        add_btn("Export Font (.ttf)", "T")
-        add_btn("Export Font (.otf)", "O")
+        self.btn_export_ttf = add_btn("Export Font (.ttf)", "T")
+        self.btn_export_otf = add_btn("Export Font (.otf)", "O")
+        add_sep()
+
+        self.btn_import_sheet = add_btn("Import Specimen Sheet…", "📥")
         add_sep()
 
         add_btn("Font Information", "ℹ️")
-        add_btn("Script & Unicode Range", "🌐")
+        self.btn_unicode = add_btn("Script & Unicode Range", "🌐")
         add_sep()
 
         add_btn("Validate Font", "✅")
@@ -630,22 +1269,196 @@ class FontHamburgerMenu(QFrame):
         add_sep()
         
         btn_close_font = add_btn("Close Font", "🚪")
-        btn_close_font.setStyleSheet("color: #ff6666; text-align: left; padding: 10px 15px;")
+        btn_close_font.setObjectName("drawerDanger")
         if self.back_callback: btn_close_font.clicked.connect(self.back_callback)
 
         self.setLayout(layout)
 
+class UnicodeRangeDialog(QDialog):
+    """
+    Pick the glyph slots for a font: one of the GLYPH_SETS presets, or any Unicode
+    script or block. `sources` holds the (kind, name) list for glyphs.UnicodeIndex.glyph_set.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.sources = None
+        self.index = unicode_index()
+        self.setWindowTitle("Script & Unicode Range")
+        self.resize(420, 520)
+        self.setStyleSheet("""
+            QDialog { background-color: #252525; }
+            QLabel { color: #aaaaaa; font-size: 12px; }
+            QLineEdit, QListWidget {
+                background-color: #1e1e1e; color: #dddddd; border: 1px solid #333333;
+                border-radius: 4px; padding: 6px; font-size: 13px;
+            }
+            QListWidget::item:selected { background-color: #0078d4; color: #ffffff; }
+            QPushButton {
+                background-color: #333333; color: #dddddd; border: none;
+                border-radius: 4px; padding: 8px 16px; font-size: 13px;
+            }
+            QPushButton:hover { background-color: #444444; }
+            QPushButton:disabled { color: #666666; }
+        """)
+
+        layout = QVBoxLayout(self)
+        self.search = QLineEdit()
+        self.search.setPlaceholderText("Filter scripts and blocks…")
+        self.search.textChanged.connect(self.apply_filter)
+        layout.addWidget(self.search)
+
+        self.list = QListWidget()
+        for name in GLYPH_SETS:
+            self.add_entry(f"★  {name}", GLYPH_SETS[name])
+        for name in self.index.script_names():
+            self.add_entry(f"Script: {name}", [("script", name)])
+        for name in self.index.block_names():
+            self.add_entry(f"Block: {name}", [("block", name)])
+        self.list.currentItemChanged.connect(self.on_current)
+        self.list.itemDoubleClicked.connect(self.accept)
+        layout.addWidget(self.list)
+
+        self.lbl_count = QLabel("")
+        layout.addWidget(self.lbl_count)
+
+        buttons = QHBoxLayout()
+        buttons.addStretch()
+        btn_cancel = QPushButton("Cancel")
+        btn_cancel.clicked.connect(self.reject)
+        self.btn_ok = QPushButton("Use Range")
+        self.btn_ok.setEnabled(False)
+        self.btn_ok.clicked.connect(self.accept)
+        buttons.addWidget(btn_cancel)
+        buttons.addWidget(self.btn_ok)
+        layout.addLayout(buttons)
+
+    def add_entry(self, label, sources):
+        item = QListWidgetItem(label)
+        item.setData(Qt.ItemDataRole.UserRole, sources)
+        self.list.addItem(item)
+
+    def apply_filter(self, text):
+        text = text.strip().lower()
+        for row in range(self.list.count()):
+            item = self.list.item(row)
+            item.setHidden(bool(text) and text not in item.text().lower())
+
+    def on_current(self, item, previous=None):
+        self.sources = item.data(Qt.ItemDataRole.UserRole) if item else None
+        self.btn_ok.setEnabled(self.sources is not None)
+        if self.sources:
+            self.lbl_count.setText(f"{len(self.index.glyph_set(self.sources))} glyphs")
+
+class SpecimenSheetDialog(QDialog):
+    """
+    Set up a batch import from one scanned page holding a character per grid cell.
+    Cells are mapped row-major onto the font's glyph slots, starting at the slot
+    the "Start at" query (anything the grid search understands) finds first.
+    """
+    def __init__(self, search_index, parent=None):
+        super().__init__(parent)
+        self.search_index = search_index
+        self.start_row = 0 if len(search_index) else None
+        self.setWindowTitle("Import Specimen Sheet")
+        self.resize(420, 0)
+        self.setStyleSheet("""
+            QDialog { background-color: #252525; }
+            QLabel, QCheckBox { color: #aaaaaa; font-size: 12px; }
+            QLineEdit, QSpinBox {
+                background-color: #1e1e1e; color: #dddddd; border: 1px solid #333333;
+                border-radius: 4px; padding: 6px; font-size: 13px;
+            }
+            QPushButton {
+                background-color: #333333; color: #dddddd; border: none;
+                border-radius: 4px; padding: 8px 16px; font-size: 13px;
+            }
+            QPushButton:hover { background-color: #444444; }
+            QPushButton:disabled { color: #666666; }
+        """)
+
+        layout = QVBoxLayout(self)
+        form = QFormLayout()
+        file_row = QHBoxLayout()
+        self.path = QLineEdit()
+        self.path.setPlaceholderText("Scanned page (PNG, JPEG, TIFF, SVG…)")
+        self.path.textChanged.connect(self.update_summary)
+        btn_browse = QPushButton("Browse…")
+        btn_browse.clicked.connect(self.browse)
+        file_row.addWidget(self.path)
+        file_row.addWidget(btn_browse)
+        form.addRow("Image", file_row)
+        self.rows = QSpinBox()
+        self.cols = QSpinBox()
+        for box in (self.rows, self.cols):
+            box.setRange(1, 100)
+            box.setValue(10)
+            box.valueChanged.connect(self.update_summary)
+        form.addRow("Rows", self.rows)
+        form.addRow("Columns", self.cols)
+        self.start = QLineEdit(search_index.chars[0] if len(search_index) else "")
+        self.start.setPlaceholderText("अ · U+0905 · letter a")
+        self.start.textChanged.connect(self.update_summary)
+        form.addRow("Start at", self.start)
+        self.keep_drawn = QCheckBox("Keep glyphs that are already drawn")
+        self.keep_drawn.setChecked(True)
+        form.addRow("", self.keep_drawn)
+        layout.addLayout(form)
+
+        self.lbl_summary = QLabel("")
+        layout.addWidget(self.lbl_summary)
+
+        buttons = QHBoxLayout()
+        buttons.addStretch()
+        btn_cancel = QPushButton("Cancel")
+        btn_cancel.clicked.connect(self.reject)
+        self.btn_ok = QPushButton("Import")
+        self.btn_ok.clicked.connect(self.accept)
+        buttons.addWidget(btn_cancel)
+        buttons.addWidget(self.btn_ok)
+        layout.addLayout(buttons)
+        self.update_summary()
+
+    def browse(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Specimen Sheet", self.path.text(), IMAGE_FILTER)
+        if path:
+            self.path.setText(path)
+
+    def cell_count(self):
+        return self.rows.value() * self.cols.value()
+
+    def update_summary(self):
+        rows = self.search_index.search(self.start.text())
+        if rows is None:    # nothing typed: start at the first slot
+            rows = range(len(self.search_index))
+        self.start_row = rows[0] if len(rows) else None
+        if self.start_row is None:
+            self.lbl_summary.setText("No glyph slot matches “Start at”.")
+        else:
+            chars = self.search_index.chars
+            last = min(self.start_row + self.cell_count(), len(chars)) - 1
+            self.lbl_summary.setText(f"{last - self.start_row + 1} cells → {chars[self.start_row]} … {chars[last]}")
+        self.btn_ok.setEnabled(self.start_row is not None and bool(self.path.text().strip()))
+
 class FontEditor(QWidget):
     pin_toggled = pyqtSignal(bool)
+    glyph_opened = pyqtSignal(int)
     def __init__(self):
         super().__init__()
         self.is_menu_pinned = False
         self.is_menu_open = False
+        self.project = None
+        self.history = None
+        self.exporter = ExportService(self)
+        self.export_progress = None
+        self.tracer = TraceService(self)
+        self.invalidation = invalidation()
+        self.invalidation.tile_ready.connect(self.on_tile_ready)
         self.init_ui()
+        self.set_history(UndoHistory())
         self.load_dummy_glyphs()
 
     def init_ui(self):
-        self.setStyleSheet("background-color: #1e1e1e; font-family: Segoe UI, sans-serif;")
+        self.setObjectName("screen")
         
         # 1. ROOT LAYOUT (Horizontal - Matches Home Screen)
         self.root_layout = QHBoxLayout(self)
@@ -661,20 +1474,14 @@ class FontEditor(QWidget):
         # --- TOP BAR ---
         top_bar = QFrame()
         top_bar.setFixedHeight(60)
-        top_bar.setStyleSheet("background-color: #252525; border-bottom: 1px solid #333333;")
+        top_bar.setObjectName("topBar")
         top_layout = QHBoxLayout(top_bar)
         top_layout.setContentsMargins(20, 0, 20, 0)
 
         self.btn_menu = QPushButton("☰")
         self.btn_menu.setFixedSize(40, 36)
         self.btn_menu.setCursor(Qt.CursorShape.PointingHandCursor)
-        self.btn_menu.setStyleSheet("""
-            QPushButton { 
-                background-color: transparent; color: #dddddd; font-size: 18px; 
-                border: 1px solid #444444; border-radius: 6px; 
-            }
-            QPushButton:hover { background-color: #333333; }
-        """)
+        self.btn_menu.setObjectName("menuButton")
         self.btn_menu.clicked.connect(self.open_menu)
         top_layout.addWidget(self.btn_menu)
         top_layout.addSpacing(15)
@@ -684,6 +1491,39 @@ class FontEditor(QWidget):
         top_layout.addWidget(self.lbl_title)
         top_layout.addStretch()
 
+        field_style = """
+            background-color: #1e1e1e; color: #dddddd; border: 1px solid #444444;
+            border-radius: 6px; padding: 6px 10px; font-size: 13px;
+        """
+        self.search = QLineEdit()
+        self.search.setPlaceholderText("Search  अ · U+0905 · letter a · is:empty")
+        self.search.setClearButtonEnabled(True)
+        self.search.setFixedWidth(300)
+        self.search.setStyleSheet(f"QLineEdit {{ {field_style} }}")
+        self.search.textChanged.connect(self.apply_search)
+        self.search.returnPressed.connect(self.open_first_match)
+        top_layout.addWidget(self.search)
+
+        self.status_filter = QComboBox()
+        self.status_filter.addItems(["All", "Filled", "Empty"])
+        self.status_filter.setStyleSheet(f"QComboBox {{ {field_style} }}")
+        self.status_filter.currentIndexChanged.connect(self.apply_search)
+        top_layout.addWidget(self.status_filter)
+
+        QShortcut(QKeySequence.StandardKey.Find, self, activated=self.search.setFocus)
+
+        # Batch import status; the cells themselves show which glyphs are done.
+        self.lbl_import = QLabel("")
+        self.lbl_import.setStyleSheet("color: #aaaaaa; font-size: 12px;")
+        self.btn_cancel_import = QPushButton("Cancel")
+        self.btn_cancel_import.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.btn_cancel_import.setStyleSheet("color: #dddddd; border: 1px solid #444444; border-radius: 4px; background: transparent; padding: 4px 10px;")
+        self.btn_cancel_import.clicked.connect(self.tracer.cancel)
+        top_layout.insertWidget(top_layout.indexOf(self.lbl_title) + 2, self.lbl_import)
+        top_layout.insertWidget(top_layout.indexOf(self.lbl_import) + 1, self.btn_cancel_import)
+        self.lbl_import.hide()
+        self.btn_cancel_import.hide()
+
         self.content_layout.addWidget(top_bar)
 
         # --- BODY (Sidebar + Grid) ---
@@ -694,32 +1534,30 @@ class FontEditor(QWidget):
         # Sidebar
         self.sidebar = QFrame()
         self.sidebar.setFixedWidth(80)
-        self.sidebar.setStyleSheet("background-color: #222222; border-right: 1px solid #333333;")
+        self.sidebar.setObjectName("sidePanel")
         side_layout = QVBoxLayout(self.sidebar)
         side_layout.setContentsMargins(10, 20, 10, 20)
         side_layout.setSpacing(15)
         actions = ["Undo", "Redo", "Save", "Export"]
+        self.sidebar_buttons = {}
         for action in actions:
             btn = QPushButton(action)
             btn.setFixedHeight(40)
             btn.setCursor(Qt.CursorShape.PointingHandCursor)
-            btn.setStyleSheet("QPushButton { color: #aaaaaa; border: 1px solid #333333; border-radius: 5px; font-size: 12px; } QPushButton:hover { background-color: #333333; color: #ffffff; }")
+            btn.setObjectName("sideAction")
             side_layout.addWidget(btn)
+            self.sidebar_buttons[action] = btn
         side_layout.addStretch()
         body_layout.addWidget(self.sidebar)
 
-        # Grid
-        self.scroll = QScrollArea()
-        self.scroll.setWidgetResizable(True)
-        self.scroll.setStyleSheet("QScrollArea { border: none; background-color: #1e1e1e; }")
-        self.container = QWidget()
-        self.container.setStyleSheet("background-color: #1e1e1e;")
-        self.grid_layout = QGridLayout(self.container)
-        self.grid_layout.setContentsMargins(40, 40, 40, 40)
-        self.grid_layout.setSpacing(15)
-        self.grid_layout.setAlignment(Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft)
-        self.scroll.setWidget(self.container)
-        body_layout.addWidget(self.scroll)
+        # Grid (model/view: only visible cells are painted)
+        self.glyph_model = GlyphGridModel(self)
+        self.glyph_filter = GlyphFilterModel(self)
+        self.glyph_filter.setSourceModel(self.glyph_model)
+        self.grid_view = GlyphGridView()
+        self.grid_view.setModel(self.glyph_filter)
+        self.grid_view.clicked.connect(lambda index: self.glyph_opened.emit(ord(index.data())))
+        body_layout.addWidget(self.grid_view)
 
         self.content_layout.addLayout(body_layout)
 
@@ -736,6 +1574,22 @@ class FontEditor(QWidget):
             back_callback=self.go_back_home
         )
         self.font_menu.hide()
+        self.font_menu.btn_save.clicked.connect(self.save_project)
+        self.font_menu.btn_unicode.clicked.connect(self.choose_glyph_set)
+        self.font_menu.btn_export_ttf.clicked.connect(lambda: self.export_font("ttf"))
+        self.font_menu.btn_export_otf.clicked.connect(lambda: self.export_font("otf"))
+        self.font_menu.btn_import_sheet.clicked.connect(self.import_sheet)
+        self.tracer.progress.connect(self.on_import_progress)
+        self.tracer.traced.connect(self.on_cell_traced)
+        self.tracer.finished.connect(self.on_import_finished)
+        self.tracer.failed.connect(self.on_import_failed)
+        self.sidebar_buttons["Save"].clicked.connect(self.save_project)
+        self.sidebar_buttons["Export"].clicked.connect(lambda: self.export_font("ttf"))
+        self.exporter.progress.connect(self.on_export_progress)
+        self.exporter.finished.connect(self.on_export_finished)
+        self.exporter.failed.connect(self.on_export_failed)
+        self.sidebar_buttons["Undo"].clicked.connect(self.undo)
+        self.sidebar_buttons["Redo"].clicked.connect(self.redo)
 
         self.anim = QPropertyAnimation(self.font_menu, b"pos")
         self.anim.setDuration(250)
@@ -744,9 +1598,110 @@ class FontEditor(QWidget):
     def go_back_home(self):
         print("Back/Close clicked")
 
-    def showEvent(self, event):
-        self.repopulate_grid()
-        super().showEvent(event)
+    def save_project(self):
+        # Edits are already journaled; Save folds the journal into the .varn off the GUI thread.
+        if self.project is not None:
+            self.project.compact_async(self.on_compacted)
+
+    def on_compacted(self, result):
+        # Called from the compaction thread. A failed compaction leaves every edit journaled.
+        if isinstance(result, Exception):
+            print(f"Save: could not compact {self.project.path}: {result}")
+
+    def export_font(self, flavor):
+        """Ask where to write the font, then export it in the background with a cancellable progress dialog."""
+        if self.project is None or self.exporter.busy():
+            return
+        self.close_menu()
+        family = self.project.font.get("family", self.project.name)
+        kind = "TrueType" if flavor == "ttf" else "OpenType CFF"
+        path, _ = QFileDialog.getSaveFileName(self, f"Export Font (.{flavor})",
+                                              os.path.join(export_dir(), f"{family}.{flavor}"), f"{kind} (*.{flavor})")
+        if not path:
+            return
+        self.export_progress = QProgressDialog(f"Exporting {family}…", "Cancel", 0, 0, self)
+        self.export_progress.setWindowTitle("Export Font")
+        self.export_progress.setWindowModality(Qt.WindowModality.WindowModal)
+        self.export_progress.setMinimumDuration(300)
+        self.export_progress.canceled.connect(self.exporter.cancel)
+        self.exporter.export(self.project.path, path)
+
+    def on_export_progress(self, done, total):
+        if self.export_progress is not None:
+            self.export_progress.setMaximum(total)
+            self.export_progress.setValue(done)
+
+    def close_export_progress(self):
+        if self.export_progress is not None:
+            self.export_progress.canceled.disconnect()
+            self.export_progress.reset()
+            self.export_progress.deleteLater()
+            self.export_progress = None
+
+    def on_export_finished(self, path, report):
+        self.close_export_progress()
+        if report.cache is not None and self.project is not None:
+            # Journaled through our handle, the one that owns the journal.
+            self.project.write_cache(report.cache_name, report.cache)
+        QMessageBox.information(self, "Export Font", f"Exported to {path}\n\n{report.summary()}")
+
+    def on_export_failed(self, path, error):
+        self.close_export_progress()
+        if error:   # empty when the user cancelled
+            QMessageBox.warning(self, "Export Font", f"Could not export {os.path.basename(path)}:\n{error}")
+
+    def import_sheet(self):
+        """Trace a scanned specimen sheet into the grid's slots in the background; cells show their progress."""
+        if self.project is None or self.tracer.busy():
+            return
+        self.close_menu()
+        index = self.glyph_model.search_index()
+        dialog = SpecimenSheetDialog(index, self)
+        if dialog.exec() != QDialog.DialogCode.Accepted or dialog.start_row is None:
+            return
+        chars = index.chars[dialog.start_row:dialog.start_row + dialog.cell_count()]
+        codepoints = [None if dialog.keep_drawn.isChecked() and self.project.has_glyph(ord(c)) else ord(c) for c in chars]
+        for cp in codepoints:
+            if cp is not None:
+                self.glyph_model.set_import_state(cp, "queued")
+        upem, ascender, _ = project_metrics(self.project)
+        self.tracer.trace_sheet(dialog.path.text().strip(), dialog.rows.value(), dialog.cols.value(),
+                                codepoints, upem, ascender)
+        self.lbl_import.setText("Importing…")
+        self.lbl_import.show()
+        self.btn_cancel_import.show()
+
+    def on_import_progress(self, done, total):
+        self.lbl_import.setText(f"Importing {done}/{total}")
+
+    def on_cell_traced(self, cp, svg):
+        if svg is None:     # an empty cell leaves the glyph as it was
+            self.glyph_model.set_import_state(cp, None)
+            return
+        image = tint_image(render_glyph_image(svg, GlyphCell.TILE), "#f0f0f0")
+        self.glyph_model.set_import_state(cp, "traced", QPixmap.fromImage(image))
+
+    def on_import_finished(self, path, glyphs):
+        self.end_import()
+        if self.project is None or not glyphs:
+            QMessageBox.information(self, "Import Specimen Sheet", f"No glyphs found in {os.path.basename(path)}.")
+            return
+        before = {cp: self.project.glyph_svg(cp) for cp in glyphs}
+        # One undo step and one journal transaction for the whole sheet.
+        self.history.font.push(ReplaceGlyphs(self.project, before, glyphs))
+        for cp in glyphs:
+            self.history.drop_glyph(cp)
+            self.refresh_glyph(cp)
+
+    def on_import_failed(self, path, error):
+        self.end_import()
+        if error:   # empty when the user cancelled
+            QMessageBox.warning(self, "Import Specimen Sheet", f"Could not import {os.path.basename(path)}:\n{error}")
+
+    def end_import(self):
+        self.glyph_model.clear_import_states()
+        self.lbl_import.hide()
+        self.btn_cancel_import.hide()
 
     def resizeEvent(self, event):
         if self.overlay.isVisible():
@@ -755,7 +1710,6 @@ class FontEditor(QWidget):
         if not self.is_menu_pinned and self.is_menu_open:
             self.font_menu.resize(self.font_menu.width(), self.height())
             
-        self.repopulate_grid()
         super().resizeEvent(event)
 
     def open_menu(self):
@@ -839,45 +1793,907 @@ class FontEditor(QWidget):
             else:
                 self.font_menu.hide()
 
+    def open_project(self, path):
+        """
+        Open a .varn for editing. This is the project's one writable handle, so
+        opening the project already open keeps it. False if it cannot be read.
+        """
+        if self.project is not None and os.path.abspath(self.project.path) == os.path.abspath(path):
+            return True
+        try:
+            project = VarnProject(path)
+        except (OSError, ValueError, VarnError) as e:
+            print(f"Open: could not open {path}: {e}")
+            return False
+        self.close_project()
+        self.load_project(project)
+        return True
+
+    def close_project(self):
+        """Let go of the open project. Edits are journaled already and replayed when it is next opened."""
+        if self.project is None:
+            return
+        self.invalidation.detach(self.project)
+        tiles = glyph_tiles()
+        tiles.flush_previews()
+        if tiles.writer is not None:
+            tiles.writer.waitForDone()  # queued preview write-backs still use this handle
+        self.project.close()
+        self.project = None
+
+    def load_project(self, project):
+        """Fill the grid from an open storage.VarnProject without reading any glyph drawings."""
+        if self.project is not None:
+            self.invalidation.detach(self.project)
+        self.project = project
+        self.invalidation.attach(project, self.visible_codepoints)
+        self.set_history(UndoHistory())
+        self.lbl_title.setText(f"{project.name} ({project.script})")
+        self.data = []
+        for cp in project_codepoints(project):
+            status = "filled" if project.has_glyph(cp) else "empty"
+            self.data.append((chr(cp), f"U+{cp:04X}", status))
         self.repopulate_grid()
 
+    def set_history(self, history):
+        if self.history is not None:
+            self.history.font.listeners.remove(self.update_undo_buttons)
+        self.history = history
+        history.font.listeners.append(self.update_undo_buttons)
+        self.update_undo_buttons()
+
+    def undo(self):
+        self.after_font_step(self.history.font.undo())
+
+    def redo(self):
+        self.after_font_step(self.history.font.redo())
+
+    def after_font_step(self, command):
+        # The glyph's drawing changed underneath its own history, which is now stale.
+        cp = getattr(command, "codepoint", None)
+        for cp in getattr(command, "codepoints", [] if cp is None else [cp]):
+            self.history.drop_glyph(cp)
+            self.refresh_glyph(cp)
+
+    def update_undo_buttons(self, command=None):
+        font = self.history.font
+        for action, enabled, text in (("Undo", font.can_undo(), font.undo_text()), ("Redo", font.can_redo(), font.redo_text())):
+            btn = self.sidebar_buttons[action]
+            btn.setEnabled(enabled)
+            btn.setToolTip(f"{action} {text}" if enabled else "")
+
+    def refresh_glyph(self, cp):
+        """
+        Update one cell after the glyph editor saved it. Its tile, the tiles of
+        glyphs using it as a component, the home thumbnail and the export caches
+        are redrawn in the background (app.InvalidationGraph); cells repaint as
+        their tiles arrive.
+        """
+        if self.project is None:
+            return
+        row = self.glyph_model.search_index().row_of(cp)
+        if row is not None:
+            self.glyph_model.set_status(row, "filled" if self.project.has_glyph(cp) else "empty")
+        self.invalidation.glyphs_changed(self.project, [cp])
+
+    def on_tile_ready(self, path, cp):
+        if self.project is not None and path == self.project.path:
+            self.glyph_model.refresh_tile(cp)
+
+    def visible_codepoints(self):
+        return [ord(self.glyph_filter.index(row).data()) for row in self.grid_view.visible_rows()]
+
+    def apply_search(self):
+        status = {"Filled": "filled", "Empty": "empty"}.get(self.status_filter.currentText())
+        self.glyph_filter.set_filter(self.search.text(), status)
+
+    def open_first_match(self):
+        index = self.glyph_filter.index(0)
+        if index.isValid():
+            self.glyph_opened.emit(ord(index.data()))
+
     def load_dummy_glyphs(self):
         self.data = []
-        for i in range(65, 91):
+        for i in unicode_index().glyph_set("Latin"):
             char = chr(i)
             code = f"U+{i:04X}"
             status = "filled" if i % 3 == 0 else "empty"
             self.data.append((char, code, status))
         self.repopulate_grid()
 
+    def choose_glyph_set(self):
+        dialog = UnicodeRangeDialog(self)
+        if dialog.exec() == QDialog.DialogCode.Accepted and dialog.sources:
+            self.close_menu()
+            self.set_glyph_set(dialog.sources)
+
+    def set_glyph_set(self, sources):
+        """Replace the grid's slots with a glyph set. Drawn glyphs always keep their slot."""
+        codepoints = unicode_index().glyph_set(sources)
+        if self.project is None:
+            self.data = [(chr(cp), f"U+{cp:04X}", "empty") for cp in codepoints]
+            self.repopulate_grid()
+            return
+        slots = sorted(set(codepoints).union(self.project.drawn_codepoints()))
+        font = dict(self.project.font)
+        font["codepoints"] = slots
+        self.project.set_font_info(font)
+        self.load_project(self.project)
+
     def repopulate_grid(self):
-        for i in reversed(range(self.grid_layout.count())):
-            widget = self.grid_layout.itemAt(i).widget()
-            if widget: widget.setParent(None)
-        
-        avail = self.scroll.viewport().width() - 40
-        if avail < 100: avail = 100
-        
-        max_cols = max(1, avail // 115)
-        row, col = 0, 0
-        for char, code, status in self.data:
-            cell = GlyphCell(char, code, status)
-            self.grid_layout.addWidget(cell, row, col)
-            col += 1
-            if col >= max_cols: col, row = 0, row + 1
+        # The view lays out and paints cells itself; we only hand it new data.
+        self.glyph_model.set_glyphs(self.data, self.project)
+        QTimer.singleShot(0, self.prepare_search)
+
+    def prepare_search(self):
+        # Once the grid is on screen, build the search lookups so no keystroke has to.
+        self.glyph_model.search_index().prepare()
+
+# --- 6. GLYPH CANVAS ---
+# Retained-mode drawing surface for the GlyphEditor. Scene units are font units
+# in SVG orientation (y down, ascender at 0), the same space glyphs/XXXX.svg uses.
+# Committed contours live in cached items, guides are painted into the view's
+# cached background, and only the stroke under the pen is redrawn while drawing.
+
+UNITS_PER_EM = 1000      # metrics for a scratch glyph, or a project whose font.json lacks them
+ASCENDER = 800
+DESCENDER = -200
+GRID_SPACING = 50
+TILE_UNITS = 128         # scene tile size for splitting large contour groups
+TILE_NODES = 2000        # groups above this many nodes are split into tiles
+BRUSH_SIZE = 40          # font units
+PICK_RADIUS = 4          # screen pixels around the pointer that still hit an edge
+FRAME_MS = 16            # how often a pressure stroke being drawn is expanded and repainted
+MAX_CACHE_PIXELS = 2048  # widest item pixmap scaled through a zoom gesture
+ZOOM_SETTLE_MS = 150     # quiet time after the last zoom step before contours are re-rendered sharp
+MIN_ZOOM, MAX_ZOOM = 0.02, 64.0
+
+def project_metrics(project):
+    """(units_per_em, ascender, descender) from the project's font.json, or the defaults for what it lacks."""
+    font = project.font if project is not None else {}
+    upem = font.get("units_per_em", UNITS_PER_EM)
+    ascender = font.get("ascender", round(upem * ASCENDER / UNITS_PER_EM))
+    return upem, ascender, font.get("descender", ascender - upem)
+
+def contours_path(contours, ascender=ASCENDER):
+    """canvas.Contour list (y up) -> one nonzero-filled QPainterPath in scene space."""
+    path = QPainterPath()
+    path.setFillRule(Qt.FillRule.WindingFill)
+    for contour in contours:
+        count = len(contour)
+        if not count:
+            continue
+        c, kinds = contour.coords, contour.kinds
+        path.moveTo(c[0], ascender - c[1])
+        i = 1
+        while i < count:
+            if kinds[i] == OFF_CURVE and (i + 2 < count or contour.closed):
+                j, k = i + 1, (i + 2) % count
+                path.cubicTo(c[2 * i], ascender - c[2 * i + 1], c[2 * j], ascender - c[2 * j + 1],
+                             c[2 * k], ascender - c[2 * k + 1])
+                i += 3
+            else:
+                path.lineTo(c[2 * i], ascender - c[2 * i + 1])
+                i += 1
+        if contour.closed:
+            path.closeSubpath()
+    return path
+
+def path_contours(path, ascender=ASCENDER):
+    """QPainterPath in scene space -> closed canvas.Contours (y up)."""
+    contours = []
+    contour = None
+    count = path.elementCount()
+    i = 0
+    while i < count:
+        e = path.elementAt(i)
+        if e.isMoveTo():
+            contour = Contour()
+            contours.append(contour)
+            contour.move_to(e.x, ascender - e.y)
+            i += 1
+        elif e.isCurveTo():
+            c2, end = path.elementAt(i + 1), path.elementAt(i + 2)
+            contour.curve_to(e.x, ascender - e.y, c2.x, ascender - c2.y, end.x, ascender - end.y)
+            i += 3
+        else:
+            contour.line_to(e.x, ascender - e.y)
+            i += 1
+    for contour in contours:
+        # QPainterPath closes subpaths by repeating the start point; Contour implies it.
+        if len(contour) > 1 and contour.kinds[-1] == ON_CURVE and contour.coords[-2:] == contour.coords[:2]:
+            del contour.coords[-2:]
+            del contour.kinds[-1]
+    return [c for c in contours if len(c) > 2]
+
+def scene_rect(bounds, ascender=ASCENDER):
+    """Contour.bounds() (font units, y up) -> QRectF in scene space."""
+    x0, y0, x1, y1 = bounds
+    return QRectF(x0, ascender - y1, x1 - x0, y1 - y0)
+
+class ContourGroupItem(QGraphicsPathItem):
+    """
+    Committed contours that must be filled together so counters punch holes
+    under the nonzero rule. Rendered once per zoom level into a device pixmap;
+    panning just blits it, and during a zoom gesture set_cache_scale() keeps one
+    pixmap that is scaled instead of re-rendered at every step.
+
+    Large groups are split into one item per scene tile (`clip`). A tile only
+    carries the contours that reach into it, which is enough to get the winding
+    right inside it, so exposing a strip while panning re-renders a few hundred
+    nodes instead of the whole group.
+    """
+    def __init__(self, contours, clip=None, ascender=ASCENDER):
+        super().__init__()
+        self.contours = contours  # the whole group, shared by all of its tiles
+        self.clip = clip
+        self.ascender = ascender
+        self.setPen(QPen(Qt.PenStyle.NoPen))
+        self.setBrush(QColor("#111111"))
+        self.setCacheMode(QGraphicsItem.CacheMode.DeviceCoordinateCache)
+        self.rebuild()
+
+    def rebuild(self):
+        contours = self.contours
+        if self.clip is not None:
+            contours = [c for c in contours if scene_rect(c.bounds(), self.ascender).intersects(self.clip)]
+        self.setPath(contours_path(contours, self.ascender))
+
+    def set_cache_scale(self, scale):
+        """
+        Cache at a fixed `scale` (pixels per font unit, at most MAX_CACHE_PIXELS
+        wide) so zooming scales the pixmap; None goes back to the device cache.
+        """
+        if scale is None:
+            self.setCacheMode(QGraphicsItem.CacheMode.DeviceCoordinateCache)
+            return
+        rect = self.boundingRect()
+        scale = min(scale, MAX_CACHE_PIXELS / max(rect.width(), rect.height(), 1))
+        size = QSize(max(1, math.ceil(rect.width() * scale)), max(1, math.ceil(rect.height() * scale)))
+        self.setCacheMode(QGraphicsItem.CacheMode.ItemCoordinateCache, size)
+
+    def boundingRect(self):
+        rect = super().boundingRect()
+        return rect if self.clip is None else rect.intersected(self.clip.adjusted(-1, -1, 1, 1))
+
+    def paint(self, painter, option, widget=None):
+        if self.clip is not None:
+            # Overlap neighbouring tiles by a device pixel so no seam shows between them.
+            pad = 1 / max(painter.worldTransform().m11(), 1e-6)
+            painter.setClipRect(self.clip.adjusted(-pad, -pad, pad, pad))
+        super().paint(painter, option, widget)
+
+class ActiveStrokeItem(QGraphicsItem):
+    """The stroke under the pen. Each new sample repaints only the rectangle around its segment."""
+    def __init__(self, width, color="#111111"):
+        super().__init__()
+        self.path = QPainterPath()
+        self.pen = QPen(QColor(color), width, Qt.PenStyle.SolidLine, Qt.PenCapStyle.RoundCap, Qt.PenJoinStyle.RoundJoin)
+        self.bounds = QRectF()
+        self.last = None
+        self.setZValue(10)
+
+    def add_point(self, point):
+        pad = self.pen.widthF()
+        if self.last is None:
+            self.path.moveTo(point)
+            self.path.lineTo(point)
+        else:
+            self.path.lineTo(point)
+        start = self.last or point
+        dirty = QRectF(start, point).normalized().adjusted(-pad, -pad, pad, pad)
+        if not self.bounds.contains(dirty):
+            self.prepareGeometryChange()
+            self.bounds = self.bounds.united(dirty) if not self.bounds.isNull() else dirty
+        self.last = point
+        self.update(dirty)
+
+    def boundingRect(self):
+        return self.bounds
+
+    def paint(self, painter, option, widget=None):
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(self.pen)
+        painter.drawPath(self.path)
+
+class PressureStrokeItem(QGraphicsItem):
+    """A pressure stroke being drawn: the capsules expanded so far, grown once per frame."""
+    def __init__(self, ascender=ASCENDER):
+        super().__init__()
+        self.ascender = ascender
+        self.path = QPainterPath()
+        self.path.setFillRule(Qt.FillRule.WindingFill)
+        self.bounds = QRectF()
+        self.setZValue(10)
+
+    def add_polygons(self, polygons):
+        if not polygons:
+            return
+        added = QPainterPath()
+        for polygon in polygons:
+            added.addPolygon(QPolygonF([QPointF(x, self.ascender - y) for x, y in polygon]))
+        dirty = added.boundingRect()
+        self.path.addPath(added)
+        if not self.bounds.contains(dirty):
+            self.prepareGeometryChange()
+            self.bounds = self.bounds.united(dirty) if not self.bounds.isNull() else dirty
+        self.update(dirty)
+
+    def boundingRect(self):
+        return self.bounds
+
+    def paint(self, painter, option, widget=None):
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor("#111111"))
+        painter.drawPath(self.path)
+
+class GlyphCanvas(QGraphicsView):
+    """
+    Infinite pan/zoom vector canvas for one glyph. Wheel zooms around the cursor,
+    middle-drag (or space + drag) pans, left-drag draws with the brush, cuts
+    the swept area out of the contours with the eraser or selects and moves
+    them, depending on `tool`. A tablet pen draws pressure strokes with the
+    brush: tabletEvent() only stores each sample in `capture`, and a frame
+    timer expands what arrived.
+    """
+    outline_changed = pyqtSignal()
+    zoom_changed = pyqtSignal(float)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.scene = QGraphicsScene(self)
+        self.scene.setSceneRect(-100_000, -100_000, 200_000, 200_000)
+        self.setScene(self.scene)
+
+        self.setRenderHint(QPainter.RenderHint.Antialiasing)
+        self.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)    # item pixmaps scaled mid-zoom
+        self.setCacheMode(QGraphicsView.CacheModeFlag.CacheBackground)
+        self.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.MinimalViewportUpdate)
+        self.setOptimizationFlags(QGraphicsView.OptimizationFlag.DontSavePainterState
+                                  | QGraphicsView.OptimizationFlag.DontAdjustForAntialiasing)
+        self.setTransformationAnchor(QGraphicsView.ViewportAnchor.AnchorUnderMouse)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setFrameShape(QFrame.Shape.NoFrame)
+        self.setStyleSheet("background-color: #181818; border: none;")
+
+        self.outline = GlyphOutline()
+        self.stack = None
+        self.units_per_em = UNITS_PER_EM
+        self.ascender = ASCENDER
+        self.descender = DESCENDER
+        self.zooming = False
+        self.groups = []
+        self.component_item = None
+        self.show_grid = False
+        self.reference = None
+        self.brush_size = BRUSH_SIZE
+        self.fitter = None
+        self.stroke_item = None
+        self.pan_from = None
+        self.space_down = False
+        self.tool = "brush"
+        self.index = SegmentIndex()
+        self.selection = []
+        self.selection_item = None
+        self.drag_from = None
+        self.band_from = None
+        self.band_item = None
+        self.erase_from = None
+        self.erased = []
+        self.eraser_item = None
+        self.capture = StrokeCapture()
+        self.capture_map = None
+        self.pressure_item = None
+        self.frame_timer = QTimer(self)
+        self.frame_timer.setInterval(FRAME_MS)
+        self.frame_timer.timeout.connect(self.on_frame)
+        self.zoom_timer = QTimer(self)
+        self.zoom_timer.setSingleShot(True)
+        self.zoom_timer.setInterval(ZOOM_SETTLE_MS)
+        self.zoom_timer.timeout.connect(self.end_zoom)
+
+    # -- Model --
+    def set_metrics(self, units_per_em, ascender, descender):
+        """The project's em square, in font units (see project_metrics()). Call before set_outline()."""
+        self.units_per_em = units_per_em
+        self.ascender = ascender
+        self.descender = descender
+        self.resetCachedContent()
+
+    def set_outline(self, outline, stack=None):
+        """Show `outline`; edits go through `stack` (a canvas.UndoStack) when one is given."""
+        if self.stack is not None:
+            self.stack.listeners.remove(self.on_command)
+        self.outline = outline
+        self.stack = stack
+        if stack is not None:
+            stack.listeners.append(self.on_command)
+        self.rebuild()
+
+    def rebuild(self):
+        for group in self.groups:
+            self.scene.removeItem(group)
+        self.groups = []
+        for contours in self.cluster(self.outline.contours):
+            self.add_group(contours)
+        self.index.build(self.outline.contours)
+        self.set_selection([])
+        self.resetCachedContent()
+
+    def add_group(self, contours):
+        if sum(len(c) for c in contours) <= TILE_NODES:
+            tiles = [None]
+        else:
+            bounds = QRectF()
+            for contour in contours:
+                bounds = bounds.united(scene_rect(contour.bounds(), self.ascender))
+            tiles = [QRectF(x * TILE_UNITS, y * TILE_UNITS, TILE_UNITS, TILE_UNITS)
+                     for y in range(int(bounds.top() // TILE_UNITS), int(bounds.bottom() // TILE_UNITS) + 1)
+                     for x in range(int(bounds.left() // TILE_UNITS), int(bounds.right() // TILE_UNITS) + 1)]
+        for clip in tiles:
+            item = ContourGroupItem(contours, clip, self.ascender)
+            if item.path().isEmpty():
+                continue
+            self.scene.addItem(item)
+            self.groups.append(item)
+
+    @staticmethod
+    def cluster(contours):
+        """
+        Split contours into groups that can be filled independently. Overlapping
+        contours of the same direction fill the same pixels whether drawn together
+        or apart, so only opposite-direction overlaps (counters) must share a group.
+        """
+        boxes = [c.bounds() for c in contours]
+        clockwise = [c.signed_area() < 0 for c in contours]
+        parent = list(range(len(contours)))
+
+        def root(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        # Sweep along x, keeping only boxes that still reach the current one.
+        order = sorted(range(len(contours)), key=lambda i: boxes[i][0])
+        active = []
+        for i in order:
+            x0, y0, x1, y1 = boxes[i]
+            active = [j for j in active if boxes[j][2] >= x0]
+            for j in active:
+                if clockwise[j] != clockwise[i] and boxes[j][1] <= y1 and boxes[j][3] >= y0:
+                    parent[root(j)] = root(i)
+            active.append(i)
+        groups = {}
+        for i in range(len(contours)):
+            groups.setdefault(root(i), []).append(contours[i])
+        return list(groups.values())
+
+    def push(self, command):
+        if self.stack is not None:
+            self.stack.push(command)    # applies it and calls on_command
+        else:
+            command.redo()
+            self.on_command(command)
+
+    def add_contours(self, contours):
+        if contours:
+            self.push(AddContours(self.outline, contours))
+
+    def on_command(self, command):
+        """A command ran (push, undo or redo). None means only the history changed."""
+        if command is None:
+            return
+        contours = command.contours()
+        if contours:
+            self.index.sync(self.outline.contours, contours)
+            self.refresh_contours(contours)
+            current = set(map(id, self.outline.contours))
+            self.set_selection([c for c in self.selection if id(c) in current])
+        else:
+            self.resetCachedContent()
+            self.viewport().update()
+        self.outline_changed.emit()
+
+    def refresh_contours(self, contours):
+        """Regroup just the items an edit touched; the rest keep their cached pixmaps."""
+        current = set(map(id, self.outline.contours))
+        changed = set(map(id, contours))
+        rect = QRectF()
+        for contour in contours:
+            if len(contour):
+                rect = rect.united(scene_rect(contour.bounds(), self.ascender))
+        touched = {}
+        for item in self.groups:
+            if id(item.contours) not in touched and (item.boundingRect().intersects(rect)
+                                                      or any(id(c) in changed for c in item.contours)):
+                touched[id(item.contours)] = item.contours
+        merged, seen = [], set()
+        for contour in [*contours, *(c for group in touched.values() for c in group)]:
+            if id(contour) in current and id(contour) not in seen:
+                seen.add(id(contour))
+                merged.append(contour)
+        for item in [g for g in self.groups if id(g.contours) in touched]:
+            self.scene.removeItem(item)
+            self.groups.remove(item)
+        for group in self.cluster(merged):
+            self.add_group(group)
+
+    def set_component_contours(self, contours):
+        """Show the glyph's components, flattened, as a locked layer under its own contours."""
+        if self.component_item is not None:
+            self.scene.removeItem(self.component_item)
+            self.component_item = None
+        if contours:
+            item = self.component_item = QGraphicsPathItem(contours_path(contours, self.ascender))
+            item.setPen(QPen(Qt.PenStyle.NoPen))
+            item.setBrush(QColor("#8a8a8a"))
+            item.setZValue(-1)
+            item.setAcceptedMouseButtons(Qt.MouseButton.NoButton)
+            item.setCacheMode(QGraphicsItem.CacheMode.DeviceCoordinateCache)
+            self.scene.addItem(item)
+
+    def set_reference(self, pixmap):
+        self.reference = pixmap
+        self.resetCachedContent()
+        self.viewport().update()
+
+    def set_grid_visible(self, visible):
+        self.show_grid = visible
+        self.resetCachedContent()
+        self.viewport().update()
+
+    # -- Tools --
+    def set_tool(self, tool):
+        """"brush", "eraser" or "select"."""
+        self.tool = tool
+        self.set_selection([])
+
+    def set_selection(self, contours):
+        self.selection = list(contours)
+        if self.selection_item is not None:
+            self.scene.removeItem(self.selection_item)
+            self.selection_item = None
+        if self.selection:
+            item = self.selection_item = QGraphicsPathItem(contours_path(self.selection, self.ascender))
+            item.setPen(QPen(QColor("#3d8bfd"), 0))
+            item.setBrush(QColor(61, 139, 253, 60))
+            item.setZValue(5)
+            item.setAcceptedMouseButtons(Qt.MouseButton.NoButton)
+            self.scene.addItem(item)
+
+    def font_point(self, position):
+        """Viewport position -> (x, y) in font units, y up."""
+        point = self.viewportTransform().inverted()[0].map(position)
+        return point.x(), self.ascender - point.y()
+
+    def pick_radius(self):
+        return PICK_RADIUS / self.zoom()
+
+    # -- View --
+    def zoom(self):
+        return self.transform().m11()
+
+    def set_zoom(self, factor):
+        factor = min(MAX_ZOOM, max(MIN_ZOOM, factor))
+        scale = factor / self.zoom()
+        if abs(scale - 1) > 1e-6:
+            self.begin_zoom()
+            self.scale(scale, scale)
+            self.zoom_changed.emit(factor)
+
+    def fit_em(self):
+        em = self.units_per_em
+        margin = em * 0.05
+        self.resetTransform()
+        self.fitInView(QRectF(-margin, -margin, em + 2 * margin, em + 2 * margin), Qt.AspectRatioMode.KeepAspectRatio)
+        self.zoom_changed.emit(self.zoom())
+
+    def begin_zoom(self):
+        """
+        A zoom step. Through a run of steps the contour pixmaps from before it
+        are scaled rather than re-rendered; end_zoom() renders them sharp again
+        once the wheel has been still for ZOOM_SETTLE_MS.
+        """
+        if not self.zooming:
+            self.zooming = True
+            for item in self.groups:
+                item.set_cache_scale(self.zoom())
+        self.zoom_timer.start()
+
+    def end_zoom(self):
+        self.zoom_timer.stop()
+        if self.zooming:
+            self.zooming = False
+            for item in self.groups:
+                item.set_cache_scale(None)
+
+    def pan_by(self, dx, dy):
+        self.horizontalScrollBar().setValue(self.horizontalScrollBar().value() + int(dx))
+        self.verticalScrollBar().setValue(self.verticalScrollBar().value() + int(dy))
+
+    def drawBackground(self, painter, rect):
+        # Cached by the view (CacheBackground): only redrawn on zoom or guide changes.
+        painter.fillRect(rect, QColor("#181818"))
+        em = QRectF(0, 0, self.units_per_em, self.units_per_em)
+        painter.fillRect(em, QColor("#ffffff"))
+        if self.reference is not None:
+            painter.drawPixmap(em, self.reference, QRectF(self.reference.rect()))
+
+        if self.show_grid and GRID_SPACING * self.zoom() >= 6:
+            painter.setPen(QPen(QColor("#ececec"), 0))
+            visible = rect.intersected(em)
+            x = GRID_SPACING * int(visible.left() // GRID_SPACING)
+            while x <= visible.right():
+                painter.drawLine(QPointF(x, visible.top()), QPointF(x, visible.bottom()))
+                x += GRID_SPACING
+            y = GRID_SPACING * int(visible.top() // GRID_SPACING)
+            while y <= visible.bottom():
+                painter.drawLine(QPointF(visible.left(), y), QPointF(visible.right(), y))
+                y += GRID_SPACING
+
+        left, right = rect.left(), rect.right()
+        guides = [
+            (0, QColor("#b0b0b0"), Qt.PenStyle.SolidLine),                               # ascender
+            (self.ascender - (self.ascender + self.descender) / 2, QColor("#c8c8c8"), Qt.PenStyle.DashLine),  # center
+            (self.ascender, QColor(255, 0, 0, 128), Qt.PenStyle.SolidLine),              # baseline
+            (self.ascender - self.descender, QColor("#b0b0b0"), Qt.PenStyle.SolidLine),  # descender
+        ]
+        for y, color, style in guides:
+            pen = QPen(color, 0, style)
+            painter.setPen(pen)
+            painter.drawLine(QPointF(left, y), QPointF(right, y))
+        painter.setPen(QPen(QColor("#9ab4d8"), 0, Qt.PenStyle.DashLine))
+        for x in (0, self.outline.advance):
+            painter.drawLine(QPointF(x, rect.top()), QPointF(x, rect.bottom()))
+
+    # -- Input --
+    def wheelEvent(self, event):
+        steps = event.angleDelta().y() / 120
+        if steps:
+            self.set_zoom(self.zoom() * 1.15 ** steps)
+        event.accept()
+
+    NUDGES = {Qt.Key.Key_Left: (-1, 0), Qt.Key.Key_Right: (1, 0), Qt.Key.Key_Up: (0, 1), Qt.Key.Key_Down: (0, -1)}
+
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key.Key_Space and not event.isAutoRepeat():
+            self.space_down = True
+            self.viewport().setCursor(Qt.CursorShape.OpenHandCursor)
+        elif event.key() in self.NUDGES and self.outline.contours:
+            # Arrow keys nudge the selection, or the whole drawing (Shift: 10 units); a run of nudges is one undo step.
+            step = 10 if event.modifiers() & Qt.KeyboardModifier.ShiftModifier else 1
+            dx, dy = self.NUDGES[event.key()]
+            self.push(MoveContours(self.selection or self.outline.contours, dx * step, dy * step, "Nudge"))
+            return
+        elif event.key() in (Qt.Key.Key_Delete, Qt.Key.Key_Backspace) and self.selection:
+            self.push(RemoveContours(self.outline, self.selection, "Delete"))
+            return
+        super().keyPressEvent(event)
+
+    def keyReleaseEvent(self, event):
+        if event.key() == Qt.Key.Key_Space and not event.isAutoRepeat():
+            self.space_down = False
+            self.viewport().unsetCursor()
+        super().keyReleaseEvent(event)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.MiddleButton or (self.space_down and event.button() == Qt.MouseButton.LeftButton):
+            self.pan_from = event.position()
+            self.viewport().setCursor(Qt.CursorShape.ClosedHandCursor)
+        elif event.button() == Qt.MouseButton.LeftButton and self.tool == "select":
+            self.start_select(event)
+        elif event.button() == Qt.MouseButton.LeftButton and self.tool == "eraser":
+            self.erase_from = self.font_point(event.position())
+            self.erase_to(event.position())
+        elif event.button() == Qt.MouseButton.LeftButton:
+            # One screen pixel of fitting error, whatever the zoom.
+            self.fitter = StrokeFitter(tolerance=max(0.1, 1 / self.zoom()))
+            self.stroke_item = ActiveStrokeItem(self.brush_size)
+            self.scene.addItem(self.stroke_item)
+            self.add_sample(event.position())
+        event.accept()
+
+    def mouseMoveEvent(self, event):
+        if self.pan_from is not None:
+            delta = event.position() - self.pan_from
+            self.pan_from = event.position()
+            self.pan_by(-delta.x(), -delta.y())
+        elif self.fitter is not None:
+            self.add_sample(event.position())
+        elif self.drag_from is not None:
+            x, y = self.font_point(event.position())
+            dx, dy = x - self.drag_from[0], y - self.drag_from[1]
+            if dx or dy:
+                self.drag_from = (x, y)
+                self.push(MoveContours(self.selection, dx, dy))
+        elif self.band_from is not None:
+            point = self.mapToScene(event.position().toPoint())
+            self.band_item.setRect(QRectF(self.band_from, point).normalized())
+        elif self.erase_from is not None:
+            self.erase_to(event.position())
+        event.accept()
+
+    def mouseReleaseEvent(self, event):
+        if self.pan_from is not None:
+            self.pan_from = None
+            if self.space_down:
+                self.viewport().setCursor(Qt.CursorShape.OpenHandCursor)
+            else:
+                self.viewport().unsetCursor()
+        elif self.fitter is not None:
+            self.finish_stroke()
+        elif self.drag_from is not None:
+            self.drag_from = None
+        elif self.band_from is not None:
+            self.finish_band(event.modifiers() & Qt.KeyboardModifier.ShiftModifier)
+        elif self.erase_from is not None:
+            self.finish_erase()
+        event.accept()
+
+    def tabletEvent(self, event):
+        """
+        Pen input for the brush. Runs per sample at up to 1000 Hz, so it only
+        maps the position and pushes the numbers into the capture ring; other
+        tools get the mouse events Qt synthesizes once this one is ignored.
+        """
+        kind = event.type()
+        if kind == QEvent.Type.TabletPress:
+            if self.tool != "brush" or self.space_down or event.button() != Qt.MouseButton.LeftButton:
+                event.ignore()
+                return
+            self.start_pressure_stroke()
+        elif not self.capture.active:
+            event.ignore()
+            return
+        position = event.position()
+        sx, tx, sy, ty = self.capture_map
+        self.capture.push(sx * position.x() + tx, self.ascender - (sy * position.y() + ty), event.pressure(),
+                          event.xTilt(), event.yTilt(), event.timestamp() / 1000)
+        if kind == QEvent.Type.TabletRelease:
+            self.finish_pressure_stroke()
+        event.accept()
+
+    def start_pressure_stroke(self):
+        # The view cannot move mid-stroke (panning needs the other hand), so the mapping is fixed for the stroke.
+        inverse = self.viewportTransform().inverted()[0]
+        self.capture_map = (inverse.m11(), inverse.dx(), inverse.m22(), inverse.dy())
+        self.capture.begin(self.brush_size, tolerance=max(0.1, 1 / self.zoom()))
+        self.pressure_item = PressureStrokeItem(self.ascender)
+        self.scene.addItem(self.pressure_item)
+        self.frame_timer.start()
+
+    def on_frame(self):
+        self.pressure_item.add_polygons(self.capture.frame())
+
+    def finish_pressure_stroke(self):
+        self.frame_timer.stop()
+        contours = self.capture.finish()
+        self.scene.removeItem(self.pressure_item)
+        self.pressure_item = None
+        self.add_contours(contours)
+
+    def start_select(self, event):
+        """Click picks a contour (Shift toggles it), dragging a picked one moves the selection, else a rubber band starts."""
+        x, y = self.font_point(event.position())
+        hit = self.index.contour_at(x, y, self.pick_radius())
+        shift = event.modifiers() & Qt.KeyboardModifier.ShiftModifier
+        if hit is not None and shift:
+            chosen = any(c is hit for c in self.selection)
+            self.set_selection([c for c in self.selection if c is not hit] if chosen else [*self.selection, hit])
+        elif hit is not None:
+            if not any(c is hit for c in self.selection):
+                self.set_selection([hit])
+            self.drag_from = (x, y)
+        else:
+            if not shift:
+                self.set_selection([])
+            self.band_from = self.mapToScene(event.position().toPoint())
+            self.band_item = QGraphicsRectItem(QRectF(self.band_from, self.band_from))
+            self.band_item.setPen(QPen(QColor("#3d8bfd"), 0, Qt.PenStyle.DashLine))
+            self.band_item.setBrush(QColor(61, 139, 253, 30))
+            self.band_item.setZValue(10)
+            self.scene.addItem(self.band_item)
+
+    def finish_band(self, add):
+        rect = self.band_item.rect()
+        self.scene.removeItem(self.band_item)
+        self.band_item = self.band_from = None
+        hits = self.index.in_rect(rect.left(), self.ascender - rect.bottom(), rect.right(), self.ascender - rect.top())
+        if add:
+            chosen = set(map(id, self.selection))
+            hits = self.selection + [c for c in hits if id(c) not in chosen]
+        # Keep drawing order so moves and deletes are reproducible.
+        order = {id(c): i for i, c in enumerate(self.outline.contours)}
+        self.set_selection(sorted(hits, key=lambda c: order[id(c)]))
+
+    def erase_to(self, position):
+        """Sweep the eraser from the last sample to `position`, painting over it and collecting the contours it touches."""
+        point = self.font_point(position)
+        if self.eraser_item is None:
+            self.eraser_item = ActiveStrokeItem(self.brush_size, "#ffffff")
+            self.scene.addItem(self.eraser_item)
+        self.eraser_item.add_point(self.mapToScene(position.toPoint()))
+        hits = self.index.near_path([self.erase_from, point], self.brush_size / 2)
+        self.erase_from = point
+        marked = set(map(id, self.erased))
+        self.erased += [c for c in hits if id(c) not in marked]
+
+    def finish_erase(self):
+        """Cut the swept area out of the touched contours as one undo step."""
+        self.erase_from = None
+        item, self.eraser_item = self.eraser_item, None
+        erased, self.erased = self.erased, []
+        if item is not None:
+            self.scene.removeItem(item)
+        if not erased:
+            return
+        # Counters fill together with the contours around them: cut whole fill groups so holes stay holes.
+        hit = set(map(id, erased))
+        subject, seen = [], set()
+        for group in self.groups:
+            if id(group.contours) not in seen and any(id(c) in hit for c in group.contours):
+                seen.add(id(group.contours))
+                subject += group.contours
+        tolerance = max(0.1, 1 / self.zoom())
+        sweep = self.stroke_outline(item.path, self.brush_size, tolerance, self.ascender)
+        self.push(ReplaceContours(self.outline, subject, boolean_contours(subject, sweep, DIFFERENCE, tolerance)))
+
+    def add_sample(self, position):
+        point = self.viewportTransform().inverted()[0].map(position)
+        self.fitter.add_point(point.x(), self.ascender - point.y())
+        self.stroke_item.add_point(point)
+
+    def finish_stroke(self):
+        centerline = self.fitter.finish()
+        self.fitter = None
+        self.scene.removeItem(self.stroke_item)
+        self.stroke_item = None
+        if not len(centerline):
+            return
+        tolerance = max(0.1, 1 / self.zoom())
+        self.add_contours(self.stroke_outline(contours_path([centerline], self.ascender), self.brush_size, tolerance,
+                                              self.ascender))
+
+    @staticmethod
+    def stroke_outline(path, width, tolerance, ascender=ASCENDER):
+        """The area a round pen of `width` covers along a scene-space path, as fitted closed contours."""
+        stroker = QPainterPathStroker()
+        stroker.setWidth(width)
+        stroker.setCapStyle(Qt.PenCapStyle.RoundCap)
+        stroker.setJoinStyle(Qt.PenJoinStyle.RoundJoin)
+        stroker.setCurveThreshold(tolerance)
+        # simplified() removes the self-overlaps but flattens to polygons; fit those back to cubics.
+        polygons = path_contours(stroker.createStroke(path).simplified(), ascender)
+        contours = [fit_polygon(p.points(), tolerance) for p in polygons if abs(p.signed_area()) > tolerance * tolerance]
+        # Outer contours run counter-clockwise (y up), like the rest of the glyph, so strokes add up.
+        if contours and max(contours, key=lambda c: abs(c.signed_area())).signed_area() < 0:
+            for contour in contours:
+                contour.reverse()
+        return contours
 
 class GlyphEditor(QWidget):
     def __init__(self):
         super().__init__()
+        self.project = None
+        self.codepoint = None
+        self.history = None
+        self.stack = None
+        self.fitted = False
+        self.tracer = TraceService(self)
+        self.trace_progress = None
+        self.trace_stack = None
         self.init_ui()
     def init_ui(self):
-        self.setStyleSheet("background-color: #1e1e1e; font-family: Segoe UI, sans-serif;")
+        self.setObjectName("screen")
         main_layout = QVBoxLayout()
         main_layout.setContentsMargins(0, 0, 0, 0)
         main_layout.setSpacing(0)
         top_bar = QFrame()
         top_bar.setFixedHeight(50)
-        top_bar.setStyleSheet("background-color: #252525; border-bottom: 1px solid #333333;")
+        top_bar.setObjectName("topBar")
         top_layout = QHBoxLayout(top_bar)
         top_layout.setContentsMargins(15, 0, 15, 0)
         self.btn_back = QPushButton("← Back")
@@ -901,46 +2717,250 @@ class GlyphEditor(QWidget):
         workspace.setSpacing(0)
         toolbar = QFrame()
         toolbar.setFixedWidth(50)
-        toolbar.setStyleSheet("background-color: #222222; border-right: 1px solid #333333;")
+        toolbar.setObjectName("sidePanel")
         tool_layout = QVBoxLayout(toolbar)
         tool_layout.setContentsMargins(5, 15, 5, 15)
         tool_layout.setSpacing(10)
-        tools = ["🖌️", "✒️", "🧽", "🔲", "📥"]
+        tools = ["🖌️", "✒️", "🧽", "🔲", "📥", "🧩"]
+        self.tool_buttons = {}
         for t in tools:
             btn = QPushButton(t)
             btn.setFixedSize(40, 40)
             btn.setCursor(Qt.CursorShape.PointingHandCursor)
-            btn.setStyleSheet("QPushButton { background-color: transparent; border: 1px solid transparent; border-radius: 4px; font-size: 20px; } QPushButton:hover { background-color: #333333; border: 1px solid #555555; }")
+            btn.setObjectName("toolButton")
             tool_layout.addWidget(btn)
+            self.tool_buttons[t] = btn
+        for t, tool, tip in (("🖌️", "brush", "Brush"), ("🧽", "eraser", "Eraser: cuts away what it sweeps over"),
+                             ("🔲", "select", "Select and move (Delete removes the selection)")):
+            btn = self.tool_buttons[t]
+            btn.setCheckable(True)
+            btn.setToolTip(tip)
+            btn.clicked.connect(lambda checked, tool=tool: self.set_tool(tool))
+        self.tool_buttons["🖌️"].setChecked(True)
+        self.tool_buttons["📥"].setToolTip("Import image to trace")
+        self.tool_buttons["📥"].clicked.connect(self.import_image)
+        self.tool_buttons["🧩"].setToolTip("Components")
+        self.tool_buttons["🧩"].clicked.connect(self.show_component_menu)
+        self.tracer.progress.connect(self.on_trace_progress)
+        self.tracer.finished.connect(self.on_trace_finished)
+        self.tracer.failed.connect(self.on_trace_failed)
         tool_layout.addStretch()
         workspace.addWidget(toolbar)
-        canvas_bg = QFrame()
-        canvas_bg.setStyleSheet("background-color: #181818;")
-        canvas_layout = QVBoxLayout(canvas_bg)
-        canvas_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.canvas = QFrame()
-        self.canvas.setFixedSize(500, 500)
-        self.canvas.setStyleSheet("background-color: white; border: 1px solid #444444;")
-        baseline = QFrame(self.canvas)
-        baseline.setGeometry(0, 350, 500, 1)
-        baseline.setStyleSheet("background-color: #ff0000; opacity: 0.5;")
-        canvas_layout.addWidget(self.canvas)
-        workspace.addWidget(canvas_bg)
+        self.canvas = GlyphCanvas()
+        self.canvas.zoom_changed.connect(self.on_zoom_changed)
+        workspace.addWidget(self.canvas)
         main_layout.addLayout(workspace)
         bottom_bar = QFrame()
         bottom_bar.setFixedHeight(40)
-        bottom_bar.setStyleSheet("background-color: #252525; border-top: 1px solid #333333;")
+        bottom_bar.setObjectName("bottomBar")
         bottom_layout = QHBoxLayout(bottom_bar)
         bottom_layout.setContentsMargins(15, 0, 15, 0)
-        zoom_lbl = QLabel("Zoom: 100%")
-        zoom_lbl.setStyleSheet("color: #888888; font-size: 12px;")
-        bottom_layout.addWidget(zoom_lbl)
+        self.zoom_lbl = QLabel("Zoom: 100%")
+        self.zoom_lbl.setStyleSheet("color: #888888; font-size: 12px;")
+        bottom_layout.addWidget(self.zoom_lbl)
+        btn_grid = QPushButton("Grid")
+        btn_grid.setCheckable(True)
+        btn_grid.setCursor(Qt.CursorShape.PointingHandCursor)
+        btn_grid.setStyleSheet("QPushButton { color: #888888; font-size: 12px; border: none; background: transparent; } QPushButton:checked { color: #f0f0f0; }")
+        btn_grid.toggled.connect(self.canvas.set_grid_visible)
+        bottom_layout.addSpacing(15)
+        bottom_layout.addWidget(btn_grid)
         bottom_layout.addStretch()
-        undo_redo = QLabel("⟲ Undo  |  Redo ⟳")
-        undo_redo.setStyleSheet("color: #888888; font-size: 12px;")
-        bottom_layout.addWidget(undo_redo)
+        self.btn_undo = QPushButton("⟲ Undo")
+        self.btn_redo = QPushButton("Redo ⟳")
+        for btn in (self.btn_undo, self.btn_redo):
+            btn.setCursor(Qt.CursorShape.PointingHandCursor)
+            btn.setStyleSheet("QPushButton { color: #cccccc; font-size: 12px; border: none; background: transparent; } QPushButton:disabled { color: #555555; }")
+        sep = QLabel("|")
+        sep.setStyleSheet("color: #888888; font-size: 12px;")
+        bottom_layout.addWidget(self.btn_undo)
+        bottom_layout.addWidget(sep)
+        bottom_layout.addWidget(self.btn_redo)
+        self.btn_undo.clicked.connect(self.undo)
+        self.btn_redo.clicked.connect(self.redo)
+        QShortcut(QKeySequence.StandardKey.Undo, self, self.undo)
+        QShortcut(QKeySequence.StandardKey.Redo, self, self.redo)
         main_layout.addWidget(bottom_bar)
         self.setLayout(main_layout)
+        self.update_undo_buttons()
+
+    TOOLS = {"brush": "🖌️", "eraser": "🧽", "select": "🔲"}
+
+    def set_tool(self, tool):
+        for name, t in self.TOOLS.items():
+            self.tool_buttons[t].setChecked(name == tool)
+        self.canvas.set_tool(tool)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self.fitted:
+            self.fitted = True
+            self.canvas.fit_em()
+
+    def open_glyph(self, project, cp, history=None):
+        """
+        Load one glyph for editing; project may be None for a scratch glyph.
+        A glyph reopened in the same session keeps its outline and undo stack.
+        """
+        if self.stack is not None:
+            self.stack.listeners.remove(self.on_history_changed)
+        self.project = project
+        self.codepoint = cp
+        self.history = history or UndoHistory()
+        self.stack = self.history.glyph(cp)
+        if self.stack.subject is None:
+            svg = project.glyph_svg(cp) if project is not None else None
+            self.stack.subject = GlyphOutline.from_svg(svg, project_metrics(project)[1]) if svg else GlyphOutline()
+        self.stack.listeners.append(self.on_history_changed)
+        self.lbl_info.setText(f"Glyph: {chr(cp)} (U+{cp:04X})")
+        self.canvas.set_metrics(*project_metrics(project))
+        self.canvas.set_outline(self.stack.subject, self.stack)
+        self.canvas.set_reference(None)
+        self.refresh_components()
+        self.update_undo_buttons()
+        self.fitted = False
+        if self.isVisible():
+            self.fitted = True
+            self.canvas.fit_em()
+
+    def save_glyph(self):
+        """
+        Journal the outline as glyphs/XXXX.svg (tiles and thumbnails follow the new
+        revision). The save is one step on the font-level undo stack.
+        """
+        if self.project is None or self.stack is None or self.stack.is_clean():
+            return
+        outline = self.canvas.outline
+        before = self.project.glyph_svg(self.codepoint)
+        after = None if outline.is_empty() else outline.to_svg(self.canvas.units_per_em, self.canvas.ascender).encode("utf-8")
+        if after != before:
+            self.history.font.push(ReplaceGlyph(self.project, self.codepoint, before, after))
+        self.stack.set_clean()
+
+    def undo(self):
+        if self.stack is not None:
+            self.stack.undo()
+
+    def redo(self):
+        if self.stack is not None:
+            self.stack.redo()
+
+    def on_history_changed(self, command):
+        self.update_undo_buttons()
+        if isinstance(command, SetComponents):
+            self.refresh_components()
+
+    def update_undo_buttons(self):
+        stack = self.stack
+        self.btn_undo.setEnabled(stack is not None and stack.can_undo())
+        self.btn_redo.setEnabled(stack is not None and stack.can_redo())
+        self.btn_undo.setToolTip(f"Undo {stack.undo_text()}" if stack is not None and stack.can_undo() else "")
+        self.btn_redo.setToolTip(f"Redo {stack.redo_text()}" if stack is not None and stack.can_redo() else "")
+
+    def on_zoom_changed(self, zoom):
+        # 100% is the em square at 500px, the size the editor opened at before zoom existed.
+        self.zoom_lbl.setText(f"Zoom: {zoom * self.canvas.units_per_em / 500:.0%}")
+
+    def show_reference(self, project, cp):
+        tile = glyph_tiles().tile(project, cp, 500, "#d0d0d0")
+        self.canvas.set_reference(tile)
+
+    def component_outline(self, cp):
+        """A glyph as the editor would show it: its open, unsaved outline if it has one, else the saved drawing."""
+        stack = self.history.glyphs.get(cp) if self.history is not None else None
+        if stack is not None and stack.subject is not None:
+            return stack.subject
+        svg = self.project.glyph_svg(cp) if self.project is not None else None
+        return GlyphOutline.from_svg(svg, self.canvas.ascender) if svg else None
+
+    def refresh_components(self):
+        outline = self.canvas.outline
+        if not outline.components:
+            self.canvas.set_component_contours([])
+            return
+        flat = GlyphOutline(components=outline.components).flattened(self.component_outline, (self.codepoint,))
+        self.canvas.set_component_contours(flat.contours)
+
+    def show_component_menu(self):
+        if self.stack is None or self.project is None:
+            return
+        menu = QMenu(self)
+        menu.addAction("Add Component…", self.add_component)
+        components = self.canvas.outline.components
+        if components:
+            menu.addSeparator()
+        for i, component in enumerate(components):
+            cp = component.codepoint
+            menu.addAction(f"Remove {chr(cp)} (U+{cp:04X})", lambda i=i: self.remove_component(i))
+        button = self.tool_buttons["🧩"]
+        menu.exec(button.mapToGlobal(QPoint(button.width(), 0)))
+
+    def add_component(self):
+        """Place another glyph's drawing into this one; it stays linked, so later edits to it show up here."""
+        text, ok = QInputDialog.getText(self, "Add Component", "Glyph to use (character or U+XXXX):")
+        text = text.strip()
+        if not ok or not text:
+            return
+        code = text[2:] if text[:2].upper() in ("U+", "0X") else None
+        try:
+            cp = int(code, 16) if code else (ord(text) if len(text) == 1 else None)
+        except ValueError:
+            cp = None
+        if cp is None or not self.project.has_glyph(cp):
+            QMessageBox.information(self, "Add Component", f"“{text}” is not a drawn glyph of this font.")
+            return
+        if component_graph(self.project).would_cycle(self.codepoint, cp):
+            QMessageBox.information(self, "Add Component", f"{chr(cp)} already contains this glyph.")
+            return
+        components = [*self.canvas.outline.components, Component(cp)]
+        self.canvas.push(SetComponents(self.canvas.outline, components, f"Add component U+{cp:04X}"))
+
+    def remove_component(self, i):
+        components = list(self.canvas.outline.components)
+        cp = components.pop(i).codepoint
+        self.canvas.push(SetComponents(self.canvas.outline, components, f"Remove component U+{cp:04X}"))
+
+    def import_image(self):
+        """Pick a scan or drawing and trace it into the glyph in the background, with a cancellable progress dialog."""
+        if self.stack is None or self.tracer.busy():
+            return
+        path, _ = QFileDialog.getOpenFileName(self, "Import Image", "", IMAGE_FILTER)
+        if not path:
+            return
+        self.trace_stack = self.stack
+        self.trace_progress = QProgressDialog(f"Tracing {os.path.basename(path)}…", "Cancel", 0, 0, self)
+        self.trace_progress.setWindowTitle("Import Image")
+        self.trace_progress.setWindowModality(Qt.WindowModality.WindowModal)
+        self.trace_progress.setMinimumDuration(300)
+        self.trace_progress.canceled.connect(self.tracer.cancel)
+        self.tracer.trace(path, self.canvas.units_per_em, self.canvas.ascender)
+
+    def on_trace_progress(self, done, total):
+        if self.trace_progress is not None:
+            self.trace_progress.setMaximum(total)
+            self.trace_progress.setValue(done)
+
+    def close_trace_progress(self):
+        if self.trace_progress is not None:
+            self.trace_progress.canceled.disconnect()
+            self.trace_progress.reset()
+            self.trace_progress.deleteLater()
+            self.trace_progress = None
+
+    def on_trace_finished(self, path, contours):
+        self.close_trace_progress()
+        # One undo step, and only into the glyph the import was started from.
+        if contours and self.stack is not None and self.stack is self.trace_stack:
+            self.canvas.push(AddContours(self.canvas.outline, contours, "Import image"))
+        elif not contours:
+            QMessageBox.information(self, "Import Image", f"No shapes found in {os.path.basename(path)}.")
+        self.trace_stack = None
+
+    def on_trace_failed(self, path, error):
+        self.close_trace_progress()
+        self.trace_stack = None
+        if error:   # empty when the user cancelled
+            QMessageBox.warning(self, "Import Image", f"Could not import {os.path.basename(path)}:\n{error}")
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)